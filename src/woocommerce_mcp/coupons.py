@@ -2,12 +2,228 @@
 מודול לניהול קופונים ב-WooCommerce.
 """
 
-from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import secrets
+from typing import Any, Callable, Dict, List, Optional, Set
 
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .utils import (
+    BATCH_LIMIT,
+    MAX_REPORTED_ERRORS,
+    WordPressError,
+    chunked,
+    fetch_all,
+    gather_limited,
+    get_data_dir,
+    handle_response_error,
+    load_checkpoint,
+    save_checkpoint,
+    submit_batch,
+)
+from .profiles import resolve_store
+
+# אלפבית ברירת המחדל לקודים: בלי תווים שקל להתבלבל ביניהם (0/O, 1/I/L)
+COUPON_CODE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+
+# החלק המרבי של מרחב הקודים האפשריים שמותר לתפוס, כדי שההגרלה לא תיתקע בהתנגשויות
+MAX_CODE_SPACE_USAGE = 0.01
+
+
+async def fetch_coupon_codes(client: httpx.AsyncClient, concurrency: int = 4) -> Set[str]:
+    """מחזיר את כל קודי הקופונים הקיימים בחנות (באותיות קטנות, כפי ש-WooCommerce משווה אותם)."""
+    coupons = await fetch_all(client, "/coupons", {"_fields": "code"}, concurrency=concurrency)
+    return {coupon["code"].lower() for coupon in coupons if coupon.get("code")}
+
+
+def generate_coupon_codes(
+    count: int,
+    existing: Set[str],
+    prefix: str = "",
+    length: int = 10,
+    alphabet: str = COUPON_CODE_ALPHABET,
+) -> List[str]:
+    """
+    מגריל קודי קופון ייחודיים שאינם מתנגשים זה בזה או בקודים קיימים.
+
+    Args:
+        count: מספר הקודים.
+        existing: קודים קיימים (באותיות קטנות); הקודים החדשים נוספים אליו.
+        prefix: קידומת לכל קוד.
+        length: מספר התווים האקראיים בכל קוד.
+        alphabet: התווים שמהם מוגרלים הקודים.
+
+    Returns:
+        List[str]: הקודים החדשים.
+
+    Raises:
+        WordPressError: אם מרחב הקודים קטן מדי למספר הקודים המבוקש.
+    """
+    alphabet = "".join(dict.fromkeys(alphabet))
+    if count < 1 or length < 1 or len(alphabet) < 2:
+        raise WordPressError("count and length must be positive and alphabet must have at least 2 characters")
+    # WooCommerce משווה קודים ללא תלות באותיות, ולכן נספרים רק תווים שונים באותיות קטנות
+    space = len(set(alphabet.lower())) ** length
+    if count > space * MAX_CODE_SPACE_USAGE:
+        raise WordPressError(f"Code space too small for {count} codes: increase length or alphabet")
+
+    codes: List[str] = []
+    while len(codes) < count:
+        code = prefix + "".join(secrets.choice(alphabet) for _ in range(length))
+        if code.lower() not in existing:
+            existing.add(code.lower())
+            codes.append(code)
+    return codes
+
+
+async def bulk_generate_coupons(
+    client: httpx.AsyncClient,
+    count: int,
+    coupon_data: Optional[Dict[str, Any]] = None,
+    prefix: str = "",
+    length: int = 10,
+    alphabet: str = COUPON_CODE_ALPHABET,
+    name: Optional[str] = None,
+    batch_size: int = BATCH_LIMIT,
+    concurrency: int = 4,
+    restart: bool = False,
+    dry_run: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    יוצר כמות גדולה של קופונים עם קודים ייחודיים דרך נקודת הקצה coupons/batch.
+
+    הקודים מוגרלים מקומית מול כל הקודים הקיימים בחנות, ונשמרים לקובץ לפני
+    השליחה. כל אצווה שהסתיימה נרשמת בנקודת ביקורת, כך שהרצה חוזרת עם אותם
+    פרמטרים ממשיכה מהמקום שבו נעצרה עם אותם קודים; קודים מאצוות שלא הושלמו
+    וכבר קיימים בחנות נספרים כנוצרו ולא נשלחים שוב. קודים שנכשלו בתוך אצווה
+    שהסתיימה נשמרים בנקודת הביקורת ונשלחים שוב (רק הם) בהרצה הבאה.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        count: מספר הקופונים.
+        coupon_data: שדות משותפים לכל הקופונים (discount_type, amount וכו').
+            ברירת המחדל היא קופון לשימוש יחיד (usage_limit=1).
+        prefix: קידומת לכל קוד.
+        length: מספר התווים האקראיים בכל קוד.
+        alphabet: התווים שמהם מוגרלים הקודים.
+        name: שם למבצע, לזיהוי נקודת הביקורת (ברירת מחדל: לפי הפרמטרים).
+        batch_size: מספר קופונים בכל בקשת batch (עד 100).
+        concurrency: מספר בקשות batch מקבילות.
+        restart: התעלמות מנקודת ביקורת קיימת והגרלת קודים חדשים.
+        dry_run: הגרלת הקודים בלבד, ללא יצירת קופונים.
+        progress: פונקציה שתיקרא אחרי כל אצווה עם מצב ההתקדמות (אופציונלי).
+
+    Returns:
+        Dict[str, Any]: סיכום: נוצרו, נכשלו, אצוות שלא הושלמו, קובץ הקודים ושגיאות.
+    """
+    coupon_data = {"usage_limit": 1, **(coupon_data or {})}
+    coupon_data.pop("code", None)
+    batch_size = max(1, min(batch_size, BATCH_LIMIT))
+    identity = {
+        "site_url": str(client.base_url),
+        "count": count,
+        "coupon_data": coupon_data,
+        "prefix": prefix,
+        "length": length,
+        "alphabet": alphabet,
+        "batch_size": batch_size,
+    }
+    key = name or json.dumps(identity, sort_keys=True)
+    digest = hashlib.sha1(f"{identity['site_url']}|{key}".encode("utf-8")).hexdigest()[:16]
+    checkpoint_path = os.path.join(get_data_dir("checkpoints"), f"coupons-{digest}.json")
+    codes_path = os.path.join(get_data_dir("checkpoints"), f"coupons-{digest}.txt")
+
+    state = None if restart or dry_run else load_checkpoint(checkpoint_path, identity)
+    existing = await fetch_coupon_codes(client, concurrency)
+    if state is None:
+        codes = generate_coupon_codes(count, set(existing), prefix, length, alphabet)
+        if dry_run:
+            return {"dry_run": True, "count": len(codes), "existing": len(existing), "sample": codes[:20]}
+        with open(codes_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(codes) + "\n")
+        state = {
+            "identity": identity, "completed_chunks": [], "failed_codes": {}, "created": 0, "failed": 0,
+            "completed": False,
+        }
+        save_checkpoint(checkpoint_path, state)
+    else:
+        with open(codes_path, "r", encoding="utf-8") as f:
+            codes = f.read().split()
+
+    summary: Dict[str, Any] = {
+        "count": count,
+        "codes_file": codes_path,
+        "checkpoint": checkpoint_path,
+        "skipped_chunks": 0,
+        "pending_chunks": 0,
+        "retried_codes": 0,
+        "errors": [],
+    }
+
+    def report(error: Dict[str, Any]) -> None:
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append(error)
+
+    completed = set(state["completed_chunks"])
+    # קודים שנכשלו לפי אצווה (המפתח הוא מספר האצווה כמחרוזת, כמו ב-JSON)
+    failed_codes: Dict[str, List[str]] = state.setdefault("failed_codes", {})
+
+    async def send(index: int, chunk: List[str], retry: bool = False) -> None:
+        # קודים שכבר קיימים נוצרו בהרצה קודמת שנקטעה באמצע האצווה
+        pending = [code for code in chunk if code.lower() not in existing]
+        try:
+            result: Dict[str, Any] = {}
+            if pending:
+                creates = [{**coupon_data, "code": code} for code in pending]
+                result = await submit_batch(client, "/coupons", {"create": creates})
+        except (WordPressError, httpx.HTTPError) as e:
+            # האצווה לא סומנה כהושלמה ותישלח שוב בהרצה הבאה
+            summary["pending_chunks"] += 1
+            report({"codes": [chunk[0], chunk[-1]], "code": getattr(e, "code", None), "message": str(e)})
+            return
+
+        # בשליחה חוזרת הקודים כבר נספרו ככושלים, והם נספרים מחדש לפי התוצאה
+        if retry:
+            state["failed"] -= len(chunk)
+        state["created"] += len(chunk) - len(pending)
+        failed = []
+        for code, item in zip(pending, result.get("create", [])):
+            error = item.get("error") if isinstance(item, dict) else None
+            if error:
+                state["failed"] += 1
+                failed.append(code)
+                report({"coupon": code, "code": error.get("code"), "message": error.get("message")})
+            else:
+                state["created"] += 1
+        if failed:
+            failed_codes[str(index)] = failed
+        else:
+            failed_codes.pop(str(index), None)
+        completed.add(index)
+        state["completed_chunks"] = sorted(completed)
+        save_checkpoint(checkpoint_path, state)
+        if progress is not None:
+            progress({"created": state["created"], "failed": state["failed"], "chunks": len(completed)})
+
+    sends = []
+    for index, chunk in enumerate(chunked(codes, batch_size)):
+        if index not in completed:
+            sends.append(send(index, chunk))
+        elif failed_codes.get(str(index)):
+            summary["retried_codes"] += len(failed_codes[str(index)])
+            sends.append(send(index, failed_codes[str(index)], retry=True))
+        else:
+            summary["skipped_chunks"] += 1
+    await gather_limited(sends, concurrency)
+
+    state["completed"] = summary["pending_chunks"] == 0 and not failed_codes
+    save_checkpoint(checkpoint_path, state)
+    summary.update(created=state["created"], failed=state["failed"], completed=state["completed"])
+    return summary
 
 
 def register_coupon_tools(mcp: FastMCP) -> None:
@@ -26,6 +242,7 @@ def register_coupon_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת קופונים מ-WooCommerce.
@@ -37,19 +254,12 @@ def register_coupon_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת הקופונים.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -58,7 +268,7 @@ def register_coupon_tools(mcp: FastMCP) -> None:
             **filters
         }
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(
                 "/coupons",
                 params=params
@@ -73,6 +283,7 @@ def register_coupon_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר קופון בודד לפי המזהה שלו.
@@ -82,21 +293,14 @@ def register_coupon_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הקופון.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/coupons/{coupon_id}")
             
             handle_response_error(response, f"Failed to get coupon {coupon_id}")
@@ -108,6 +312,7 @@ def register_coupon_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר קופון חדש ב-WooCommerce.
@@ -117,6 +322,7 @@ def register_coupon_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הקופון שנוצר.
@@ -131,21 +337,13 @@ def register_coupon_tools(mcp: FastMCP) -> None:
             ...     "minimum_amount": "100.00"
             ... }
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
         # ודא שיש קוד קופון
         if "code" not in coupon_data:
             raise ValueError("Coupon code is required")
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 "/coupons",
                 json=coupon_data
@@ -161,6 +359,7 @@ def register_coupon_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מעדכן קופון קיים ב-WooCommerce.
@@ -171,21 +370,14 @@ def register_coupon_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הקופון המעודכן.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.put(
                 f"/coupons/{coupon_id}",
                 json=coupon_data
@@ -201,6 +393,7 @@ def register_coupon_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק קופון מ-WooCommerce.
@@ -211,25 +404,65 @@ def register_coupon_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/coupons/{coupon_id}",
                 params={"force": force}
             )
             
             handle_response_error(response, f"Failed to delete coupon {coupon_id}")
-            return response.json() 
\ No newline at end of file
+            return response.json() 
+
+    @mcp.tool()
+    async def generate_coupons(
+        count: int,
+        coupon_data: Optional[Dict[str, Any]] = None,
+        prefix: str = "",
+        length: int = 10,
+        alphabet: str = COUPON_CODE_ALPHABET,
+        name: Optional[str] = None,
+        batch_size: int = BATCH_LIMIT,
+        concurrency: int = 4,
+        restart: bool = False,
+        dry_run: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מגריל ויוצר אלפי קופונים עם קודים ייחודיים בבקשות batch מקבילות, עם המשכיות מנקודת ביקורת.
+
+        Args:
+            count: מספר הקופונים.
+            coupon_data: שדות משותפים לכל הקופונים (ברירת מחדל: usage_limit=1).
+            prefix: קידומת לכל קוד.
+            length: מספר התווים האקראיים בכל קוד.
+            alphabet: התווים שמהם מוגרלים הקודים.
+            name: שם למבצע, לזיהוי נקודת הביקורת בהרצה חוזרת.
+            batch_size: מספר קופונים בכל בקשה (עד 100).
+            concurrency: מספר בקשות מקבילות.
+            restart: הגרלת קודים חדשים גם אם קיימת נקודת ביקורת.
+            dry_run: הגרלת קודים לדוגמה בלבד, ללא יצירה.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום היצירה וקובץ הקודים.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await bulk_generate_coupons(
+                client, count, coupon_data, prefix, length, alphabet, name,
+                batch_size, concurrency, restart, dry_run,
+            )
@@ -0,0 +1,336 @@
+"""
+מודול לאינדקס לקוחות לפי אימייל וטלפון, כולל לקוחות אורח מההזמנות.
+
+לכל חנות נשמר בזיכרון אינדקס שנבנה מרשימת הלקוחות ומפרטי החיוב של הזמנות
+אורח. ההזמנות מתעדכנות בהדרגה (modified_after), ורשימת הלקוחות נמשכת מחדש
+בכל רענון כי ה-API לא מאפשר לסנן לקוחות לפי תאריך שינוי. זיהוי כפילויות נעשה
+לפי מפתחות מנורמלים (hash) ולא בהשוואה של כל זוג רשומות.
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import fetch_all, iter_pages
+from .profiles import StoreProfile, resolve_store
+
+# מפתח האינדקס במטמונים של החנות
+CUSTOMER_INDEX_CACHE = "customer_index"
+
+# גיל מרבי (בשניות) של האינדקס לפני רענון אוטומטי
+CUSTOMER_INDEX_TTL = 300
+
+CUSTOMER_INDEX_FIELDS = "id,email,first_name,last_name,billing"
+GUEST_ORDER_FIELDS = "id,customer_id,billing,date_created_gmt,date_modified_gmt"
+
+# מספר הספרות האחרונות שמשוות בין טלפונים (מתעלם מקידומת מדינה או 0)
+PHONE_KEY_DIGITS = 9
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def email_key(email: Optional[str], canonical: bool = False) -> Optional[str]:
+    """
+    מנרמל אימייל להשוואה (אותיות קטנות, בלי רווחים).
+
+    במצב canonical מוסר גם תג "+" מהחלק המקומי, ובכתובות Gmail גם הנקודות,
+    כדי לזהות כפילויות כמו dana.levi+shop@gmail.com ו-danalevi@gmail.com.
+    """
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return None
+    if canonical:
+        local, domain = email.rsplit("@", 1)
+        local = local.split("+", 1)[0]
+        if domain in ("gmail.com", "googlemail.com"):
+            local, domain = local.replace(".", ""), "gmail.com"
+        email = f"{local}@{domain}"
+    return email
+
+
+def phone_key(phone: Optional[str]) -> Optional[str]:
+    """מנרמל טלפון להשוואה: רק ספרות, PHONE_KEY_DIGITS האחרונות."""
+    digits = _NON_DIGITS.sub("", phone or "")
+    if len(digits) < 7:
+        return None
+    return digits[-PHONE_KEY_DIGITS:]
+
+
+class CustomerIndex:
+    """רשומות לקוחות ואורחים, עם מיפוי מאימייל וטלפון מנורמלים לרשומות."""
+
+    def __init__(self):
+        self.customers: Dict[int, Dict[str, Any]] = {}
+        self.guest_orders: Dict[int, Dict[str, Any]] = {}
+        self.last_modified: Optional[str] = None
+        self.refreshed_at = 0.0
+        self.dirty = False
+        self._records: Optional[Dict[str, Dict[str, Any]]] = None
+        self._by_email: Dict[str, Set[str]] = {}
+        self._by_phone: Dict[str, Set[str]] = {}
+
+    def set_customers(self, customers: List[Dict[str, Any]]) -> None:
+        self.customers = {customer["id"]: customer for customer in customers}
+        self._records = None
+
+    def set_orders(self, orders: List[Dict[str, Any]]) -> None:
+        """מעדכן הזמנות; רק הזמנות אורח (בלי customer_id) נשמרות."""
+        for order in orders:
+            billing = order.get("billing") or {}
+            if order.get("customer_id") or not (billing.get("email") or billing.get("phone")):
+                self.guest_orders.pop(order["id"], None)
+                continue
+            self.guest_orders[order["id"]] = {
+                "email": billing.get("email") or "",
+                "phone": billing.get("phone") or "",
+                "name": " ".join(filter(None, [billing.get("first_name"), billing.get("last_name")])),
+                "date": order.get("date_created_gmt"),
+            }
+        self._records = None
+
+    @property
+    def records(self) -> Dict[str, Dict[str, Any]]:
+        """הרשומות לפי מפתח (customer:<id> או guest:<email/phone>), נבנות מחדש אחרי שינוי."""
+        if self._records is None:
+            self._build()
+        return self._records
+
+    def _build(self) -> None:
+        records: Dict[str, Dict[str, Any]] = {}
+        for customer in self.customers.values():
+            billing = customer.get("billing") or {}
+            records[f"customer:{customer['id']}"] = {
+                "type": "customer",
+                "customer_id": customer["id"],
+                "name": " ".join(filter(None, [customer.get("first_name"), customer.get("last_name")])),
+                "emails": sorted({e.strip().lower() for e in (customer.get("email"), billing.get("email")) if e}),
+                "phones": [billing["phone"]] if billing.get("phone") else [],
+            }
+        for order_id, guest in sorted(self.guest_orders.items()):
+            identity = email_key(guest["email"]) or phone_key(guest["phone"])
+            if identity is None:
+                continue
+            record = records.setdefault(f"guest:{identity}", {
+                "type": "guest", "customer_id": None, "name": guest["name"],
+                "emails": [], "phones": [], "orders": 0, "last_order_date": None,
+            })
+            if guest["email"] and guest["email"].strip().lower() not in record["emails"]:
+                record["emails"].append(guest["email"].strip().lower())
+            if guest["phone"] and guest["phone"] not in record["phones"]:
+                record["phones"].append(guest["phone"])
+            record["orders"] += 1
+            record["last_order_date"] = max(filter(None, [record["last_order_date"], guest["date"]]), default=None)
+
+        self._by_email, self._by_phone = {}, {}
+        for key, record in records.items():
+            record["key"] = key
+            for email in record["emails"]:
+                for variant in {email_key(email), email_key(email, canonical=True)} - {None}:
+                    self._by_email.setdefault(variant, set()).add(key)
+            for phone in record["phones"]:
+                if phone_key(phone):
+                    self._by_phone.setdefault(phone_key(phone), set()).add(key)
+        self._records = records
+
+    def find(self, email: Optional[str] = None, phone: Optional[str] = None) -> List[Dict[str, Any]]:
+        """מחזיר את הרשומות שמתאימות לאימייל (כולל צורה קנונית) או לטלפון."""
+        records = self.records
+        keys: Set[str] = set()
+        if email:
+            for variant in {email_key(email), email_key(email, canonical=True)} - {None}:
+                keys |= self._by_email.get(variant, set())
+        if phone and phone_key(phone):
+            keys |= self._by_phone.get(phone_key(phone), set())
+        return [records[key] for key in sorted(keys)]
+
+    def duplicates(self, include_guests: bool = True) -> List[Dict[str, Any]]:
+        """
+        מחזיר קבוצות של רשומות שחולקות אימייל קנוני או טלפון.
+
+        כל מפתח מנורמל הוא דלי (hash) של רשומות; דליים עם יותר מרשומה אחת
+        מאוחדים (union-find) לקבוצות, כך שהזמן ליניארי במספר הרשומות.
+        """
+        records = self.records
+        parent: Dict[str, str] = {}
+
+        def find(key: str) -> str:
+            while parent.setdefault(key, key) != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        reasons: Dict[Tuple[str, str], Set[str]] = {}
+        buckets: Dict[Tuple[str, str], Set[str]] = {}
+        for key, record in records.items():
+            if not include_guests and record["type"] == "guest":
+                continue
+            # ערכים שאינם מתנרמלים (אימייל בלי "@", טלפון קצר) אינם מפתח, כדי לא לאחד רשומות זרות
+            for email in record["emails"]:
+                if email_key(email, canonical=True):
+                    buckets.setdefault(("email", email_key(email, canonical=True)), set()).add(key)
+            for phone in record["phones"]:
+                if phone_key(phone):
+                    buckets.setdefault(("phone", phone_key(phone)), set()).add(key)
+
+        for (kind, value), keys in buckets.items():
+            if len(keys) < 2:
+                continue
+            first, *rest = sorted(keys)
+            for key in rest:
+                parent[find(key)] = find(first)
+            reasons.setdefault((kind, value), set()).update(keys)
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        for (kind, value), keys in sorted(reasons.items()):
+            root = find(next(iter(keys)))
+            group = groups.setdefault(root, {"keys": set(), "matched_on": []})
+            group["keys"] |= keys
+            group["matched_on"].append({kind: value})
+        return [
+            {"records": [records[key] for key in sorted(group["keys"])], "matched_on": group["matched_on"]}
+            for _, group in sorted(groups.items())
+        ]
+
+    async def refresh(self, client: httpx.AsyncClient, full: bool = False, concurrency: int = 4) -> Dict[str, Any]:
+        """
+        מעדכן את האינדקס: כל הלקוחות, והזמנות שהשתנו (או כולן ברענון מלא).
+
+        Returns:
+            Dict[str, Any]: סוג הרענון ומספר הלקוחות, ההזמנות והרשומות.
+        """
+        since = None if full else self.last_modified
+        self.set_customers(await fetch_all(
+            client, "/customers", {"_fields": CUSTOMER_INDEX_FIELDS, "role": "all"}, concurrency=concurrency
+        ))
+
+        params: Dict[str, Any] = {"_fields": GUEST_ORDER_FIELDS, "status": "any"}
+        if since:
+            params.update({"modified_after": since, "dates_are_gmt": "true"})
+        else:
+            self.guest_orders = {}
+        orders = 0
+        latest = since or ""
+        async for response in iter_pages(client, "/orders", params):
+            page = response.json()
+            self.set_orders(page)
+            orders += len(page)
+            latest = max([latest] + [order.get("date_modified_gmt") or "" for order in page])
+
+        self.last_modified = latest or None
+        self.refreshed_at = time.monotonic()
+        self.dirty = False
+        return {
+            "mode": "incremental" if since else "full",
+            "customers": len(self.customers),
+            "orders": orders,
+            "records": len(self.records),
+        }
+
+
+def mark_customers_dirty(store: StoreProfile) -> None:
+    """מסמן שהלקוחות השתנו דרך הכלים של השרת, כך שהשימוש הבא ירענן את האינדקס."""
+    index = store.caches.get(CUSTOMER_INDEX_CACHE)
+    if index is not None:
+        index.dirty = True
+
+
+async def get_customer_index(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    refresh: bool = False,
+) -> CustomerIndex:
+    """מחזיר את אינדקס הלקוחות של החנות, ובונה או מעדכן אותו לפי הצורך."""
+    index = store.caches.get(CUSTOMER_INDEX_CACHE)
+    if index is None:
+        index = store.caches[CUSTOMER_INDEX_CACHE] = CustomerIndex()
+    if refresh or not index.refreshed_at:
+        await index.refresh(client, full=True)
+    elif index.dirty or time.monotonic() - index.refreshed_at > CUSTOMER_INDEX_TTL:
+        await index.refresh(client)
+    return index
+
+
+def register_customer_index_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לחיפוש לקוחות וזיהוי כפילויות.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def find_customers(
+        emails: Optional[List[str]] = None,
+        phones: Optional[List[str]] = None,
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מאתר לקוחות רשומים ולקוחות אורח (מההזמנות) לפי אימיילים וטלפונים רבים בקריאה אחת.
+
+        אימיילים מושווים ללא תלות באותיות וגם בצורה קנונית (בלי תג "+" ובלי נקודות
+        ב-Gmail); טלפונים מושווים לפי הספרות האחרונות.
+
+        Args:
+            emails: אימיילים לחיפוש.
+            phones: טלפונים לחיפוש.
+            refresh: בנייה מחדש מלאה של האינדקס לפני החיפוש.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: emails ו-phones (ערך -> רשומות תואמות) וערכים שלא נמצאו.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            index = await get_customer_index(store, client, refresh)
+
+        result: Dict[str, Any] = {"emails": {}, "phones": {}, "missing": []}
+        for kind, values in (("emails", emails or []), ("phones", phones or [])):
+            for value in values:
+                matches = index.find(email=value) if kind == "emails" else index.find(phone=value)
+                if matches:
+                    result[kind][value] = matches
+                else:
+                    result["missing"].append(value)
+        return result
+
+    @mcp.tool()
+    async def find_duplicate_customers(
+        include_guests: bool = True,
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        דוח כפילויות לקוחות: קבוצות של לקוחות (ואורחים) שחולקים אימייל קנוני או טלפון.
+
+        Args:
+            include_guests: האם לכלול לקוחות אורח מההזמנות.
+            refresh: בנייה מחדש מלאה של האינדקס לפני הדוח.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: מספר הרשומות, מספר הקבוצות והקבוצות עם סיבת ההתאמה.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            index = await get_customer_index(store, client, refresh)
+
+        groups = index.duplicates(include_guests)
+        return {"records": len(index.records), "groups_count": len(groups), "groups": groups}
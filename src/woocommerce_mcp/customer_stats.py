@@ -0,0 +1,374 @@
+"""
+מודול לסטטיסטיקות לקוח (ערך חיים, מספר הזמנות, הזמנה אחרונה) מתצוגה מקומית.
+
+לכל חנות נשמר קובץ SQLite עם טבלת הזמנות מצומצמת וטבלת סיכומים לכל לקוח
+(materialized view). הטבלה נבנית ממשיכה מלאה של ההזמנות, ומתעדכנת בהדרגה
+לפי modified_after: רק הלקוחות של הזמנות שהשתנו מחושבים מחדש.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import WordPressError, get_data_dir, iter_pages
+from .profiles import StoreProfile, resolve_store
+
+# מפתח התצוגה במטמונים של החנות
+CUSTOMER_STATS_CACHE = "customer_stats"
+
+# גיל מרבי (בשניות) של התצוגה לפני רענון הדרגתי אוטומטי
+CUSTOMER_STATS_MAX_AGE = 300
+
+CUSTOMER_STATS_ORDER_FIELDS = (
+    "id,customer_id,billing,status,total,currency,refunds,date_created_gmt,date_modified_gmt"
+)
+
+# סטטוסים של הזמנות ששולמו ונספרות בערך החיים
+PAID_STATUSES = ("processing", "completed")
+
+CUSTOMER_STATS_SORTS = {
+    "total_spent": "total_spent DESC",
+    "orders": "orders DESC",
+    "last_order": "last_order_date IS NULL, last_order_date DESC",
+    "average_order": "average_order DESC",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    customer_key TEXT,
+    customer_id INTEGER,
+    email TEXT,
+    status TEXT,
+    total REAL,
+    refunded REAL,
+    currency TEXT,
+    date_created_gmt TEXT,
+    date_modified_gmt TEXT
+);
+CREATE INDEX IF NOT EXISTS orders_customer ON orders (customer_key);
+CREATE TABLE IF NOT EXISTS customer_stats (
+    customer_key TEXT PRIMARY KEY,
+    customer_id INTEGER,
+    email TEXT,
+    orders INTEGER,
+    all_orders INTEGER,
+    total_spent REAL,
+    refunded REAL,
+    average_order REAL,
+    first_order_date TEXT,
+    last_order_date TEXT,
+    last_activity TEXT
+);
+CREATE INDEX IF NOT EXISTS customer_stats_customer_id ON customer_stats (customer_id);
+CREATE INDEX IF NOT EXISTS customer_stats_email ON customer_stats (email);
+CREATE TABLE IF NOT EXISTS index_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_PAID = ", ".join(f"'{status}'" for status in PAID_STATUSES)
+
+# חישוב הסיכום של לקוחות נתונים מתוך טבלת ההזמנות
+_AGGREGATE = f"""
+INSERT OR REPLACE INTO customer_stats
+SELECT
+    customer_key,
+    MAX(customer_id),
+    MAX(email),
+    SUM(status IN ({_PAID})),
+    COUNT(*),
+    ROUND(COALESCE(SUM(CASE WHEN status IN ({_PAID}) THEN total - refunded END), 0), 2),
+    ROUND(COALESCE(SUM(CASE WHEN status IN ({_PAID}) THEN refunded END), 0), 2),
+    ROUND(COALESCE(AVG(CASE WHEN status IN ({_PAID}) THEN total - refunded END), 0), 2),
+    MIN(CASE WHEN status IN ({_PAID}) THEN date_created_gmt END),
+    MAX(CASE WHEN status IN ({_PAID}) THEN date_created_gmt END),
+    MAX(date_modified_gmt)
+FROM orders
+WHERE customer_key IN (SELECT value FROM json_each(?))
+GROUP BY customer_key
+"""
+
+
+def customer_key(order: Dict[str, Any]) -> Optional[str]:
+    """מפתח הלקוח של הזמנה: מזהה הלקוח, או האימייל עבור הזמנות אורח."""
+    if order.get("customer_id"):
+        return str(order["customer_id"])
+    email = ((order.get("billing") or {}).get("email") or "").strip().lower()
+    return f"guest:{email}" if email else None
+
+
+class CustomerStatsView:
+    """טבלת הזמנות מצומצמת וסיכום לכל לקוח, בקובץ SQLite אחד לכל חנות."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _state(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM index_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self._db.execute(
+            "INSERT INTO index_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        """תאריך השינוי (GMT) המאוחר ביותר שנכלל בתצוגה."""
+        return self._state("last_modified")
+
+    @property
+    def refreshed_at(self) -> float:
+        return float(self._state("refreshed_at") or 0)
+
+    def _recompute(self, keys: Iterable[str]) -> None:
+        # לקוח שלא נותרו לו הזמנות נמחק; השאר מחושבים מחדש מטבלת ההזמנות
+        keys_json = json.dumps(sorted(set(keys)))
+        self._db.execute("DELETE FROM customer_stats WHERE customer_key IN (SELECT value FROM json_each(?))", (keys_json,))
+        self._db.execute(_AGGREGATE, (keys_json,))
+
+    def upsert(self, orders: List[Dict[str, Any]]) -> None:
+        """מוסיף או מחליף הזמנות ומחשב מחדש את הסיכום של הלקוחות שלהן."""
+        with self._db:
+            # גם הלקוח הקודם של הזמנה (למשל אורח שנרשם) מחושב מחדש
+            ids = json.dumps([order["id"] for order in orders])
+            affected = {
+                row[0] for row in self._db.execute(
+                    "SELECT customer_key FROM orders WHERE id IN (SELECT value FROM json_each(?))", (ids,)
+                )
+            }
+            self._db.execute("DELETE FROM orders WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+            for order in orders:
+                key = customer_key(order)
+                if key is None:
+                    continue
+                affected.add(key)
+                refunded = sum(abs(float(refund.get("total") or 0)) for refund in order.get("refunds") or [])
+                self._db.execute(
+                    "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        order["id"],
+                        key,
+                        order.get("customer_id") or None,
+                        ((order.get("billing") or {}).get("email") or "").strip().lower() or None,
+                        order.get("status"),
+                        float(order.get("total") or 0),
+                        refunded,
+                        order.get("currency"),
+                        order.get("date_created_gmt"),
+                        order.get("date_modified_gmt"),
+                    ),
+                )
+            self._recompute(affected)
+
+    def remove(self, ids: List[int]) -> None:
+        with self._db:
+            ids_json = json.dumps(ids)
+            affected = {
+                row[0] for row in self._db.execute(
+                    "SELECT customer_key FROM orders WHERE id IN (SELECT value FROM json_each(?))", (ids_json,)
+                )
+            }
+            self._db.execute("DELETE FROM orders WHERE id IN (SELECT value FROM json_each(?))", (ids_json,))
+            self._recompute(affected)
+
+    async def refresh(self, client: httpx.AsyncClient, full: bool = False) -> Dict[str, Any]:
+        """
+        מעדכן את התצוגה מה-API.
+
+        רענון הדרגתי מושך רק הזמנות שהשתנו מאז השינוי האחרון שנכלל, ומסיר
+        הזמנות שהועברו לפח מאז (status=any אינו כולל אותן). הזמנות שנמחקו
+        לצמיתות מוסרות רק ברענון מלא.
+
+        Args:
+            client: לקוח WooCommerce פתוח.
+            full: האם לבנות מחדש את כל התצוגה.
+
+        Returns:
+            Dict[str, Any]: סוג הרענון, מספר ההזמנות שנמשכו והוסרו ומספר הלקוחות.
+        """
+        since = None if full else self.last_modified
+        params: Dict[str, Any] = {"_fields": CUSTOMER_STATS_ORDER_FIELDS, "status": "any"}
+        if since:
+            params.update({"modified_after": since, "dates_are_gmt": "true"})
+
+        seen = set()
+        latest = since or ""
+        async for response in iter_pages(client, "/orders", params):
+            orders = response.json()
+            self.upsert(orders)
+            for order in orders:
+                seen.add(order["id"])
+                latest = max(latest, order.get("date_modified_gmt") or "")
+
+        if since is None:
+            stale = [row[0] for row in self._db.execute("SELECT id FROM orders") if row[0] not in seen]
+        else:
+            trash_params = {"_fields": "id", "status": "trash", "modified_after": since, "dates_are_gmt": "true"}
+            stale = [order["id"] async for response in iter_pages(client, "/orders", trash_params)
+                     for order in response.json()]
+        self.remove(stale)
+        removed = len(stale)
+
+        with self._db:
+            if latest:
+                self._set_state("last_modified", latest)
+            self._set_state("refreshed_at", str(time.time()))
+        customers = self._db.execute("SELECT COUNT(*) FROM customer_stats").fetchone()[0]
+        return {"mode": "incremental" if since else "full", "orders": len(seen), "removed": removed, "customers": customers}
+
+    def stats(
+        self,
+        customer_ids: Optional[List[int]] = None,
+        emails: Optional[List[str]] = None,
+        min_orders: Optional[int] = None,
+        include_guests: bool = True,
+        sort: str = "total_spent",
+        limit: Optional[int] = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        מחזיר את הסיכומים של לקוחות לפי מזהים או אימיילים, או את הלקוחות
+        המובילים לפי המיון כשלא הועברו.
+        """
+        if sort not in CUSTOMER_STATS_SORTS:
+            raise WordPressError(f"Unsupported sort: {sort} (available: {', '.join(CUSTOMER_STATS_SORTS)})")
+
+        where: List[str] = []
+        args: List[Any] = []
+        selectors = []
+        if customer_ids:
+            selectors.append("customer_id IN (SELECT value FROM json_each(?))")
+            args.append(json.dumps(customer_ids))
+        if emails:
+            selectors.append("email IN (SELECT value FROM json_each(?))")
+            args.append(json.dumps([email.strip().lower() for email in emails]))
+        if selectors:
+            where.append(f"({' OR '.join(selectors)})")
+        if min_orders is not None:
+            where.append("orders >= ?")
+            args.append(min_orders)
+        if not include_guests:
+            where.append("customer_id IS NOT NULL")
+
+        query = "SELECT * FROM customer_stats"
+        if where:
+            query += f" WHERE {' AND '.join(where)}"
+        query += f" ORDER BY {CUSTOMER_STATS_SORTS[sort]}, customer_key"
+        if limit is not None and not selectors:
+            query += " LIMIT ?"
+            args.append(limit)
+        return [dict(row) for row in self._db.execute(query, args)]
+
+
+def get_customer_stats_view(store: StoreProfile) -> CustomerStatsView:
+    """מחזיר את תצוגת סטטיסטיקות הלקוחות של החנות, ופותח אותה מהקובץ בשימוש הראשון."""
+    view = store.caches.get(CUSTOMER_STATS_CACHE)
+    if view is None:
+        digest = hashlib.sha1(store.site_url.encode("utf-8")).hexdigest()[:12]
+        db_path = os.path.join(get_data_dir("indexes"), f"customers-{digest}.sqlite3")
+        view = store.caches[CUSTOMER_STATS_CACHE] = CustomerStatsView(db_path)
+    return view
+
+
+def register_customer_stats_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לסטטיסטיקות לקוחות.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def get_customer_stats(
+        customer_ids: Optional[List[int]] = None,
+        emails: Optional[List[str]] = None,
+        min_orders: Optional[int] = None,
+        include_guests: bool = True,
+        sort: str = "total_spent",
+        limit: Optional[int] = 100,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחזיר ערך חיים (LTV), מספר הזמנות ותאריכי הזמנה ראשונה ואחרונה לכל לקוח,
+        מתצוגה מקומית שמתעדכנת בהדרגה מההזמנות.
+
+        נספרות הזמנות בסטטוס processing או completed, בניכוי החזרים. הזמנות אורח
+        מקובצות לפי אימייל.
+
+        Args:
+            customer_ids: מזהי לקוחות (אלפים בקריאה אחת).
+            emails: אימיילים של לקוחות (כולל הזמנות אורח).
+            min_orders: מספר הזמנות ששולמו מינימלי.
+            include_guests: האם לכלול לקוחות אורח.
+            sort: total_spent, orders, last_order או average_order.
+            limit: מספר לקוחות מרבי כשלא הועברו מזהים או אימיילים (ברירת מחדל: 100).
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: customers (סיכום לכל לקוח), ולקוחות שלא נמצאו.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+        view = get_customer_stats_view(store)
+
+        if time.time() - view.refreshed_at > CUSTOMER_STATS_MAX_AGE:
+            async with store.client() as client:
+                await view.refresh(client)
+
+        customers = view.stats(customer_ids, emails, min_orders, include_guests, sort, limit)
+        result: Dict[str, Any] = {"count": len(customers), "customers": customers}
+        if customer_ids:
+            found = {customer["customer_id"] for customer in customers}
+            result["not_found"] = [customer_id for customer_id in customer_ids if customer_id not in found]
+        if emails:
+            found_emails = {customer["email"] for customer in customers}
+            result["emails_not_found"] = [email for email in emails if email.strip().lower() not in found_emails]
+        return result
+
+    @mcp.tool()
+    async def refresh_customer_stats(
+        full: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מעדכן את תצוגת סטטיסטיקות הלקוחות.
+
+        Args:
+            full: בנייה מחדש מלאה (מסירה גם הזמנות שנמחקו לצמיתות); אחרת רק הזמנות שהשתנו.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סוג הרענון, מספר ההזמנות שנמשכו והוסרו ומספר הלקוחות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+        view = get_customer_stats_view(store)
+
+        async with store.client() as client:
+            return await view.refresh(client, full)
@@ -7,7 +7,10 @@ from typing import Any, Dict, List, Optional
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .utils import WordPressError, handle_response_error
+from .profiles import resolve_store
+from .customer_index import mark_customers_dirty
+from .meta import write_meta
 
 def register_customer_tools(mcp: FastMCP) -> None:
     """
@@ -25,6 +28,7 @@ def register_customer_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת לקוחות מ-WooCommerce.
@@ -36,19 +40,12 @@ def register_customer_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת הלקוחות.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -57,7 +54,7 @@ def register_customer_tools(mcp: FastMCP) -> None:
             **filters
         }
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(
                 "/customers",
                 params=params
@@ -72,6 +69,7 @@ def register_customer_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר לקוח בודד לפי המזהה שלו.
@@ -81,21 +79,14 @@ def register_customer_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הלקוח.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/customers/{customer_id}")
             
             handle_response_error(response, f"Failed to get customer {customer_id}")
@@ -107,6 +98,7 @@ def register_customer_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר לקוח חדש ב-WooCommerce.
@@ -116,27 +108,21 @@ def register_customer_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הלקוח שנוצר.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 "/customers",
                 json=customer_data
             )
             
             handle_response_error(response, "Failed to create customer")
+            mark_customers_dirty(store)
             return response.json()
     
     @mcp.tool()
@@ -146,6 +132,7 @@ def register_customer_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מעדכן לקוח קיים ב-WooCommerce.
@@ -156,27 +143,21 @@ def register_customer_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הלקוח המעודכן.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.put(
                 f"/customers/{customer_id}",
                 json=customer_data
             )
             
             handle_response_error(response, f"Failed to update customer {customer_id}")
+            mark_customers_dirty(store)
             return response.json()
     
     @mcp.tool()
@@ -186,6 +167,7 @@ def register_customer_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק לקוח מ-WooCommerce.
@@ -196,27 +178,21 @@ def register_customer_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/customers/{customer_id}",
                 params={"force": force}
             )
             
             handle_response_error(response, f"Failed to delete customer {customer_id}")
+            mark_customers_dirty(store)
             return response.json()
             
     # מטא-דאטה של לקוחות
@@ -227,6 +203,7 @@ def register_customer_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר מטא-דאטה של לקוח.
@@ -237,27 +214,19 @@ def register_customer_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת מטא-דאטה של הלקוח.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
-            response = await client.get(f"/customers/{customer_id}")
+        async with store.client() as client:
+            # רק meta_data, בלי פרטי החיוב והמשלוח
+            response = await client.get(f"/customers/{customer_id}", params={"_fields": "meta_data"})
             
             handle_response_error(response, f"Failed to get customer {customer_id}")
-            customer_data = response.json()
-            
-            meta_data = customer_data.get("meta_data", [])
+            meta_data = response.json().get("meta_data", [])
             
             # אם מפתח ספציפי צוין, סנן רק את הערכים המתאימים
             if meta_key:
@@ -273,6 +242,7 @@ def register_customer_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         יוצר או מעדכן מטא-דאטה של לקוח.
@@ -284,51 +254,60 @@ def register_customer_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת מטא-דאטה מעודכנת של הלקוח.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
-            # קודם כל קבל את הלקוח הנוכחי
-            response = await client.get(f"/customers/{customer_id}")
-            
-            handle_response_error(response, f"Failed to get customer {customer_id}")
-            customer_data = response.json()
-            
-            # השג את המטא-דאטה הנוכחי
-            meta_data = customer_data.get("meta_data", [])
-            
-            # חפש אם המפתח כבר קיים
-            existing_meta_index = next((i for i, item in enumerate(meta_data) 
-                                      if item.get("key") == meta_key), None)
-            
-            if existing_meta_index is not None:
-                # עדכן את הערך הקיים
-                meta_data[existing_meta_index]["value"] = meta_value
-            else:
-                # הוסף ערך חדש
-                meta_data.append({
-                    "key": meta_key,
-                    "value": meta_value
-                })
-            
-            # שמור את השינויים בלקוח
-            update_response = await client.put(
+        async with store.client() as client:
+            # WooCommerce מעדכן מפתח קיים או מוסיף חדש לפי key, כך שנשלחת רק הרשומה
+            # שמשתנה ואין צורך לקרוא קודם את הלקוח
+            response = await client.put(
                 f"/customers/{customer_id}",
-                json={"meta_data": meta_data}
+                params={"_fields": "meta_data"},
+                json={"meta_data": [{"key": meta_key, "value": meta_value}]}
             )
             
-            handle_response_error(update_response, f"Failed to update customer meta data for customer {customer_id}")
-            updated_customer = update_response.json()
-            
-            return updated_customer.get("meta_data", []) 
\ No newline at end of file
+            handle_response_error(response, f"Failed to update customer meta data for customer {customer_id}")
+            return response.json().get("meta_data", [])
+
+    @mcp.tool()
+    async def set_customers_meta(
+        meta: Dict[str, Dict[str, Any]],
+        delete_keys: Optional[List[str]] = None,
+        only_changed: bool = True,
+        dry_run: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        יוצר או מעדכן מטא-דאטה של לקוחות רבים דרך בקשות batch של /customers/batch.
+        
+        Args:
+            meta: ערכים לפי מזהה לקוח, למשל {"12": {"loyalty_tier": "gold"}}.
+            delete_keys: מפתחות למחיקה מכל הלקוחות שב-meta.
+            only_changed: האם לשלוח רק ערכים שהשתנו (קריאה מקדימה של meta_data בלבד).
+            dry_run: החזרת התוכנית בלבד, ללא שינויים.
+            concurrency: מספר הבקשות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+        
+        Returns:
+            Dict[str, Any]: סיכום: לקוחות שנבדקו, עודכנו, לא השתנו, לא נמצאו ושגיאות.
+        """
+        if not meta:
+            raise WordPressError("No customer meta to write")
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+        
+        async with store.client() as client:
+            return await write_meta(
+                client, "customers", per_item=meta, delete_keys=delete_keys,
+                only_changed=only_changed, dry_run=dry_run, concurrency=concurrency
+            )
@@ -7,7 +7,8 @@ from typing import Any, Dict, List, Optional
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .utils import WordPressError, handle_response_error
+from .profiles import resolve_store
 
 
 def register_data_tools(mcp: FastMCP) -> None:
@@ -24,6 +25,7 @@ def register_data_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר מידע כללי מ-WooCommerce לפי סוג.
@@ -33,21 +35,14 @@ def register_data_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת פריטי מידע.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/data/{type}")
             
             handle_response_error(response, f"Failed to get data for {type}")
@@ -58,6 +53,7 @@ def register_data_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת יבשות מ-WooCommerce.
@@ -66,17 +62,19 @@ def register_data_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת יבשות עם המדינות שבהן.
         """
-        return await get_data("continents", site_url, consumer_key, consumer_secret)
+        return await get_data("continents", site_url, consumer_key, consumer_secret, profile)
 
     @mcp.tool()
     async def get_countries(
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת מדינות מ-WooCommerce.
@@ -85,17 +83,19 @@ def register_data_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת מדינות.
         """
-        return await get_data("countries", site_url, consumer_key, consumer_secret)
+        return await get_data("countries", site_url, consumer_key, consumer_secret, profile)
 
     @mcp.tool()
     async def get_currencies(
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת מטבעות מ-WooCommerce.
@@ -104,17 +104,19 @@ def register_data_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת מטבעות.
         """
-        return await get_data("currencies", site_url, consumer_key, consumer_secret)
+        return await get_data("currencies", site_url, consumer_key, consumer_secret, profile)
 
     @mcp.tool()
     async def get_current_currency(
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר את המטבע הנוכחי מ-WooCommerce.
@@ -123,21 +125,14 @@ def register_data_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: פרטי המטבע הנוכחי.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get("/data/currencies/current")
             
             handle_response_error(response, "Failed to get current currency")
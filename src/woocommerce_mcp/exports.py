@@ -0,0 +1,298 @@
+"""
+מודול לייצוא כמויות גדולות של נתונים מ-WooCommerce לקבצים מקומיים (NDJSON / Parquet).
+"""
+
+import dataclasses
+import gzip
+import json
+import os
+import time
+import typing
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .models import Customer, Order, Product, decode_many, projection, to_dict
+from .utils import WordPressError, get_data_dir, iter_pages
+from .profiles import resolve_store
+
+# משאבים הניתנים לייצוא: נתיב ה-API והמודל שאליו מפוענחות התוצאות
+EXPORT_RESOURCES = {
+    "orders": ("/orders", Order),
+    "products": ("/products", Product),
+    "customers": ("/customers", Customer),
+}
+
+EXPORT_FORMATS = {
+    "ndjson": ("gzip", "none"),
+    "parquet": ("snappy", "zstd", "gzip", "none"),
+}
+
+
+def _arrow_type(pa: Any, tp: Any) -> Any:
+    """ממפה טיפוס Python של שדה במודל לטיפוס Arrow."""
+    origin = typing.get_origin(tp)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        return _arrow_type(pa, args[0])
+    if origin in (list, List):
+        return pa.list_(_arrow_type(pa, typing.get_args(tp)[0]))
+    if dataclasses.is_dataclass(tp):
+        return pa.struct(_arrow_fields(pa, tp))
+    if tp is bool:
+        return pa.bool_()
+    if tp is int:
+        return pa.int64()
+    if tp is float:
+        return pa.float64()
+    return pa.string()
+
+
+def _arrow_fields(pa: Any, model: type) -> List[Any]:
+    hints = typing.get_type_hints(model)
+    return [pa.field(f.name, _arrow_type(pa, hints[f.name])) for f in dataclasses.fields(model)]
+
+
+class _NDJSONWriter:
+    """כותב שורות JSON לקובץ, עם דחיסת gzip אופציונלית."""
+
+    def __init__(self, path: str, compression: str):
+        if compression == "gzip":
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: List[Any]) -> None:
+        self._file.writelines(
+            json.dumps(to_dict(row), ensure_ascii=False) + "\n" for row in rows
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetWriter:
+    """כותב כל עמוד כ-row group בקובץ Parquet עם סכמה שנגזרת מהמודל."""
+
+    def __init__(self, path: str, compression: str, model: type):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise WordPressError(
+                "Parquet export requires pyarrow (pip install 'woocommerce-mcp[parquet]')"
+            )
+
+        self._pa = pa
+        self._schema = pa.schema(_arrow_fields(pa, model))
+        self._writer = pq.ParquetWriter(path, self._schema, compression=compression)
+
+    def write(self, rows: List[Any]) -> None:
+        table = self._pa.Table.from_pylist([to_dict(row) for row in rows], schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _default_export_path(resource: str, fmt: str, compression: str) -> str:
+    suffix = ".ndjson" if fmt == "ndjson" else ".parquet"
+    if fmt == "ndjson" and compression == "gzip":
+        suffix += ".gz"
+    filename = f"{resource}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}"
+    return os.path.join(get_data_dir("exports"), filename)
+
+
+async def export_resource(
+    client: httpx.AsyncClient,
+    resource: str,
+    output_path: Optional[str] = None,
+    format: str = "ndjson",
+    compression: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    per_page: int = 100,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    מייצא את כל העמודים של משאב לקובץ מקומי, עמוד אחר עמוד, בלי להחזיק את כל הנתונים בזיכרון.
+
+    הקובץ נכתב תחילה לנתיב זמני ומועבר למקומו רק בסיום מוצלח.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        resource: שם המשאב (orders, products, customers).
+        output_path: נתיב קובץ היעד (ברירת מחדל: תיקיית הייצוא של השרת).
+        format: פורמט הקובץ (ndjson או parquet).
+        compression: סוג הדחיסה (ברירת מחדל: הראשון הנתמך בפורמט).
+        filters: מסננים שיועברו ל-API (סטטוס, after, before וכו').
+        per_page: מספר פריטים לכל בקשה.
+        progress: פונקציה שתיקרא אחרי כל עמוד עם מצב ההתקדמות (אופציונלי).
+
+    Returns:
+        Dict[str, Any]: נתיב הקובץ ומספר השורות והעמודים שנכתבו.
+
+    Raises:
+        WordPressError: אם המשאב, הפורמט או הדחיסה אינם נתמכים, או אם בקשה נכשלה.
+    """
+    if resource not in EXPORT_RESOURCES:
+        raise WordPressError(f"Unsupported export resource: {resource}")
+    if format not in EXPORT_FORMATS:
+        raise WordPressError(f"Unsupported export format: {format}")
+
+    compression = compression or EXPORT_FORMATS[format][0]
+    if compression not in EXPORT_FORMATS[format]:
+        raise WordPressError(f"Unsupported compression for {format}: {compression}")
+
+    path, model = EXPORT_RESOURCES[resource]
+    output_path = output_path or _default_export_path(resource, format, compression)
+    tmp_path = f"{output_path}.part"
+
+    params = {**(filters or {}), "_fields": projection(model)}
+
+    if format == "parquet":
+        writer = _ParquetWriter(tmp_path, compression, model)
+    else:
+        writer = _NDJSONWriter(tmp_path, compression)
+
+    rows = 0
+    pages = 0
+    try:
+        async for response in iter_pages(client, path, params, per_page):
+            items = decode_many(model, response.content)
+            writer.write(items)
+            rows += len(items)
+            pages += 1
+            if progress is not None:
+                progress({
+                    "rows": rows,
+                    "pages": pages,
+                    "total_pages": int(response.headers.get("X-WP-TotalPages") or pages),
+                })
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+
+    writer.close()
+    os.replace(tmp_path, output_path)
+
+    return {
+        "resource": resource,
+        "path": os.path.abspath(output_path),
+        "format": format,
+        "compression": compression,
+        "rows": rows,
+        "pages": pages,
+    }
+
+
+def register_export_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לייצוא נתונים לקבצים.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def export_orders(
+        filters: Optional[Dict[str, Any]] = None,
+        format: str = "ndjson",
+        compression: Optional[str] = None,
+        output_path: Optional[str] = None,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מייצא הזמנות לקובץ NDJSON או Parquet מקומי ומחזיר רק את נתיב הקובץ ומספר השורות.
+
+        Args:
+            filters: מסננים (status, after, before וכו').
+            format: פורמט הקובץ (ndjson או parquet).
+            compression: דחיסה (ndjson: gzip/none, parquet: snappy/zstd/gzip/none).
+            output_path: נתיב קובץ היעד (אופציונלי).
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: נתיב הקובץ, מספר שורות ועמודים.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await export_resource(
+                client, "orders", output_path, format, compression, filters
+            )
+
+    @mcp.tool()
+    async def export_products(
+        filters: Optional[Dict[str, Any]] = None,
+        format: str = "ndjson",
+        compression: Optional[str] = None,
+        output_path: Optional[str] = None,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מייצא מוצרים לקובץ NDJSON או Parquet מקומי ומחזיר רק את נתיב הקובץ ומספר השורות.
+
+        Args:
+            filters: מסננים (status, category, type וכו').
+            format: פורמט הקובץ (ndjson או parquet).
+            compression: דחיסה (ndjson: gzip/none, parquet: snappy/zstd/gzip/none).
+            output_path: נתיב קובץ היעד (אופציונלי).
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: נתיב הקובץ, מספר שורות ועמודים.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await export_resource(
+                client, "products", output_path, format, compression, filters
+            )
+
+    @mcp.tool()
+    async def export_customers(
+        filters: Optional[Dict[str, Any]] = None,
+        format: str = "ndjson",
+        compression: Optional[str] = None,
+        output_path: Optional[str] = None,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מייצא לקוחות לקובץ NDJSON או Parquet מקומי ומחזיר רק את נתיב הקובץ ומספר השורות.
+
+        Args:
+            filters: מסננים (role, email וכו').
+            format: פורמט הקובץ (ndjson או parquet).
+            compression: דחיסה (ndjson: gzip/none, parquet: snappy/zstd/gzip/none).
+            output_path: נתיב קובץ היעד (אופציונלי).
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: נתיב הקובץ, מספר שורות ועמודים.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await export_resource(
+                client, "customers", output_path, format, compression, filters
+            )
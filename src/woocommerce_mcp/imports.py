@@ -0,0 +1,536 @@
+"""
+מודול לייבוא כמויות גדולות של מוצרים, לקוחות וקופונים מקבצי CSV/NDJSON מקומיים.
+"""
+
+import asyncio
+import csv
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import (
+    BATCH_LIMIT,
+    MAX_REPORTED_ERRORS,
+    WordPressError,
+    chunked,
+    get_data_dir,
+    load_checkpoint,
+    save_checkpoint,
+    submit_batch,
+)
+from .profiles import resolve_store
+
+
+@dataclass(frozen=True)
+class _ImportSpec:
+    """תיאור משאב לייבוא: נתיב ה-API, שדות חובה והמרות טיפוסים לעמודות CSV."""
+    path: str
+    required: Tuple[str, ...]
+    ints: FrozenSet[str] = frozenset()
+    bools: FrozenSet[str] = frozenset()
+    decimals: FrozenSet[str] = frozenset()
+    term_lists: FrozenSet[str] = frozenset()
+    int_lists: FrozenSet[str] = frozenset()
+    str_lists: FrozenSet[str] = frozenset()
+    src_lists: FrozenSet[str] = frozenset()
+    emails: FrozenSet[str] = frozenset()
+    choices: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+
+
+IMPORT_RESOURCES = {
+    "products": _ImportSpec(
+        path="/products",
+        required=("name",),
+        ints=frozenset({"id", "stock_quantity", "menu_order", "parent_id"}),
+        bools=frozenset({"manage_stock", "featured", "virtual", "downloadable", "sold_individually"}),
+        decimals=frozenset({"regular_price", "sale_price"}),
+        term_lists=frozenset({"categories", "tags"}),
+        src_lists=frozenset({"images"}),
+        choices={
+            "type": ("simple", "grouped", "external", "variable"),
+            "status": ("draft", "pending", "private", "publish"),
+        },
+    ),
+    "customers": _ImportSpec(
+        path="/customers",
+        required=("email",),
+        ints=frozenset({"id"}),
+        emails=frozenset({"email"}),
+    ),
+    "coupons": _ImportSpec(
+        path="/coupons",
+        required=("code",),
+        ints=frozenset({"id", "usage_limit", "usage_limit_per_user", "limit_usage_to_x_items"}),
+        bools=frozenset({"individual_use", "exclude_sale_items", "free_shipping"}),
+        decimals=frozenset({"amount", "minimum_amount", "maximum_amount"}),
+        int_lists=frozenset({
+            "product_ids",
+            "excluded_product_ids",
+            "product_categories",
+            "excluded_product_categories",
+        }),
+        str_lists=frozenset({"email_restrictions"}),
+        choices={"discount_type": ("percent", "fixed_cart", "fixed_product")},
+    ),
+}
+
+
+def _coerce(spec: _ImportSpec, column: str, value: str) -> Any:
+    """ממיר ערך טקסטואלי מעמודת CSV לטיפוס שה-API מצפה לו."""
+    if column in spec.ints:
+        return int(value)
+    if column in spec.bools:
+        return value.lower() in ("1", "true", "yes", "y")
+    if column in spec.term_lists:
+        return [{"id": int(v)} for v in value.split("|") if v.strip()]
+    if column in spec.int_lists:
+        return [int(v) for v in value.split("|") if v.strip()]
+    if column in spec.str_lists:
+        return [v.strip() for v in value.split("|") if v.strip()]
+    if column in spec.src_lists:
+        return [{"src": v.strip()} for v in value.split("|") if v.strip()]
+    return value
+
+
+def map_csv_row(spec: _ImportSpec, row: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    ממפה שורת CSV שטוחה למבנה הנתונים של WooCommerce.
+
+    עמודות עם נקודה (למשל billing.email) הופכות למילונים מקוננים, ועמודות
+    רשימה מופרדות ב-"|". תאים ריקים מושמטים.
+
+    Args:
+        spec: תיאור המשאב.
+        row: שורת ה-CSV.
+
+    Returns:
+        Dict[str, Any]: נתוני הפריט לשליחה ל-API.
+
+    Raises:
+        ValueError: אם ערך לא ניתן להמרה לטיפוס הנדרש.
+    """
+    payload: Dict[str, Any] = {}
+    for column, raw in row.items():
+        if column is None or raw is None:
+            continue
+        value = raw.strip()
+        if not value:
+            continue
+
+        column = column.strip()
+        try:
+            coerced = _coerce(spec, column, value)
+        except ValueError:
+            raise ValueError(f"Invalid value for {column}: {value!r}")
+
+        target = payload
+        *parents, leaf = column.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = coerced
+    return payload
+
+
+def validate_payload(spec: _ImportSpec, payload: Dict[str, Any]) -> Optional[str]:
+    """
+    מאמת פריט לפני שליחה.
+
+    Args:
+        spec: תיאור המשאב.
+        payload: נתוני הפריט.
+
+    Returns:
+        Optional[str]: הודעת שגיאה, או None אם הפריט תקין.
+    """
+    if "id" not in payload:
+        for name in spec.required:
+            if payload.get(name) in (None, ""):
+                return f"Missing required field: {name}"
+
+    for name in spec.decimals:
+        if name in payload and payload[name] != "":
+            try:
+                float(payload[name])
+            except (TypeError, ValueError):
+                return f"Invalid decimal value for {name}: {payload[name]!r}"
+
+    for name in spec.emails:
+        if name in payload and "@" not in str(payload[name]):
+            return f"Invalid email address: {payload[name]!r}"
+
+    for name, allowed in spec.choices.items():
+        if name in payload and payload[name] not in allowed:
+            return f"Invalid value for {name}: {payload[name]!r} (expected one of {', '.join(allowed)})"
+
+    return None
+
+
+def open_text(path: str):
+    """פותח קובץ טקסט UTF-8 לקריאה, כולל קבצים דחוסים ב-gzip (‎.gz)."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8-sig", newline="")
+
+
+def detect_format(path: str) -> str:
+    """מזהה את פורמט הקובץ ("csv" או "ndjson") לפי הסיומת, גם מתחת ל-‎.gz."""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    raise WordPressError(f"Cannot detect import format for {path}; pass file_format explicitly")
+
+
+def iter_rows(
+    spec: _ImportSpec,
+    path: str,
+    file_format: str,
+) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    קורא את קובץ המקור שורה אחר שורה, ממפה ומאמת כל שורה.
+
+    Args:
+        spec: תיאור המשאב.
+        path: נתיב הקובץ.
+        file_format: csv או ndjson.
+
+    Yields:
+        Tuple: מספר השורה, נתוני הפריט (או None) והודעת שגיאה (או None).
+    """
+    with open_text(path) as f:
+        if file_format == "csv":
+            # שורה 1 היא שורת הכותרות
+            for row_number, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    payload = map_csv_row(spec, row)
+                except ValueError as e:
+                    yield row_number, None, str(e)
+                    continue
+                error = validate_payload(spec, payload)
+                yield row_number, (None if error else payload), error
+        else:
+            for row_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    payload = json.loads(line)
+                except ValueError:
+                    yield row_number, None, "Invalid JSON"
+                    continue
+                if not isinstance(payload, dict):
+                    yield row_number, None, "Row must be a JSON object"
+                    continue
+                error = validate_payload(spec, payload)
+                yield row_number, (None if error else payload), error
+
+
+def _checkpoint_path(resource: str, source: str) -> str:
+    digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_data_dir("checkpoints"), f"import-{resource}-{digest}.json")
+
+
+async def import_file(
+    client: httpx.AsyncClient,
+    resource: str,
+    file_path: str,
+    file_format: Optional[str] = None,
+    batch_size: int = BATCH_LIMIT,
+    concurrency: int = 4,
+    restart: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    מייבא קובץ CSV/NDJSON דרך נקודת הקצה batch של המשאב.
+
+    הקובץ נקרא בזרימה, והאצוות נשלחות במקביל (עד `concurrency` בקשות פעילות)
+    תוך כדי המשך קריאת הקובץ. כל אצווה שהסתיימה נרשמת בקובץ נקודת ביקורת,
+    כך שהרצה חוזרת על אותו קובץ ממשיכה מהמקום שבו נעצרה. שורות שנכשלו בתוך
+    אצווה שהסתיימה נשמרות בנקודת הביקורת ונשלחות שוב (רק הן) בהרצה הבאה.
+    שורות עם `id` נשלחות כעדכון, והשאר כיצירה.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        resource: שם המשאב (products, customers, coupons).
+        file_path: נתיב קובץ המקור (אפשר גם ‎.gz).
+        file_format: csv או ndjson (ברירת מחדל: לפי סיומת הקובץ).
+        batch_size: מספר פריטים בכל בקשת batch (עד 100).
+        concurrency: מספר בקשות batch מקבילות.
+        restart: התעלמות מנקודת ביקורת קיימת והתחלה מחדש.
+        progress: פונקציה שתיקרא אחרי כל אצווה עם מצב ההתקדמות (אופציונלי).
+
+    Returns:
+        Dict[str, Any]: סיכום הייבוא (נוצרו, עודכנו, נכשלו, שורות לא תקינות ושגיאות).
+
+    Raises:
+        WordPressError: אם המשאב או הפורמט אינם נתמכים או שהקובץ לא קיים.
+    """
+    if resource not in IMPORT_RESOURCES:
+        raise WordPressError(f"Unsupported import resource: {resource}")
+
+    spec = IMPORT_RESOURCES[resource]
+    source = os.path.abspath(file_path)
+    if not os.path.isfile(source):
+        raise WordPressError(f"Import file not found: {file_path}")
+
+    file_format = file_format or detect_format(source)
+    if file_format not in ("csv", "ndjson"):
+        raise WordPressError(f"Unsupported import format: {file_format}")
+
+    batch_size = max(1, min(batch_size, BATCH_LIMIT))
+    stat = os.stat(source)
+    identity = {
+        "source": source,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "batch_size": batch_size,
+    }
+
+    checkpoint_path = _checkpoint_path(resource, source)
+    state = None if restart else load_checkpoint(checkpoint_path, identity)
+    if state is None:
+        state = {
+            "identity": identity,
+            "completed_chunks": [],
+            "failed_rows": {},
+            "created": 0,
+            "updated": 0,
+            "failed": 0,
+            "completed": False,
+        }
+
+    summary = {
+        "resource": resource,
+        "source": source,
+        "checkpoint": checkpoint_path,
+        "rows": 0,
+        "invalid": 0,
+        "skipped_chunks": 0,
+        "pending_chunks": 0,
+        "retried_rows": 0,
+        "errors": [],
+    }
+
+    def report(error: Dict[str, Any]) -> None:
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append(error)
+
+    def finish() -> Dict[str, Any]:
+        summary.update(
+            created=state["created"],
+            updated=state["updated"],
+            failed=state["failed"],
+            completed=state["completed"],
+        )
+        return summary
+
+    if state["completed"]:
+        summary["already_completed"] = True
+        return finish()
+
+    completed = set(state["completed_chunks"])
+    # שורות שנכשלו לפי אצווה (המפתח הוא מספר האצווה כמחרוזת, כמו ב-JSON)
+    failed_rows: Dict[str, List[int]] = state.setdefault("failed_rows", {})
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    in_flight = set()
+
+    def valid_rows() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for row_number, payload, error in iter_rows(spec, source, file_format):
+            summary["rows"] += 1
+            if error:
+                summary["invalid"] += 1
+                report({"row": row_number, "message": error})
+                continue
+            yield row_number, payload
+
+    async def send(index: int, chunk: List[Tuple[int, Dict[str, Any]]], retry: bool = False) -> None:
+        try:
+            creates = [(row, item) for row, item in chunk if "id" not in item]
+            updates = [(row, item) for row, item in chunk if "id" in item]
+            result = await submit_batch(client, spec.path, {
+                "create": [item for _, item in creates],
+                "update": [item for _, item in updates],
+            })
+
+            # בשליחה חוזרת השורות כבר נספרו ככושלות, והן נספרות מחדש לפי התוצאה
+            if retry:
+                state["failed"] -= len(chunk)
+            failed = []
+            for action, rows in (("create", creates), ("update", updates)):
+                for (row_number, _), item in zip(rows, result.get(action, [])):
+                    error = item.get("error") if isinstance(item, dict) else None
+                    if error:
+                        state["failed"] += 1
+                        failed.append(row_number)
+                        report({"row": row_number, "code": error.get("code"), "message": error.get("message")})
+                    else:
+                        state["created" if action == "create" else "updated"] += 1
+
+            if failed:
+                failed_rows[str(index)] = sorted(failed)
+            else:
+                failed_rows.pop(str(index), None)
+            completed.add(index)
+            state["completed_chunks"] = sorted(completed)
+            save_checkpoint(checkpoint_path, state)
+            if progress is not None:
+                progress({
+                    "rows": summary["rows"],
+                    "invalid": summary["invalid"],
+                    "created": state["created"],
+                    "updated": state["updated"],
+                    "failed": state["failed"],
+                    "chunks": len(completed),
+                })
+        except (WordPressError, httpx.HTTPError) as e:
+            # האצווה לא סומנה כהושלמה ותישלח שוב בהרצה הבאה
+            summary["pending_chunks"] += 1
+            report({"rows": [chunk[0][0], chunk[-1][0]], "code": getattr(e, "code", None), "message": str(e)})
+        finally:
+            semaphore.release()
+
+    try:
+        for index, chunk in enumerate(chunked(valid_rows(), batch_size)):
+            retry = index in completed
+            if retry:
+                retry_rows = set(failed_rows.get(str(index), []))
+                chunk = [(row_number, item) for row_number, item in chunk if row_number in retry_rows]
+                if not chunk:
+                    summary["skipped_chunks"] += 1
+                    continue
+                summary["retried_rows"] += len(chunk)
+            # ממתינים למקום פנוי לפני קריאת אצווה נוספת, כדי לשמור על זיכרון חסום
+            await semaphore.acquire()
+            task = asyncio.create_task(send(index, chunk, retry))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+    finally:
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    state["completed"] = summary["pending_chunks"] == 0 and not failed_rows
+    save_checkpoint(checkpoint_path, state)
+    return finish()
+
+
+def register_import_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לייבוא נתונים מקבצים.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def import_products(
+        file_path: str,
+        file_format: Optional[str] = None,
+        batch_size: int = BATCH_LIMIT,
+        concurrency: int = 4,
+        restart: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מייבא מוצרים מקובץ CSV/NDJSON מקומי בבקשות batch מקבילות, עם המשכיות מנקודת ביקורת.
+
+        Args:
+            file_path: נתיב קובץ המקור.
+            file_format: csv או ndjson (ברירת מחדל: לפי סיומת הקובץ).
+            batch_size: מספר מוצרים בכל בקשה (עד 100).
+            concurrency: מספר בקשות מקבילות.
+            restart: התחלה מחדש גם אם קיימת נקודת ביקורת.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום הייבוא.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await import_file(
+                client, "products", file_path, file_format, batch_size, concurrency, restart
+            )
+
+    @mcp.tool()
+    async def import_customers(
+        file_path: str,
+        file_format: Optional[str] = None,
+        batch_size: int = BATCH_LIMIT,
+        concurrency: int = 4,
+        restart: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מייבא לקוחות מקובץ CSV/NDJSON מקומי בבקשות batch מקבילות, עם המשכיות מנקודת ביקורת.
+
+        Args:
+            file_path: נתיב קובץ המקור.
+            file_format: csv או ndjson (ברירת מחדל: לפי סיומת הקובץ).
+            batch_size: מספר לקוחות בכל בקשה (עד 100).
+            concurrency: מספר בקשות מקבילות.
+            restart: התחלה מחדש גם אם קיימת נקודת ביקורת.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום הייבוא.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await import_file(
+                client, "customers", file_path, file_format, batch_size, concurrency, restart
+            )
+
+    @mcp.tool()
+    async def import_coupons(
+        file_path: str,
+        file_format: Optional[str] = None,
+        batch_size: int = BATCH_LIMIT,
+        concurrency: int = 4,
+        restart: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מייבא קופונים מקובץ CSV/NDJSON מקומי בבקשות batch מקבילות, עם המשכיות מנקודת ביקורת.
+
+        Args:
+            file_path: נתיב קובץ המקור.
+            file_format: csv או ndjson (ברירת מחדל: לפי סיומת הקובץ).
+            batch_size: מספר קופונים בכל בקשה (עד 100).
+            concurrency: מספר בקשות מקבילות.
+            restart: התחלה מחדש גם אם קיימת נקודת ביקורת.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום הייבוא.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await import_file(
+                client, "coupons", file_path, file_format, batch_size, concurrency, restart
+            )
@@ -0,0 +1,279 @@
+"""
+מודול לעדכון מרוכז של רמות מלאי לפי SKU.
+
+ה-SKU מתורגמים דרך אינדקס ה-SKU, הכמויות הנוכחיות נקראות בחלקים (רק id
+ושדות המלאי), ורק ערכים שהשתנו נשלחים דרך נקודות ה-batch: אחת למוצרים
+ואחת לכל מוצר אב של וריאציות.
+"""
+
+import csv
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import BATCH_LIMIT, MAX_REPORTED_ERRORS, WordPressError, apply_batch, chunked, fetch_all, gather_limited
+from .profiles import StoreProfile, resolve_store
+from .imports import detect_format, open_text
+from .sku_index import find_skus
+
+STOCK_FIELDS = "id,stock_quantity,manage_stock"
+
+
+def _quantity(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid quantity: {value}")
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"Quantity must be a whole number: {value}")
+    return int(number)
+
+
+def read_stock_file(
+    path: str,
+    sku_column: str = "sku",
+    quantity_column: str = "quantity",
+) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+    """
+    קורא קובץ רמות מלאי: CSV עם עמודות SKU וכמות, NDJSON (אובייקט לכל שורה)
+    או קובץ JSON עם מילון SKU -> כמות.
+
+    Args:
+        path: נתיב הקובץ (אפשר גם ‎.gz).
+        sku_column: שם עמודת ה-SKU.
+        quantity_column: שם עמודת הכמות.
+
+    Returns:
+        Tuple: מילון SKU -> כמות (SKU כפול: השורה האחרונה קובעת) ושגיאות שורות.
+    """
+    if not os.path.isfile(path):
+        raise WordPressError(f"Stock file not found: {path}")
+
+    levels: Dict[str, int] = {}
+    errors: List[Dict[str, Any]] = []
+
+    def add(row_number: int, sku: Any, quantity: Any) -> None:
+        try:
+            if sku in (None, ""):
+                raise ValueError("Missing SKU")
+            levels[str(sku).strip()] = _quantity(quantity)
+        except (TypeError, ValueError) as e:
+            errors.append({"row": row_number, "sku": sku, "message": str(e)})
+
+    file_format = detect_format(path)
+    with open_text(path) as f:
+        if file_format == "csv":
+            # שורה 1 היא שורת הכותרות
+            for row_number, row in enumerate(csv.DictReader(f), start=2):
+                add(row_number, row.get(sku_column), row.get(quantity_column))
+            return levels, errors
+
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        for row_number, (sku, quantity) in enumerate(data.items(), start=1):
+            add(row_number, sku, quantity)
+        return levels, errors
+
+    for row_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            errors.append({"row": row_number, "message": "Invalid JSON"})
+            continue
+        if not isinstance(row, dict):
+            errors.append({"row": row_number, "message": "Row must be a JSON object"})
+            continue
+        add(row_number, row.get(sku_column), row.get(quantity_column))
+    return levels, errors
+
+
+async def _fetch_stock(
+    client: httpx.AsyncClient,
+    path: str,
+    ids: List[int],
+) -> Dict[int, Dict[str, Any]]:
+    items: Dict[int, Dict[str, Any]] = {}
+    for chunk in chunked(ids, BATCH_LIMIT):
+        params = {"include": ",".join(str(i) for i in chunk), "_fields": STOCK_FIELDS}
+        if path == "/products":
+            params["status"] = "any"
+        for item in await fetch_all(client, path, params, per_page=BATCH_LIMIT):
+            items[item["id"]] = item
+    return items
+
+
+def _stock_update(item_id: int, quantity: int, current: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    מחזיר את העדכון הדרוש לפריט, או None אם הכמות כבר נכונה.
+
+    לא נקרא עבור וריאציה שהמלאי שלה מנוהל במוצר האב (manage_stock == "parent").
+    """
+    managed = current is not None and current.get("manage_stock") is True
+    if managed and current.get("stock_quantity") == quantity:
+        return None
+    update: Dict[str, Any] = {"id": item_id, "stock_quantity": quantity}
+    # בלי ניהול מלאי ברמת הפריט WooCommerce מתעלם מהכמות
+    if not managed:
+        update["manage_stock"] = True
+    return update
+
+
+async def update_stock(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    levels: Dict[str, int],
+    dry_run: bool = False,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """
+    מעדכן רמות מלאי לפי SKU.
+
+    מוצרים פשוטים מקובצים לבקשות batch של /products, ווריאציות מקובצות לפי
+    מוצר האב לבקשות batch של /products/{id}/variations. פריטים שהכמות שלהם
+    כבר נכונה (ומלאי מנוהל בהם) לא נשלחים. וריאציות שהמלאי שלהן מנוהל במוצר
+    האב אינן מעודכנות ומדווחות ב-parent_managed.
+
+    Args:
+        store: פרופיל החנות.
+        client: לקוח WooCommerce פתוח.
+        levels: מילון SKU -> כמות.
+        dry_run: החזרת התוכנית בלבד, ללא שינויים.
+        concurrency: מספר הבקשות במקביל.
+
+    Returns:
+        Dict[str, Any]: סיכום: SKU שלא נמצאו, פריטים ללא שינוי, עדכונים ושגיאות.
+    """
+    resolved = await find_skus(store, client, list(levels))
+
+    products: Dict[int, int] = {}
+    variations: Dict[int, Dict[int, int]] = {}
+    variation_skus: Dict[int, Tuple[str, int]] = {}
+    for sku, entry in resolved["found"].items():
+        if entry["variation_id"] is None:
+            products[entry["product_id"]] = levels[sku]
+        else:
+            variations.setdefault(entry["product_id"], {})[entry["variation_id"]] = levels[sku]
+            variation_skus[entry["variation_id"]] = (sku, entry["product_id"])
+
+    # הכמויות הנוכחיות: חלק אחד למוצרים וחלק לכל מוצר אב, במקביל
+    groups: List[Tuple[str, Dict[int, int]]] = [("/products", products)] if products else []
+    groups += [(f"/products/{parent_id}/variations", items) for parent_id, items in sorted(variations.items())]
+    current = await gather_limited((_fetch_stock(client, path, list(items)) for path, items in groups), concurrency)
+
+    plan: List[Tuple[str, List[Dict[str, Any]]]] = []
+    unchanged = 0
+    parent_managed: List[Dict[str, Any]] = []
+    for (path, items), existing in zip(groups, current):
+        updates = []
+        for item_id, quantity in items.items():
+            # המלאי של הוריאציה משותף למוצר האב; הפעלת ניהול מלאי בוריאציה הייתה
+            # מנתקת אותה מהמלאי המשותף, ולכן השורה מדולגת ויש לעדכן את ה-SKU של האב
+            if (existing.get(item_id) or {}).get("manage_stock") == "parent":
+                sku, parent_id = variation_skus[item_id]
+                parent_managed.append({"sku": sku, "product_id": parent_id, "variation_id": item_id, "quantity": quantity})
+                continue
+            update = _stock_update(item_id, quantity, existing.get(item_id))
+            if update is None:
+                unchanged += 1
+            else:
+                updates.append(update)
+        if updates:
+            plan.append((path, updates))
+
+    result: Dict[str, Any] = {
+        "requested": len(levels),
+        "missing": resolved["missing"],
+        "unchanged": unchanged,
+        "parent_managed": parent_managed,
+        "to_update": sum(len(updates) for _, updates in plan),
+        "batches": sum(-(-len(updates) // BATCH_LIMIT) for _, updates in plan),
+        "dry_run": dry_run,
+    }
+    if dry_run:
+        result["plan"] = {path: updates for path, updates in plan}
+        return result
+
+    summaries = await gather_limited(
+        (apply_batch(client, path, update=updates, concurrency=concurrency) for path, updates in plan),
+        concurrency,
+    )
+    errors: List[Dict[str, Any]] = []
+    for (path, _), summary in zip(plan, summaries):
+        errors.extend({"path": path, **error} for error in summary["errors"])
+    result.update({
+        "updated": sum(summary["updated"] for summary in summaries),
+        "failed": sum(summary["failed"] for summary in summaries),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    })
+    return result
+
+
+def register_inventory_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לניהול מלאי.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def update_stock_levels(
+        levels: Optional[Dict[str, int]] = None,
+        file_path: Optional[str] = None,
+        sku_column: str = "sku",
+        quantity_column: str = "quantity",
+        dry_run: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מעדכן רמות מלאי של אלפי מוצרים ווריאציות לפי SKU, דרך בקשות batch.
+
+        רק פריטים שהכמות שלהם משתנה נשלחים; בפריט שהמלאי בו אינו מנוהל
+        מופעל גם manage_stock. וריאציות שהמלאי שלהן מנוהל במוצר האב מדולגות
+        ומוחזרות ב-parent_managed - יש לעדכן את ה-SKU של מוצר האב.
+
+        Args:
+            levels: מילון SKU -> כמות.
+            file_path: קובץ CSV, NDJSON או JSON עם רמות המלאי (נוסף ל-levels).
+            sku_column: שם עמודת ה-SKU בקובץ.
+            quantity_column: שם עמודת הכמות בקובץ.
+            dry_run: החזרת התוכנית בלבד, ללא שינויים.
+            concurrency: מספר הבקשות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום: SKU שלא נמצאו, פריטים ללא שינוי, עודכנו, נכשלו ושגיאות.
+        """
+        all_levels: Dict[str, int] = {}
+        invalid: List[Dict[str, Any]] = []
+        if file_path:
+            all_levels, invalid = read_stock_file(file_path, sku_column, quantity_column)
+        for sku, quantity in (levels or {}).items():
+            try:
+                all_levels[sku] = _quantity(quantity)
+            except (TypeError, ValueError) as e:
+                invalid.append({"sku": sku, "message": str(e)})
+        if not all_levels:
+            raise WordPressError("No stock levels to update: provide levels or file_path")
+
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            result = await update_stock(store, client, all_levels, dry_run, concurrency)
+        result["invalid"] = invalid[:MAX_REPORTED_ERRORS]
+        return result
@@ -0,0 +1,343 @@
+"""
+מודול להרצת פעולות מרוכזות ארוכות כמשימות רקע, עם שמירת מצב ב-SQLite.
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP
+
+from .coupons import bulk_generate_coupons
+from .exports import export_resource
+from .imports import import_file
+from .product_variations import fetch_catalog_variations
+from .utils import WordPressError, get_data_dir
+from .profiles import StoreProfile, resolve_store
+
+# סוגי המשימות הזמינים: פונקציה אסינכרונית שמקבלת לקוח WooCommerce כפרמטר ראשון
+# ו-progress כפרמטר מפתח, יחד עם פרמטרים קבועים לכל סוג
+JOB_KINDS: Dict[str, Tuple[Callable[..., Any], Dict[str, Any]]] = {
+    "export_orders": (export_resource, {"resource": "orders"}),
+    "export_products": (export_resource, {"resource": "products"}),
+    "export_customers": (export_resource, {"resource": "customers"}),
+    "import_products": (import_file, {"resource": "products"}),
+    "import_customers": (import_file, {"resource": "customers"}),
+    "import_coupons": (import_file, {"resource": "coupons"}),
+    "catalog_variations": (fetch_catalog_variations, {}),
+    "generate_coupons": (bulk_generate_coupons, {}),
+}
+
+# סטטוסים שמהם אפשר להפעיל משימה מחדש
+RESUMABLE_STATUSES = ("interrupted", "failed", "cancelled")
+
+# מרווח מינימלי (בשניות) בין שמירות של מצב ההתקדמות למסד הנתונים
+PROGRESS_FLUSH_INTERVAL = 1.0
+
+
+def register_job_kind(kind: str, func: Callable[..., Any], **fixed: Any) -> None:
+    """
+    רישום סוג משימה נוסף שניתן להריץ ברקע.
+
+    Args:
+        kind: שם סוג המשימה.
+        func: פונקציה אסינכרונית שמקבלת לקוח WooCommerce, פרמטרים ו-progress.
+        fixed: פרמטרים קבועים שיועברו לפונקציה בכל הרצה.
+    """
+    JOB_KINDS[kind] = (func, fixed)
+
+
+class JobManager:
+    """
+    מנהל משימות רקע בתוך התהליך.
+
+    כל משימה רצה כ-asyncio.Task, ומצבה (פרמטרים, התקדמות, תוצאה) נשמר ב-SQLite.
+    משימות שרצו בזמן שהתהליך נעצר מסומנות כ-"interrupted" בעלייה הבאה וניתן
+    להפעיל אותן מחדש; משימות ייבוא ממשיכות אז מנקודת הביקורת שלהן.
+    """
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                site_url TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "UPDATE jobs SET status = 'interrupted', updated_at = ? WHERE status IN ('pending', 'running')",
+            (time.time(),),
+        )
+        self._db.commit()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._last_flush: Dict[str, float] = {}
+
+    def _update(self, job_id: str, **values: Any) -> None:
+        for key in ("params", "progress", "result"):
+            if key in values and values[key] is not None:
+                values[key] = json.dumps(values[key], ensure_ascii=False)
+        values["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        self._db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values.values(), job_id))
+        self._db.commit()
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """
+        מחזיר את מצב המשימה.
+
+        Raises:
+            WordPressError: אם המשימה לא קיימת.
+        """
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise WordPressError(f"Job not found: {job_id}", "job_not_found")
+
+        job = dict(row)
+        for key in ("params", "progress", "result"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def list(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """מחזיר את המשימות האחרונות, לפי סטטוס אופציונלי."""
+        query = "SELECT id FROM jobs"
+        args: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        return [self.get(row["id"]) for row in self._db.execute(query, args).fetchall()]
+
+    def start(self, kind: str, params: Dict[str, Any], store: StoreProfile) -> Dict[str, Any]:
+        """
+        יוצר משימה חדשה ומפעיל אותה ברקע.
+
+        Args:
+            kind: סוג המשימה.
+            params: פרמטרים לפונקציית המשימה.
+            store: פרופיל החנות שעליה תרוץ המשימה.
+
+        Returns:
+            Dict[str, Any]: מצב המשימה שנוצרה.
+
+        Raises:
+            WordPressError: אם סוג המשימה או הפרמטרים אינם תקינים.
+        """
+        if kind not in JOB_KINDS:
+            raise WordPressError(f"Unknown job kind: {kind} (available: {', '.join(sorted(JOB_KINDS))})")
+
+        func, fixed = JOB_KINDS[kind]
+        try:
+            inspect.signature(func).bind(None, **fixed, **params)
+        except TypeError as e:
+            raise WordPressError(f"Invalid parameters for job {kind}: {e}")
+
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        # פרטי ההתחברות הסודיים אינם נשמרים; רק כתובת האתר
+        self._db.execute(
+            "INSERT INTO jobs (id, kind, site_url, params, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+            (job_id, kind, store.site_url, json.dumps(params, ensure_ascii=False), now, now),
+        )
+        self._db.commit()
+        self._launch(job_id, kind, params, store)
+        return self.get(job_id)
+
+    def resume(self, job_id: str, store: StoreProfile) -> Dict[str, Any]:
+        """
+        מפעיל מחדש משימה שנקטעה, נכשלה או בוטלה, עם אותם פרמטרים.
+
+        Raises:
+            WordPressError: אם המשימה עדיין רצה או הסתיימה בהצלחה.
+        """
+        job = self.get(job_id)
+        if job["status"] not in RESUMABLE_STATUSES:
+            raise WordPressError(f"Job {job_id} cannot be resumed from status {job['status']}")
+        if store.site_url != job["site_url"]:
+            raise WordPressError(f"Job {job_id} belongs to {job['site_url']}")
+
+        self._update(job_id, status="pending", error=None)
+        self._launch(job_id, job["kind"], job["params"], store)
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        מבטל משימה פעילה או ממתינה.
+
+        Raises:
+            WordPressError: אם המשימה כבר הסתיימה.
+        """
+        job = self.get(job_id)
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            self._update(job_id, status="cancelling")
+        elif job["status"] == "interrupted":
+            self._update(job_id, status="cancelled")
+        else:
+            raise WordPressError(f"Job {job_id} is not running (status: {job['status']})")
+        return self.get(job_id)
+
+    def _launch(self, job_id: str, kind: str, params: Dict[str, Any], store: StoreProfile) -> None:
+        task = asyncio.create_task(self._run(job_id, kind, params, store))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda t: self._on_done(job_id, t))
+
+    def _on_done(self, job_id: str, task: asyncio.Task) -> None:
+        self._tasks.pop(job_id, None)
+        self._last_flush.pop(job_id, None)
+        # ביטול מסומן כאן, כך שגם משימה שבוטלה לפני שהתחילה לרוץ תסומן כמבוטלת
+        if task.cancelled():
+            self._update(job_id, status="cancelled")
+
+    async def _run(self, job_id: str, kind: str, params: Dict[str, Any], store: StoreProfile) -> None:
+        func, fixed = JOB_KINDS[kind]
+
+        def progress(state: Dict[str, Any]) -> None:
+            now = time.monotonic()
+            if now - self._last_flush.get(job_id, 0.0) >= PROGRESS_FLUSH_INTERVAL:
+                self._last_flush[job_id] = now
+                self._update(job_id, progress=state)
+
+        self._update(job_id, status="running")
+        try:
+            async with store.client() as client:
+                result = await func(client, **fixed, **params, progress=progress)
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e))
+        else:
+            self._update(job_id, status="completed", result=result)
+
+
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """מחזיר את מנהל המשימות של התהליך, ויוצר אותו בקריאה הראשונה."""
+    global _manager
+    if _manager is None:
+        _manager = JobManager(os.path.join(get_data_dir(), "jobs.sqlite3"))
+    return _manager
+
+
+def register_job_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לניהול משימות רקע.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def start_job(
+        kind: str,
+        params: Optional[Dict[str, Any]] = None,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מפעיל פעולה מרוכזת (ייצוא, ייבוא וכו') כמשימת רקע ומחזיר מיד את מזהה המשימה.
+
+        Args:
+            kind: סוג המשימה (export_orders, export_products, export_customers,
+                import_products, import_customers, import_coupons, catalog_variations,
+                generate_coupons).
+            params: פרמטרים לפעולה, כמו בכלי המקביל (למשל file_path או filters).
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: מצב המשימה שנוצרה.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        return get_job_manager().start(kind, params or {}, store)
+
+    @mcp.tool()
+    async def get_job_status(job_id: str) -> Dict[str, Any]:
+        """
+        מחזיר את מצב משימת הרקע, ההתקדמות שלה והתוצאה (בסיום).
+
+        Args:
+            job_id: מזהה המשימה.
+
+        Returns:
+            Dict[str, Any]: מצב המשימה.
+        """
+        return get_job_manager().get(job_id)
+
+    @mcp.tool()
+    async def list_jobs(
+        status: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        מחזיר את משימות הרקע האחרונות.
+
+        Args:
+            status: סינון לפי סטטוס (pending, running, completed, failed, cancelled, interrupted).
+            limit: מספר המשימות המרבי להחזרה.
+
+        Returns:
+            List[Dict[str, Any]]: רשימת המשימות.
+        """
+        return get_job_manager().list(status, limit)
+
+    @mcp.tool()
+    async def cancel_job(job_id: str) -> Dict[str, Any]:
+        """
+        מבטל משימת רקע פעילה.
+
+        Args:
+            job_id: מזהה המשימה.
+
+        Returns:
+            Dict[str, Any]: מצב המשימה לאחר הביטול.
+        """
+        return get_job_manager().cancel(job_id)
+
+    @mcp.tool()
+    async def resume_job(
+        job_id: str,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מפעיל מחדש משימה שנקטעה (למשל בהפעלה מחדש של השרת), נכשלה או בוטלה.
+
+        Args:
+            job_id: מזהה המשימה.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: מצב המשימה.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        return get_job_manager().resume(job_id, store)
@@ -0,0 +1,482 @@
+"""
+מודול לטבלת שורות הזמנה מנורמלת לשאלות מרצ'נדייזינג.
+
+כל שורת הזמנה נשמרת כשורה אחת (תאריך, סטטוס, מוצר, וריאציה, כמות וסכומים)
+במערכים עמודתיים בזיכרון, לכל חנות. הטבלה נבנית מסריקה זורמת של ההזמנות
+ומתעדכנת בהדרגה לפי modified_after. שאילתות קיבוץ וחלוקה לתקופות רצות
+בקוד וקטורי עם numpy כשהוא מותקן (pip install 'woocommerce-mcp[analytics]'),
+ובלולאת Python רגילה אחרת.
+"""
+
+import time
+from array import array
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import WordPressError, iter_pages
+from .profiles import StoreProfile, resolve_store
+from .customer_stats import PAID_STATUSES
+from .sku_index import normalize_sku
+
+# מפתח הטבלה במטמונים של החנות
+LINE_ITEMS_CACHE = "line_items"
+
+# גיל מרבי (בשניות) של הטבלה לפני רענון אוטומטי
+LINE_ITEMS_TTL = 300
+
+LINE_ITEM_ORDER_FIELDS = "id,status,date_created_gmt,date_modified_gmt,line_items"
+
+LINE_ITEM_GROUPS = ("product", "variation", "sku", "status", "period")
+LINE_ITEM_PERIODS = ("day", "week", "month")
+LINE_ITEM_METRICS = ("quantity", "total", "subtotal", "orders", "lines")
+
+# מספר השורות המחוקות (מהזמנות שהשתנו) שמעליו הטבלה נדחסת
+_COMPACT_MIN_DEAD = 1000
+
+# date(1970, 1, 1).toordinal(): ההפרש בין מספר יום סידורי לימים מאז 1970 ב-numpy
+_EPOCH_ORDINAL = 719163
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _parse_day(value: str) -> date:
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise WordPressError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+
+
+def _period_start(ordinal: int, period: str) -> int:
+    """תחילת התקופה (יום סידורי) של יום: היום עצמו, יום שני של השבוע או 1 בחודש."""
+    if period == "week":
+        return ordinal - (ordinal - 1) % 7
+    if period == "month":
+        return date.fromordinal(ordinal).replace(day=1).toordinal()
+    return ordinal
+
+
+class LineItemStore:
+    """שורות הזמנה במערכים עמודתיים, עם מחיקה רכה של שורות של הזמנות שהשתנו."""
+
+    def __init__(self):
+        self.last_modified: Optional[str] = None
+        self.refreshed_at = 0.0
+        self.product_names: Dict[int, str] = {}
+        self._statuses: List[str] = []
+        self._skus: List[str] = []
+        self._codes: Dict[Tuple[str, str], int] = {}
+        self.clear()
+
+    def clear(self) -> None:
+        self.order_id = array("q")
+        self.day = array("i")
+        self.status = array("i")
+        self.product_id = array("q")
+        self.variation_id = array("q")
+        self.sku = array("i")
+        self.quantity = array("d")
+        self.subtotal = array("d")
+        self.total = array("d")
+        self.alive = array("b")
+        self._rows: Dict[int, List[int]] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self.order_id) - self._dead
+
+    def _code(self, kind: str, value: str) -> int:
+        values = self._statuses if kind == "status" else self._skus
+        code = self._codes.get((kind, value))
+        if code is None:
+            code = self._codes[(kind, value)] = len(values)
+            values.append(value)
+        return code
+
+    def _remove(self, order_id: int) -> None:
+        for row in self._rows.pop(order_id, []):
+            self.alive[row] = 0
+            self._dead += 1
+
+    def upsert(self, orders: List[Dict[str, Any]]) -> None:
+        """מחליף את שורות ההזמנות הנתונות בשורות העדכניות שלהן."""
+        for order in orders:
+            self._remove(order["id"])
+            created = (order.get("date_created_gmt") or "")[:10]
+            if not created:
+                continue
+            ordinal = date.fromisoformat(created).toordinal()
+            status = self._code("status", order.get("status") or "")
+            rows = self._rows[order["id"]] = []
+            for item in order.get("line_items") or []:
+                rows.append(len(self.order_id))
+                self.order_id.append(order["id"])
+                self.day.append(ordinal)
+                self.status.append(status)
+                self.product_id.append(item.get("product_id") or 0)
+                self.variation_id.append(item.get("variation_id") or 0)
+                self.sku.append(self._code("sku", item.get("sku") or ""))
+                self.quantity.append(float(item.get("quantity") or 0))
+                self.subtotal.append(float(item.get("subtotal") or 0))
+                self.total.append(float(item.get("total") or 0))
+                self.alive.append(1)
+                if item.get("product_id") and item.get("name"):
+                    self.product_names[item["product_id"]] = item["name"]
+        if self._dead > _COMPACT_MIN_DEAD and self._dead * 2 > len(self.order_id):
+            self._compact()
+
+    def _compact(self) -> None:
+        columns = ("order_id", "day", "status", "product_id", "variation_id", "sku", "quantity", "subtotal", "total")
+        keep = [row for row, alive in enumerate(self.alive) if alive]
+        for name in columns:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[row] for row in keep)))
+        self.alive = array("b", [1]) * len(keep)
+        self._rows = {}
+        for row, order_id in enumerate(self.order_id):
+            self._rows.setdefault(order_id, []).append(row)
+        self._dead = 0
+
+    async def refresh(self, client: httpx.AsyncClient, full: bool = False) -> Dict[str, Any]:
+        """
+        מושך הזמנות שהשתנו מאז הרענון הקודם (או את כולן ברענון מלא) ומעדכן את שורותיהן.
+
+        ברענון הדרגתי נמשכות גם הזמנות שהועברו לפח מאז (status=any אינו כולל
+        אותן), והשורות שלהן מוסרות.
+
+        Returns:
+            Dict[str, Any]: סוג הרענון, מספר ההזמנות שנמשכו והוסרו ומספר השורות בטבלה.
+        """
+        since = None if full else self.last_modified
+        params: Dict[str, Any] = {"_fields": LINE_ITEM_ORDER_FIELDS, "status": "any"}
+        if since:
+            params.update({"modified_after": since, "dates_are_gmt": "true"})
+        else:
+            self.clear()
+
+        orders = 0
+        latest = since or ""
+        async for response in iter_pages(client, "/orders", params):
+            page = response.json()
+            self.upsert(page)
+            orders += len(page)
+            latest = max([latest] + [order.get("date_modified_gmt") or "" for order in page])
+
+        removed = 0
+        if since:
+            trash_params = {"_fields": "id", "status": "trash", "modified_after": since, "dates_are_gmt": "true"}
+            async for response in iter_pages(client, "/orders", trash_params):
+                for order in response.json():
+                    removed += order["id"] in self._rows
+                    self._remove(order["id"])
+
+        self.last_modified = latest or None
+        self.refreshed_at = time.monotonic()
+        return {"mode": "incremental" if since else "full", "orders": orders, "removed": removed, "rows": len(self)}
+
+    def query(
+        self,
+        group_by: Sequence[str] = ("product",),
+        period: str = "day",
+        date_min: Optional[date] = None,
+        date_max: Optional[date] = None,
+        statuses: Sequence[str] = PAID_STATUSES,
+        product_ids: Optional[Sequence[int]] = None,
+        skus: Optional[Sequence[str]] = None,
+        with_product: Optional[int] = None,
+        sort: str = "quantity",
+        limit: Optional[int] = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        מקבץ את שורות ההזמנה ומחזיר כמות, סכומים, מספר הזמנות ומספר שורות לכל קבוצה.
+
+        Args:
+            group_by: שדות קיבוץ מתוך product, variation, sku, status, period.
+            period: גודל התקופה לקיבוץ period (day, week, month).
+            date_min: תאריך יצירה מינימלי (כולל).
+            date_max: תאריך יצירה מרבי (כולל).
+            statuses: סטטוסי הזמנה שנכללים.
+            product_ids: הגבלה למוצרים או וריאציות.
+            skus: הגבלה ל-SKU.
+            with_product: רק הזמנות שכוללות את המוצר (או הוריאציה), בלי השורות שלו עצמו.
+            sort: מדד המיון (quantity, total, subtotal, orders, lines).
+            limit: מספר הקבוצות המרבי.
+
+        Returns:
+            List[Dict[str, Any]]: שורה לכל קבוצה עם שדות הקיבוץ והמדדים.
+        """
+        unknown = [field for field in group_by if field not in LINE_ITEM_GROUPS]
+        if unknown:
+            raise WordPressError(f"Unsupported group_by: {', '.join(unknown)} (available: {', '.join(LINE_ITEM_GROUPS)})")
+        if period not in LINE_ITEM_PERIODS:
+            raise WordPressError(f"Unsupported period: {period}")
+        if sort not in LINE_ITEM_METRICS:
+            raise WordPressError(f"Unsupported sort: {sort}")
+
+        # variation מקובץ תמיד יחד עם המוצר שלה
+        fields = [field for field in LINE_ITEM_GROUPS if field in group_by or (field == "product" and "variation" in group_by)]
+        wanted_skus = {normalize_sku(sku) for sku in skus} if skus else None
+        filters = {
+            "day_min": date_min.toordinal() if date_min else None,
+            "day_max": date_max.toordinal() if date_max else None,
+            "statuses": {self._codes[("status", s)] for s in statuses if ("status", s) in self._codes},
+            "ids": set(product_ids) if product_ids else None,
+            "skus": {code for code, sku in enumerate(self._skus) if normalize_sku(sku) in wanted_skus}
+            if wanted_skus is not None else None,
+        }
+
+        np = _numpy()
+        groups = self._query_numpy(np, fields, period, filters, with_product) if np else \
+            self._query_python(fields, period, filters, with_product)
+
+        rows = []
+        for key, metrics in groups:
+            row: Dict[str, Any] = {}
+            for field, value in zip(fields, key):
+                if field == "product":
+                    row.update(product_id=value, name=self.product_names.get(value))
+                elif field == "variation":
+                    row["variation_id"] = value
+                elif field == "sku":
+                    row["sku"] = self._skus[value]
+                elif field == "status":
+                    row["status"] = self._statuses[value]
+                else:
+                    row["period"] = date.fromordinal(value).isoformat()
+            row.update(metrics)
+            rows.append(row)
+        rows.sort(key=lambda row: -row[sort])
+        return rows[:limit] if limit else rows
+
+    def _key_value(self, field: str, row: int, period: str) -> int:
+        if field == "period":
+            return _period_start(self.day[row], period)
+        column = {"product": self.product_id, "variation": self.variation_id, "sku": self.sku, "status": self.status}
+        return column[field][row]
+
+    def _query_python(self, fields, period, filters, with_product):
+        with_orders = None
+        if with_product is not None:
+            with_orders = {
+                self.order_id[row] for row in range(len(self.order_id))
+                if self.alive[row] and with_product in (self.product_id[row], self.variation_id[row])
+            }
+
+        groups: Dict[Tuple[int, ...], List[Any]] = {}
+        for row in range(len(self.order_id)):
+            if not self.alive[row] or self.status[row] not in filters["statuses"]:
+                continue
+            if filters["day_min"] is not None and self.day[row] < filters["day_min"]:
+                continue
+            if filters["day_max"] is not None and self.day[row] > filters["day_max"]:
+                continue
+            ids = (self.product_id[row], self.variation_id[row])
+            if filters["ids"] is not None and not filters["ids"].intersection(ids):
+                continue
+            if filters["skus"] is not None and self.sku[row] not in filters["skus"]:
+                continue
+            if with_orders is not None and (self.order_id[row] not in with_orders or with_product in ids):
+                continue
+            key = tuple(self._key_value(field, row, period) for field in fields)
+            group = groups.setdefault(key, [0.0, 0.0, 0.0, set(), 0])
+            group[0] += self.quantity[row]
+            group[1] += self.total[row]
+            group[2] += self.subtotal[row]
+            group[3].add(self.order_id[row])
+            group[4] += 1
+
+        return [
+            (key, {"quantity": q, "total": round(t, 2), "subtotal": round(s, 2), "orders": len(o), "lines": n})
+            for key, (q, t, s, o, n) in groups.items()
+        ]
+
+    def _query_numpy(self, np, fields, period, filters, with_product):
+        order_id = np.frombuffer(self.order_id, dtype=np.int64)
+        day = np.frombuffer(self.day, dtype=np.int32).astype(np.int64)
+        product_id = np.frombuffer(self.product_id, dtype=np.int64)
+        variation_id = np.frombuffer(self.variation_id, dtype=np.int64)
+        sku = np.frombuffer(self.sku, dtype=np.int32).astype(np.int64)
+        status = np.frombuffer(self.status, dtype=np.int32).astype(np.int64)
+        if not len(order_id):
+            return []
+
+        mask = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+        mask &= np.isin(status, list(filters["statuses"]))
+        if filters["day_min"] is not None:
+            mask &= day >= filters["day_min"]
+        if filters["day_max"] is not None:
+            mask &= day <= filters["day_max"]
+        if filters["ids"] is not None:
+            ids = list(filters["ids"])
+            mask &= np.isin(product_id, ids) | np.isin(variation_id, ids)
+        if filters["skus"] is not None:
+            mask &= np.isin(sku, list(filters["skus"]))
+        if with_product is not None:
+            own = (product_id == with_product) | (variation_id == with_product)
+            with_orders = np.unique(order_id[own & np.frombuffer(self.alive, dtype=np.int8).astype(bool)])
+            mask &= np.isin(order_id, with_orders) & ~own
+        if not mask.any():
+            return []
+
+        if "period" in fields:
+            if period == "week":
+                period_day = day - (day - 1) % 7
+            elif period == "month":
+                months = (day - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]")
+                period_day = months.astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+            else:
+                period_day = day
+        columns = {"product": product_id, "variation": variation_id, "sku": sku, "status": status}
+        keys = np.stack(
+            [(period_day if field == "period" else columns[field])[mask] for field in fields]
+            or [np.zeros(int(mask.sum()), dtype=np.int64)],
+            axis=1,
+        )
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        count = len(unique)
+
+        quantity = np.bincount(inverse, weights=np.frombuffer(self.quantity)[mask], minlength=count)
+        total = np.bincount(inverse, weights=np.frombuffer(self.total)[mask], minlength=count)
+        subtotal = np.bincount(inverse, weights=np.frombuffer(self.subtotal)[mask], minlength=count)
+        lines = np.bincount(inverse, minlength=count)
+        # הזמנות שונות לכל קבוצה: זוגות (קבוצה, הזמנה) ייחודיים
+        pairs = np.unique(np.stack([inverse, order_id[mask]], axis=1), axis=0)
+        orders = np.bincount(pairs[:, 0], minlength=count)
+
+        return [
+            (
+                tuple(int(value) for value in unique[i]) if fields else (),
+                {
+                    "quantity": float(quantity[i]),
+                    "total": round(float(total[i]), 2),
+                    "subtotal": round(float(subtotal[i]), 2),
+                    "orders": int(orders[i]),
+                    "lines": int(lines[i]),
+                },
+            )
+            for i in range(count)
+        ]
+
+
+async def get_line_item_store(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    refresh: bool = False,
+) -> LineItemStore:
+    """מחזיר את טבלת שורות ההזמנה של החנות, ובונה או מעדכן אותה לפי הצורך."""
+    items = store.caches.get(LINE_ITEMS_CACHE)
+    if items is None:
+        items = store.caches[LINE_ITEMS_CACHE] = LineItemStore()
+    if refresh or not items.refreshed_at:
+        await items.refresh(client, full=True)
+    elif time.monotonic() - items.refreshed_at > LINE_ITEMS_TTL:
+        await items.refresh(client)
+    return items
+
+
+def register_line_item_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לניתוח שורות הזמנה.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def query_line_items(
+        group_by: Optional[List[str]] = None,
+        period: str = "day",
+        date_min: Optional[str] = None,
+        date_max: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        product_ids: Optional[List[int]] = None,
+        skus: Optional[List[str]] = None,
+        with_product: Optional[int] = None,
+        sort: str = "quantity",
+        limit: int = 100,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מנתח שורות הזמנה מטבלה מקומית: יחידות וסכומים לפי מוצר, וריאציה, SKU, סטטוס ותקופה.
+
+        לדוגמה: יחידות לכל SKU לכל יום (group_by=["sku", "period"]), או מה נמכר
+        יחד עם מוצר (with_product=12, group_by=["product"]).
+
+        Args:
+            group_by: שדות קיבוץ: product, variation, sku, status, period (ברירת מחדל: product).
+            period: גודל התקופה לקיבוץ period (day, week, month).
+            date_min: תאריך יצירה מינימלי (YYYY-MM-DD, כולל).
+            date_max: תאריך יצירה מרבי (YYYY-MM-DD, כולל).
+            statuses: סטטוסי הזמנה (ברירת מחדל: processing, completed).
+            product_ids: הגבלה למוצרים או וריאציות.
+            skus: הגבלה ל-SKU.
+            with_product: רק הזמנות שכוללות את המוצר, בלי השורות שלו עצמו.
+            sort: מדד המיון (quantity, total, subtotal, orders, lines).
+            limit: מספר הקבוצות המרבי.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: שורה לכל קבוצה, מספר השורות בטבלה והמנוע שחישב (numpy או python).
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            items = await get_line_item_store(store, client)
+
+        rows = items.query(
+            group_by or ["product"],
+            period,
+            _parse_day(date_min) if date_min else None,
+            _parse_day(date_max) if date_max else None,
+            statuses or PAID_STATUSES,
+            product_ids,
+            skus,
+            with_product,
+            sort,
+            limit,
+        )
+        return {"rows": rows, "line_items": len(items), "engine": "numpy" if _numpy() else "python"}
+
+    @mcp.tool()
+    async def refresh_line_items(
+        full: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מעדכן את טבלת שורות ההזמנה המקומית (רק הזמנות שהשתנו, או בנייה מלאה).
+
+        Args:
+            full: בנייה מחדש מלאה במקום עדכון הדרגתי.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סוג הרענון, מספר ההזמנות שנמשכו ומספר השורות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            items = store.caches.get(LINE_ITEMS_CACHE)
+            if items is None:
+                items = store.caches[LINE_ITEMS_CACHE] = LineItemStore()
+            return await items.refresh(client, full=full or not items.refreshed_at)
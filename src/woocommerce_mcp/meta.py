@@ -0,0 +1,281 @@
+"""
+מודול לקריאה וכתיבה מרוכזות של מטא-דאטה עבור מוצרים, הזמנות ולקוחות.
+
+הקריאה מבקשת רק את השדות id,meta_data (בחלקים מקבילים), והכתיבה נשלחת דרך
+נקודות ה-batch, כך שעדכון מפתח אחד באלפי פריטים דורש מספר קטן של בקשות.
+"""
+
+from typing import Any, Dict, List, Optional, Union
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import BATCH_LIMIT, WordPressError, apply_batch, chunked, fetch_all, gather_limited
+from .profiles import resolve_store
+
+# משאבים שתומכים בפעולות מטא-דאטה מרוכזות
+META_RESOURCES = {
+    "products": "/products",
+    "orders": "/orders",
+    "customers": "/customers",
+}
+
+META_FIELDS = "id,meta_data"
+
+
+def _resource_path(resource: str) -> str:
+    if resource not in META_RESOURCES:
+        raise WordPressError(
+            f"Unsupported meta resource: {resource} (available: {', '.join(META_RESOURCES)})"
+        )
+    return META_RESOURCES[resource]
+
+
+async def fetch_meta(
+    client: httpx.AsyncClient,
+    resource: str,
+    ids: Optional[List[int]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    concurrency: int = 8,
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    מחזיר את המטא-דאטה הגולמי (רשימות id/key/value) של פריטים לפי מזהים או מסננים.
+
+    מזהים נשלפים בחלקים של עד 100 בעזרת הפרמטר include, במקביל; מסננים נשלפים
+    עם טעינה מקבילית של העמודים.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        resource: products, orders או customers.
+        ids: מזהי הפריטים.
+        filters: מסננים (כשלא הועברו מזהים).
+        concurrency: מספר הבקשות במקביל.
+
+    Returns:
+        Dict[int, List[Dict[str, Any]]]: המטא-דאטה לפי מזהה פריט.
+    """
+    path = _resource_path(resource)
+    if ids is None and filters is None:
+        raise WordPressError("Either ids or filters is required")
+
+    if ids is None:
+        items = await fetch_all(client, path, {**filters, "_fields": META_FIELDS}, concurrency=concurrency)
+    else:
+        async def fetch(chunk: List[int]) -> List[Dict[str, Any]]:
+            params = {**(filters or {}), "include": ",".join(str(i) for i in chunk), "_fields": META_FIELDS}
+            return await fetch_all(client, path, params, per_page=BATCH_LIMIT)
+
+        pages = await gather_limited((fetch(chunk) for chunk in chunked(ids, BATCH_LIMIT)), concurrency)
+        items = [item for page in pages for item in page]
+
+    return {item["id"]: item.get("meta_data") or [] for item in items}
+
+
+def meta_values(meta_data: List[Dict[str, Any]], keys: Optional[List[str]] = None) -> Dict[str, Any]:
+    """ממיר רשימת מטא-דאטה למילון מפתח -> ערך (הערך הראשון לכל מפתח)."""
+    values: Dict[str, Any] = {}
+    for item in meta_data:
+        key = item.get("key")
+        if key is not None and (keys is None or key in keys):
+            values.setdefault(key, item.get("value"))
+    return values
+
+
+def build_meta_update(
+    current: Optional[List[Dict[str, Any]]],
+    set_values: Optional[Dict[str, Any]] = None,
+    delete_keys: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    מחשב את רשימת ה-meta_data שיש לשלוח כדי להגיע לערכים הרצויים.
+
+    כשהמטא-דאטה הנוכחי ידוע, נשלחים רק מפתחות שערכם משתנה. מחיקה נעשית
+    בשליחת הרשומה עם value ריק (null) ומזהה המטא, כפי ש-WooCommerce מצפה.
+
+    Args:
+        current: המטא-דאטה הנוכחי, או None אם לא נקרא.
+        set_values: מפתחות וערכים לקביעה.
+        delete_keys: מפתחות למחיקה.
+
+    Returns:
+        List[Dict[str, Any]]: רשומות meta_data לעדכון (ריקה אם אין שינוי).
+    """
+    existing = meta_values(current) if current is not None else None
+    update = [
+        {"key": key, "value": value}
+        for key, value in (set_values or {}).items()
+        if existing is None or key not in existing or existing[key] != value
+    ]
+    for item in current or []:
+        if item.get("key") in (delete_keys or []) and item.get("id"):
+            update.append({"id": item["id"], "key": item["key"], "value": None})
+    return update
+
+
+async def write_meta(
+    client: httpx.AsyncClient,
+    resource: str,
+    ids: Optional[List[int]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    values: Optional[Dict[str, Any]] = None,
+    per_item: Optional[Dict[Union[int, str], Dict[str, Any]]] = None,
+    delete_keys: Optional[List[str]] = None,
+    only_changed: bool = True,
+    dry_run: bool = False,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """
+    קובע ומוחק מפתחות מטא-דאטה בפריטים רבים דרך נקודת ה-batch של המשאב.
+
+    המטא-דאטה הנוכחי נקרא (עם _fields=id,meta_data) רק כשצריך: כשהיעד מוגדר
+    במסננים, כשיש מפתחות למחיקה או כשמבקשים לשלוח רק ערכים שהשתנו.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        resource: products, orders או customers.
+        ids: מזהי הפריטים.
+        filters: מסננים לבחירת הפריטים (כשלא הועברו מזהים).
+        values: מפתחות וערכים לקביעה בכל הפריטים.
+        per_item: ערכים לפי מזהה פריט (נוספים ל-values).
+        delete_keys: מפתחות למחיקה.
+        only_changed: האם לשלוח רק ערכים שהשתנו.
+        dry_run: החזרת התוכנית בלבד, ללא שינויים.
+        concurrency: מספר הבקשות במקביל.
+
+    Returns:
+        Dict[str, Any]: מספר הפריטים שנבדקו, שעודכנו, שלא השתנו והשגיאות.
+    """
+    path = _resource_path(resource)
+    per_item = {int(item_id): item_values for item_id, item_values in (per_item or {}).items()}
+    if ids is None and filters is None:
+        ids = list(per_item)
+    if not (values or per_item or delete_keys):
+        raise WordPressError("Nothing to write: provide values, per_item or delete_keys")
+
+    if filters is not None or delete_keys or only_changed:
+        current: Dict[int, Optional[List[Dict[str, Any]]]] = dict(
+            await fetch_meta(client, resource, ids, filters, concurrency)
+        )
+    else:
+        current = {item_id: None for item_id in ids}
+
+    updates = []
+    for item_id, meta_data in current.items():
+        meta_update = build_meta_update(
+            meta_data, {**(values or {}), **per_item.get(item_id, {})}, delete_keys
+        )
+        if meta_update:
+            updates.append({"id": item_id, "meta_data": meta_update})
+
+    result: Dict[str, Any] = {
+        "resource": resource,
+        "matched": len(current),
+        "to_update": len(updates),
+        "unchanged": len(current) - len(updates),
+        "dry_run": dry_run,
+    }
+    if ids is not None:
+        result["not_found"] = [item_id for item_id in ids if item_id not in current]
+    if dry_run:
+        result["plan"] = updates
+        return result
+
+    summary = await apply_batch(client, path, update=updates, concurrency=concurrency)
+    result.update({"updated": summary["updated"], "failed": summary["failed"], "errors": summary["errors"]})
+    return result
+
+
+def register_meta_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לפעולות מטא-דאטה מרוכזות.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def get_meta_bulk(
+        resource: str,
+        ids: Optional[List[int]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        keys: Optional[List[str]] = None,
+        concurrency: int = 8,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחזיר מטא-דאטה של מוצרים, הזמנות או לקוחות רבים בבת אחת (רק id ו-meta_data).
+
+        Args:
+            resource: products, orders או customers.
+            ids: מזהי הפריטים.
+            filters: מסננים לבחירת הפריטים (כשלא הועברו מזהים).
+            keys: מפתחות להחזרה (ברירת מחדל: כולם).
+            concurrency: מספר הבקשות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: מילון meta (מזהה -> {מפתח: ערך}) ומזהים שלא נמצאו.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            meta = await fetch_meta(client, resource, ids, filters, concurrency)
+
+        result: Dict[str, Any] = {
+            "resource": resource,
+            "count": len(meta),
+            "meta": {str(item_id): meta_values(meta_data, keys) for item_id, meta_data in meta.items()},
+        }
+        if ids is not None:
+            result["not_found"] = [item_id for item_id in ids if item_id not in meta]
+        return result
+
+    @mcp.tool()
+    async def set_meta_bulk(
+        resource: str,
+        values: Optional[Dict[str, Any]] = None,
+        ids: Optional[List[int]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        per_item: Optional[Dict[str, Dict[str, Any]]] = None,
+        delete_keys: Optional[List[str]] = None,
+        only_changed: bool = True,
+        dry_run: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        קובע או מוחק מפתחות מטא-דאטה במוצרים, הזמנות או לקוחות רבים דרך בקשות batch.
+
+        Args:
+            resource: products, orders או customers.
+            values: מפתחות וערכים לקביעה בכל הפריטים.
+            ids: מזהי הפריטים.
+            filters: מסננים לבחירת הפריטים (כשלא הועברו מזהים).
+            per_item: ערכים לפי מזהה פריט, למשל {"12": {"_supplier": "A"}}.
+            delete_keys: מפתחות למחיקה.
+            only_changed: האם לשלוח רק ערכים שהשתנו (דורש קריאה מקדימה).
+            dry_run: החזרת התוכנית בלבד, ללא שינויים.
+            concurrency: מספר הבקשות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום: פריטים שנבדקו, עודכנו, לא השתנו ושגיאות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await write_meta(
+                client, resource, ids, filters, values, per_item, delete_keys, only_changed, dry_run, concurrency
+            )
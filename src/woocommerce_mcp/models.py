@@ -0,0 +1,226 @@
+"""
+מודלים טיפוסיים וחסכוניים בזיכרון עבור המשאבים ה"חמים" של WooCommerce.
+
+המודלים מוגדרים כ-dataclasses עם slots, ומפוענחים ישירות מה-bytes של תגובת
+ה-HTTP בעזרת pydantic-core, ללא שלב ביניים של מילונים מקוננים. שדות שאינם
+מוגדרים במודל מושמטים בזמן הפענוח.
+"""
+
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+
+from pydantic import TypeAdapter
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class Address:
+    """כתובת חיוב/משלוח."""
+    first_name: str = ""
+    last_name: str = ""
+    company: str = ""
+    address_1: str = ""
+    address_2: str = ""
+    city: str = ""
+    state: str = ""
+    postcode: str = ""
+    country: str = ""
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+
+@dataclass(slots=True)
+class TermRef:
+    """הפניה לקטגוריה או תגית של מוצר."""
+    id: int
+    name: str = ""
+    slug: str = ""
+
+
+@dataclass(slots=True)
+class Product:
+    """מוצר WooCommerce במבנה מצומצם."""
+    id: int
+    name: str = ""
+    slug: str = ""
+    sku: Optional[str] = None
+    type: str = ""
+    status: str = ""
+    price: Optional[str] = None
+    regular_price: Optional[str] = None
+    sale_price: Optional[str] = None
+    manage_stock: bool = False
+    stock_quantity: Optional[int] = None
+    stock_status: Optional[str] = None
+    total_sales: int = 0
+    date_created: Optional[str] = None
+    date_modified: Optional[str] = None
+    categories: List[TermRef] = field(default_factory=list)
+    tags: List[TermRef] = field(default_factory=list)
+    variations: List[int] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class VariationAttribute:
+    """אפשרות מאפיין שנבחרה בוריאציה."""
+    id: int = 0
+    name: str = ""
+    option: str = ""
+
+
+@dataclass(slots=True)
+class Variation:
+    """וריאציית מוצר במבנה מצומצם."""
+    id: int
+    sku: Optional[str] = None
+    status: str = ""
+    price: Optional[str] = None
+    regular_price: Optional[str] = None
+    sale_price: Optional[str] = None
+    # בוריאציות הערך יכול להיות גם "parent" (ניהול מלאי ברמת מוצר האב)
+    manage_stock: Union[bool, str] = False
+    stock_quantity: Optional[int] = None
+    stock_status: Optional[str] = None
+    attributes: List[VariationAttribute] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class LineItem:
+    """פריט שורה בהזמנה."""
+    id: int
+    name: str = ""
+    product_id: int = 0
+    variation_id: int = 0
+    sku: Optional[str] = None
+    quantity: int = 0
+    price: float = 0.0
+    subtotal: str = "0"
+    subtotal_tax: str = "0"
+    total: str = "0"
+    total_tax: str = "0"
+
+
+@dataclass(slots=True)
+class CouponLine:
+    """קופון שהוחל על הזמנה."""
+    id: int
+    code: str = ""
+    discount: str = "0"
+    discount_tax: str = "0"
+
+
+@dataclass(slots=True)
+class RefundSummary:
+    """תקציר החזר כפי שמופיע בגוף ההזמנה."""
+    id: int
+    reason: str = ""
+    total: str = "0"
+
+
+@dataclass(slots=True)
+class Order:
+    """הזמנת WooCommerce במבנה מצומצם."""
+    id: int
+    parent_id: int = 0
+    number: str = ""
+    status: str = ""
+    currency: str = ""
+    date_created: Optional[str] = None
+    date_created_gmt: Optional[str] = None
+    date_modified: Optional[str] = None
+    date_modified_gmt: Optional[str] = None
+    date_paid: Optional[str] = None
+    date_completed: Optional[str] = None
+    customer_id: int = 0
+    discount_total: str = "0"
+    shipping_total: str = "0"
+    total_tax: str = "0"
+    total: str = "0"
+    payment_method: str = ""
+    billing: Address = field(default_factory=Address)
+    shipping: Address = field(default_factory=Address)
+    line_items: List[LineItem] = field(default_factory=list)
+    coupon_lines: List[CouponLine] = field(default_factory=list)
+    refunds: List[RefundSummary] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Customer:
+    """לקוח WooCommerce במבנה מצומצם."""
+    id: int
+    email: str = ""
+    first_name: str = ""
+    last_name: str = ""
+    username: str = ""
+    role: str = ""
+    is_paying_customer: bool = False
+    date_created: Optional[str] = None
+    date_modified: Optional[str] = None
+    billing: Address = field(default_factory=Address)
+    shipping: Address = field(default_factory=Address)
+
+
+# מטמון של מתאמי פענוח לפי טיפוס, כדי לא לבנות את הסכמה בכל קריאה
+_LIST_ADAPTERS: Dict[type, TypeAdapter] = {}
+_ITEM_ADAPTERS: Dict[type, TypeAdapter] = {}
+
+
+def decode_many(model: Type[T], data: Union[bytes, str]) -> List[T]:
+    """
+    מפענח מערך JSON ישירות לרשימת מודלים.
+
+    Args:
+        model: מחלקת המודל (למשל Order).
+        data: גוף התגובה הגולמי.
+
+    Returns:
+        List[T]: רשימת המודלים המפוענחים.
+    """
+    adapter = _LIST_ADAPTERS.get(model)
+    if adapter is None:
+        adapter = _LIST_ADAPTERS[model] = TypeAdapter(List[model])
+    return adapter.validate_json(data)
+
+
+def decode_one(model: Type[T], data: Union[bytes, str]) -> T:
+    """
+    מפענח אובייקט JSON בודד ישירות למודל.
+
+    Args:
+        model: מחלקת המודל.
+        data: גוף התגובה הגולמי.
+
+    Returns:
+        T: המודל המפוענח.
+    """
+    adapter = _ITEM_ADAPTERS.get(model)
+    if adapter is None:
+        adapter = _ITEM_ADAPTERS[model] = TypeAdapter(model)
+    return adapter.validate_json(data)
+
+
+def projection(model: type) -> str:
+    """
+    מחזיר את ערך הפרמטר `_fields` המתאים למודל, כך שהשרת יחזיר רק את השדות הנדרשים.
+
+    Args:
+        model: מחלקת המודל.
+
+    Returns:
+        str: רשימת שדות מופרדת בפסיקים.
+    """
+    return ",".join(f.name for f in fields(model))
+
+
+def to_dict(obj: Any) -> Dict[str, Any]:
+    """
+    ממיר מודל חזרה למילון (למשל לצורך החזרה מכלי MCP או כתיבה לקובץ).
+
+    Args:
+        obj: מופע של מודל.
+
+    Returns:
+        Dict[str, Any]: ייצוג המודל כמילון.
+    """
+    return asdict(obj)
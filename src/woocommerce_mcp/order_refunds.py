@@ -2,12 +2,300 @@
 מודול לניהול החזרות להזמנות ב-WooCommerce.
 """
 
-from typing import Any, Dict, List, Optional
+import asyncio
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .utils import (
+    MAX_REPORTED_ERRORS,
+    RateLimiter,
+    WordPressError,
+    fetch_all,
+    gather_limited,
+    handle_response_error,
+)
+from .profiles import resolve_store
+
+REFUND_ORDER_FIELDS = "id,status,currency,total,line_items"
+
+# סטטוסים של הזמנות שאי אפשר לבצע בהן החזר
+NON_REFUNDABLE_STATUSES = ("pending", "failed", "cancelled", "refunded", "checkout-draft")
+
+CENT = Decimal("0.01")
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+def _parse_amount(value: Any) -> Optional[Decimal]:
+    """סכום מקלט המשתמש, או None אם אינו מספר סופי."""
+    try:
+        amount = _money(value)
+    except (InvalidOperation, ValueError):
+        return None
+    return amount if amount.is_finite() else None
+
+
+def _round(value: Decimal) -> Decimal:
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _refunded_item_id(item: Dict[str, Any]) -> Optional[int]:
+    if item.get("refunded_item_id"):
+        return int(item["refunded_item_id"])
+    for meta in item.get("meta_data") or []:
+        if meta.get("key") == "_refunded_item_id":
+            return int(meta["value"])
+    return None
+
+
+def refundable_items(order: Dict[str, Any], refunds: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """
+    מחשב לכל פריט בהזמנה את הכמות, הסכום והמס שעוד ניתנים להחזר, בניכוי
+    ההחזרים הקיימים.
+
+    Returns:
+        Dict[int, Dict[str, Any]]: לפי מזהה פריט: quantity, total, taxes (מזהה מס -> סכום)
+        שנותרו, והכמות, הסכום והמס המקוריים (ordered, ordered_total, ordered_taxes).
+    """
+    items: Dict[int, Dict[str, Any]] = {}
+    for item in order.get("line_items") or []:
+        items[item["id"]] = {
+            "id": item["id"],
+            "product_id": item.get("product_id"),
+            "variation_id": item.get("variation_id"),
+            "sku": item.get("sku") or "",
+            "ordered": int(item.get("quantity") or 0),
+            "quantity": int(item.get("quantity") or 0),
+            "total": _money(item.get("total")),
+            "taxes": {tax["id"]: _money(tax.get("total")) for tax in item.get("taxes") or [] if tax.get("total")},
+        }
+        items[item["id"]]["ordered_total"] = items[item["id"]]["total"]
+        items[item["id"]]["ordered_taxes"] = dict(items[item["id"]]["taxes"])
+
+    # בפריטי החזר הכמויות והסכומים שליליים
+    for refund in refunds:
+        for refunded in refund.get("line_items") or []:
+            item = items.get(_refunded_item_id(refunded))
+            if item is None:
+                continue
+            item["quantity"] -= abs(int(refunded.get("quantity") or 0))
+            item["total"] -= abs(_money(refunded.get("total")))
+            for tax in refunded.get("taxes") or []:
+                if tax.get("id") in item["taxes"]:
+                    item["taxes"][tax["id"]] -= abs(_money(tax.get("total")))
+    return items
+
+
+def plan_refund(
+    order: Dict[str, Any],
+    refunds: List[Dict[str, Any]],
+    request: Dict[str, Any],
+) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    בונה את גוף בקשת ההחזר להזמנה ומאמת אותו מקומית.
+
+    פריט נבחר לפי id של שורת ההזמנה, sku או product_id; בלי quantity מוחזרת
+    כל הכמות שנותרה, ובלי line_items מוחזרים כל הפריטים שנותרו. הסכום והמס
+    מחושבים יחסית לכמות, ולא יעלו על מה שנותר להחזר.
+
+    Returns:
+        Tuple: גוף ההחזר (או None) ורשימת שגיאות (ריקה אם ההחזר תקין).
+    """
+    if order.get("status") in NON_REFUNDABLE_STATUSES:
+        return None, [f"Order status {order.get('status')} cannot be refunded"]
+
+    already_refunded = sum((abs(_money(refund.get("amount"))) for refund in refunds), Decimal(0))
+    available = _money(order.get("total")) - already_refunded
+    reason = {"reason": request["reason"]} if request.get("reason") else {}
+
+    # החזר של סכום בלבד, בלי פריטים
+    if request.get("amount") is not None and not request.get("line_items"):
+        amount = _parse_amount(request["amount"])
+        if amount is None:
+            return None, [f"Invalid refund amount: {request['amount']}"]
+        amount = _round(amount)
+        if amount <= 0 or amount > available:
+            return None, [f"Refund of {amount} is outside the {available} left to refund"]
+        return {"amount": str(amount), **reason}, []
+
+    items = refundable_items(order, refunds)
+    selections = request.get("line_items") or [{"id": item_id} for item_id, item in items.items() if item["quantity"] > 0]
+    errors: List[str] = []
+    line_items: List[Dict[str, Any]] = []
+    amount = Decimal(0)
+    used = set()
+
+    for selection in selections:
+        if not isinstance(selection, dict):
+            errors.append(f"Invalid line item selection: {selection}")
+            continue
+        if "id" in selection:
+            matches = [items[selection["id"]]] if selection["id"] in items else []
+        elif "sku" in selection:
+            matches = [item for item in items.values() if item["sku"] and item["sku"] == selection["sku"]]
+        else:
+            matches = [
+                item for item in items.values()
+                if selection.get("product_id") in (item["product_id"], item["variation_id"])
+            ]
+        if len(matches) != 1:
+            errors.append(f"Line item {selection} {'is ambiguous' if matches else 'not found'}")
+            continue
+        item = matches[0]
+        if item["id"] in used:
+            errors.append(f"Line item {item['id']} selected more than once")
+            continue
+        used.add(item["id"])
+
+        try:
+            quantity = item["quantity"] if selection.get("quantity") is None else int(selection["quantity"])
+        except (TypeError, ValueError):
+            errors.append(f"Line item {item['id']}: invalid quantity {selection['quantity']}")
+            continue
+        if quantity <= 0 or quantity > item["quantity"]:
+            errors.append(f"Line item {item['id']}: cannot refund {quantity}, {max(item['quantity'], 0)} remaining")
+            continue
+
+        # בהחזר של כל הכמות שנותרה מוחזרת כל היתרה, כדי לא להשאיר אגורות מעיגול
+        if quantity == item["quantity"]:
+            total, taxes = item["total"], dict(item["taxes"])
+        else:
+            share = Decimal(quantity) / Decimal(item["ordered"])
+            total = min(_round(item["ordered_total"] * share), item["total"])
+            taxes = {
+                tax_id: min(_round(item["ordered_taxes"][tax_id] * share), remaining)
+                for tax_id, remaining in item["taxes"].items()
+            }
+        if total < 0 or any(value < 0 for value in taxes.values()):
+            errors.append(f"Line item {item['id']}: nothing left to refund")
+            continue
+
+        line_item: Dict[str, Any] = {"id": item["id"], "quantity": quantity, "refund_total": str(total)}
+        if taxes:
+            line_item["refund_tax"] = [{"id": tax_id, "refund_total": str(value)} for tax_id, value in taxes.items()]
+        line_items.append(line_item)
+        amount += total + sum(taxes.values(), Decimal(0))
+
+    if not errors and amount > available:
+        errors.append(f"Refund of {amount} exceeds the {available} left to refund")
+    if not errors and not line_items:
+        errors.append("Nothing to refund")
+    if errors:
+        return None, errors
+
+    return {"amount": str(amount), "line_items": line_items, **reason}, []
+
+
+async def _fetch_refund_state(
+    client: httpx.AsyncClient,
+    order_id: int,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    # כל עמודי ההחזרים נקראים, אחרת הזמנה עם יותר מ-100 החזרים תחושב כאילו נותר בה יותר להחזיר
+    order_response, refunds = await asyncio.gather(
+        client.get(f"/orders/{order_id}", params={"_fields": REFUND_ORDER_FIELDS}),
+        fetch_all(client, f"/orders/{order_id}/refunds"),
+    )
+    handle_response_error(order_response, f"Failed to get order {order_id}")
+    return order_response.json(), refunds
+
+
+async def process_refunds(
+    client: httpx.AsyncClient,
+    requests: List[Dict[str, Any]],
+    reason: Optional[str] = None,
+    api_refund: bool = True,
+    restock: bool = False,
+    skip_invalid: bool = False,
+    dry_run: bool = False,
+    concurrency: int = 4,
+    rate: float = 2.0,
+) -> Dict[str, Any]:
+    """
+    מבצע החזרים להזמנות רבות עם אימות מלא לפני כל כתיבה.
+
+    ההזמנות וההחזרים הקיימים שלהן נמשכים במקביל, כל החזר מחושב ומאומת מקומית
+    (plan_refund), ורק אם כל הבקשות תקינות (או skip_invalid) ההחזרים נשלחים,
+    במקביליות חסומה ובקצב של עד `rate` החזרים בשנייה.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        requests: בקשות ההחזר: order_id ו-line_items/amount/reason לכל אחת.
+        reason: סיבת ברירת מחדל לבקשות בלי reason.
+        api_refund: האם לבצע את ההחזר גם בשער התשלום.
+        restock: האם להחזיר את הפריטים למלאי.
+        skip_invalid: שליחת הבקשות התקינות גם כשיש בקשות שנדחו.
+        dry_run: החזרת התוכנית בלבד, ללא שינויים.
+        concurrency: מספר הבקשות במקביל.
+        rate: מספר ההחזרים המרבי בשנייה (0 ללא הגבלה).
+
+    Returns:
+        Dict[str, Any]: ספירות, הבקשות שנדחו עם הסיבות, ותוצאת כל החזר.
+    """
+    order_ids = [request.get("order_id") for request in requests]
+    duplicates = {order_id for order_id in order_ids if order_ids.count(order_id) > 1}
+    rejected: List[Dict[str, Any]] = []
+
+    async def prepare(request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        order_id = request.get("order_id")
+        if not isinstance(order_id, int):
+            rejected.append({"order_id": order_id, "errors": ["order_id is required"]})
+            return None
+        if order_id in duplicates:
+            rejected.append({"order_id": order_id, "errors": ["Order appears in more than one request"]})
+            return None
+        try:
+            order, refunds = await _fetch_refund_state(client, order_id)
+        except (WordPressError, httpx.HTTPError) as e:
+            rejected.append({"order_id": order_id, "errors": [str(e)]})
+            return None
+        payload, errors = plan_refund(order, refunds, {"reason": reason, **request})
+        if errors:
+            rejected.append({"order_id": order_id, "errors": errors})
+            return None
+        return {"order_id": order_id, "currency": order.get("currency"), "payload": payload}
+
+    plans = [plan for plan in await gather_limited((prepare(r) for r in requests), concurrency) if plan]
+    result: Dict[str, Any] = {
+        "requested": len(requests),
+        "valid": len(plans),
+        "rejected": rejected[:MAX_REPORTED_ERRORS],
+        "rejected_count": len(rejected),
+        "dry_run": dry_run,
+    }
+    if dry_run or (rejected and not skip_invalid):
+        result["submitted"] = False
+        result["plan"] = plans
+        return result
+
+    limiter = RateLimiter(rate)
+    outcomes: List[Dict[str, Any]] = []
+
+    async def submit(plan: Dict[str, Any]) -> None:
+        await limiter.wait()
+        payload = {**plan["payload"], "api_refund": api_refund, "api_restock": restock}
+        try:
+            response = await client.post(f"/orders/{plan['order_id']}/refunds", json=payload)
+            handle_response_error(response, f"Failed to create refund for order {plan['order_id']}")
+            refund = response.json()
+            outcomes.append({"order_id": plan["order_id"], "refund_id": refund.get("id"), "amount": refund.get("amount")})
+        except (WordPressError, httpx.HTTPError) as e:
+            outcomes.append({"order_id": plan["order_id"], "error": str(e)})
+
+    await gather_limited((submit(plan) for plan in plans), concurrency)
+    failed = [outcome for outcome in outcomes if "error" in outcome]
+    result.update({
+        "submitted": True,
+        "refunded": len(outcomes) - len(failed),
+        "failed": len(failed),
+        "errors": failed[:MAX_REPORTED_ERRORS],
+        "refunds": [outcome for outcome in outcomes if "error" not in outcome],
+    })
+    return result
 
 
 def register_order_refund_tools(mcp: FastMCP) -> None:
@@ -24,6 +312,7 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת החזרות להזמנה מ-WooCommerce.
@@ -33,21 +322,14 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת ההחזרות.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/orders/{order_id}/refunds")
             
             handle_response_error(response, f"Failed to get refunds for order {order_id}")
@@ -60,6 +342,7 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר החזרה בודדת להזמנה לפי המזהה שלה.
@@ -70,21 +353,14 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני ההחזרה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/orders/{order_id}/refunds/{refund_id}")
             
             handle_response_error(response, f"Failed to get refund {refund_id} for order {order_id}")
@@ -97,6 +373,7 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר החזרה חדשה להזמנה ב-WooCommerce.
@@ -107,6 +384,7 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני ההחזרה שנוצרה.
@@ -124,21 +402,13 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
             ...     ]
             ... }
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
         # ודא שיש סכום להחזרה
         if "amount" not in refund_data:
             raise ValueError("Refund amount is required")
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 f"/orders/{order_id}/refunds",
                 json=refund_data
@@ -155,6 +425,7 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק החזרה מהזמנה ב-WooCommerce.
@@ -168,25 +439,66 @@ def register_order_refund_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/orders/{order_id}/refunds/{refund_id}",
                 params={"force": force}
             )
             
             handle_response_error(response, f"Failed to delete refund {refund_id} for order {order_id}")
-            return response.json() 
\ No newline at end of file
+            return response.json()
+
+    @mcp.tool()
+    async def bulk_refund(
+        refunds: List[Dict[str, Any]],
+        reason: Optional[str] = None,
+        api_refund: bool = True,
+        restock: bool = False,
+        skip_invalid: bool = False,
+        dry_run: bool = False,
+        concurrency: int = 4,
+        rate: float = 2.0,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מבצע החזרים לפריטים בהזמנות רבות (למשל בריקול), עם אימות מקומי לפני כל כתיבה.
+
+        לכל הזמנה מחושבים הכמות, הסכום והמס שנותרו להחזר בניכוי החזרים קודמים.
+        החזר שעולה על היתרה נדחה, ואם יש בקשה שנדחתה לא נשלח אף החזר
+        (אלא אם skip_invalid).
+
+        Args:
+            refunds: בקשות ההחזר, למשל [{"order_id": 12, "line_items": [{"sku": "TS-1", "quantity": 1}]}].
+                פריט נבחר לפי id (של שורת ההזמנה), sku או product_id; בלי quantity מוחזרת כל
+                הכמות שנותרה, ובלי line_items כל ההזמנה. אפשר גם {"order_id": 12, "amount": "20.00"}.
+            reason: סיבת ההחזר (לבקשות בלי reason משלהן).
+            api_refund: האם לבצע את ההחזר גם בשער התשלום.
+            restock: האם להחזיר את הפריטים למלאי.
+            skip_invalid: שליחת הבקשות התקינות גם כשיש בקשות שנדחו.
+            dry_run: החזרת התוכנית בלבד, ללא שינויים.
+            concurrency: מספר הבקשות במקביל.
+            rate: מספר ההחזרים המרבי בשנייה (0 ללא הגבלה).
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: ספירות, בקשות שנדחו עם הסיבות, ותוצאת כל החזר (או התוכנית).
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await process_refunds(
+                client, refunds, reason, api_refund, restock, skip_invalid, dry_run, concurrency, rate
+            )
@@ -0,0 +1,378 @@
+"""
+מודול לאיתור הזמנות תקועות (ממתינות לתשלום או בהמתנה) במשימת רקע מתוזמנת.
+
+לכל חנות נשמרת בזיכרון קבוצת ההזמנות שבסטטוסים הנבחרים ולא השתנו מאז סף
+גיל. הסריקה הראשונה מושכת את כל ההזמנות האלה (status + modified_before),
+והסריקות הבאות מעדכנות את הקבוצה בהדרגה: הזמנות שהשתנו מאז הסריקה הקודמת
+יוצאות ממנה, והזמנות שחצו את הסף מאז הסריקה הקודמת נכנסות אליה.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import BATCH_LIMIT, WordPressError, chunked, fetch_all, gather_limited, iter_pages
+from .profiles import StoreProfile, resolve_store
+from .orders import transition_order_statuses
+
+logger = logging.getLogger("woocommerce-mcp")
+
+# מפתח הסורק במטמונים של החנות
+ORDER_SWEEPER_CACHE = "order_sweeper"
+
+SWEEP_STATUSES = ("pending", "on-hold")
+SWEEP_ORDER_FIELDS = "id,status,total,currency,customer_id,billing,payment_method,date_created_gmt,date_modified_gmt"
+
+# מרווח מינימלי (בדקות) בין סריקות מתוזמנות
+MIN_SWEEP_INTERVAL = 1
+
+
+def _gmt(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _summary(order: Dict[str, Any]) -> Dict[str, Any]:
+    billing = order.get("billing") or {}
+    return {
+        "id": order["id"],
+        "status": order.get("status"),
+        "total": order.get("total"),
+        "currency": order.get("currency"),
+        "customer_id": order.get("customer_id"),
+        "email": billing.get("email"),
+        "payment_method": order.get("payment_method"),
+        "date_created_gmt": order.get("date_created_gmt"),
+        "date_modified_gmt": order.get("date_modified_gmt"),
+    }
+
+
+class OrderSweeper:
+    """קבוצת ההזמנות התקועות של חנות, ומשימת הרקע שמעדכנת אותה."""
+
+    def __init__(self, statuses: List[str], older_than_hours: float, interval_minutes: float):
+        self.statuses = list(statuses)
+        self.older_than = timedelta(hours=older_than_hours)
+        self.interval = max(MIN_SWEEP_INTERVAL, interval_minutes) * 60
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.threshold: Optional[str] = None
+        self.swept_at: Optional[str] = None
+        self.sweeps = 0
+        self.last_error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def sweep(self, client: httpx.AsyncClient, full: bool = False) -> Dict[str, Any]:
+        """
+        מעדכן את קבוצת ההזמנות התקועות.
+
+        Args:
+            client: לקוח WooCommerce פתוח.
+            full: סריקה מלאה במקום עדכון הדרגתי.
+
+        Returns:
+            Dict[str, Any]: סוג הסריקה, הזמנות שנוספו והוסרו וגודל הקבוצה.
+        """
+        now = datetime.now(timezone.utc)
+        threshold = _gmt(now - self.older_than)
+        incremental = not full and self.threshold is not None
+        added = removed = 0
+
+        if incremental:
+            # הזמנות שהשתנו מאז הסריקה הקודמת אינן תקועות (ואם עדיין כן, ייכנסו שוב בהמשך)
+            params = {"_fields": "id", "status": "any", "modified_after": self.swept_at, "dates_are_gmt": "true"}
+            async for response in iter_pages(client, "/orders", params):
+                for order in response.json():
+                    if self.orders.pop(order["id"], None) is not None:
+                        removed += 1
+        else:
+            removed = len(self.orders)
+            self.orders = {}
+
+        params = {
+            "_fields": SWEEP_ORDER_FIELDS,
+            "status": ",".join(self.statuses),
+            "modified_before": threshold,
+            "dates_are_gmt": "true",
+        }
+        if incremental:
+            params["modified_after"] = self.threshold
+        async for response in iter_pages(client, "/orders", params):
+            for order in response.json():
+                if order.get("status") in self.statuses:
+                    added += order["id"] not in self.orders
+                    self.orders[order["id"]] = _summary(order)
+
+        self.threshold = threshold
+        self.swept_at = _gmt(now)
+        self.sweeps += 1
+        return {
+            "mode": "incremental" if incremental else "full",
+            "added": added,
+            "removed": removed,
+            "stale": len(self.orders),
+        }
+
+    async def recheck(
+        self,
+        client: httpx.AsyncClient,
+        order_ids: List[int],
+        cutoff: Optional[str] = None,
+        concurrency: int = 4,
+    ) -> Dict[str, List[int]]:
+        """
+        קורא מחדש את הסטטוס ותאריך השינוי של הזמנות מהקבוצה, ומחלק אותן לפי המצב הנוכחי.
+
+        הזמנה נשארת תקועה רק אם הסטטוס שלה עדיין באחד מהסטטוסים הנסרקים ולא
+        השתנתה אחרי הסף (או אחרי cutoff, אם הוא מוקדם יותר). השאר יוצאות מהקבוצה.
+
+        Returns:
+            Dict[str, List[int]]: stale (עדיין תקועות) ו-no_longer_stale.
+        """
+        cutoff = min(filter(None, [self.threshold, cutoff]), default=None)
+
+        async def fetch(chunk: List[int]) -> List[Dict[str, Any]]:
+            params = {"include": ",".join(str(i) for i in chunk), "_fields": "id,status,date_modified_gmt"}
+            return await fetch_all(client, "/orders", params, per_page=BATCH_LIMIT)
+
+        pages = await gather_limited((fetch(chunk) for chunk in chunked(order_ids, BATCH_LIMIT)), concurrency)
+        current = {order["id"]: order for page in pages for order in page}
+
+        result: Dict[str, List[int]] = {"stale": [], "no_longer_stale": []}
+        for order_id in order_ids:
+            order = current.get(order_id)
+            modified = (order or {}).get("date_modified_gmt") or ""
+            if order is not None and order.get("status") in self.statuses and (cutoff is None or modified <= cutoff):
+                result["stale"].append(order_id)
+            else:
+                result["no_longer_stale"].append(order_id)
+                self.orders.pop(order_id, None)
+        return result
+
+    def start(self, store: StoreProfile) -> None:
+        """מפעיל את הסריקה המתוזמנת ברקע (הסריקה הראשונה אחרי מרווח אחד)."""
+        self.stop()
+        self.task = asyncio.create_task(self._run(store))
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self, store: StoreProfile) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with store.client() as client:
+                    await self.sweep(client)
+                self.last_error = None
+            except Exception as e:
+                # כל שגיאה (גם תגובה לא צפויה) לא עוצרת את התזמון; הסריקה הבאה תנסה שוב
+                self.last_error = str(e)
+                logger.exception(f"Order sweep failed for {store.site_url}: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.task is not None and not self.task.done(),
+            "statuses": self.statuses,
+            "older_than_hours": self.older_than.total_seconds() / 3600,
+            "interval_minutes": self.interval / 60,
+            "threshold": self.threshold,
+            "swept_at": self.swept_at,
+            "sweeps": self.sweeps,
+            "stale": len(self.orders),
+            "last_error": self.last_error,
+        }
+
+    def stale_orders(self, older_than_hours: Optional[float] = None) -> List[Dict[str, Any]]:
+        """ההזמנות התקועות, מהישנה לחדשה; older_than_hours מחמיר את סף הגיל."""
+        orders = sorted(self.orders.values(), key=lambda order: order.get("date_modified_gmt") or "")
+        if older_than_hours is not None:
+            cutoff = _gmt(datetime.now(timezone.utc) - timedelta(hours=older_than_hours))
+            orders = [order for order in orders if (order.get("date_modified_gmt") or "") <= cutoff]
+        return orders
+
+
+def register_order_sweeper_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לאיתור וביטול הזמנות תקועות.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def start_order_sweeper(
+        statuses: Optional[List[str]] = None,
+        older_than_hours: float = 24,
+        interval_minutes: float = 15,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מפעיל סורק רקע שמאתר הזמנות ממתינות לתשלום או בהמתנה שלא השתנו מאז סף גיל.
+
+        הסריקה הראשונה רצה מיד; הבאות רצות כל interval_minutes ומעדכנות את
+        הקבוצה בהדרגה. הפעלה חוזרת מחליפה את הסורק הקיים של החנות.
+
+        Args:
+            statuses: סטטוסים לסריקה (ברירת מחדל: pending, on-hold).
+            older_than_hours: גיל מינימלי (בשעות מאז השינוי האחרון) של הזמנה תקועה.
+            interval_minutes: מרווח בין סריקות (לפחות דקה).
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: תוצאת הסריקה הראשונה ומצב הסורק.
+        """
+        if older_than_hours <= 0:
+            raise WordPressError("older_than_hours must be positive")
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        previous = store.caches.get(ORDER_SWEEPER_CACHE)
+        if previous is not None:
+            previous.stop()
+        sweeper = store.caches[ORDER_SWEEPER_CACHE] = OrderSweeper(
+            statuses or list(SWEEP_STATUSES), older_than_hours, interval_minutes
+        )
+
+        async with store.client() as client:
+            sweep = await sweeper.sweep(client, full=True)
+        sweeper.start(store)
+        return {"sweep": sweep, **sweeper.status()}
+
+    @mcp.tool()
+    async def stop_order_sweeper(
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        עוצר את סורק ההזמנות התקועות של החנות (הקבוצה האחרונה נשמרת).
+
+        Args:
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: מצב הסורק.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        sweeper = store.caches.get(ORDER_SWEEPER_CACHE)
+        if sweeper is None:
+            raise WordPressError("Order sweeper is not running; call start_order_sweeper first")
+        sweeper.stop()
+        return sweeper.status()
+
+    @mcp.tool()
+    async def get_stale_orders(
+        older_than_hours: Optional[float] = None,
+        sweep_now: bool = False,
+        limit: int = 100,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחזיר את ההזמנות התקועות שהסורק מצא, מהישנה לחדשה.
+
+        Args:
+            older_than_hours: סף גיל מחמיר יותר מזה של הסורק (אופציונלי).
+            sweep_now: הרצת סריקה הדרגתית לפני ההחזרה.
+            limit: מספר ההזמנות המרבי להחזרה.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: מצב הסורק, מספר ההזמנות והזמנות (עד limit).
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        sweeper = store.caches.get(ORDER_SWEEPER_CACHE)
+        if sweeper is None:
+            raise WordPressError("Order sweeper is not running; call start_order_sweeper first")
+        if sweep_now:
+            async with store.client() as client:
+                await sweeper.sweep(client)
+
+        orders = sweeper.stale_orders(older_than_hours)
+        return {**sweeper.status(), "count": len(orders), "orders": orders[:limit]}
+
+    @mcp.tool()
+    async def cancel_stale_orders(
+        order_ids: Optional[List[int]] = None,
+        older_than_hours: Optional[float] = None,
+        note: Optional[str] = None,
+        dry_run: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מבטל הזמנות תקועות דרך /orders/batch (כל הקבוצה, או מזהים מתוכה).
+
+        לפני הביטול נקראים מחדש הסטטוס ותאריך השינוי של כל הזמנה; רק הזמנות שעדיין
+        בסטטוס נסרק ולא השתנו מאז הסף נשלחות, והשאר מדווחות ב-no_longer_stale.
+
+        Args:
+            order_ids: מזהי הזמנות מתוך הקבוצה (ברירת מחדל: כולן).
+            older_than_hours: ביטול רק של הזמנות ישנות מסף זה.
+            note: הערה להוספה לכל הזמנה שבוטלה.
+            dry_run: החזרת התוכנית בלבד, ללא שינויים.
+            concurrency: מספר הבקשות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: תוצאות המעבר לכל הזמנה, מזהים שאינם בקבוצה והזמנות שכבר אינן תקועות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        sweeper = store.caches.get(ORDER_SWEEPER_CACHE)
+        if sweeper is None:
+            raise WordPressError("Order sweeper is not running; call start_order_sweeper first")
+        stale = [order["id"] for order in sweeper.stale_orders(older_than_hours)]
+        targets = stale if order_ids is None else [order_id for order_id in order_ids if order_id in stale]
+        not_stale = [] if order_ids is None else [order_id for order_id in order_ids if order_id not in stale]
+        cutoff = (
+            _gmt(datetime.now(timezone.utc) - timedelta(hours=older_than_hours)) if older_than_hours is not None else None
+        )
+
+        async with store.client() as client:
+            # הקבוצה עשויה להיות ישנה: הזמנה ששולמה או השתנתה מאז הסריקה לא נשלחת לביטול
+            checked = await sweeper.recheck(client, targets, cutoff, concurrency) if targets else {
+                "stale": [], "no_longer_stale": [],
+            }
+            if checked["stale"]:
+                result = await transition_order_statuses(
+                    client, "cancelled", checked["stale"], note=note, dry_run=dry_run, concurrency=concurrency
+                )
+            else:
+                result = {
+                    "status": "cancelled", "matched": 0, "counts": {}, "notes_added": 0,
+                    "dry_run": dry_run, "orders": [],
+                }
+        if not dry_run:
+            for outcome in result["orders"]:
+                if outcome["outcome"] in ("updated", "invalid", "unchanged", "not_found"):
+                    sweeper.orders.pop(outcome["id"], None)
+        result["not_stale"] = not_stale
+        result["no_longer_stale"] = checked["no_longer_stale"]
+        return result
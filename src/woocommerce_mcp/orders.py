@@ -2,12 +2,254 @@
 מודול לניהול הזמנות ב-WooCommerce.
 """
 
+import asyncio
+import html
+import re
 from typing import Any, Dict, List, Optional
 
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .utils import (
+    BATCH_LIMIT,
+    MAX_REPORTED_ERRORS,
+    WordPressError,
+    apply_batch,
+    chunked,
+    fetch_all,
+    gather_limited,
+    handle_response_error,
+)
+from .profiles import resolve_store
+
+# השדות שנשלפים להזמנה בציר הזמן
+TIMELINE_ORDER_FIELDS = (
+    "id,number,status,currency,total,total_tax,shipping_total,discount_total,customer_id,billing,"
+    "payment_method_title,transaction_id,customer_note,line_items,"
+    "date_created_gmt,date_paid_gmt,date_completed_gmt,date_modified_gmt"
+)
+
+# סדר אירועים עם אותו זמן
+_EVENT_ORDER = {"created": 0, "paid": 1, "note": 2, "refund": 3, "completed": 4, "modified": 5}
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def build_order_timeline(
+    order: Dict[str, Any],
+    notes: List[Dict[str, Any]],
+    refunds: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    ממזג הזמנה, הערות והחזרים לתצוגה תמציתית עם אירועים ממוינים לפי זמן (GMT).
+
+    Args:
+        order: נתוני ההזמנה.
+        notes: הערות ההזמנה.
+        refunds: החזרי ההזמנה.
+
+    Returns:
+        Dict[str, Any]: סיכום ההזמנה ורשימת events.
+    """
+    events: List[Dict[str, Any]] = []
+
+    def add(event_type: str, date: Optional[str], **details: Any) -> None:
+        if date:
+            events.append({"date": date, "type": event_type, **{k: v for k, v in details.items() if v not in (None, "")}})
+
+    add("created", order.get("date_created_gmt"), status=order.get("status"), total=order.get("total"))
+    add(
+        "paid", order.get("date_paid_gmt"),
+        method=order.get("payment_method_title"), transaction_id=order.get("transaction_id"),
+    )
+    for note in notes:
+        add(
+            "note", note.get("date_created_gmt"),
+            note=html.unescape(_TAG_RE.sub("", note.get("note") or "")).strip(),
+            author=note.get("author"), customer_note=note.get("customer_note") or None,
+        )
+    for refund in refunds:
+        add(
+            "refund", refund.get("date_created_gmt"),
+            id=refund.get("id"), amount=refund.get("amount"), reason=refund.get("reason"),
+        )
+    add("completed", order.get("date_completed_gmt"))
+    add("modified", order.get("date_modified_gmt"))
+    events.sort(key=lambda event: (event["date"], _EVENT_ORDER[event["type"]]))
+
+    billing = order.get("billing") or {}
+    refunded = sum(abs(float(refund.get("amount") or 0)) for refund in refunds)
+    return {
+        "id": order.get("id"),
+        "number": order.get("number"),
+        "status": order.get("status"),
+        "currency": order.get("currency"),
+        "total": order.get("total"),
+        "refunded": f"{refunded:.2f}",
+        "customer": {
+            "id": order.get("customer_id"),
+            "name": " ".join(filter(None, [billing.get("first_name"), billing.get("last_name")])),
+            "email": billing.get("email"),
+        },
+        "customer_note": order.get("customer_note") or None,
+        "items": [
+            {"name": item.get("name"), "sku": item.get("sku"), "quantity": item.get("quantity"), "total": item.get("total")}
+            for item in order.get("line_items") or []
+        ],
+        "events": events,
+    }
+
+
+async def fetch_order_timeline(client: httpx.AsyncClient, order_id: int) -> Dict[str, Any]:
+    """
+    מושך הזמנה, הערות והחזרים במקביל (על אותו חיבור) ומחזיר את ציר הזמן שלה.
+
+    Raises:
+        WordPressError: אם אחת הבקשות נכשלה.
+    """
+    order_response, notes_response, refunds = await asyncio.gather(
+        client.get(f"/orders/{order_id}", params={"_fields": TIMELINE_ORDER_FIELDS}),
+        client.get(f"/orders/{order_id}/notes"),
+        fetch_all(client, f"/orders/{order_id}/refunds"),
+    )
+    handle_response_error(order_response, f"Failed to get order {order_id}")
+    handle_response_error(notes_response, f"Failed to get notes for order {order_id}")
+    return build_order_timeline(order_response.json(), notes_response.json(), refunds)
+
+
+# מעברי סטטוס מותרים להזמנות (מקור -> יעדים)
+ORDER_TRANSITIONS = {
+    "pending": ("processing", "on-hold", "completed", "cancelled", "failed"),
+    "processing": ("completed", "on-hold", "cancelled", "refunded"),
+    "on-hold": ("pending", "processing", "completed", "cancelled"),
+    "failed": ("pending", "processing", "cancelled"),
+    "completed": ("refunded",),
+    "cancelled": ("pending", "processing"),
+    "refunded": (),
+}
+
+
+def check_transition(current: Optional[str], target: str) -> Optional[str]:
+    """מחזיר הודעת שגיאה אם המעבר בין הסטטוסים אינו מותר, אחרת None."""
+    if current not in ORDER_TRANSITIONS:
+        return f"Unknown current status: {current}"
+    if target not in ORDER_TRANSITIONS[current]:
+        return f"Transition {current} -> {target} is not allowed"
+    return None
+
+
+async def _fetch_statuses(
+    client: httpx.AsyncClient,
+    order_ids: Optional[List[int]],
+    filters: Optional[Dict[str, Any]],
+    concurrency: int,
+) -> Dict[int, str]:
+    if order_ids is None:
+        orders = await fetch_all(client, "/orders", {**(filters or {}), "_fields": "id,status"}, concurrency=concurrency)
+    else:
+        async def fetch(chunk: List[int]) -> List[Dict[str, Any]]:
+            params = {"include": ",".join(str(i) for i in chunk), "_fields": "id,status"}
+            return await fetch_all(client, "/orders", params, per_page=BATCH_LIMIT)
+
+        pages = await gather_limited((fetch(chunk) for chunk in chunked(order_ids, BATCH_LIMIT)), concurrency)
+        orders = [order for page in pages for order in page]
+    return {order["id"]: order.get("status") for order in orders}
+
+
+async def transition_order_statuses(
+    client: httpx.AsyncClient,
+    status: str,
+    order_ids: Optional[List[int]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    note: Optional[str] = None,
+    customer_note: bool = False,
+    force: bool = False,
+    dry_run: bool = False,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """
+    מעביר הזמנות רבות לסטטוס חדש דרך /orders/batch.
+
+    הסטטוס הנוכחי של כל הזמנה נקרא מראש (רק id,status), המעבר מאומת מול
+    ORDER_TRANSITIONS, וההזמנות התקינות נשלחות בחלקים מקבילים. הערה (אם
+    הועברה) נוספת רק להזמנות שעודכנו בהצלחה, במקביל.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        status: סטטוס היעד.
+        order_ids: מזהי ההזמנות.
+        filters: מסננים לבחירת ההזמנות (כשלא הועברו מזהים), למשל {"status": "processing"}.
+        note: הערה להוספה לכל הזמנה שעודכנה.
+        customer_note: האם ההערה מיועדת ללקוח.
+        force: דילוג על אימות המעברים.
+        dry_run: החזרת התוכנית בלבד, ללא שינויים.
+        concurrency: מספר הבקשות במקביל.
+
+    Returns:
+        Dict[str, Any]: ספירות לפי תוצאה ותוצאה לכל הזמנה (orders).
+    """
+    if status not in ORDER_TRANSITIONS:
+        raise WordPressError(f"Unsupported order status: {status} (available: {', '.join(ORDER_TRANSITIONS)})")
+    if order_ids is None and filters is None:
+        raise WordPressError("Either order_ids or filters is required")
+
+    current = await _fetch_statuses(client, order_ids, filters, concurrency)
+    outcomes: Dict[int, Dict[str, Any]] = {}
+    for order_id in order_ids if order_ids is not None else list(current):
+        if order_id not in current:
+            outcomes[order_id] = {"id": order_id, "outcome": "not_found"}
+            continue
+        outcome: Dict[str, Any] = {"id": order_id, "from": current[order_id], "to": status}
+        error = None if force else check_transition(current[order_id], status)
+        if current[order_id] == status:
+            outcome["outcome"] = "unchanged"
+        elif error:
+            outcome.update(outcome="invalid", message=error)
+        else:
+            outcome["outcome"] = "planned"
+        outcomes[order_id] = outcome
+
+    planned = [order_id for order_id, outcome in outcomes.items() if outcome["outcome"] == "planned"]
+    if planned and not dry_run:
+        summary = await apply_batch(
+            client, "/orders", update=[{"id": order_id, "status": status} for order_id in planned], concurrency=concurrency
+        )
+        succeeded = {item.get("id") for item in summary["items"]["update"]}
+        messages = {error.get("id"): error.get("message") for error in summary["errors"]}
+        for order_id in planned:
+            if order_id in succeeded:
+                outcomes[order_id]["outcome"] = "updated"
+            else:
+                outcomes[order_id]["outcome"] = "failed"
+                if order_id in messages:
+                    outcomes[order_id]["message"] = messages[order_id]
+
+    updated = [order_id for order_id, o in outcomes.items() if o["outcome"] == "updated"]
+    if note and updated:
+        async def add_note(order_id: int) -> None:
+            try:
+                response = await client.post(
+                    f"/orders/{order_id}/notes", json={"note": note, "customer_note": customer_note}
+                )
+                handle_response_error(response, f"Failed to create note for order {order_id}")
+                outcomes[order_id]["note_added"] = True
+            except (WordPressError, httpx.HTTPError) as e:
+                outcomes[order_id].update(note_added=False, note_error=str(e))
+
+        await gather_limited((add_note(order_id) for order_id in updated), concurrency)
+
+    counts: Dict[str, int] = {}
+    for outcome in outcomes.values():
+        counts[outcome["outcome"]] = counts.get(outcome["outcome"], 0) + 1
+    return {
+        "status": status,
+        "matched": len(current),
+        "counts": counts,
+        "notes_added": sum(1 for o in outcomes.values() if o.get("note_added")),
+        "dry_run": dry_run,
+        "orders": list(outcomes.values()),
+    }
+
 
 def register_order_tools(mcp: FastMCP) -> None:
     """
@@ -25,6 +267,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת הזמנות מ-WooCommerce.
@@ -36,19 +279,12 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת ההזמנות.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -57,7 +293,7 @@ def register_order_tools(mcp: FastMCP) -> None:
             **filters
         }
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(
                 "/orders",
                 params=params
@@ -72,6 +308,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר הזמנה בודדת לפי המזהה שלה.
@@ -81,21 +318,14 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני ההזמנה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/orders/{order_id}")
             
             handle_response_error(response, f"Failed to get order {order_id}")
@@ -107,6 +337,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר הזמנה חדשה ב-WooCommerce.
@@ -116,21 +347,14 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני ההזמנה שנוצרה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 "/orders",
                 json=order_data
@@ -146,6 +370,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מעדכן הזמנה קיימת ב-WooCommerce.
@@ -156,21 +381,14 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני ההזמנה המעודכנת.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.put(
                 f"/orders/{order_id}",
                 json=order_data
@@ -186,6 +404,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק הזמנה מ-WooCommerce.
@@ -196,21 +415,14 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/orders/{order_id}",
                 params={"force": force}
@@ -226,6 +438,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר הערות להזמנה.
@@ -235,21 +448,14 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת ההערות.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/orders/{order_id}/notes")
             
             handle_response_error(response, f"Failed to get notes for order {order_id}")
@@ -263,6 +469,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר הערה חדשה להזמנה.
@@ -274,21 +481,14 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני ההערה שנוצרה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 f"/orders/{order_id}/notes",
                 json={
@@ -299,6 +499,118 @@ def register_order_tools(mcp: FastMCP) -> None:
             
             handle_response_error(response, f"Failed to create note for order {order_id}")
             return response.json()
+
+    @mcp.tool()
+    async def get_order_timeline(
+        order_id: int,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחזיר תצוגה תמציתית של הזמנה: סיכום, פריטים ואירועים (יצירה, תשלום,
+        הערות, החזרים, השלמה) ממוינים לפי זמן. ההזמנה, ההערות וההחזרים
+        נמשכים במקביל.
+
+        Args:
+            order_id: מזהה ההזמנה.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום ההזמנה ורשימת events.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await fetch_order_timeline(client, order_id)
+
+    @mcp.tool()
+    async def get_order_timelines(
+        order_ids: List[int],
+        concurrency: int = 8,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחזיר את ציר הזמן של כמה הזמנות, במקביל. הזמנה שנכשלה מדווחת בשגיאות
+        ולא עוצרת את האחרות.
+
+        Args:
+            order_ids: מזהי ההזמנות.
+            concurrency: מספר ההזמנות שנמשכות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: timelines (לפי סדר המזהים) ו-errors.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+        errors: List[Dict[str, Any]] = []
+
+        async def fetch(client: httpx.AsyncClient, order_id: int) -> Optional[Dict[str, Any]]:
+            try:
+                return await fetch_order_timeline(client, order_id)
+            except (WordPressError, httpx.HTTPError) as e:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"order_id": order_id, "message": str(e)})
+                return None
+
+        async with store.client() as client:
+            timelines = await gather_limited((fetch(client, order_id) for order_id in order_ids), concurrency)
+
+        return {"timelines": [timeline for timeline in timelines if timeline is not None], "errors": errors}
+
+    @mcp.tool()
+    async def transition_orders(
+        status: str,
+        order_ids: Optional[List[int]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        note: Optional[str] = None,
+        customer_note: bool = False,
+        force: bool = False,
+        dry_run: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מעביר הזמנות רבות לסטטוס חדש (למשל processing -> completed) דרך בקשות batch,
+        עם אימות מקומי של המעברים המותרים והוספת הערה אופציונלית.
+
+        Args:
+            status: סטטוס היעד (pending, processing, on-hold, completed, cancelled, refunded, failed).
+            order_ids: מזהי ההזמנות.
+            filters: מסננים לבחירת ההזמנות (כשלא הועברו מזהים), למשל {"status": "processing"}.
+            note: הערה להוספה לכל הזמנה שעודכנה.
+            customer_note: האם ההערה מיועדת ללקוח (אמת) או רק למנהל (שקר).
+            force: דילוג על אימות המעברים.
+            dry_run: החזרת התוכנית בלבד, ללא שינויים.
+            concurrency: מספר הבקשות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: ספירות לפי תוצאה (updated, unchanged, invalid, failed, not_found)
+            ותוצאה לכל הזמנה.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await transition_order_statuses(
+                client, status, order_ids, filters, note, customer_note, force, dry_run, concurrency
+            )
             
     # מטא-דאטה של הזמנות
     @mcp.tool()
@@ -308,6 +620,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר מטא-דאטה של הזמנה.
@@ -318,21 +631,14 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת מטא-דאטה של ההזמנה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/orders/{order_id}")
             
             handle_response_error(response, f"Failed to get order {order_id}")
@@ -354,6 +660,7 @@ def register_order_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         יוצר או מעדכן מטא-דאטה של הזמנה.
@@ -365,21 +672,14 @@ def register_order_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת מטא-דאטה מעודכנת של ההזמנה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             # קודם כל קבל את ההזמנה הנוכחית
             response = await client.get(f"/orders/{order_id}")
             
@@ -2,12 +2,101 @@
 מודול לניהול תכונות מוצרים ותנאים שקשורים אליהם (Attribute Terms)
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .utils import WordPressError, apply_batch, fetch_all, handle_response_error
+from .profiles import resolve_store
+from .resolver import invalidate_names, resolve_id
+
+# שדות של מונח מאפיין שמושווים ומסונכרנים
+TERM_SYNC_FIELDS = ("name", "slug", "description", "menu_order")
+
+
+def _same_term_value(field: str, current: Any, desired: Any) -> bool:
+    # ההתאמה לפי שם אינה תלויה באותיות, אבל שינוי אותיות בשם הוא עדכון
+    if field == "name":
+        return str(current).strip() == str(desired).strip()
+    return str(current) == str(desired)
+
+
+def diff_attribute_terms(
+    desired: List[Union[str, Dict[str, Any]]],
+    existing: List[Dict[str, Any]],
+    delete_missing: bool = False,
+) -> Dict[str, Any]:
+    """
+    משווה בין רשימת המונחים הרצויה לקיימת ומחזיר את פעולות ה-batch הנדרשות.
+
+    מונח רצוי מותאם לקיים לפי slug (אם צוין) ואחרת לפי שם, ללא תלות באותיות.
+    slug שלא נמצא מותאם לפי השם (ואז מתוכנן עדכון של ה-slug), אלא אם ה-slug
+    של המונח הקיים מבוקש במפורש במונח רצוי אחר.
+
+    Args:
+        desired: המונחים הרצויים: שמות, או מילונים עם name ו-slug/description/menu_order.
+        existing: המונחים הקיימים.
+        delete_missing: האם למחוק מונחים שאינם ברשימה.
+
+    Returns:
+        Dict[str, Any]: רשימות create/update/delete ומספר המונחים ללא שינוי.
+
+    Raises:
+        WordPressError: אם מונח רצוי חסר שם או מופיע פעמיים (גם שני מונחים
+            חדשים עם אותו שם, ש-WooCommerce היה דוחה).
+    """
+    by_slug = {str(term.get("slug", "")).lower(): term for term in existing}
+    by_name = {}
+    for term in existing:
+        by_name.setdefault(str(term.get("name", "")).strip().lower(), term)
+    desired_slugs = {
+        str(item["slug"]).lower() for item in desired if isinstance(item, dict) and item.get("slug")
+    }
+
+    create, update = [], []
+    matched = set()
+    created_names = set()
+    for item in desired:
+        term = {"name": item} if isinstance(item, str) else dict(item)
+        if not str(term.get("name", "")).strip():
+            raise WordPressError(f"Attribute term without a name: {item}")
+        unknown = set(term) - set(TERM_SYNC_FIELDS)
+        if unknown:
+            raise WordPressError(f"Unsupported attribute term fields: {', '.join(sorted(unknown))}")
+
+        name = str(term["name"]).strip().lower()
+        current = by_slug.get(str(term["slug"]).lower()) if term.get("slug") else None
+        if current is None:
+            current = by_name.get(name)
+            if current is not None and term.get("slug") and str(current.get("slug", "")).lower() in desired_slugs:
+                current = None
+
+        if current is None:
+            if name in created_names:
+                raise WordPressError(f"Attribute term listed twice: {term['name']}")
+            created_names.add(name)
+            create.append(term)
+            continue
+        if current["id"] in matched:
+            raise WordPressError(f"Attribute term listed twice: {term['name']}")
+        matched.add(current["id"])
+        changes = {
+            field: value
+            for field, value in term.items()
+            if not _same_term_value(field, current.get(field, ""), value)
+        }
+        if changes:
+            update.append({"id": current["id"], **changes})
+
+    extra = [term["id"] for term in existing if term["id"] not in matched]
+    return {
+        "create": create,
+        "update": update,
+        "delete": extra if delete_missing else [],
+        "unchanged": len(matched) - len(update),
+        "extra": len(extra),
+    }
 
 
 def register_product_attribute_tools(mcp: FastMCP) -> None:
@@ -27,6 +116,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת תכונות מוצרים מ-WooCommerce.
@@ -35,21 +125,14 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת התכונות.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get("/products/attributes")
             
             handle_response_error(response, "Failed to get product attributes")
@@ -61,6 +144,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר תכונת מוצר בודדת לפי המזהה שלה.
@@ -70,21 +154,14 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני התכונה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/products/attributes/{attribute_id}")
             
             handle_response_error(response, f"Failed to get product attribute {attribute_id}")
@@ -96,6 +173,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר תכונת מוצר חדשה ב-WooCommerce.
@@ -105,6 +183,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני התכונה שנוצרה.
@@ -118,23 +197,16 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             ...     "has_archives": False
             ... }
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 "/products/attributes",
                 json=attribute_data
             )
             
             handle_response_error(response, "Failed to create product attribute")
+            invalidate_names(store, "attributes")
             return response.json()
 
     @mcp.tool()
@@ -144,6 +216,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מעדכן תכונת מוצר קיימת ב-WooCommerce.
@@ -154,27 +227,21 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני התכונה המעודכנת.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.put(
                 f"/products/attributes/{attribute_id}",
                 json=attribute_data
             )
             
             handle_response_error(response, f"Failed to update product attribute {attribute_id}")
+            invalidate_names(store, "attributes", attribute_id)
             return response.json()
 
     @mcp.tool()
@@ -184,6 +251,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק תכונת מוצר מ-WooCommerce.
@@ -194,27 +262,21 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/products/attributes/{attribute_id}",
                 params={"force": force}
             )
             
             handle_response_error(response, f"Failed to delete product attribute {attribute_id}")
+            invalidate_names(store, "attributes", attribute_id)
             return response.json()
     
     #
@@ -230,6 +292,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת תנאים של תכונת מוצר מ-WooCommerce.
@@ -242,19 +305,12 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת התנאים.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -263,7 +319,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             **filters
         }
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(
                 f"/products/attributes/{attribute_id}/terms",
                 params=params
@@ -279,6 +335,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר תנאי בודד של תכונת מוצר מ-WooCommerce.
@@ -289,21 +346,14 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני התנאי.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/products/attributes/{attribute_id}/terms/{term_id}")
             
             handle_response_error(response, f"Failed to get term {term_id} for attribute {attribute_id}")
@@ -316,6 +366,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר תנאי חדש לתכונת מוצר ב-WooCommerce.
@@ -326,6 +377,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני התנאי שנוצר.
@@ -337,23 +389,16 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             ...     "description": "מידה גדולה"
             ... }
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 f"/products/attributes/{attribute_id}/terms",
                 json=term_data
             )
             
             handle_response_error(response, f"Failed to create term for attribute {attribute_id}")
+            invalidate_names(store, "attribute_terms", attribute_id)
             return response.json()
 
     @mcp.tool()
@@ -364,6 +409,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מעדכן תנאי קיים של תכונת מוצר ב-WooCommerce.
@@ -375,27 +421,21 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני התנאי המעודכן.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.put(
                 f"/products/attributes/{attribute_id}/terms/{term_id}",
                 json=term_data
             )
             
             handle_response_error(response, f"Failed to update term {term_id} for attribute {attribute_id}")
+            invalidate_names(store, "attribute_terms", attribute_id)
             return response.json()
 
     @mcp.tool()
@@ -406,6 +446,7 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק תנאי של תכונת מוצר ב-WooCommerce.
@@ -417,25 +458,79 @@ def register_product_attribute_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/products/attributes/{attribute_id}/terms/{term_id}",
                 params={"force": force}
             )
             
             handle_response_error(response, f"Failed to delete term {term_id} for attribute {attribute_id}")
-            return response.json() 
\ No newline at end of file
+            invalidate_names(store, "attribute_terms", attribute_id)
+            return response.json()
+
+    @mcp.tool()
+    async def sync_attribute_terms(
+        attribute: Union[int, str],
+        terms: List[Union[str, Dict[str, Any]]],
+        delete_missing: bool = False,
+        dry_run: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מסנכרן את מונחי המאפיין לרשימה רצויה: טוען את כל המונחים הקיימים במקביל,
+        מחשב את ההפרשים ומחיל אותם בבקשות batch (עד 100 מונחים לבקשה).
+
+        Args:
+            attribute: מזהה, שם או slug של המאפיין.
+            terms: המונחים הרצויים: שמות, או מילונים עם name ו-slug/description/menu_order.
+            delete_missing: האם למחוק מונחים שאינם ברשימה.
+            dry_run: החזרת התוכנית בלבד, ללא שינויים.
+            concurrency: מספר הבקשות שיישלחו במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום: יצירות, עדכונים, מחיקות ושגיאות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            attribute_id = await resolve_id(store, client, "attributes", attribute)
+            path = f"/products/attributes/{attribute_id}/terms"
+            existing = await fetch_all(
+                client, path, {"_fields": "id," + ",".join(TERM_SYNC_FIELDS)}, concurrency=concurrency
+            )
+            plan = diff_attribute_terms(terms, existing, delete_missing)
+
+            result: Dict[str, Any] = {
+                "attribute_id": attribute_id,
+                "existing": len(existing),
+                "to_create": len(plan["create"]),
+                "to_update": len(plan["update"]),
+                "to_delete": len(plan["delete"]),
+                "unchanged": plan["unchanged"],
+                "extra": plan["extra"],
+                "dry_run": dry_run,
+            }
+            if dry_run:
+                result["plan"] = {action: plan[action] for action in ("create", "update", "delete")}
+                return result
+
+            summary = await apply_batch(client, path, plan["create"], plan["update"], plan["delete"], concurrency)
+            invalidate_names(store, "attribute_terms", attribute_id)
+            result.update({key: value for key, value in summary.items() if key != "items"})
+            return result
+
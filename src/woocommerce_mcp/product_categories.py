@@ -2,15 +2,196 @@
 מודול לניהול קטגוריות מוצרים ב-WooCommerce.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client
+from .models import Product, decode_many, projection, to_dict
+from .utils import WordPressError, fetch_all, gather_limited, iter_pages
+from .profiles import StoreProfile, resolve_store
+from .resolver import invalidate_names, resolve_id, resolve_term_filters
 
 # ברירות מחדל למשתני סביבה יוגדרו בקובץ server.py
 
+# מפתח עץ הקטגוריות במטמונים של החנות
+CATEGORY_TREE_CACHE = "category_tree"
+
+# השדות שנשמרים לכל קטגוריה בעץ
+CATEGORY_TREE_FIELDS = "id,name,slug,parent,count"
+
+
+class CategoryTree:
+    """
+    עץ קטגוריות המוצרים בזיכרון.
+
+    האינדקסים (נתיב לכל קטגוריה וסדר מעבר DFS) נבנים מחדש בעצלתיים אחרי
+    שינוי, כך ששאלת אבות ושאלת "האם צאצא" הן O(1), ורשימת צאצאים היא O(k).
+    """
+
+    def __init__(self, categories: List[Dict[str, Any]]):
+        self._nodes: Dict[int, Dict[str, Any]] = {}
+        self._order: Optional[List[int]] = None
+        for category in categories:
+            self.upsert(category)
+
+    def upsert(self, category: Dict[str, Any]) -> None:
+        """מוסיף או מעדכן קטגוריה (למשל אחרי יצירה או עדכון)."""
+        self._nodes[category["id"]] = {
+            "id": category["id"],
+            "name": category.get("name", ""),
+            "slug": category.get("slug", ""),
+            "parent": category.get("parent") or 0,
+            "count": category.get("count", 0),
+        }
+        self._order = None
+
+    def remove(self, category_id: int) -> None:
+        """מסיר קטגוריה; הילדים שלה עוברים להורה שלה, כמו ב-WordPress."""
+        node = self._nodes.pop(category_id, None)
+        if node is None:
+            return
+        for child in self._nodes.values():
+            if child["parent"] == category_id:
+                child["parent"] = node["parent"]
+        self._order = None
+
+    def _index(self) -> None:
+        if self._order is not None:
+            return
+        children: Dict[int, List[int]] = {}
+        for node in sorted(self._nodes.values(), key=lambda n: (n["name"].lower(), n["id"])):
+            parent = node["parent"] if node["parent"] in self._nodes else 0
+            children.setdefault(parent, []).append(node["id"])
+
+        self._children = children
+        self._paths: Dict[int, Tuple[int, ...]] = {}
+        self._enter: Dict[int, int] = {}
+        self._exit: Dict[int, int] = {}
+        order: List[int] = []
+        # DFS איטרטיבי; קטגוריות במעגל (נתונים פגומים) פשוט לא נכנסות לעץ
+        stack: List[Tuple[int, Tuple[int, ...], bool]] = [
+            (root, (), False) for root in reversed(children.get(0, []))
+        ]
+        while stack:
+            category_id, parents, done = stack.pop()
+            if done:
+                self._exit[category_id] = len(order)
+                continue
+            self._paths[category_id] = parents + (category_id,)
+            self._enter[category_id] = len(order)
+            order.append(category_id)
+            stack.append((category_id, parents, True))
+            for child in reversed(children.get(category_id, [])):
+                stack.append((child, parents + (category_id,), False))
+        self._order = order
+
+    def _get(self, category_id: int) -> Dict[str, Any]:
+        self._index()
+        if category_id not in self._paths:
+            raise WordPressError(f"Unknown product category: {category_id}", "unknown_category")
+        return self._nodes[category_id]
+
+    def __contains__(self, category_id: int) -> bool:
+        return category_id in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def node(self, category_id: int) -> Dict[str, Any]:
+        return dict(self._get(category_id), depth=len(self._paths[category_id]) - 1)
+
+    def path(self, category_id: int) -> List[Dict[str, Any]]:
+        """הקטגוריות מהשורש ועד הקטגוריה עצמה."""
+        self._get(category_id)
+        return [self.node(node_id) for node_id in self._paths[category_id]]
+
+    def ancestors(self, category_id: int) -> List[int]:
+        self._get(category_id)
+        return list(self._paths[category_id][:-1])
+
+    def children(self, category_id: int) -> List[int]:
+        self._get(category_id)
+        return list(self._children.get(category_id, []))
+
+    def descendants(self, category_id: int, include_self: bool = False) -> List[int]:
+        """כל הצאצאים בסדר DFS (עמוק קודם)."""
+        self._get(category_id)
+        start = self._enter[category_id] + (0 if include_self else 1)
+        return self._order[start:self._exit[category_id]]
+
+    def is_descendant(self, category_id: int, ancestor_id: int) -> bool:
+        self._get(category_id)
+        self._get(ancestor_id)
+        return self._enter[ancestor_id] < self._enter[category_id] < self._exit[ancestor_id]
+
+
+async def get_category_tree(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    refresh: bool = False,
+) -> CategoryTree:
+    """
+    מחזיר את עץ הקטגוריות של החנות מהמטמון, ובונה אותו מכל עמודי
+    /products/categories בקריאה הראשונה (או כשמתבקש refresh).
+    """
+    tree = store.caches.get(CATEGORY_TREE_CACHE)
+    if tree is None or refresh:
+        categories = await fetch_all(client, "/products/categories", {"_fields": CATEGORY_TREE_FIELDS})
+        tree = store.caches[CATEGORY_TREE_CACHE] = CategoryTree(categories)
+    return tree
+
+
+def _update_cached_tree(store: StoreProfile, category: Optional[Dict[str, Any]] = None, deleted_id: Optional[int] = None) -> None:
+    """מעדכן את עץ הקטגוריות השמור (אם נבנה) ואת אינדקס השמות אחרי יצירה, עדכון או מחיקה."""
+    invalidate_names(store, "categories")
+    tree = store.caches.get(CATEGORY_TREE_CACHE)
+    if tree is None:
+        return
+    if deleted_id is not None:
+        tree.remove(deleted_id)
+    elif category and "id" in category:
+        tree.upsert(category)
+
+
+async def fetch_subtree_products(
+    client: httpx.AsyncClient,
+    tree: CategoryTree,
+    category_id: int,
+    filters: Optional[Dict[str, Any]] = None,
+    concurrency: int = 8,
+) -> Dict[str, Any]:
+    """
+    מחזיר את כל המוצרים בקטגוריה ובכל תתי-הקטגוריות שלה, בטעינה מקבילית לכל
+    קטגוריה בעץ ובלי כפילויות.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        tree: עץ הקטגוריות.
+        category_id: מזהה קטגוריית השורש.
+        filters: מסננים נוספים למוצרים (status, stock_status וכו').
+        concurrency: מספר הקטגוריות שנטענות במקביל.
+
+    Returns:
+        Dict[str, Any]: הקטגוריות שנסרקו והמוצרים (ממוינים לפי מזהה).
+    """
+    category_ids = tree.descendants(category_id, include_self=True)
+    params = {**(filters or {}), "_fields": projection(Product)}
+    products: Dict[int, Product] = {}
+
+    async def fetch(term_id: int) -> None:
+        async for response in iter_pages(client, "/products", {**params, "category": term_id}):
+            for product in decode_many(Product, response.content):
+                products.setdefault(product.id, product)
+
+    await gather_limited((fetch(term_id) for term_id in category_ids), concurrency)
+    return {
+        "category": tree.node(category_id),
+        "categories": category_ids,
+        "total": len(products),
+        "products": [to_dict(products[product_id]) for product_id in sorted(products)],
+    }
+
 def register_product_category_tools(mcp: FastMCP) -> None:
     """
     רישום כלים לניהול קטגוריות מוצרים.
@@ -27,6 +208,7 @@ def register_product_category_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת קטגוריות מוצרים מ-WooCommerce.
@@ -38,20 +220,13 @@ def register_product_category_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת קטגוריות המוצרים.
         """
         # הערך יילקח מהמשתנים בזמן הקריאה לפונקציה
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -60,7 +235,7 @@ def register_product_category_tools(mcp: FastMCP) -> None:
             **filters
         }
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(
                 "/products/categories",
                 params=params
@@ -81,6 +256,7 @@ def register_product_category_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר קטגוריית מוצר בודדת לפי המזהה שלה.
@@ -90,21 +266,14 @@ def register_product_category_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הקטגוריה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/products/categories/{category_id}")
             
             if response.status_code >= 400:
@@ -125,6 +294,7 @@ def register_product_category_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר קטגוריית מוצר חדשה ב-WooCommerce.
@@ -137,19 +307,12 @@ def register_product_category_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הקטגוריה שנוצרה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
         category_data = {
             "name": name
@@ -164,7 +327,7 @@ def register_product_category_tools(mcp: FastMCP) -> None:
         if image is not None:
             category_data["image"] = image
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 "/products/categories",
                 json=category_data
@@ -177,7 +340,9 @@ def register_product_category_tools(mcp: FastMCP) -> None:
                     error_data.get("code")
                 )
             
-            return response.json()
+            category = response.json()
+            _update_cached_tree(store, category)
+            return category
     
     @mcp.tool()
     async def update_product_category(
@@ -189,6 +354,7 @@ def register_product_category_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מעדכן קטגוריית מוצר קיימת ב-WooCommerce.
@@ -202,19 +368,12 @@ def register_product_category_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הקטגוריה המעודכנת.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
         category_data = {}
         
@@ -233,7 +392,7 @@ def register_product_category_tools(mcp: FastMCP) -> None:
         if not category_data:
             raise ValueError("At least one parameter must be provided for update")
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.put(
                 f"/products/categories/{category_id}",
                 json=category_data
@@ -246,7 +405,9 @@ def register_product_category_tools(mcp: FastMCP) -> None:
                     error_data.get("code")
                 )
             
-            return response.json()
+            category = response.json()
+            _update_cached_tree(store, category)
+            return category
     
     @mcp.tool()
     async def delete_product_category(
@@ -255,6 +416,7 @@ def register_product_category_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק קטגוריית מוצר מ-WooCommerce.
@@ -265,21 +427,14 @@ def register_product_category_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/products/categories/{category_id}",
                 params={"force": force}
@@ -292,4 +447,109 @@ def register_product_category_tools(mcp: FastMCP) -> None:
                     error_data.get("code")
                 )
             
-            return response.json() 
\ No newline at end of file
+            _update_cached_tree(store, deleted_id=category_id)
+            return response.json() 
+
+    @mcp.tool()
+    async def get_category_path(
+        category_id: Union[int, str],
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחזיר את הנתיב של קטגוריה מהשורש (פירורי לחם), מתוך עץ הקטגוריות השמור.
+
+        Args:
+            category_id: מזהה, שם או slug של הקטגוריה.
+            refresh: האם לבנות מחדש את עץ הקטגוריות מה-API.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: הקטגוריה, הנתיב שלה ומזהי תתי-הקטגוריות הישירות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            category_id = await resolve_id(store, client, "categories", category_id)
+            tree = await get_category_tree(store, client, refresh)
+
+        path = tree.path(category_id)
+        return {
+            "category": path[-1],
+            "path": path,
+            "path_names": " > ".join(node["name"] for node in path),
+            "children": tree.children(category_id),
+        }
+
+    @mcp.tool()
+    async def get_category_descendants(
+        category_id: Union[int, str],
+        include_self: bool = False,
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        מחזיר את כל תתי-הקטגוריות (בכל העומקים) של קטגוריה, מתוך עץ הקטגוריות השמור.
+
+        Args:
+            category_id: מזהה, שם או slug של הקטגוריה.
+            include_self: האם לכלול את הקטגוריה עצמה.
+            refresh: האם לבנות מחדש את עץ הקטגוריות מה-API.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            List[Dict[str, Any]]: הקטגוריות בסדר העץ, כל אחת עם depth.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            category_id = await resolve_id(store, client, "categories", category_id)
+            tree = await get_category_tree(store, client, refresh)
+
+        return [tree.node(node_id) for node_id in tree.descendants(category_id, include_self)]
+
+    @mcp.tool()
+    async def get_category_tree_products(
+        category_id: Union[int, str],
+        filters: Optional[Dict[str, Any]] = None,
+        concurrency: int = 8,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחזיר את כל המוצרים בקטגוריה ובכל תתי-הקטגוריות שלה, בטעינה מקבילית וללא כפילויות.
+
+        Args:
+            category_id: מזהה, שם או slug של קטגוריית השורש.
+            filters: מסננים נוספים למוצרים (status, stock_status וכו').
+            concurrency: מספר הקטגוריות שנטענות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: הקטגוריות שנסרקו ורשימת המוצרים.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            category_id = await resolve_id(store, client, "categories", category_id)
+            filters = await resolve_term_filters(store, client, filters)
+            tree = await get_category_tree(store, client)
+            return await fetch_subtree_products(client, tree, category_id, filters, concurrency)
+
@@ -2,12 +2,177 @@
 מודול לניהול חוות דעת על מוצרים ב-WooCommerce.
 """
 
-from typing import Any, Dict, List, Optional
+import html
+import re
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .utils import WordPressError, apply_batch, handle_response_error, iter_pages
+from .profiles import resolve_store
+
+# פעולות מודרציה והסטטוס שנקבע לחוות הדעת בכל אחת מהן
+REVIEW_ACTIONS = {
+    "approve": "approved",
+    "hold": "hold",
+    "spam": "spam",
+    "trash": "trash",
+}
+
+REVIEW_RULE_CONDITIONS = ("keywords", "pattern", "min_rating", "max_rating", "reviewers", "verified", "product_ids")
+
+MODERATION_FIELDS = "id,product_id,status,reviewer,reviewer_email,review,rating,verified"
+
+# מספר חוות הדעת לדוגמה בדוח
+MODERATION_SAMPLE_SIZE = 20
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _review_text(review: Dict[str, Any]) -> str:
+    return html.unescape(_TAG_RE.sub(" ", review.get("review") or "")).strip()
+
+
+def compile_review_rules(rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    מאמת כללי מודרציה ומכין אותם להרצה (הידור ביטויים רגולריים, אותיות קטנות).
+
+    Raises:
+        WordPressError: אם כלל חסר פעולה או תנאים, או שהביטוי הרגולרי שגוי.
+    """
+    compiled = []
+    for number, rule in enumerate(rules, start=1):
+        if rule.get("action") not in REVIEW_ACTIONS:
+            raise WordPressError(
+                f"Rule {number}: action must be one of {', '.join(REVIEW_ACTIONS)}"
+            )
+        if not any(rule.get(condition) is not None for condition in REVIEW_RULE_CONDITIONS):
+            raise WordPressError(f"Rule {number}: at least one condition is required")
+        try:
+            pattern = re.compile(rule["pattern"], re.IGNORECASE) if rule.get("pattern") else None
+        except re.error as e:
+            raise WordPressError(f"Rule {number}: invalid pattern: {e}")
+        compiled.append({
+            **rule,
+            "pattern": pattern,
+            "keywords": [keyword.lower() for keyword in rule.get("keywords") or []],
+            "reviewers": [reviewer.strip().lower() for reviewer in rule.get("reviewers") or []],
+        })
+    return compiled
+
+
+def _rule_matches(rule: Dict[str, Any], review: Dict[str, Any], text: str) -> bool:
+    rating = review.get("rating") or 0
+    if rule.get("min_rating") is not None and rating < rule["min_rating"]:
+        return False
+    if rule.get("max_rating") is not None and rating > rule["max_rating"]:
+        return False
+    if rule.get("verified") is not None and bool(review.get("verified")) != rule["verified"]:
+        return False
+    if rule.get("product_ids") and review.get("product_id") not in rule["product_ids"]:
+        return False
+    if rule["reviewers"]:
+        identities = {str(review.get("reviewer") or "").strip().lower(), str(review.get("reviewer_email") or "").lower()}
+        if not identities & set(rule["reviewers"]):
+            return False
+    if rule["keywords"]:
+        haystack = f"{text} {review.get('reviewer') or ''}".lower()
+        if not any(keyword in haystack for keyword in rule["keywords"]):
+            return False
+    if rule["pattern"] is not None and not rule["pattern"].search(text):
+        return False
+    return True
+
+
+def match_review(rules: List[Dict[str, Any]], review: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    """
+    מחזיר את הכלל הראשון שמתאים לחוות הדעת (אינדקס ופעולה), או None.
+
+    כלל מתאים כשכל התנאים שהוגדרו בו מתקיימים.
+    """
+    text = _review_text(review)
+    for index, rule in enumerate(rules):
+        if _rule_matches(rule, review, text):
+            return index, rule["action"]
+    return None
+
+
+async def moderate(
+    client: httpx.AsyncClient,
+    rules: List[Dict[str, Any]],
+    status: str = "hold",
+    product_id: Optional[int] = None,
+    dry_run: bool = False,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """
+    עובר על כל חוות הדעת בסטטוס נתון, מחיל עליהן את הכללים ומעדכן את
+    הסטטוס דרך /products/reviews/batch.
+
+    ההחלטות נאספות במהלך הקריאה ונשלחות רק בסופה, כי שינוי סטטוס בזמן
+    הדפדוף מזיז את העמודים הבאים ומדלג על חוות דעת.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        rules: כללי המודרציה (לפי סדר עדיפות).
+        status: סטטוס חוות הדעת לסריקה (hold = ממתינות לאישור, או all).
+        product_id: הגבלה למוצר אחד (אופציונלי).
+        dry_run: החזרת דוח בלבד, ללא שינויים.
+        concurrency: מספר בקשות ה-batch שיישלחו במקביל.
+
+    Returns:
+        Dict[str, Any]: מספר חוות הדעת שנסרקו והתאימו, ספירות לפי פעולה ולפי כלל,
+        דוגמאות, ותוצאות העדכון.
+    """
+    compiled = compile_review_rules(rules)
+    params: Dict[str, Any] = {"status": status, "_fields": MODERATION_FIELDS}
+    if product_id:
+        params["product"] = product_id
+
+    updates: List[Dict[str, Any]] = []
+    sample: List[Dict[str, Any]] = []
+    actions = {action: 0 for action in REVIEW_ACTIONS}
+    rule_counts = [0] * len(compiled)
+    scanned = 0
+    async for response in iter_pages(client, "/products/reviews", params):
+        for review in response.json():
+            scanned += 1
+            match = match_review(compiled, review)
+            if match is None:
+                continue
+            index, action = match
+            rule_counts[index] += 1
+            actions[action] += 1
+            # חוות דעת שכבר בסטטוס הרצוי לא נשלחות
+            if review.get("status") != REVIEW_ACTIONS[action]:
+                updates.append({"id": review["id"], "status": REVIEW_ACTIONS[action]})
+            if len(sample) < MODERATION_SAMPLE_SIZE:
+                sample.append({
+                    "id": review["id"],
+                    "product_id": review.get("product_id"),
+                    "reviewer": review.get("reviewer"),
+                    "rating": review.get("rating"),
+                    "excerpt": _review_text(review)[:120],
+                    "rule": index,
+                    "action": action,
+                })
+
+    result: Dict[str, Any] = {
+        "scanned": scanned,
+        "matched": sum(rule_counts),
+        "actions": actions,
+        "rules": rule_counts,
+        "to_update": len(updates),
+        "sample": sample,
+        "dry_run": dry_run,
+    }
+    if dry_run:
+        return result
+
+    summary = await apply_batch(client, "/products/reviews", update=updates, concurrency=concurrency)
+    result.update({"updated": summary["updated"], "failed": summary["failed"], "errors": summary["errors"]})
+    return result
 
 
 def register_product_review_tools(mcp: FastMCP) -> None:
@@ -27,6 +192,7 @@ def register_product_review_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת חוות דעת על מוצרים מ-WooCommerce.
@@ -39,19 +205,12 @@ def register_product_review_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת חוות הדעת.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -63,7 +222,7 @@ def register_product_review_tools(mcp: FastMCP) -> None:
         if product_id:
             params["product"] = product_id
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(
                 "/products/reviews",
                 params=params
@@ -78,6 +237,7 @@ def register_product_review_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר חוות דעת בודדת על מוצר לפי המזהה שלה.
@@ -87,21 +247,14 @@ def register_product_review_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני חוות הדעת.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/products/reviews/{review_id}")
             
             handle_response_error(response, f"Failed to get product review {review_id}")
@@ -113,6 +266,7 @@ def register_product_review_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר חוות דעת חדשה על מוצר ב-WooCommerce.
@@ -122,6 +276,7 @@ def register_product_review_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני חוות הדעת שנוצרה.
@@ -136,17 +291,9 @@ def register_product_review_tools(mcp: FastMCP) -> None:
             ...     "verified": True
             ... }
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 "/products/reviews",
                 json=review_data
@@ -162,6 +309,7 @@ def register_product_review_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מעדכן חוות דעת קיימת על מוצר ב-WooCommerce.
@@ -172,21 +320,14 @@ def register_product_review_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני חוות הדעת המעודכנת.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.put(
                 f"/products/reviews/{review_id}",
                 json=review_data
@@ -202,6 +343,7 @@ def register_product_review_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק חוות דעת על מוצר מ-WooCommerce.
@@ -212,25 +354,59 @@ def register_product_review_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/products/reviews/{review_id}",
                 params={"force": force}
             )
             
             handle_response_error(response, f"Failed to delete product review {review_id}")
-            return response.json() 
\ No newline at end of file
+            return response.json()
+
+    @mcp.tool()
+    async def moderate_reviews(
+        rules: List[Dict[str, Any]],
+        status: str = "hold",
+        product_id: Optional[int] = None,
+        dry_run: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מודרציה מרוכזת של חוות דעת: סורק את כל חוות הדעת בסטטוס נתון, מחיל כללים
+        מקומיים ומאשר/מסמן כספאם/מעביר לפח דרך בקשות batch.
+
+        כל כלל כולל action (approve, hold, spam, trash) ותנאי אחד או יותר:
+        keywords (רשימת מילים, מספיקה אחת), pattern (ביטוי רגולרי על התוכן),
+        min_rating/max_rating, reviewers (שמות או אימיילים), verified ו-product_ids.
+        הכלל הראשון שכל התנאים שלו מתקיימים קובע את הפעולה; חוות דעת שלא התאימו
+        לאף כלל לא משתנות.
+
+        Args:
+            rules: כללי המודרציה, למשל [{"action": "spam", "keywords": ["casino"]}].
+            status: סטטוס חוות הדעת לסריקה (ברירת מחדל: hold - ממתינות לאישור).
+            product_id: הגבלה למוצר אחד (אופציונלי).
+            dry_run: החזרת דוח בלבד, ללא שינויים.
+            concurrency: מספר בקשות ה-batch שיישלחו במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: דוח: נסרקו, התאימו, ספירות לפי פעולה ולפי כלל, דוגמאות ותוצאות העדכון.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await moderate(client, rules, status, product_id, dry_run, concurrency)
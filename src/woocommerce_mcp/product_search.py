@@ -0,0 +1,510 @@
+"""
+מודול לאינדקס חיפוש מקומי של מוצרים (SQLite FTS5).
+
+האינדקס נבנה פעם אחת מכל המוצרים בחנות, מתעדכן בהדרגה לפי modified_after,
+ומאפשר חיפוש טקסט מדורג, סינון לפי מחיר, מלאי וקטגוריה ופאסטים (ספירות)
+בלי לשלוח שאילתות חיפוש לבסיס הנתונים של החנות.
+"""
+
+import hashlib
+import html
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import WordPressError, get_data_dir, iter_pages
+from .profiles import StoreProfile, resolve_store
+from .resolver import resolve_id
+from .product_categories import get_category_tree
+
+# מפתח האינדקס במטמונים של החנות
+SEARCH_INDEX_CACHE = "product_search_index"
+
+# גיל מרבי (בשניות) של האינדקס לפני רענון הדרגתי אוטומטי בחיפוש
+SEARCH_INDEX_MAX_AGE = 300
+
+# גיל מרבי (בשניות) של הבנייה המלאה האחרונה; רק בנייה מלאה מסירה מוצרים
+# שנמחקו לצמיתות מחוץ לשרת (מוצרים שהועברו לפח מוסרים גם ברענון הדרגתי)
+SEARCH_INDEX_FULL_REFRESH_INTERVAL = 86400
+
+# השדות שנשלפים לאינדקס
+SEARCH_INDEX_FIELDS = (
+    "id,name,slug,sku,type,status,price,regular_price,sale_price,stock_status,stock_quantity,"
+    "short_description,description,categories,tags,attributes,date_modified_gmt"
+)
+
+# משקלות bm25 לעמודות name, sku, description, categories, attributes
+SEARCH_WEIGHTS = (10.0, 8.0, 1.0, 3.0, 2.0)
+
+SEARCH_SORTS = {
+    "relevance": "score",
+    "price_asc": "p.price IS NULL, p.price",
+    "price_desc": "p.price IS NULL, p.price DESC",
+    "name": "p.name COLLATE NOCASE",
+    "newest": "p.date_modified_gmt DESC",
+}
+
+SEARCH_FACETS = ("categories", "stock_status", "type", "attributes")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    sku TEXT,
+    type TEXT,
+    status TEXT,
+    price REAL,
+    regular_price REAL,
+    sale_price REAL,
+    stock_status TEXT,
+    stock_quantity INTEGER,
+    date_modified_gmt TEXT
+);
+CREATE TABLE IF NOT EXISTS product_categories (
+    product_id INTEGER,
+    category_id INTEGER,
+    name TEXT
+);
+CREATE INDEX IF NOT EXISTS product_categories_category ON product_categories (category_id);
+CREATE INDEX IF NOT EXISTS product_categories_product ON product_categories (product_id);
+CREATE TABLE IF NOT EXISTS product_attributes (
+    product_id INTEGER,
+    name TEXT,
+    option TEXT
+);
+CREATE INDEX IF NOT EXISTS product_attributes_product ON product_attributes (product_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name, sku, description, categories, attributes,
+    tokenize = "unicode61 remove_diacritics 2"
+);
+CREATE TABLE IF NOT EXISTS index_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TOKEN_RE = re.compile(r"[^\s\"]+")
+
+
+def _price(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _plain_text(value: Optional[str]) -> str:
+    return html.unescape(_TAG_RE.sub(" ", value or ""))
+
+
+def fts_query(text: str) -> str:
+    """
+    ממיר טקסט חופשי לשאילתת FTS5 בטוחה: כל מילה כביטוי מצוטט עם התאמת קידומת,
+    וכל המילים נדרשות (AND).
+    """
+    tokens = _TOKEN_RE.findall(text)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class ProductSearchIndex:
+    """אינדקס חיפוש מוצרים בקובץ SQLite אחד לכל חנות."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path)
+        self._db.row_factory = sqlite3.Row
+        try:
+            self._db.executescript(_SCHEMA)
+        except sqlite3.OperationalError as e:
+            raise WordPressError(f"SQLite FTS5 is not available: {e}")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _state(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM index_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self._db.execute(
+            "INSERT INTO index_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        """תאריך השינוי (GMT) המאוחר ביותר שנכלל באינדקס."""
+        return self._state("last_modified")
+
+    @property
+    def refreshed_at(self) -> float:
+        return float(self._state("refreshed_at") or 0)
+
+    @property
+    def full_refresh_at(self) -> float:
+        return float(self._state("full_refresh_at") or 0)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def _delete(self, ids: Iterable[int]) -> None:
+        rows = [(product_id,) for product_id in ids]
+        self._db.executemany("DELETE FROM products WHERE id = ?", rows)
+        self._db.executemany("DELETE FROM products_fts WHERE rowid = ?", rows)
+        self._db.executemany("DELETE FROM product_categories WHERE product_id = ?", rows)
+        self._db.executemany("DELETE FROM product_attributes WHERE product_id = ?", rows)
+
+    def upsert(self, products: List[Dict[str, Any]]) -> None:
+        """מוסיף או מחליף מוצרים באינדקס (בטרנזקציה אחת)."""
+        with self._db:
+            self._delete(product["id"] for product in products)
+            for product in products:
+                categories = product.get("categories") or []
+                attributes = [
+                    (attr.get("name", ""), option)
+                    for attr in product.get("attributes") or []
+                    for option in attr.get("options") or ([attr["option"]] if attr.get("option") else [])
+                ]
+                self._db.execute(
+                    "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        product["id"],
+                        product.get("name", ""),
+                        product.get("sku") or "",
+                        product.get("type", ""),
+                        product.get("status", ""),
+                        _price(product.get("price")),
+                        _price(product.get("regular_price")),
+                        _price(product.get("sale_price")),
+                        product.get("stock_status"),
+                        product.get("stock_quantity"),
+                        product.get("date_modified_gmt"),
+                    ),
+                )
+                self._db.executemany(
+                    "INSERT INTO product_categories VALUES (?, ?, ?)",
+                    [(product["id"], category["id"], category.get("name", "")) for category in categories],
+                )
+                self._db.executemany(
+                    "INSERT INTO product_attributes VALUES (?, ?, ?)",
+                    [(product["id"], name, option) for name, option in attributes],
+                )
+                tags = " ".join(tag.get("name", "") for tag in product.get("tags") or [])
+                self._db.execute(
+                    "INSERT INTO products_fts (rowid, name, sku, description, categories, attributes) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        product["id"],
+                        product.get("name", ""),
+                        product.get("sku") or "",
+                        _plain_text(product.get("short_description")) + " " + _plain_text(product.get("description")),
+                        " ".join(category.get("name", "") for category in categories) + " " + tags,
+                        " ".join(f"{name} {option}" for name, option in attributes),
+                    ),
+                )
+
+    def remove(self, ids: List[int]) -> None:
+        with self._db:
+            self._delete(ids)
+
+    async def refresh(self, client: httpx.AsyncClient, full: bool = False) -> Dict[str, Any]:
+        """
+        מעדכן את האינדקס מה-API.
+
+        רענון הדרגתי מושך רק מוצרים שהשתנו מאז השינוי האחרון שנכלל באינדקס,
+        ומסיר מוצרים שהועברו לפח מאז (status=any אינו כולל אותם). מוצרים
+        שנמחקו לצמיתות מחוץ לשרת מוסרים רק ברענון מלא.
+
+        Args:
+            client: לקוח WooCommerce פתוח.
+            full: האם לבנות מחדש את כל האינדקס.
+
+        Returns:
+            Dict[str, Any]: סוג הרענון ומספר המוצרים שנוספו/עודכנו והוסרו.
+        """
+        since = None if full else self.last_modified
+        params: Dict[str, Any] = {"_fields": SEARCH_INDEX_FIELDS, "status": "any"}
+        if since:
+            params.update({"modified_after": since, "dates_are_gmt": "true"})
+
+        seen = set()
+        latest = since or ""
+        async for response in iter_pages(client, "/products", params):
+            products = response.json()
+            self.upsert(products)
+            for product in products:
+                seen.add(product["id"])
+                latest = max(latest, product.get("date_modified_gmt") or "")
+
+        if since is None:
+            stale = [row[0] for row in self._db.execute("SELECT id FROM products") if row[0] not in seen]
+        else:
+            trash_params = {"_fields": "id", "status": "trash", "modified_after": since, "dates_are_gmt": "true"}
+            stale = [product["id"] async for response in iter_pages(client, "/products", trash_params)
+                     for product in response.json()]
+        self.remove(stale)
+        removed = len(stale)
+
+        with self._db:
+            if latest:
+                self._set_state("last_modified", latest)
+            self._set_state("refreshed_at", str(time.time()))
+            if since is None:
+                self._set_state("full_refresh_at", str(time.time()))
+        return {"mode": "incremental" if since else "full", "indexed": len(seen), "removed": removed, "total": len(self)}
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        category_ids: Optional[List[int]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        stock_status: Optional[str] = None,
+        in_stock: Optional[bool] = None,
+        product_type: Optional[str] = None,
+        status: Optional[str] = "publish",
+        attributes: Optional[Dict[str, str]] = None,
+        facets: Optional[List[str]] = None,
+        sort: str = "relevance",
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        מחפש מוצרים באינדקס.
+
+        Returns:
+            Dict[str, Any]: total, results (ממוינים) ו-facets (ספירות על כל ההתאמות).
+        """
+        if sort not in SEARCH_SORTS:
+            raise WordPressError(f"Unsupported sort: {sort} (available: {', '.join(SEARCH_SORTS)})")
+        unknown = set(facets or []) - set(SEARCH_FACETS)
+        if unknown:
+            raise WordPressError(f"Unsupported facets: {', '.join(sorted(unknown))}")
+
+        joins = ""
+        where: List[str] = []
+        args: List[Any] = []
+        score = "0"
+        match = fts_query(query or "")
+        if match:
+            joins = " JOIN products_fts f ON f.rowid = p.id"
+            where.append("products_fts MATCH ?")
+            args.append(match)
+            score = f"bm25(products_fts, {', '.join(str(w) for w in SEARCH_WEIGHTS)})"
+        elif sort == "relevance":
+            sort = "name"
+
+        if category_ids:
+            placeholders = ", ".join("?" for _ in category_ids)
+            where.append(
+                "EXISTS (SELECT 1 FROM product_categories c "
+                f"WHERE c.product_id = p.id AND c.category_id IN ({placeholders}))"
+            )
+            args.extend(category_ids)
+        for name, option in (attributes or {}).items():
+            where.append(
+                "EXISTS (SELECT 1 FROM product_attributes a WHERE a.product_id = p.id "
+                "AND a.name = ? COLLATE NOCASE AND a.option = ? COLLATE NOCASE)"
+            )
+            args.extend([name, option])
+        for clause, value in (
+            ("p.price >= ?", min_price),
+            ("p.price <= ?", max_price),
+            ("p.stock_status = ?", stock_status),
+            ("p.type = ?", product_type),
+            ("p.status = ?", status),
+        ):
+            if value is not None:
+                where.append(clause)
+                args.append(value)
+        if in_stock is not None:
+            where.append("p.stock_status " + ("!= 'outofstock'" if in_stock else "= 'outofstock'"))
+
+        where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+        matches = f"SELECT p.id FROM products p{joins}{where_sql}"
+
+        total = self._db.execute(f"SELECT COUNT(*) FROM ({matches})", args).fetchone()[0]
+        rows = self._db.execute(
+            f"SELECT p.*, {score} AS score FROM products p{joins}{where_sql} "
+            f"ORDER BY {SEARCH_SORTS[sort]}, p.id LIMIT ? OFFSET ?",
+            args + [limit, offset],
+        ).fetchall()
+
+        ids = [row["id"] for row in rows]
+        categories: Dict[int, List[str]] = {}
+        if ids:
+            placeholders = ", ".join("?" for _ in ids)
+            for row in self._db.execute(
+                f"SELECT product_id, name FROM product_categories WHERE product_id IN ({placeholders})", ids
+            ):
+                categories.setdefault(row["product_id"], []).append(row["name"])
+
+        results = []
+        for row in rows:
+            item = {key: row[key] for key in row.keys() if key != "score"}
+            item["categories"] = categories.get(row["id"], [])
+            if match:
+                item["score"] = round(-row["score"], 4)
+            results.append(item)
+
+        return {
+            "total": total,
+            "results": results,
+            "facets": {facet: self._facet(facet, matches, args) for facet in facets or []},
+        }
+
+    def _facet(self, facet: str, matches: str, args: List[Any]) -> Any:
+        if facet == "categories":
+            query = (
+                f"SELECT c.category_id AS value, c.name AS label, COUNT(*) AS count FROM product_categories c "
+                f"WHERE c.product_id IN ({matches}) GROUP BY c.category_id ORDER BY count DESC"
+            )
+            return [dict(row) for row in self._db.execute(query, args)]
+        if facet == "attributes":
+            query = (
+                f"SELECT a.name, a.option, COUNT(DISTINCT a.product_id) AS count FROM product_attributes a "
+                f"WHERE a.product_id IN ({matches}) GROUP BY a.name, a.option ORDER BY a.name, count DESC"
+            )
+            result: Dict[str, Dict[str, int]] = {}
+            for row in self._db.execute(query, args):
+                result.setdefault(row["name"], {})[row["option"]] = row["count"]
+            return result
+        column = {"stock_status": "stock_status", "type": "type"}[facet]
+        query = (
+            f"SELECT {column} AS value, COUNT(*) AS count FROM products "
+            f"WHERE id IN ({matches}) GROUP BY {column} ORDER BY count DESC"
+        )
+        return {row["value"]: row["count"] for row in self._db.execute(query, args)}
+
+
+def get_search_index(store: StoreProfile) -> ProductSearchIndex:
+    """מחזיר את אינדקס החיפוש של החנות, ופותח אותו מהקובץ בשימוש הראשון."""
+    index = store.caches.get(SEARCH_INDEX_CACHE)
+    if index is None:
+        digest = hashlib.sha1(store.site_url.encode("utf-8")).hexdigest()[:12]
+        db_path = os.path.join(get_data_dir("indexes"), f"products-{digest}.sqlite3")
+        index = store.caches[SEARCH_INDEX_CACHE] = ProductSearchIndex(db_path)
+    return index
+
+
+def remove_from_search_index(store: StoreProfile, product_id: int) -> None:
+    """מסיר מוצר שנמחק דרך הכלים של השרת מאינדקס החיפוש, אם הוא פתוח."""
+    index = store.caches.get(SEARCH_INDEX_CACHE)
+    if index is not None:
+        index.remove([product_id])
+
+
+def register_product_search_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לחיפוש מוצרים באינדקס המקומי.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def search_products(
+        query: Optional[str] = None,
+        category: Optional[Union[int, str]] = None,
+        include_subcategories: bool = True,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        stock_status: Optional[str] = None,
+        in_stock: Optional[bool] = None,
+        type: Optional[str] = None,
+        status: Optional[str] = "publish",
+        attributes: Optional[Dict[str, str]] = None,
+        facets: Optional[List[str]] = None,
+        sort: str = "relevance",
+        limit: int = 20,
+        offset: int = 0,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחפש מוצרים באינדקס המקומי (ללא שאילתות חיפוש לחנות): חיפוש טקסט מדורג
+        בשם, SKU, תיאור, קטגוריות ומאפיינים, עם סינון ופאסטים.
+
+        האינדקס נבנה בקריאה הראשונה ומתעדכן בהדרגה כשהוא ישן מ-5 דקות.
+
+        Args:
+            query: טקסט לחיפוש (כל המילים נדרשות, עם התאמת קידומת).
+            category: מזהה, שם או slug של קטגוריה.
+            include_subcategories: האם לכלול מוצרים מתתי-הקטגוריות.
+            min_price: מחיר מינימלי.
+            max_price: מחיר מרבי.
+            stock_status: instock, outofstock או onbackorder.
+            in_stock: סינון לפי זמינות (כל מה שאינו outofstock).
+            type: סוג מוצר (simple, variable וכו').
+            status: סטטוס המוצר (ברירת מחדל: publish; None לכל הסטטוסים).
+            attributes: סינון לפי מאפיינים, למשל {"Color": "Red"}.
+            facets: ספירות להחזרה: categories, stock_status, type, attributes.
+            sort: relevance, price_asc, price_desc, name או newest.
+            limit: מספר תוצאות מרבי.
+            offset: דילוג על תוצאות (לדפדוף).
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: total, results ו-facets.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+        index = get_search_index(store)
+
+        async with store.client() as client:
+            if time.time() - index.full_refresh_at > SEARCH_INDEX_FULL_REFRESH_INTERVAL:
+                await index.refresh(client, full=True)
+            elif time.time() - index.refreshed_at > SEARCH_INDEX_MAX_AGE:
+                await index.refresh(client)
+
+            category_ids = None
+            if category is not None:
+                category_id = await resolve_id(store, client, "categories", category)
+                category_ids = [category_id]
+                if include_subcategories:
+                    tree = await get_category_tree(store, client)
+                    if category_id in tree:
+                        category_ids = tree.descendants(category_id, include_self=True)
+
+        return index.search(
+            query, category_ids, min_price, max_price, stock_status, in_stock,
+            type, status, attributes, facets, sort, limit, offset,
+        )
+
+    @mcp.tool()
+    async def refresh_product_index(
+        full: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מעדכן את אינדקס החיפוש המקומי של המוצרים.
+
+        Args:
+            full: בנייה מחדש מלאה (מסירה גם מוצרים שנמחקו); אחרת רק מוצרים שהשתנו.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סוג הרענון ומספר המוצרים שעודכנו והוסרו.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+        index = get_search_index(store)
+
+        async with store.client() as client:
+            return await index.refresh(client, full)
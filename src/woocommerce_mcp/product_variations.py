@@ -2,12 +2,380 @@
 מודול לניהול וריאציות מוצרים ב-WooCommerce.
 """
 
-from typing import Any, Dict, List, Optional
+import asyncio
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .models import Variation, decode_many, projection
+from .utils import (
+    MAX_REPORTED_ERRORS,
+    WordPressError,
+    apply_batch,
+    fetch_all,
+    handle_response_error,
+    iter_pages,
+)
+from .profiles import resolve_store
+from .sku_index import mark_sku_dirty
+
+# שדות וריאציה שניתן לקבוע בכללי המטריצה, ומושווים מול הוריאציות הקיימות
+VARIATION_RULE_FIELDS = (
+    "regular_price",
+    "sale_price",
+    "sku",
+    "manage_stock",
+    "stock_quantity",
+    "stock_status",
+    "status",
+    "weight",
+    "description",
+)
+
+# שדות שמושווים כמספר ("10" ו-"10.00" זהים); כל השאר מושווים כמחרוזת מדויקת
+NUMERIC_VARIATION_FIELDS = ("regular_price", "sale_price", "stock_quantity", "weight")
+
+# עמודות הטבלה שמחזיר fetch_catalog_variations
+CATALOG_VARIATION_COLUMNS = (
+    "product_id",
+    "product_name",
+    "variation_id",
+    "sku",
+    "attributes",
+    "price",
+    "regular_price",
+    "sale_price",
+    "stock_status",
+    "stock_quantity",
+    "manage_stock",
+)
+
+
+def _axis_label(axis: Dict[str, Any]) -> str:
+    return str(axis.get("name") or axis.get("id"))
+
+
+def _axis_matches(axis: Dict[str, Any], attribute: Dict[str, Any]) -> bool:
+    """מאפיין גלובלי מזוהה לפי id, ומאפיין מקומי לפי שם (ללא תלות באותיות)."""
+    if axis.get("id"):
+        return attribute.get("id") == axis["id"]
+    return str(attribute.get("name", "")).lower() == str(axis.get("name", "")).lower()
+
+
+def _variation_key(axes: List[Dict[str, Any]], attributes: List[Dict[str, Any]]) -> Optional[Tuple[str, ...]]:
+    """מפתח הצירוף של וריאציה קיימת, או None אם היא אינה מתאימה לצירי המטריצה."""
+    if len(attributes) != len(axes):
+        return None
+    key = []
+    for axis in axes:
+        match = next((attr for attr in attributes if _axis_matches(axis, attr)), None)
+        if match is None or not match.get("option"):
+            return None
+        key.append(str(match["option"]).lower())
+    return tuple(key)
+
+
+def _same_value(field: str, current: Any, desired: Any) -> bool:
+    if current in (None, "") and desired in (None, ""):
+        return True
+    if isinstance(current, bool) or isinstance(desired, bool):
+        return current == desired
+    # רק שדות מספריים מושווים כמספר; SKU כמו "007" ו-"7" הם ערכים שונים
+    if field in NUMERIC_VARIATION_FIELDS:
+        try:
+            return float(current) == float(desired)
+        except (TypeError, ValueError):
+            pass
+    return str(current) == str(desired)
+
+
+def build_variation_matrix(
+    axes: List[Dict[str, Any]],
+    defaults: Optional[Dict[str, Any]] = None,
+    rules: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    מחשב את כל צירופי הוריאציות (מכפלה קרטזית של הצירים) ואת השדות של כל אחת.
+
+    Args:
+        axes: צירי המאפיינים, כל אחד עם name או id (מאפיין גלובלי) ו-options.
+        defaults: שדות לכל הוריאציות (מחיר, מלאי וכו'). ב-sku ניתן להשתמש
+            בשמות הצירים כתבנית, למשל "TSHIRT-{Size}-{Color}".
+        rules: כללים לפי הסדר, כל אחד עם when ({ציר: אפשרות}) ו-set (שדות לעדכון).
+
+    Returns:
+        List[Dict[str, Any]]: נתוני הוריאציות, כולל attributes.
+
+    Raises:
+        WordPressError: אם הצירים או הכללים אינם תקינים.
+    """
+    if not axes:
+        raise WordPressError("At least one attribute axis is required")
+    for axis in axes:
+        if not (axis.get("name") or axis.get("id")) or not axis.get("options"):
+            raise WordPressError(f"Each axis needs a name or id and a list of options: {axis}")
+
+    variations = []
+    for combination in itertools.product(*(axis["options"] for axis in axes)):
+        chosen = {_axis_label(axis): str(option) for axis, option in zip(axes, combination)}
+
+        variation = dict(defaults or {})
+        for rule in rules or []:
+            when = rule.get("when") or {}
+            if all(str(chosen.get(str(name), "")).lower() == str(option).lower() for name, option in when.items()):
+                variation.update(rule.get("set") or {})
+
+        unknown = set(variation) - set(VARIATION_RULE_FIELDS)
+        if unknown:
+            raise WordPressError(f"Unsupported variation fields in rules: {', '.join(sorted(unknown))}")
+        if isinstance(variation.get("sku"), str):
+            try:
+                variation["sku"] = variation["sku"].format(**chosen)
+            except (KeyError, IndexError) as e:
+                raise WordPressError(f"Unknown axis in SKU pattern: {e}")
+
+        variation["attributes"] = [
+            {("id" if axis.get("id") else "name"): axis.get("id") or axis["name"], "option": chosen[_axis_label(axis)]}
+            for axis in axes
+        ]
+        variations.append(variation)
+    return variations
+
+
+def diff_variations(
+    axes: List[Dict[str, Any]],
+    desired: List[Dict[str, Any]],
+    existing: List[Dict[str, Any]],
+    delete_missing: bool = False,
+) -> Dict[str, Any]:
+    """
+    משווה בין הוריאציות הרצויות לקיימות ומחזיר את פעולות ה-batch הנדרשות.
+
+    וריאציה קיימת מעודכנת רק בשדות שהשתנו. וריאציות שאינן במטריצה (כולל
+    כפילויות ווריאציות "כל אפשרות") נמחקות רק אם delete_missing.
+
+    Returns:
+        Dict[str, Any]: רשימות create/update/delete ומספר הוריאציות ללא שינוי ומחוץ למטריצה.
+    """
+    by_key: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+    extra = []
+    for variation in existing:
+        key = _variation_key(axes, variation.get("attributes") or [])
+        if key is None or key in by_key:
+            extra.append(variation)
+        else:
+            by_key[key] = variation
+
+    create, update = [], []
+    for variation in desired:
+        key = tuple(str(attr["option"]).lower() for attr in variation["attributes"])
+        current = by_key.pop(key, None)
+        if current is None:
+            create.append(variation)
+            continue
+        changes = {
+            field: value
+            for field, value in variation.items()
+            if field != "attributes" and not _same_value(field, current.get(field), value)
+        }
+        if changes:
+            update.append({"id": current["id"], **changes})
+
+    extra.extend(by_key.values())
+    return {
+        "create": create,
+        "update": update,
+        "delete": [variation["id"] for variation in extra] if delete_missing else [],
+        "unchanged": len(desired) - len(create) - len(update),
+        "extra": len(extra),
+    }
+
+
+async def _ensure_parent_attributes(
+    client: httpx.AsyncClient,
+    product_id: int,
+    axes: List[Dict[str, Any]],
+) -> bool:
+    """מוודא שלמוצר האב יש את כל המאפיינים והאפשרויות של המטריצה, כמאפייני וריאציה."""
+    response = await client.get(f"/products/{product_id}", params={"_fields": "id,type,attributes"})
+    handle_response_error(response, f"Failed to get product {product_id}")
+    product = response.json()
+    if product.get("type") != "variable":
+        raise WordPressError(f"Product {product_id} is not a variable product")
+
+    attributes = product.get("attributes") or []
+    changed = False
+    for axis in axes:
+        options = [str(option) for option in axis["options"]]
+        current = next((attr for attr in attributes if _axis_matches(axis, attr)), None)
+        if current is None:
+            new = {"id": axis["id"]} if axis.get("id") else {"name": axis["name"]}
+            attributes.append({**new, "options": options, "variation": True, "visible": True})
+            changed = True
+            continue
+        missing = [option for option in options if option not in current.get("options", [])]
+        if missing or not current.get("variation"):
+            current["options"] = list(current.get("options", [])) + missing
+            current["variation"] = True
+            changed = True
+
+    if changed:
+        response = await client.put(f"/products/{product_id}", json={"attributes": attributes})
+        handle_response_error(response, f"Failed to update attributes of product {product_id}")
+    return changed
+
+
+async def sync_variation_matrix(
+    client: httpx.AsyncClient,
+    product_id: int,
+    axes: List[Dict[str, Any]],
+    defaults: Optional[Dict[str, Any]] = None,
+    rules: Optional[List[Dict[str, Any]]] = None,
+    delete_missing: bool = False,
+    dry_run: bool = False,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """
+    מסנכרן את הוריאציות של מוצר למטריצת מאפיינים: יוצר, מעדכן ומוחק דרך
+    /products/{id}/variations/batch בחלקים מקבילים.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        product_id: מזהה המוצר (מסוג variable).
+        axes: צירי המאפיינים (ראו build_variation_matrix).
+        defaults: שדות לכל הוריאציות.
+        rules: כללי מחיר/מלאי לפי אפשרויות.
+        delete_missing: האם למחוק וריאציות שאינן במטריצה.
+        dry_run: החזרת התוכנית בלבד, ללא שינויים.
+        concurrency: מספר בקשות ה-batch שיישלחו במקביל.
+
+    Returns:
+        Dict[str, Any]: סיכום התוכנית והביצוע.
+    """
+    desired = build_variation_matrix(axes, defaults, rules)
+    fields = ",".join(("id", "attributes") + VARIATION_RULE_FIELDS)
+    existing = await fetch_all(client, f"/products/{product_id}/variations", {"_fields": fields})
+    plan = diff_variations(axes, desired, existing, delete_missing)
+
+    result: Dict[str, Any] = {
+        "product_id": product_id,
+        "combinations": len(desired),
+        "to_create": len(plan["create"]),
+        "to_update": len(plan["update"]),
+        "to_delete": len(plan["delete"]),
+        "unchanged": plan["unchanged"],
+        "extra": plan["extra"],
+        "dry_run": dry_run,
+    }
+    if dry_run:
+        result["plan"] = {action: plan[action] for action in ("create", "update", "delete")}
+        return result
+
+    result["parent_attributes_updated"] = await _ensure_parent_attributes(client, product_id, axes)
+    summary = await apply_batch(
+        client,
+        f"/products/{product_id}/variations",
+        plan["create"],
+        plan["update"],
+        plan["delete"],
+        concurrency,
+    )
+    result.update({key: value for key, value in summary.items() if key != "items"})
+    result["created_ids"] = [item.get("id") for item in summary["items"]["create"]]
+    return result
+
+
+def _catalog_row(product_id: int, product_name: str, variation: Variation) -> Tuple[Any, ...]:
+    attributes = ", ".join(f"{attr.name}: {attr.option}" for attr in variation.attributes)
+    return (
+        product_id,
+        product_name,
+        variation.id,
+        variation.sku,
+        attributes,
+        variation.price,
+        variation.regular_price,
+        variation.sale_price,
+        variation.stock_status,
+        variation.stock_quantity,
+        variation.manage_stock,
+    )
+
+
+async def fetch_catalog_variations(
+    client: httpx.AsyncClient,
+    product_filters: Optional[Dict[str, Any]] = None,
+    variation_filters: Optional[Dict[str, Any]] = None,
+    concurrency: int = 8,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    מחזיר את הוריאציות של כל המוצרים מסוג variable כטבלה שטוחה.
+
+    רשימת המוצרים נקראת עמוד אחר עמוד, והוריאציות של כל מוצר נטענות במקביל
+    (עד concurrency מוצרים בו-זמנית) כבר בזמן שעמודי המוצרים הבאים נטענים.
+
+    Args:
+        client: לקוח WooCommerce פתוח.
+        product_filters: מסננים לרשימת המוצרים (category, status וכו').
+        variation_filters: מסננים לוריאציות (stock_status וכו').
+        concurrency: מספר המוצרים שהוריאציות שלהם נטענות במקביל.
+        progress: פונקציה שתיקרא אחרי כל מוצר עם מצב ההתקדמות (אופציונלי).
+
+    Returns:
+        Dict[str, Any]: העמודות, השורות (לפי סדר המוצרים) ומספר המוצרים, הוריאציות והשגיאות.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    variation_params = {**(variation_filters or {}), "_fields": projection(Variation)}
+    product_params = {**(product_filters or {}), "type": "variable", "_fields": "id,name"}
+
+    rows_by_product: Dict[int, List[Tuple[Any, ...]]] = {}
+    state = {"products": 0, "done": 0, "variations": 0, "failed": 0}
+    errors: List[Dict[str, Any]] = []
+    tasks: set = set()
+
+    async def fetch(index: int, product_id: int, name: str) -> None:
+        try:
+            rows = []
+            path = f"/products/{product_id}/variations"
+            async for response in iter_pages(client, path, variation_params):
+                rows.extend(_catalog_row(product_id, name, v) for v in decode_many(Variation, response.content))
+            rows_by_product[index] = rows
+            state["variations"] += len(rows)
+        except (WordPressError, httpx.HTTPError) as e:
+            state["failed"] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"product_id": product_id, "message": str(e)})
+        finally:
+            state["done"] += 1
+            semaphore.release()
+            if progress is not None:
+                progress(dict(state))
+
+    try:
+        async for response in iter_pages(client, "/products", product_params):
+            for product in response.json():
+                await semaphore.acquire()
+                task = asyncio.ensure_future(fetch(state["products"], product["id"], product.get("name", "")))
+                state["products"] += 1
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return {
+        "columns": list(CATALOG_VARIATION_COLUMNS),
+        "rows": [row for index in sorted(rows_by_product) for row in rows_by_product[index]],
+        "products": state["products"],
+        "variations": state["variations"],
+        "failed_products": state["failed"],
+        "errors": errors,
+    }
 
 
 def register_product_variation_tools(mcp: FastMCP) -> None:
@@ -27,6 +395,7 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר רשימת וריאציות של מוצר מ-WooCommerce.
@@ -39,19 +408,12 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: רשימת הוריאציות.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -60,7 +422,7 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
             **filters
         }
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(
                 f"/products/{product_id}/variations",
                 params=params
@@ -76,6 +438,7 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר וריאציית מוצר בודדת לפי המזהה שלה.
@@ -86,21 +449,14 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הוריאציה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get(f"/products/{product_id}/variations/{variation_id}")
             
             handle_response_error(response, f"Failed to get variation {variation_id} for product {product_id}")
@@ -113,6 +469,7 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         יוצר וריאציית מוצר חדשה ב-WooCommerce.
@@ -123,6 +480,7 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הוריאציה שנוצרה.
@@ -139,23 +497,16 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
             ...     "stock_quantity": 10
             ... }
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.post(
                 f"/products/{product_id}/variations",
                 json=variation_data
             )
             
             handle_response_error(response, f"Failed to create variation for product {product_id}")
+            mark_sku_dirty(store, product_id)
             return response.json()
 
     @mcp.tool()
@@ -166,6 +517,7 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מעדכן וריאציית מוצר קיימת ב-WooCommerce.
@@ -177,27 +529,21 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני הוריאציה המעודכנת.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.put(
                 f"/products/{product_id}/variations/{variation_id}",
                 json=variation_data
             )
             
             handle_response_error(response, f"Failed to update variation {variation_id} for product {product_id}")
+            mark_sku_dirty(store, product_id)
             return response.json()
 
     @mcp.tool()
@@ -208,6 +554,7 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מוחק וריאציית מוצר מ-WooCommerce.
@@ -219,25 +566,94 @@ def register_product_variation_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: תוצאת המחיקה.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
-        
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.delete(
                 f"/products/{product_id}/variations/{variation_id}",
                 params={"force": force}
             )
             
             handle_response_error(response, f"Failed to delete variation {variation_id} for product {product_id}")
-            return response.json() 
\ No newline at end of file
+            mark_sku_dirty(store, product_id)
+            return response.json() 
+
+    @mcp.tool()
+    async def generate_variation_matrix(
+        product_id: int,
+        axes: List[Dict[str, Any]],
+        defaults: Optional[Dict[str, Any]] = None,
+        rules: Optional[List[Dict[str, Any]]] = None,
+        delete_missing: bool = False,
+        dry_run: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        יוצר את כל הוריאציות של מוצר מצירי מאפיינים (מכפלה קרטזית), משווה לוריאציות
+        הקיימות ומחיל רק את ההפרשים בבקשות batch מקבילות.
+
+        Args:
+            product_id: מזהה המוצר.
+            axes: צירי המאפיינים, למשל [{"name": "Size", "options": ["S", "M"]}, {"id": 2, "name": "Color", "options": [...]}].
+            defaults: שדות לכל הוריאציות (regular_price, stock_quantity, sku עם תבנית "{Size}" וכו').
+            rules: כללים לפי אפשרויות, למשל [{"when": {"Size": "XL"}, "set": {"regular_price": "59.90"}}].
+            delete_missing: האם למחוק וריאציות שאינן במטריצה.
+            dry_run: החזרת התוכנית בלבד, ללא שינויים.
+            concurrency: מספר בקשות ה-batch שיישלחו במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סיכום: מספר צירופים, יצירות, עדכונים, מחיקות ושגיאות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            result = await sync_variation_matrix(
+                client, product_id, axes, defaults, rules, delete_missing, dry_run, concurrency
+            )
+        if not dry_run:
+            mark_sku_dirty(store, product_id)
+        return result
+
+    @mcp.tool()
+    async def get_catalog_variations(
+        product_filters: Optional[Dict[str, Any]] = None,
+        variation_filters: Optional[Dict[str, Any]] = None,
+        concurrency: int = 8,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מחזיר את כל הוריאציות של כל המוצרים מסוג variable בקטלוג, כטבלה שטוחה של
+        SKU, מחיר ומלאי (לבדיקת מלאי ומחירים בקריאה אחת).
+
+        Args:
+            product_filters: מסננים לרשימת המוצרים (category, status, tag וכו').
+            variation_filters: מסננים לוריאציות (למשל {"stock_status": "outofstock"}).
+            concurrency: מספר המוצרים שהוריאציות שלהם נטענות במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: columns ו-rows (שורה לכל וריאציה), ומספר המוצרים והוריאציות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await fetch_catalog_variations(client, product_filters, variation_filters, concurrency)
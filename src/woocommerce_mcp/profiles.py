@@ -0,0 +1,309 @@
+"""
+מודול לניהול פרופילי חנות: פרטי התחברות בעלי שם, לקוח HTTP משותף ומטמונים לכל חנות.
+"""
+
+import asyncio
+import json
+import os
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import WordPressError, create_wc_client
+
+# מספר הפרופילים הזמניים (פרטי התחברות שהועברו ישירות לכלי) שנשמרים עם לקוח פתוח
+MAX_ADHOC_PROFILES = 32
+
+
+class StoreProfile:
+    """
+    פרופיל חנות: פרטי ההתחברות, לקוח HTTP שנפתח פעם אחת ומשמש את כל הקריאות,
+    ומטמונים (אינדקסים מקומיים וכו') המשותפים לכל הפרופילים של אותו אתר.
+    """
+
+    def __init__(self, name: str, site_url: str, consumer_key: str, consumer_secret: str):
+        self.name = name
+        self.site_url = (site_url or "").rstrip("/")
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # מספר הבלוקים שמשתמשים כרגע בלקוח, ופרופיל שהוחלף או הוצא מהמטמון
+        self._users = 0
+        self._retired = False
+
+    @property
+    def credentials(self) -> Tuple[str, str, str]:
+        return self.site_url, self.consumer_key, self.consumer_secret
+
+    @property
+    def caches(self) -> Dict[str, Any]:
+        """מטמונים מקומיים של האתר (משותפים לכל הפרופילים עם אותה כתובת)."""
+        return _SITE_CACHES.setdefault(self.site_url, {})
+
+    @asynccontextmanager
+    async def client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        מחזיר את הלקוח המשותף של הפרופיל, ויוצר אותו בשימוש הראשון.
+
+        בניגוד ל-create_wc_client, הלקוח אינו נסגר בסוף הבלוק, כך שהחיבורים
+        נשמרים בין קריאות. בפרופיל שהוחלף (retire) הלקוח נסגר כשהבלוק האחרון
+        שמשתמש בו מסתיים.
+        """
+        loop = asyncio.get_running_loop()
+        # חיבורים פתוחים שייכים ללולאת האירועים שבה נוצרו
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = await create_wc_client(*self.credentials)
+            self._loop = loop
+        self._users += 1
+        try:
+            yield self._client
+        finally:
+            self._users -= 1
+            if self._retired:
+                await self._close_if_idle()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _close_if_idle(self) -> None:
+        if self._users == 0:
+            await self.aclose()
+
+    def retire(self) -> None:
+        """
+        מסמן שהפרופיל הוחלף או הוצא מהמטמון. הלקוח נסגר מיד אם אינו בשימוש,
+        ואחרת כשהקריאות שכבר משתמשות בו מסתיימות.
+        """
+        self._retired = True
+        if self._client is not None:
+            asyncio.ensure_future(self._close_if_idle())
+
+    def describe(self) -> Dict[str, Any]:
+        """תיאור הפרופיל ללא הסודות."""
+        return {"profile": self.name, "site_url": self.site_url}
+
+
+_PROFILES: Dict[str, StoreProfile] = {}
+_ADHOC: "OrderedDict[Tuple[str, str, str], StoreProfile]" = OrderedDict()
+_SITE_CACHES: Dict[str, Dict[str, Any]] = {}
+_SESSION_PROFILES: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+_process_profile: Optional[str] = None
+
+
+def _current_session() -> Any:
+    """מחזיר את סשן ה-MCP של הבקשה הנוכחית, או None מחוץ לבקשה."""
+    from .server import mcp
+
+    try:
+        return mcp.get_context().session
+    except (LookupError, ValueError):
+        return None
+
+
+def add_profile(name: str, site_url: str, consumer_key: str, consumer_secret: str) -> StoreProfile:
+    """
+    רישום (או החלפה) של פרופיל בעל שם.
+
+    Args:
+        name: שם הפרופיל.
+        site_url: כתובת האתר.
+        consumer_key: מפתח צרכן.
+        consumer_secret: מפתח סודי.
+
+    Returns:
+        StoreProfile: הפרופיל שנרשם.
+    """
+    _PROFILES[name] = StoreProfile(name, site_url, consumer_key, consumer_secret)
+    return _PROFILES[name]
+
+
+def load_profiles() -> List[str]:
+    """
+    טוען פרופילים בעלי שם בעליית השרת.
+
+    הפרופילים נקראים מקובץ JSON שנתיבו ב-WOOCOMMERCE_PROFILES_FILE ו/או מ-JSON
+    ישירות במשתנה WOOCOMMERCE_PROFILES, במבנה:
+    {"name": {"site_url": ..., "consumer_key": ..., "consumer_secret": ...}}.
+
+    Returns:
+        List[str]: שמות הפרופילים שנטענו.
+
+    Raises:
+        WordPressError: אם הגדרת הפרופילים אינה תקינה.
+    """
+    sources = []
+    path = os.environ.get("WOOCOMMERCE_PROFILES_FILE")
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            sources.append(f.read())
+    if os.environ.get("WOOCOMMERCE_PROFILES"):
+        sources.append(os.environ["WOOCOMMERCE_PROFILES"])
+
+    loaded = []
+    for source in sources:
+        try:
+            profiles = json.loads(source)
+            for name, config in profiles.items():
+                add_profile(name, config["site_url"], config["consumer_key"], config["consumer_secret"])
+                loaded.append(name)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise WordPressError(f"Invalid store profiles configuration: {e}")
+    return loaded
+
+
+def get_profile(name: str) -> StoreProfile:
+    """
+    מחזיר פרופיל בעל שם.
+
+    Raises:
+        WordPressError: אם הפרופיל לא קיים.
+    """
+    if name not in _PROFILES:
+        raise WordPressError(f"Unknown store profile: {name}", "unknown_profile")
+    return _PROFILES[name]
+
+
+def set_active_profile(name: Optional[str]) -> None:
+    """קובע את הפרופיל הפעיל עבור הסשן הנוכחי (או עבור התהליך, מחוץ לבקשה)."""
+    global _process_profile
+
+    if name is not None:
+        get_profile(name)
+
+    session = _current_session()
+    if session is None:
+        _process_profile = name
+    elif name is None:
+        _SESSION_PROFILES.pop(session, None)
+    else:
+        _SESSION_PROFILES[session] = name
+
+
+def get_active_profile() -> Optional[str]:
+    """מחזיר את שם הפרופיל הפעיל של הסשן הנוכחי, אם נקבע."""
+    session = _current_session()
+    if session is not None and session in _SESSION_PROFILES:
+        return _SESSION_PROFILES[session]
+    return _process_profile
+
+
+def _adhoc_profile(site_url: str, consumer_key: str, consumer_secret: str) -> StoreProfile:
+    key = (site_url, consumer_key, consumer_secret)
+    store = _ADHOC.get(key)
+    if store is None:
+        store = _ADHOC[key] = StoreProfile("", site_url, consumer_key, consumer_secret)
+        if len(_ADHOC) > MAX_ADHOC_PROFILES:
+            _, evicted = _ADHOC.popitem(last=False)
+            evicted.retire()
+    else:
+        _ADHOC.move_to_end(key)
+    return store
+
+
+def resolve_store(
+    profile: Optional[str] = None,
+    site_url: Optional[str] = None,
+    consumer_key: Optional[str] = None,
+    consumer_secret: Optional[str] = None,
+) -> StoreProfile:
+    """
+    מחזיר את פרופיל החנות עבור קריאה לכלי.
+
+    סדר העדיפויות: פרופיל בעל שם שהועבר לכלי, פרטי התחברות שהועברו ישירות
+    (משלימים מהגדרות הסביבה), הפרופיל הפעיל של הסשן, ולבסוף הגדרות הסביבה.
+    בכל המקרים אותו פרופיל (ואותו לקוח HTTP) מוחזר בקריאות חוזרות.
+
+    Args:
+        profile: שם פרופיל (אופציונלי).
+        site_url: כתובת האתר (אופציונלי).
+        consumer_key: מפתח צרכן (אופציונלי).
+        consumer_secret: מפתח סודי (אופציונלי).
+
+    Returns:
+        StoreProfile: פרופיל החנות.
+
+    Raises:
+        WordPressError: אם שם הפרופיל לא קיים.
+    """
+    if profile:
+        return get_profile(profile)
+
+    if not (site_url or consumer_key or consumer_secret):
+        active = get_active_profile()
+        if active:
+            return get_profile(active)
+
+    from .server import (
+        DEFAULT_SITE_URL,
+        DEFAULT_CONSUMER_KEY,
+        DEFAULT_CONSUMER_SECRET,
+    )
+
+    return _adhoc_profile(
+        (site_url or DEFAULT_SITE_URL).rstrip("/"),
+        consumer_key or DEFAULT_CONSUMER_KEY,
+        consumer_secret or DEFAULT_CONSUMER_SECRET,
+    )
+
+
+def register_profile_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לניהול פרופילי חנות.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def set_store_profile(
+        profile: str,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        קובע את פרופיל החנות הפעיל לסשן הנוכחי, כך שקריאות הבאות לא יצטרכו להעביר פרטי התחברות.
+
+        אם מועברים פרטי התחברות, הפרופיל נוצר (או מוחלף) בזיכרון לפני ההפעלה.
+
+        Args:
+            profile: שם הפרופיל.
+            site_url: כתובת האתר (ליצירת פרופיל חדש).
+            consumer_key: מפתח צרכן (ליצירת פרופיל חדש).
+            consumer_secret: מפתח סודי (ליצירת פרופיל חדש).
+
+        Returns:
+            Dict[str, Any]: שם הפרופיל הפעיל וכתובת האתר שלו.
+        """
+        if site_url or consumer_key or consumer_secret:
+            if not (site_url and consumer_key and consumer_secret):
+                raise WordPressError("site_url, consumer_key and consumer_secret are all required to define a profile")
+            # קריאות של סשנים אחרים עשויות עדיין להשתמש בלקוח הקודם
+            previous = _PROFILES.get(profile)
+            add_profile(profile, site_url, consumer_key, consumer_secret)
+            if previous is not None:
+                previous.retire()
+
+        set_active_profile(profile)
+        return {**get_profile(profile).describe(), "active": True}
+
+    @mcp.tool()
+    async def list_store_profiles() -> List[Dict[str, Any]]:
+        """
+        מחזיר את פרופילי החנות המוגדרים (ללא מפתחות), ומסמן את הפרופיל הפעיל.
+
+        Returns:
+            List[Dict[str, Any]]: רשימת הפרופילים.
+        """
+        active = get_active_profile()
+        return [
+            {**store.describe(), "active": name == active}
+            for name, store in sorted(_PROFILES.items())
+        ]
@@ -2,12 +2,175 @@
 מודול לניהול דוחות ב-WooCommerce.
 """
 
-from typing import Any, Dict, List, Optional
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp.server.fastmcp import FastMCP
 import httpx
 
-from .utils import WordPressError, create_wc_client, handle_response_error
+from .utils import WordPressError, gather_limited, handle_response_error, iter_pages
+from .profiles import StoreProfile, resolve_store
+from .customer_stats import customer_key
+
+# מפתח מטמון השימוש בקופונים במטמונים של החנות
+COUPON_USAGE_CACHE = "coupon_usage"
+
+# תוקף (בשניות) של סיכום יום שהסתיים, ושל סיכום היום הנוכחי
+COUPON_USAGE_TTL_CLOSED = 3600
+COUPON_USAGE_TTL_OPEN = 300
+
+# סטטוסים שבהם WooCommerce סופר שימוש בקופון
+COUPON_USAGE_STATUSES = ("processing", "completed", "on-hold")
+
+COUPON_USAGE_FIELDS = "id,customer_id,billing,coupon_lines,date_created_gmt"
+
+
+def _decimal(value: Any) -> Decimal:
+    try:
+        return Decimal(str(value or 0))
+    except InvalidOperation:
+        return Decimal(0)
+
+
+def _parse_day(value: str) -> date:
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise WordPressError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+
+
+def aggregate_coupon_usage(
+    orders: List[Dict[str, Any]],
+    days: Dict[str, Dict[str, Dict[str, Any]]],
+) -> int:
+    """
+    מוסיף את שורות הקופון של הזמנות לסיכומים היומיים, במעבר אחד.
+
+    Args:
+        orders: הזמנות עם coupon_lines ו-date_created_gmt.
+        days: יום (YYYY-MM-DD) -> קוד קופון -> סיכום; רק ימים שקיימים בו מעודכנים.
+
+    Returns:
+        int: מספר ההזמנות שנספרו.
+    """
+    counted = 0
+    for order in orders:
+        day = days.get((order.get("date_created_gmt") or "")[:10])
+        if day is None:
+            continue
+        counted += 1
+        customer = customer_key(order)
+        for line in order.get("coupon_lines") or []:
+            code = (line.get("code") or "").strip().lower()
+            if not code:
+                continue
+            usage = day.setdefault(code, {
+                "orders": set(), "discount": Decimal(0), "discount_tax": Decimal(0), "customers": set(),
+            })
+            usage["orders"].add(order["id"])
+            usage["discount"] += _decimal(line.get("discount"))
+            usage["discount_tax"] += _decimal(line.get("discount_tax"))
+            if customer:
+                usage["customers"].add(customer)
+    return counted
+
+
+def _missing_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """מאחד ימים חסרים לטווחים רציפים, כדי למשוך כל טווח בסריקה אחת."""
+    ranges: List[Tuple[date, date]] = []
+    for day in days:
+        if ranges and ranges[-1][1] + timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+async def coupon_usage(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    date_min: date,
+    date_max: date,
+    statuses: Tuple[str, ...] = COUPON_USAGE_STATUSES,
+    refresh: bool = False,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """
+    מחשב שימוש בקופונים בטווח תאריכים (לפי תאריך יצירת ההזמנה, UTC).
+
+    הסיכומים נשמרים במטמון לכל יום בנפרד, כך שטווחים חופפים משתמשים שוב בימים
+    שכבר חושבו; רק ימים חסרים או שפג תוקפם נמשכים, בסריקה אחת לכל טווח רציף.
+
+    Returns:
+        Dict[str, Any]: סיכום לכל קוד קופון, מספר ההזמנות שנסרקו ומספר הימים שנמשכו.
+    """
+    if date_min > date_max:
+        raise WordPressError("date_min must not be after date_max")
+
+    cache = store.caches.setdefault(COUPON_USAGE_CACHE, {})
+    today = datetime.now(timezone.utc).date()
+    now = time.monotonic()
+    statuses = tuple(sorted(statuses))
+
+    requested = [date_min + timedelta(days=i) for i in range((date_max - date_min).days + 1)]
+    missing = []
+    for day in requested:
+        entry = cache.get((statuses, day))
+        ttl = COUPON_USAGE_TTL_OPEN if day >= today else COUPON_USAGE_TTL_CLOSED
+        if refresh or entry is None or now - entry["fetched_at"] > ttl:
+            missing.append(day)
+
+    async def fetch(start: date, end: date) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], int]:
+        days: Dict[str, Dict[str, Dict[str, Any]]] = {
+            (start + timedelta(days=i)).isoformat(): {} for i in range((end - start).days + 1)
+        }
+        params = {
+            "_fields": COUPON_USAGE_FIELDS,
+            "status": ",".join(statuses),
+            # הגבולות של after/before אינם כוללים; הזמנות מחוץ לטווח מסוננות בסיכום
+            "after": f"{(start - timedelta(days=1)).isoformat()}T23:59:59",
+            "before": f"{(end + timedelta(days=1)).isoformat()}T00:00:00",
+            "dates_are_gmt": "true",
+        }
+        scanned = 0
+        async for response in iter_pages(client, "/orders", params):
+            scanned += aggregate_coupon_usage(response.json(), days)
+        return days, scanned
+
+    results = await gather_limited((fetch(start, end) for start, end in _missing_ranges(missing)), concurrency)
+    fetched_at = time.monotonic()
+    for days, scanned in results:
+        for day, usage in days.items():
+            cache[(statuses, date.fromisoformat(day))] = {"fetched_at": fetched_at, "usage": usage}
+
+    coupons: Dict[str, Dict[str, Any]] = {}
+    for day in requested:
+        for code, usage in cache[(statuses, day)]["usage"].items():
+            total = coupons.setdefault(code, {
+                "orders": set(), "discount": Decimal(0), "discount_tax": Decimal(0), "customers": set(),
+            })
+            total["orders"] |= usage["orders"]
+            total["discount"] += usage["discount"]
+            total["discount_tax"] += usage["discount_tax"]
+            total["customers"] |= usage["customers"]
+
+    return {
+        "coupons": {
+            code: {
+                "orders": len(usage["orders"]),
+                "discount": float(usage["discount"]),
+                "discount_tax": float(usage["discount_tax"]),
+                "customers": len(usage["customers"]),
+            }
+            for code, usage in coupons.items()
+        },
+        "scanned_orders": sum(scanned for _, scanned in results),
+        "fetched_days": len(missing),
+        "cached_days": len(requested) - len(missing),
+    }
+
 
 def register_report_tools(mcp: FastMCP) -> None:
     """
@@ -26,6 +189,7 @@ def register_report_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         מחזיר דוח מכירות מ-WooCommerce.
@@ -38,19 +202,12 @@ def register_report_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             Dict[str, Any]: נתוני דוח המכירות.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -64,7 +221,7 @@ def register_report_tools(mcp: FastMCP) -> None:
         if date_max:
             params["date_max"] = date_max
             
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get("/reports/sales", params=params)
             handle_response_error(response, "Failed to get sales report")
             return response.json()
@@ -80,6 +237,7 @@ def register_report_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר דוח מוצרים מ-WooCommerce.
@@ -94,19 +252,12 @@ def register_report_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: נתוני דוח המוצרים.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -122,7 +273,7 @@ def register_report_tools(mcp: FastMCP) -> None:
         if date_max:
             params["date_max"] = date_max
             
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get("/reports/products", params=params)
             handle_response_error(response, "Failed to get products report")
             return response.json()
@@ -135,6 +286,7 @@ def register_report_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר דוח לקוחות מ-WooCommerce.
@@ -146,19 +298,12 @@ def register_report_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: נתוני דוח הלקוחות.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -167,7 +312,7 @@ def register_report_tools(mcp: FastMCP) -> None:
             **filters
         }
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get("/reports/customers", params=params)
             handle_response_error(response, "Failed to get customers report")
             return response.json()
@@ -180,6 +325,7 @@ def register_report_tools(mcp: FastMCP) -> None:
         site_url: Optional[str] = None,
         consumer_key: Optional[str] = None,
         consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         מחזיר דוח מלאי מ-WooCommerce.
@@ -191,19 +337,12 @@ def register_report_tools(mcp: FastMCP) -> None:
             site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
             consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
             consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
         
         Returns:
             List[Dict[str, Any]]: נתוני דוח המלאי.
         """
-        from .server import (
-            DEFAULT_SITE_URL,
-            DEFAULT_CONSUMER_KEY,
-            DEFAULT_CONSUMER_SECRET,
-        )
-        
-        site_url = site_url or DEFAULT_SITE_URL
-        consumer_key = consumer_key or DEFAULT_CONSUMER_KEY
-        consumer_secret = consumer_secret or DEFAULT_CONSUMER_SECRET
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
         filters = filters or {}
         
         params = {
@@ -212,7 +351,73 @@ def register_report_tools(mcp: FastMCP) -> None:
             **filters
         }
         
-        async with await create_wc_client(site_url, consumer_key, consumer_secret) as client:
+        async with store.client() as client:
             response = await client.get("/reports/stock", params=params)
             handle_response_error(response, "Failed to get stock report")
-            return response.json() 
\ No newline at end of file
+            return response.json() 
+
+    @mcp.tool()
+    async def coupon_usage_report(
+        date_min: Optional[str] = None,
+        date_max: Optional[str] = None,
+        codes: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        sort: str = "orders",
+        refresh: bool = False,
+        concurrency: int = 4,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        דוח שימוש בקופונים לפי ההזמנות בטווח תאריכים: מספר הזמנות, סכומי הנחה ולקוחות ייחודיים לכל קוד.
+
+        ההזמנות נסרקות עם שדות מצומצמים, והסיכומים נשמרים במטמון לכל יום.
+
+        Args:
+            date_min: תאריך התחלה (YYYY-MM-DD, ברירת מחדל: 30 יום אחורה).
+            date_max: תאריך סיום כולל (YYYY-MM-DD, ברירת מחדל: היום).
+            codes: הגבלה לקודי קופון מסוימים.
+            statuses: סטטוסי הזמנה שנספרים (ברירת מחדל: processing, completed, on-hold).
+            sort: מיון לפי orders, discount או customers.
+            refresh: חישוב מחדש גם של ימים שנמצאים במטמון.
+            concurrency: מספר הטווחים שנסרקים במקביל.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: הטווח, שורה לכל קופון, סיכומים, ונתוני מטמון.
+        """
+        if sort not in ("orders", "discount", "customers"):
+            raise WordPressError(f"Unsupported sort: {sort}")
+        end = _parse_day(date_max) if date_max else datetime.now(timezone.utc).date()
+        start = _parse_day(date_min) if date_min else end - timedelta(days=29)
+
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            usage = await coupon_usage(
+                store, client, start, end, tuple(statuses or COUPON_USAGE_STATUSES), refresh, concurrency
+            )
+
+        wanted = {code.strip().lower() for code in codes} if codes else None
+        rows = [
+            {"code": code, **totals}
+            for code, totals in usage["coupons"].items()
+            if wanted is None or code in wanted
+        ]
+        rows.sort(key=lambda row: (-row[sort], row["code"]))
+        return {
+            "date_min": start.isoformat(),
+            "date_max": end.isoformat(),
+            "coupons": rows,
+            "unused": sorted(wanted - set(usage["coupons"])) if wanted else [],
+            "coupon_uses": sum(row["orders"] for row in rows),
+            "total_discount": round(sum(row["discount"] for row in rows), 2),
+            "scanned_orders": usage["scanned_orders"],
+            "fetched_days": usage["fetched_days"],
+            "cached_days": usage["cached_days"],
+        }
@@ -0,0 +1,324 @@
+"""
+מודול לתרגום שמות ו-slugs של תגיות, קטגוריות, מאפיינים ומונחי מאפיינים למזהים.
+
+לכל חנות נשמר אינדקס בזיכרון שנבנה מהרשימות המלאות, ומתרענן אחרי זמן קצוב,
+אחרי שינוי דרך הכלים של השרת, או כששם לא נמצא.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import WordPressError, fetch_all
+from .profiles import StoreProfile, resolve_store
+
+# זמן החיים (בשניות) של אינדקס לפני שהוא נבנה מחדש
+RESOLVER_TTL = 300
+
+# זמן מינימלי (בשניות) בין רענונים שנגרמים משם שלא נמצא
+MISS_REFRESH_INTERVAL = 10
+
+# סוגי האינדקסים ונתיבי ה-API שלהם
+RESOLVER_KINDS = {
+    "categories": "/products/categories",
+    "tags": "/products/tags",
+    "attributes": "/products/attributes",
+    "attribute_terms": "/products/attributes/{attribute_id}/terms",
+}
+
+# מסנני מוצרים שמקבלים מזהה של מונח, ואפשר להעביר בהם גם שם או slug
+TERM_FILTERS = {"category": "categories", "tag": "tags"}
+
+
+class NameIndex:
+    """אינדקס של מזהים לפי slug ולפי שם (ללא תלות באותיות)."""
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.built_at = time.monotonic()
+        self.items: Dict[int, Dict[str, Any]] = {}
+        self._by_slug: Dict[str, int] = {}
+        self._by_name: Dict[str, List[int]] = {}
+        for item in items:
+            self.items[item["id"]] = item
+            if item.get("slug"):
+                self._by_slug[str(item["slug"]).lower()] = item["id"]
+            self._by_name.setdefault(str(item.get("name", "")).strip().lower(), []).append(item["id"])
+
+    def lookup(self, value: Union[int, str]) -> List[int]:
+        """
+        מחזיר את המזהים המתאימים לערך: מזהה (int), slug או שם.
+
+        slug הוא ייחודי ולכן מועדף; שם עשוי להתאים לכמה פריטים. מחרוזת של
+        ספרות (למשל תגית "2024") מחופשת קודם כ-slug או שם, ורק אם לא נמצאה
+        מתפרשת כמזהה; אם היא מתאימה גם לשם וגם למזהה של פריט אחר, מוחזרים
+        שניהם כדי שהתוצאה תדווח כעמומה.
+        """
+        if isinstance(value, int):
+            return [value] if value in self.items else []
+        key = str(value).strip().lower()
+        if key in self._by_slug:
+            ids = [self._by_slug[key]]
+        else:
+            ids = list(self._by_name.get(key, []))
+        if key.isdigit() and int(key) in self.items and int(key) not in ids:
+            ids.append(int(key))
+        return ids
+
+
+def _cache_key(kind: str, attribute_id: Optional[int]) -> Tuple[str, str, Optional[int]]:
+    return ("resolver", kind, attribute_id)
+
+
+async def get_name_index(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    kind: str,
+    attribute_id: Optional[int] = None,
+    refresh: bool = False,
+) -> NameIndex:
+    """
+    מחזיר את האינדקס של סוג מסוים מהמטמון של החנות, ובונה אותו אם חסר או ישן.
+
+    Args:
+        store: פרופיל החנות.
+        client: לקוח WooCommerce פתוח.
+        kind: categories, tags, attributes או attribute_terms.
+        attribute_id: מזהה המאפיין (עבור attribute_terms).
+        refresh: האם לבנות מחדש בכל מקרה.
+
+    Returns:
+        NameIndex: האינדקס.
+    """
+    if kind not in RESOLVER_KINDS:
+        raise WordPressError(f"Unsupported resolver kind: {kind}")
+    if kind == "attribute_terms" and attribute_id is None:
+        raise WordPressError("attribute_id is required for attribute terms")
+
+    key = _cache_key(kind, attribute_id)
+    index = store.caches.get(key)
+    if index is None or refresh or time.monotonic() - index.built_at > RESOLVER_TTL:
+        path = RESOLVER_KINDS[kind].format(attribute_id=attribute_id)
+        index = store.caches[key] = NameIndex(await fetch_all(client, path, {"_fields": "id,name,slug"}))
+    return index
+
+
+def invalidate_names(store: StoreProfile, kind: str, attribute_id: Optional[int] = None) -> None:
+    """מסיר אינדקס מהמטמון אחרי שינוי (יצירה, עדכון או מחיקה)."""
+    if kind == "attribute_terms":
+        store.caches.pop(_cache_key(kind, attribute_id), None)
+        return
+    store.caches.pop(_cache_key(kind, None), None)
+    # מחיקה או שינוי של מאפיין משפיעים גם על אינדקס המונחים שלו
+    if kind == "attributes" and attribute_id is not None:
+        store.caches.pop(_cache_key("attribute_terms", attribute_id), None)
+
+
+async def resolve_names(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    kind: str,
+    names: List[Union[int, str]],
+    attribute_id: Optional[int] = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    מתרגם רשימת שמות/slugs למזהים.
+
+    אם חלק מהשמות לא נמצאו, האינדקס נבנה מחדש פעם אחת (לכל היותר כל
+    MISS_REFRESH_INTERVAL שניות), למקרה שהפריטים נוצרו מחוץ לשרת.
+
+    Returns:
+        Dict[str, Any]: resolved (שם -> מזהה), ambiguous (שם -> מזהים) ו-missing.
+    """
+    index = await get_name_index(store, client, kind, attribute_id, refresh)
+    if any(not index.lookup(name) for name in names) and time.monotonic() - index.built_at > MISS_REFRESH_INTERVAL:
+        index = await get_name_index(store, client, kind, attribute_id, refresh=True)
+
+    result: Dict[str, Any] = {"resolved": {}, "ambiguous": {}, "missing": []}
+    for name in names:
+        ids = index.lookup(name)
+        if len(ids) == 1:
+            result["resolved"][str(name)] = ids[0]
+        elif ids:
+            result["ambiguous"][str(name)] = ids
+        else:
+            result["missing"].append(name)
+    return result
+
+
+async def resolve_id(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    kind: str,
+    value: Union[int, str],
+    attribute_id: Optional[int] = None,
+) -> int:
+    """
+    מתרגם ערך בודד למזהה, עבור כלים שמקבלים מזהה או שם.
+
+    Raises:
+        WordPressError: אם הערך לא נמצא או מתאים לכמה פריטים.
+    """
+    if isinstance(value, int):
+        return value
+
+    result = await resolve_names(store, client, kind, [value], attribute_id)
+    if result["ambiguous"]:
+        raise WordPressError(f"Ambiguous {kind} name '{value}': {result['ambiguous'][str(value)]}")
+    if result["missing"]:
+        raise WordPressError(f"Unknown {kind} name: {value}", "not_found")
+    return result["resolved"][str(value)]
+
+
+async def resolve_term_filters(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    filters: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    מחליף שמות/slugs במסנני category ו-tag של מוצרים במזהים (גם רשימה מופרדת בפסיקים).
+    """
+    filters = dict(filters or {})
+    for key, kind in TERM_FILTERS.items():
+        value = filters.get(key)
+        if value is None or isinstance(value, int):
+            continue
+        parts = [part.strip() for part in str(value).split(",") if part.strip()]
+        if all(part.isdigit() for part in parts):
+            continue
+        ids = [await resolve_id(store, client, kind, part) for part in parts]
+        filters[key] = ",".join(str(term_id) for term_id in ids)
+    return filters
+
+
+def register_resolver_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לתרגום שמות למזהים.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    async def _resolve(
+        kind: str,
+        names: List[Union[int, str]],
+        refresh: bool,
+        profile: Optional[str],
+        site_url: Optional[str],
+        consumer_key: Optional[str],
+        consumer_secret: Optional[str],
+        attribute: Optional[Union[int, str]] = None,
+    ) -> Dict[str, Any]:
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            attribute_id = None
+            if attribute is not None:
+                attribute_id = await resolve_id(store, client, "attributes", attribute)
+            return await resolve_names(store, client, kind, names, attribute_id, refresh)
+
+    @mcp.tool()
+    async def resolve_categories(
+        names: List[Union[int, str]],
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מתרגם שמות או slugs של קטגוריות מוצרים למזהים, בקריאה אחת.
+
+        Args:
+            names: שמות או slugs של קטגוריות.
+            refresh: האם לבנות מחדש את האינדקס מה-API.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: resolved (שם -> מזהה), ambiguous (שם -> מזהים) ו-missing.
+        """
+        return await _resolve("categories", names, refresh, profile, site_url, consumer_key, consumer_secret)
+
+    @mcp.tool()
+    async def resolve_tags(
+        names: List[Union[int, str]],
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מתרגם שמות או slugs של תגיות מוצרים למזהים, בקריאה אחת.
+
+        Args:
+            names: שמות או slugs של תגיות.
+            refresh: האם לבנות מחדש את האינדקס מה-API.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: resolved (שם -> מזהה), ambiguous (שם -> מזהים) ו-missing.
+        """
+        return await _resolve("tags", names, refresh, profile, site_url, consumer_key, consumer_secret)
+
+    @mcp.tool()
+    async def resolve_attributes(
+        names: List[Union[int, str]],
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מתרגם שמות או slugs של מאפייני מוצרים גלובליים (למשל "Color" או "pa_color") למזהים.
+
+        Args:
+            names: שמות או slugs של מאפיינים.
+            refresh: האם לבנות מחדש את האינדקס מה-API.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: resolved (שם -> מזהה), ambiguous (שם -> מזהים) ו-missing.
+        """
+        return await _resolve("attributes", names, refresh, profile, site_url, consumer_key, consumer_secret)
+
+    @mcp.tool()
+    async def resolve_attribute_terms(
+        attribute: Union[int, str],
+        names: List[Union[int, str]],
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מתרגם שמות או slugs של מונחי מאפיין (למשל "Red" במאפיין "Color") למזהים.
+
+        Args:
+            attribute: מזהה, שם או slug של המאפיין.
+            names: שמות או slugs של המונחים.
+            refresh: האם לבנות מחדש את האינדקס מה-API.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: resolved (שם -> מזהה), ambiguous (שם -> מזהים) ו-missing.
+        """
+        return await _resolve(
+            "attribute_terms", names, refresh, profile, site_url, consumer_key, consumer_secret, attribute
+        )
@@ -36,6 +36,7 @@ DEFAULT_CONSUMER_SECRET = os.environ.get("WOOCOMMERCE_CONSUMER_SECRET", "")
 # הגדרות שרת
 MCP_HOST = os.environ.get("MCP_HOST", "0.0.0.0")
 MCP_PORT = int(os.environ.get("MCP_PORT", "8000"))
+MCP_DATA_DIR = os.environ.get("MCP_DATA_DIR", os.path.join(os.path.expanduser("~"), ".woocommerce_mcp"))
 
 logger.info(f"Server configuration: HOST={MCP_HOST}, PORT={MCP_PORT}")
 
@@ -65,6 +66,19 @@ def initialize():
     from .data import register_data_tools
     from .customers import register_customer_tools
     from .reports import register_report_tools
+    from .exports import register_export_tools
+    from .imports import register_import_tools
+    from .meta import register_meta_tools
+    from .jobs import register_job_tools
+    from .profiles import load_profiles, register_profile_tools
+    from .resolver import register_resolver_tools
+    from .product_search import register_product_search_tools
+    from .sku_index import register_sku_tools
+    from .inventory import register_inventory_tools
+    from .customer_stats import register_customer_stats_tools
+    from .customer_index import register_customer_index_tools
+    from .line_items import register_line_item_tools
+    from .order_sweeper import register_order_sweeper_tools
     
     # רישום הכלים
     register_wordpress_tools(mcp)
@@ -85,6 +99,24 @@ def initialize():
     register_data_tools(mcp)
     register_customer_tools(mcp)
     register_report_tools(mcp)
+    register_export_tools(mcp)
+    register_import_tools(mcp)
+    register_meta_tools(mcp)
+    register_job_tools(mcp)
+    register_profile_tools(mcp)
+    register_resolver_tools(mcp)
+    register_product_search_tools(mcp)
+    register_sku_tools(mcp)
+    register_inventory_tools(mcp)
+    register_customer_stats_tools(mcp)
+    register_customer_index_tools(mcp)
+    register_line_item_tools(mcp)
+    register_order_sweeper_tools(mcp)
+    
+    # טעינת פרופילי חנות בעלי שם
+    profiles = load_profiles()
+    if profiles:
+        logger.info(f"Loaded store profiles: {', '.join(profiles)}")
     
     logger.info("All MCP tools registered successfully")
     
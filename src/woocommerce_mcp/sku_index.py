@@ -0,0 +1,333 @@
+"""
+מודול לאינדקס SKU של מוצרים ווריאציות.
+
+לכל חנות נשמר בזיכרון מיפוי SKU -> (מזהה מוצר, מזהה וריאציה) שנבנה ממשיכה
+מלאה של המוצרים והוריאציות, ומתעדכן בהדרגה: מוצרים שהשתנו (modified_after),
+ומוצרים שסומנו אחרי שינוי דרך הכלים של השרת. כך חיפוש של מאות SKU לא דורש
+בקשה לכל SKU, וגם וריאציות (שאי אפשר לחפש לפי SKU ברשימת המוצרים) נמצאות.
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from mcp.server.fastmcp import FastMCP
+import httpx
+
+from .utils import BATCH_LIMIT, MAX_REPORTED_ERRORS, WordPressError, chunked, fetch_all, gather_limited, iter_pages
+from .profiles import StoreProfile, resolve_store
+
+# מפתח האינדקס במטמונים של החנות
+SKU_INDEX_CACHE = "sku_index"
+
+# גיל מרבי (בשניות) של האינדקס לפני רענון הדרגתי אוטומטי
+SKU_INDEX_TTL = 300
+
+# זמן מינימלי (בשניות) בין רענונים שנגרמים מ-SKU שלא נמצא
+SKU_MISS_REFRESH_INTERVAL = 10
+
+# גיל מרבי (בשניות) של הבנייה המלאה האחרונה; שינוי SKU של וריאציה מחוץ לשרת
+# אינו מעדכן את date_modified של מוצר האב, ולכן רק בנייה מלאה קולטת אותו
+SKU_FULL_REFRESH_INTERVAL = 3600
+
+SKU_PRODUCT_FIELDS = "id,name,sku,type,date_modified_gmt"
+SKU_VARIATION_FIELDS = "id,sku"
+
+
+def normalize_sku(sku: Any) -> str:
+    """מפתח ההשוואה של SKU (ללא רווחים מסביב וללא תלות באותיות, כמו בבסיס הנתונים)."""
+    return str(sku).strip().lower()
+
+
+class SkuIndex:
+    """מיפוי SKU לפריט, עם מיפוי הפוך לעדכון פריטים שה-SKU שלהם השתנה."""
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[Tuple[int, int], str] = {}
+        # המפתחות של כל מוצר, כדי שהחלפת וריאציות או מחיקת מוצר לא יסרקו את כל האינדקס
+        self._by_product: Dict[int, Set[Tuple[int, int]]] = {}
+        self._variable: Set[int] = set()
+        self.dirty: Set[int] = set()
+        self.last_modified: Optional[str] = None
+        self.refreshed_at = 0.0
+        self.full_refresh_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, sku: Any) -> Optional[Dict[str, Any]]:
+        return self.entries.get(normalize_sku(sku))
+
+    def _set(self, product_id: int, variation_id: int, sku: Optional[str], entry: Dict[str, Any]) -> None:
+        key = (product_id, variation_id)
+        old = self._keys.pop(key, None)
+        if old is not None:
+            self._pop_entry(old, key)
+            self._discard_key(key)
+        if sku:
+            normalized = normalize_sku(sku)
+            self._keys[key] = normalized
+            self._by_product.setdefault(product_id, set()).add(key)
+            self.entries[normalized] = entry
+
+    def _pop_entry(self, sku: str, key: Tuple[int, int]) -> None:
+        # ה-SKU עשוי כבר להיות שייך לפריט אחר (למשל שני מוצרים שהחליפו SKU ביניהם)
+        entry = self.entries.get(sku)
+        if entry is not None and (entry["product_id"], entry["variation_id"] or 0) == key:
+            del self.entries[sku]
+
+    def _discard_key(self, key: Tuple[int, int]) -> None:
+        keys = self._by_product.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_product[key[0]]
+
+    def _remove(self, keys: Iterable[Tuple[int, int]]) -> None:
+        for key in list(keys):
+            self._pop_entry(self._keys.pop(key), key)
+            self._discard_key(key)
+
+    def set_product(self, product: Dict[str, Any]) -> None:
+        product_id = product["id"]
+        self._set(product_id, 0, product.get("sku"), {
+            "sku": product.get("sku"),
+            "product_id": product_id,
+            "variation_id": None,
+            "name": product.get("name", ""),
+            "type": product.get("type", ""),
+        })
+        if product.get("type") == "variable":
+            self._variable.add(product_id)
+        else:
+            self._variable.discard(product_id)
+            self.set_variations(product_id, "", [])
+
+    def set_variations(self, product_id: int, name: str, variations: List[Dict[str, Any]]) -> None:
+        """מחליף את כל הוריאציות של מוצר באינדקס."""
+        self._remove(key for key in self._by_product.get(product_id, ()) if key[1])
+        for variation in variations:
+            self._set(product_id, variation["id"], variation.get("sku"), {
+                "sku": variation.get("sku"),
+                "product_id": product_id,
+                "variation_id": variation["id"],
+                "name": name,
+                "type": "variation",
+            })
+
+    def remove_products(self, product_ids: Iterable[int]) -> None:
+        product_ids = set(product_ids)
+        self._remove(key for product_id in product_ids for key in self._by_product.get(product_id, ()))
+        self._variable -= product_ids
+
+    @property
+    def product_ids(self) -> Set[int]:
+        return {product_id for product_id, variation_id in self._keys if not variation_id} | self._variable
+
+    async def refresh(self, client: httpx.AsyncClient, full: bool = False, concurrency: int = 8) -> Dict[str, Any]:
+        """
+        מעדכן את האינדקס מה-API.
+
+        ברענון מלא נמשכים כל המוצרים וכל הוריאציות של מוצרים מסוג variable,
+        ומוצרים שלא הוחזרו מוסרים. ברענון הדרגתי נמשכים רק מוצרים שהשתנו מאז
+        השינוי האחרון שנכלל ומוצרים שסומנו (dirty), והוריאציות שלהם.
+
+        Args:
+            client: לקוח WooCommerce פתוח.
+            full: האם לבנות מחדש את כל האינדקס.
+            concurrency: מספר המוצרים שהוריאציות שלהם נטענות במקביל.
+
+        Returns:
+            Dict[str, Any]: סוג הרענון, מספר המוצרים והוריאציות שנמשכו והשגיאות.
+        """
+        incremental = not full and self.last_modified is not None
+        base_params: Dict[str, Any] = {"_fields": SKU_PRODUCT_FIELDS, "status": "any"}
+        params = dict(base_params)
+        if incremental:
+            params.update({"modified_after": self.last_modified, "dates_are_gmt": "true"})
+
+        dirty, self.dirty = self.dirty, set()
+        seen: Dict[int, Dict[str, Any]] = {}
+        latest = self.last_modified or ""
+        async for response in iter_pages(client, "/products", params):
+            for product in response.json():
+                seen[product["id"]] = product
+                latest = max(latest, product.get("date_modified_gmt") or "")
+
+        # מוצרים שסומנו נמשכים לפי מזהה; מוצר שלא הוחזר נמחק
+        marked = sorted(dirty - set(seen)) if incremental else []
+        for chunk in chunked(marked, BATCH_LIMIT):
+            products = await fetch_all(
+                client, "/products", {**base_params, "include": ",".join(str(i) for i in chunk)}, per_page=BATCH_LIMIT
+            )
+            seen.update((product["id"], product) for product in products)
+            self.remove_products(set(chunk) - {product["id"] for product in products})
+
+        if not incremental:
+            self.remove_products(self.product_ids - set(seen))
+        for product in seen.values():
+            self.set_product(product)
+
+        errors: List[Dict[str, Any]] = []
+
+        async def fetch_variations(product: Dict[str, Any]) -> int:
+            path = f"/products/{product['id']}/variations"
+            try:
+                variations = await fetch_all(client, path, {"_fields": SKU_VARIATION_FIELDS})
+            except (WordPressError, httpx.HTTPError) as e:
+                # המוצר יימשך שוב ברענון הבא
+                self.dirty.add(product["id"])
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"product_id": product["id"], "message": str(e)})
+                return 0
+            self.set_variations(product["id"], product.get("name", ""), variations)
+            return len(variations)
+
+        variable = [product for product in seen.values() if product.get("type") == "variable"]
+        counts = await gather_limited((fetch_variations(product) for product in variable), concurrency)
+
+        self.last_modified = latest or None
+        self.refreshed_at = time.monotonic()
+        if not incremental:
+            self.full_refresh_at = self.refreshed_at
+        return {
+            "mode": "incremental" if incremental else "full",
+            "products": len(seen),
+            "variations": sum(counts),
+            "skus": len(self),
+            "errors": errors,
+        }
+
+
+def _get_index(store: StoreProfile) -> SkuIndex:
+    index = store.caches.get(SKU_INDEX_CACHE)
+    if index is None:
+        index = store.caches[SKU_INDEX_CACHE] = SkuIndex()
+    return index
+
+
+def mark_sku_dirty(store: StoreProfile, product_id: int) -> None:
+    """מסמן מוצר (והוריאציות שלו) למשיכה מחדש, אחרי שינוי דרך הכלים של השרת."""
+    index = store.caches.get(SKU_INDEX_CACHE)
+    if index is not None:
+        index.dirty.add(product_id)
+
+
+async def get_sku_index(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    refresh: bool = False,
+) -> SkuIndex:
+    """
+    מחזיר את אינדקס ה-SKU של החנות, ובונה או מעדכן אותו לפי הצורך.
+
+    Args:
+        store: פרופיל החנות.
+        client: לקוח WooCommerce פתוח.
+        refresh: האם לבנות מחדש את כל האינדקס.
+
+    Returns:
+        SkuIndex: האינדקס.
+    """
+    index = _get_index(store)
+    if refresh or not index.full_refresh_at or time.monotonic() - index.full_refresh_at > SKU_FULL_REFRESH_INTERVAL:
+        await index.refresh(client, full=True)
+    elif index.dirty or time.monotonic() - index.refreshed_at > SKU_INDEX_TTL:
+        await index.refresh(client)
+    return index
+
+
+async def find_skus(
+    store: StoreProfile,
+    client: httpx.AsyncClient,
+    skus: List[str],
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    מתרגם רשימת SKU למוצרים ווריאציות.
+
+    אם חלק מה-SKU לא נמצאו, האינדקס מתעדכן בהדרגה פעם אחת (לכל היותר כל
+    SKU_MISS_REFRESH_INTERVAL שניות), למקרה שהפריטים נוצרו מחוץ לשרת.
+
+    Returns:
+        Dict[str, Any]: found (SKU -> פריט) ו-missing.
+    """
+    index = await get_sku_index(store, client, refresh)
+    if any(index.lookup(sku) is None for sku in skus) and time.monotonic() - index.refreshed_at > SKU_MISS_REFRESH_INTERVAL:
+        await index.refresh(client)
+
+    result: Dict[str, Any] = {"found": {}, "missing": []}
+    for sku in skus:
+        entry = index.lookup(sku)
+        if entry is None:
+            result["missing"].append(sku)
+        else:
+            result["found"][str(sku)] = dict(entry)
+    return result
+
+
+def register_sku_tools(mcp: FastMCP) -> None:
+    """
+    רישום כלים לחיפוש לפי SKU.
+
+    Args:
+        mcp: אובייקט שרת ה-MCP.
+    """
+
+    @mcp.tool()
+    async def lookup_skus(
+        skus: List[str],
+        refresh: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מתרגם SKU רבים (של מוצרים ווריאציות) למזהים בקריאה אחת, מאינדקס מקומי.
+
+        האינדקס נבנה בקריאה הראשונה ומתעדכן בהדרגה כשהוא ישן מ-5 דקות או
+        כש-SKU לא נמצא.
+
+        Args:
+            skus: רשימת ה-SKU.
+            refresh: בנייה מחדש מלאה של האינדקס לפני החיפוש.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: found (SKU -> product_id, variation_id, name, type) ו-missing.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+
+        async with store.client() as client:
+            return await find_skus(store, client, skus, refresh)
+
+    @mcp.tool()
+    async def refresh_sku_index(
+        full: bool = False,
+        site_url: Optional[str] = None,
+        consumer_key: Optional[str] = None,
+        consumer_secret: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        מעדכן את אינדקס ה-SKU המקומי.
+
+        Args:
+            full: בנייה מחדש מלאה (מסירה גם מוצרים שנמחקו); אחרת רק מוצרים שהשתנו.
+            site_url: כתובת האתר (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_key: מפתח צרכן (אופציונלי אם מוגדר במשתני סביבה).
+            consumer_secret: מפתח סודי (אופציונלי אם מוגדר במשתני סביבה).
+            profile: שם פרופיל חנות (אופציונלי, במקום פרטי התחברות).
+
+        Returns:
+            Dict[str, Any]: סוג הרענון, מספר המוצרים והוריאציות שנמשכו והשגיאות.
+        """
+        store = resolve_store(profile, site_url, consumer_key, consumer_secret)
+        index = _get_index(store)
+
+        async with store.client() as client:
+            return await index.refresh(client, full or not index.full_refresh_at)
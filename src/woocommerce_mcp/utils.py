@@ -2,11 +2,22 @@
 פונקציות עזר ושירות למודולים השונים של שרת ה-MCP של WooCommerce.
 """
 
+import asyncio
+import json
 import os
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Iterable, Iterator, List, TypeVar
 
 import httpx
 
+T = TypeVar("T")
+
+# מספר הפריטים המרבי שנקודות הקצה מסוג batch של WooCommerce מקבלות בבקשה אחת
+BATCH_LIMIT = 100
+
+# מספר השגיאות המרבי שיוחזר בסיכום של פעולה מרוכזת
+MAX_REPORTED_ERRORS = 50
+
 class WordPressError(Exception):
     """שגיאה שמוחזרת מ-WordPress API."""
     def __init__(self, message: str, code: Optional[str] = None):
@@ -96,4 +107,308 @@ def handle_response_error(response: httpx.Response, default_message: str) -> Non
                 error_data.get("code")
             )
         except (ValueError, KeyError):
-            raise WordPressError(f"{default_message}: {response.status_code}") 
\ No newline at end of file
+            raise WordPressError(f"{default_message}: {response.status_code}") 
+
+async def iter_pages(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    per_page: int = 100,
+) -> AsyncIterator[httpx.Response]:
+    """
+    עובר על כל העמודים של נקודת קצה מדופדפת ומחזיר את התגובות אחת אחרי השנייה.
+
+    העמוד הבא נטען ברקע בזמן שהצרכן מעבד את העמוד הנוכחי, כך שרק עמוד אחד
+    נוסף מוחזק בזיכרון בכל רגע.
+
+    Args:
+        client: לקוח HTTP פתוח.
+        path: נתיב נקודת הקצה (למשל "/orders").
+        params: פרמטרים נוספים לבקשה (מסננים, _fields וכו').
+        per_page: מספר פריטים לעמוד (עד 100).
+
+    Yields:
+        httpx.Response: תגובת HTTP עבור כל עמוד.
+
+    Raises:
+        WordPressError: אם אחת הבקשות נכשלה.
+    """
+    base_params = {**(params or {}), "per_page": per_page}
+
+    def fetch(page: int) -> "asyncio.Task[httpx.Response]":
+        return asyncio.ensure_future(client.get(path, params={**base_params, "page": page}))
+
+    page = 1
+    total_pages = None
+    pending: Optional[asyncio.Task] = fetch(page)
+    try:
+        while pending is not None:
+            response = await pending
+            pending = None
+            handle_response_error(response, f"Failed to get {path} page {page}")
+
+            if total_pages is None:
+                total_pages = int(response.headers.get("X-WP-TotalPages") or 1)
+            if page < total_pages:
+                pending = fetch(page + 1)
+
+            yield response
+            page += 1
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+async def fetch_all(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    per_page: int = 100,
+    concurrency: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    מחזיר את כל הפריטים מכל העמודים של נקודת קצה מדופדפת.
+
+    מיועד לאוספים קטנים יחסית (וריאציות של מוצר, מונחי מאפיין וכו'); לאוספים
+    גדולים יש לעבוד עם iter_pages עמוד אחר עמוד. כש-concurrency גדול מ-1,
+    העמודים שאחרי הראשון נטענים במקביל.
+
+    Args:
+        client: לקוח HTTP פתוח.
+        path: נתיב נקודת הקצה.
+        params: פרמטרים נוספים לבקשה (מסננים, _fields וכו').
+        per_page: מספר פריטים לעמוד (עד 100).
+        concurrency: מספר העמודים שנטענים במקביל.
+
+    Returns:
+        List[Dict[str, Any]]: כל הפריטים, לפי סדר העמודים.
+    """
+    items: List[Dict[str, Any]] = []
+    if concurrency <= 1:
+        async for response in iter_pages(client, path, params, per_page):
+            items.extend(response.json())
+        return items
+
+    base_params = {**(params or {}), "per_page": per_page}
+
+    async def fetch(page: int) -> List[Dict[str, Any]]:
+        response = await client.get(path, params={**base_params, "page": page})
+        handle_response_error(response, f"Failed to get {path} page {page}")
+        return response.json()
+
+    response = await client.get(path, params={**base_params, "page": 1})
+    handle_response_error(response, f"Failed to get {path} page 1")
+    items.extend(response.json())
+    total_pages = int(response.headers.get("X-WP-TotalPages") or 1)
+    pages = await gather_limited((fetch(page) for page in range(2, total_pages + 1)), concurrency)
+    for page_items in pages:
+        items.extend(page_items)
+    return items
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    מחלק רצף פריטים לרשימות בגודל קבוע (האחרונה עשויה להיות קצרה יותר).
+
+    Args:
+        items: רצף הפריטים.
+        size: גודל כל חלק.
+
+    Yields:
+        List[T]: חלק מהפריטים.
+    """
+    chunk: List[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def gather_limited(aws: Iterable[Awaitable[T]], concurrency: int) -> List[T]:
+    """
+    מריץ קבוצת פעולות אסינכרוניות במקביל, עם הגבלה על מספר הפעולות הפעילות בו-זמנית.
+
+    Args:
+        aws: הפעולות להרצה.
+        concurrency: מספר הפעולות המרבי שירוצו במקביל.
+
+    Returns:
+        List[T]: התוצאות, לפי סדר הפעולות.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws))
+
+class RateLimiter:
+    """
+    מגביל קצב פעולות: לכל היותר `rate` פעולות בשנייה, במרווחים שווים.
+
+    משמש פעולות כתיבה רבות (כמו החזרים) שאינן עוברות דרך נקודת batch, כדי
+    לא להעמיס על החנות או על שער התשלום.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """ממתין עד שמותר לבצע את הפעולה הבאה."""
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def submit_batch(
+    client: httpx.AsyncClient,
+    path: str,
+    payload: Dict[str, List[Any]],
+) -> Dict[str, Any]:
+    """
+    שולח בקשת batch (create/update/delete) לנקודת קצה של WooCommerce.
+
+    Args:
+        client: לקוח HTTP פתוח.
+        path: נתיב המשאב (למשל "/products"), ללא הסיומת "/batch".
+        payload: מילון עם המפתחות create/update/delete.
+
+    Returns:
+        Dict[str, Any]: תוצאות ה-batch כפי שהוחזרו מה-API.
+
+    Raises:
+        WordPressError: אם הבקשה נכשלה.
+    """
+    response = await client.post(f"{path}/batch", json=payload)
+    handle_response_error(response, f"Failed to run batch on {path}")
+    return response.json()
+
+def get_data_dir(*parts: str) -> str:
+    """
+    מחזיר תיקייה לשמירת קבצים מקומיים של השרת (ייצוא, אינדקסים וכו') ויוצר אותה אם צריך.
+
+    Args:
+        parts: תתי-תיקיות בתוך תיקיית הנתונים.
+
+    Returns:
+        str: הנתיב המלא לתיקייה.
+    """
+    from .server import MCP_DATA_DIR
+
+    path = os.path.join(MCP_DATA_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """
+    שומר מצב של עבודה ארוכה (ייבוא, יצירת קופונים) לקובץ JSON.
+
+    הכתיבה לקובץ זמני ואז החלפה, כך שהפסקה באמצע לא משאירה קובץ חלקי.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str, identity: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    טוען מצב שנשמר ב-save_checkpoint.
+
+    Returns:
+        Optional[Dict[str, Any]]: המצב, או None אם אין קובץ תקין או שה-identity
+        שבו (קובץ המקור, גודל האצווה וכו') שונה - ואז מתחילים מחדש.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("identity") != identity:
+        return None
+    return state
+
+async def apply_batch(
+    client: httpx.AsyncClient,
+    path: str,
+    create: Optional[List[Dict[str, Any]]] = None,
+    update: Optional[List[Dict[str, Any]]] = None,
+    delete: Optional[List[int]] = None,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """
+    מחיל יצירות, עדכונים ומחיקות דרך נקודת ה-batch של משאב, בחלקים של עד
+    BATCH_LIMIT פעולות הנשלחים במקביל.
+
+    כשל של חלק שלם (שגיאת HTTP) אינו עוצר את שאר החלקים; הפריטים שבו נספרים
+    ככושלים.
+
+    Args:
+        client: לקוח HTTP פתוח.
+        path: נתיב המשאב, ללא הסיומת "/batch".
+        create: פריטים ליצירה.
+        update: פריטים לעדכון (כל אחד עם id).
+        delete: מזהים למחיקה.
+        concurrency: מספר בקשות ה-batch שיישלחו במקביל.
+
+    Returns:
+        Dict[str, Any]: מספר הפריטים שנוצרו, עודכנו, נמחקו ונכשלו, השגיאות
+        (עד MAX_REPORTED_ERRORS) והפריטים שהוחזרו מה-API לכל פעולה.
+    """
+    operations = (
+        [("create", item) for item in create or []]
+        + [("update", item) for item in update or []]
+        + [("delete", item_id) for item_id in delete or []]
+    )
+    summary: Dict[str, Any] = {
+        "created": 0,
+        "updated": 0,
+        "deleted": 0,
+        "failed": 0,
+        "errors": [],
+        "items": {"create": [], "update": [], "delete": []},
+    }
+    counters = {"create": "created", "update": "updated", "delete": "deleted"}
+
+    def report(error: Dict[str, Any]) -> None:
+        summary["failed"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append(error)
+
+    async def send(chunk: List[Any]) -> None:
+        payload: Dict[str, List[Any]] = {}
+        for action, item in chunk:
+            payload.setdefault(action, []).append(item)
+        try:
+            result = await submit_batch(client, path, payload)
+        except (WordPressError, httpx.HTTPError) as e:
+            for action, item in chunk:
+                item_id = item if action == "delete" else item.get("id")
+                report({"action": action, "id": item_id, "message": str(e)})
+            return
+
+        for action, sent in payload.items():
+            for request_item, item in zip(sent, result.get(action) or []):
+                error = item.get("error") if isinstance(item, dict) else None
+                if error:
+                    item_id = request_item if action == "delete" else request_item.get("id")
+                    report({
+                        "action": action,
+                        "id": item_id,
+                        "code": error.get("code"),
+                        "message": error.get("message"),
+                    })
+                else:
+                    summary[counters[action]] += 1
+                    summary["items"][action].append(item)
+
+    await gather_limited((send(chunk) for chunk in chunked(operations, BATCH_LIMIT)), concurrency)
+    return summary
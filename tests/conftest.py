@@ -191,6 +191,48 @@ def mock_sales_report():
     }
 
 
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """מפנה את תיקיית הנתונים המקומית של השרת לתיקייה זמנית."""
+    import woocommerce_mcp.server
+
+    path = tmp_path / "data"
+    monkeypatch.setattr(woocommerce_mcp.server, "MCP_DATA_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """לקוח WooCommerce מדומה שמוחזר מכל פרופיל חנות (tests.mocks.wc_api.FakeWCClient)."""
+    from tests.mocks.wc_api import FakeWCClient
+    import woocommerce_mcp.profiles
+
+    client = FakeWCClient()
+
+    async def create_client(*args):
+        return client
+
+    monkeypatch.setattr(woocommerce_mcp.profiles, "create_wc_client", create_client)
+    return client
+
+
+@pytest.fixture
+def fake_store(fake_client, monkeypatch):
+    """
+    פרופיל חנות לבדיקות שהלקוח שלו הוא fake_client, עם מטמונים נקיים.
+
+    הפרופיל רשום בשם "test", כך שאפשר לקרוא לכלים עם profile="test".
+    """
+    import woocommerce_mcp.profiles
+
+    store = woocommerce_mcp.profiles.StoreProfile(
+        "test", "https://test-site.example.com", "test_key", "test_secret"
+    )
+    monkeypatch.setitem(woocommerce_mcp.profiles._PROFILES, "test", store)
+    yield store
+    woocommerce_mcp.profiles._SITE_CACHES.pop(store.site_url, None)
+
+
 @pytest.fixture
 def mock_http_response():
     """Create a mock HTTP response with custom data."""
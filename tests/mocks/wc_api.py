@@ -0,0 +1,88 @@
+"""
+לקוח WooCommerce מדומה שמחזיר תגובות httpx אמיתיות, לבדיקת לוגיקה של כלים מרוכזים.
+"""
+
+import json
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+
+class FakeWCClient:
+    """
+    מדמה את httpx.AsyncClient של WooCommerce.
+
+    אוספים (collections) מוחזרים בדפדוף עם הכותרת X-WP-TotalPages, ו-handlers
+    מאפשרים להגדיר תגובה לכל שילוב של מתודה ונתיב.
+    """
+
+    base_url = httpx.URL("https://test-site.example.com/wp-json/wc/v3/")
+
+    def __init__(self):
+        self.collections: Dict[str, List[Dict[str, Any]]] = {}
+        self.handlers: Dict[Tuple[str, str], Callable[..., Any]] = {}
+        self.calls: List[Tuple[str, str, Dict[str, Any], Any]] = []
+        self.is_closed = False
+
+    def add_collection(self, path: str, items: List[Dict[str, Any]]) -> None:
+        self.collections[path] = items
+
+    def on(self, method: str, path: str, handler: Callable[..., Any]) -> None:
+        """handler(params, json) מחזיר גוף תגובה, או (status, body)."""
+        self.handlers[(method, path)] = handler
+
+    def calls_to(self, method: str, path: str) -> List[Tuple[str, str, Dict[str, Any], Any]]:
+        return [call for call in self.calls if call[0] == method and call[1] == path]
+
+    def _respond(self, method: str, path: str, status: int, body: Any, headers=None) -> httpx.Response:
+        return httpx.Response(
+            status,
+            content=json.dumps(body).encode(),
+            headers=headers or {},
+            request=httpx.Request(method, f"{str(self.base_url).rstrip('/')}{path}"),
+        )
+
+    async def _dispatch(self, method: str, path: str, params: Optional[Dict[str, Any]], body: Any):
+        params = dict(params or {})
+        self.calls.append((method, path, params, body))
+
+        handler = self.handlers.get((method, path))
+        if handler is not None:
+            result = handler(params, body)
+            status, payload = result if isinstance(result, tuple) else (200, result)
+            return self._respond(method, path, status, payload)
+
+        if method == "GET" and path in self.collections:
+            items = self.collections[path]
+            per_page = int(params.get("per_page", 10))
+            page = int(params.get("page", 1))
+            total_pages = max(1, math.ceil(len(items) / per_page))
+            chunk = items[(page - 1) * per_page:page * per_page]
+            return self._respond(
+                method, path, 200, chunk,
+                {"X-WP-Total": str(len(items)), "X-WP-TotalPages": str(total_pages)},
+            )
+
+        return self._respond(method, path, 404, {"code": "rest_no_route", "message": "No route"})
+
+    async def get(self, path, params=None):
+        return await self._dispatch("GET", path, params, None)
+
+    async def post(self, path, json=None, params=None):
+        return await self._dispatch("POST", path, params, json)
+
+    async def put(self, path, json=None, params=None):
+        return await self._dispatch("PUT", path, params, json)
+
+    async def delete(self, path, params=None):
+        return await self._dispatch("DELETE", path, params, None)
+
+    async def aclose(self):
+        self.is_closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
@@ -2,12 +2,17 @@
 בדיקות לכלי ניהול קופונים
 """
 
+import json
+
 import pytest
 from unittest.mock import patch, AsyncMock
 
 import mcp.types as types
 from mcp.types import TextContent
 
+from woocommerce_mcp.coupons import bulk_generate_coupons, generate_coupon_codes
+from woocommerce_mcp.utils import WordPressError
+
 
 @pytest.mark.anyio
 async def test_get_coupons_tool(mcp_tool_client, mock_wc_client, mock_http_response):
@@ -233,4 +238,100 @@ async def test_batch_update_coupons_tool(mcp_tool_client, mock_wc_client, mock_h
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent) 
+
+
+def test_generate_coupon_codes_avoids_collisions():
+    """בדיקה שהקודים המוגרלים ייחודיים, לא מתנגשים בקודים קיימים (ללא תלות באותיות), ושמרחב קטן מדי נדחה."""
+    existing = {"sale-aa"}
+    codes = generate_coupon_codes(50, existing, prefix="SALE-", length=4)
+
+    assert len({code.lower() for code in codes}) == 50
+    assert all(code.startswith("SALE-") and len(code) == 9 for code in codes)
+    assert len(existing) == 51
+
+    with pytest.raises(WordPressError):
+        generate_coupon_codes(10, set(), length=2, alphabet="AB")
+
+
+@pytest.mark.anyio
+async def test_bulk_generate_coupons_resumes(fake_client, data_dir):
+    """בדיקה שיצירה שנקטעה ממשיכה עם אותם קודים, בלי לשלוח שוב אצוות שהושלמו."""
+    coupons = [{"id": 1, "code": "taken"}]
+    failing = {"batch": 2}
+
+    def batch(params, body):
+        failing["batch"] -= 1
+        if failing["batch"] == 0:
+            return 500, {"code": "internal_server_error", "message": "boom"}
+        coupons.extend({"code": item["code"].lower()} for item in body["create"])
+        return {"create": [{"id": len(coupons) + i} for i, _ in enumerate(body["create"])]}
+
+    fake_client.add_collection("/coupons", coupons)
+    fake_client.on("POST", "/coupons/batch", batch)
+
+    preview = await bulk_generate_coupons(fake_client, 5, {"amount": "10"}, batch_size=2, dry_run=True)
+    assert preview["count"] == 5
+    assert not fake_client.calls_to("POST", "/coupons/batch")
+
+    first = await bulk_generate_coupons(fake_client, 5, {"amount": "10"}, batch_size=2, name="spring", concurrency=1)
+    assert first["created"] == 3
+    assert first["pending_chunks"] == 1
+    assert first["completed"] is False
+    sent = fake_client.calls_to("POST", "/coupons/batch")
+    assert sent[0][3]["create"][0]["usage_limit"] == 1
+    assert sent[0][3]["create"][0]["amount"] == "10"
+
+    second = await bulk_generate_coupons(fake_client, 5, {"amount": "10"}, batch_size=2, name="spring", concurrency=1)
+    assert second["skipped_chunks"] == 2
+    assert second["created"] == 5
+    assert second["completed"] is True
+
+    with open(second["codes_file"], encoding="utf-8") as f:
+        codes = f.read().split()
+    assert sorted(code.lower() for code in codes) == sorted(c["code"] for c in coupons[1:])
+    assert "taken" not in {code.lower() for code in codes}
+
+
+@pytest.mark.anyio
+async def test_bulk_generate_coupons_retries_failed_codes(fake_client, data_dir):
+    """בדיקה שאצווה עם קופון שנכשל לא מסומנת כהושלמה, ורק הקוד שנכשל נשלח שוב."""
+    coupons = []
+    attempts = {"first": True}
+
+    def batch(params, body):
+        results = []
+        for i, item in enumerate(body["create"]):
+            if attempts["first"] and i == 1:
+                attempts["first"] = False
+                results.append({"id": 0, "error": {"code": "internal", "message": "Temporary failure"}})
+            else:
+                coupons.append({"code": item["code"].lower()})
+                results.append({"id": len(coupons)})
+        return {"create": results}
+
+    fake_client.add_collection("/coupons", coupons)
+    fake_client.on("POST", "/coupons/batch", batch)
+
+    first = await bulk_generate_coupons(fake_client, 4, {"amount": "5"}, batch_size=2, name="retry", concurrency=1)
+    assert (first["created"], first["failed"], first["completed"]) == (3, 1, False)
+    failed_code = first["errors"][0]["coupon"]
+
+    second = await bulk_generate_coupons(fake_client, 4, {"amount": "5"}, batch_size=2, name="retry", concurrency=1)
+    assert [item["code"] for item in fake_client.calls_to("POST", "/coupons/batch")[-1][3]["create"]] == [failed_code]
+    assert (second["retried_codes"], second["skipped_chunks"]) == (1, 1)
+    assert (second["created"], second["failed"], second["completed"]) == (4, 0, True)
+
+
+@pytest.mark.anyio
+async def test_generate_coupons_tool_dry_run(mcp_server, fake_store, fake_client, data_dir):
+    """בדיקה שהכלי generate_coupons בהרצת ניסיון מחזיר קודים לדוגמה בלי ליצור קופונים."""
+    fake_client.add_collection("/coupons", [])
+
+    result = await mcp_server.call_tool(
+        "generate_coupons", {"count": 3, "prefix": "VIP-", "dry_run": True, "profile": "test"}
+    )
+    data = json.loads(result[0].text)
+
+    assert len(data["sample"]) == 3
+    assert all(code.startswith("VIP-") for code in data["sample"])
@@ -0,0 +1,132 @@
+"""
+בדיקות לכלי אינדקס הלקוחות וזיהוי הכפילויות
+"""
+
+import json
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp.customer_index import CustomerIndex, email_key, phone_key
+
+CUSTOMERS = [
+    {"id": 5, "email": "Dana.Levi@gmail.com", "first_name": "דנה", "last_name": "לוי",
+     "billing": {"email": "dana.levi@gmail.com", "phone": "050-123-4567"}},
+    {"id": 6, "email": "danalevi+shop@gmail.com", "first_name": "דנה", "last_name": "ל",
+     "billing": {"email": "", "phone": ""}},
+    {"id": 7, "email": "yossi@example.com", "first_name": "יוסי", "last_name": "כהן",
+     "billing": {"email": "yossi@example.com", "phone": "03-5551234"}},
+]
+
+ORDERS = [
+    {"id": 100, "customer_id": 0, "billing": {"email": "guest@example.com", "phone": "+972 50 999 8888",
+     "first_name": "אורח"}, "date_created_gmt": "2026-01-01T10:00:00", "date_modified_gmt": "2026-01-01T10:00:00"},
+    {"id": 101, "customer_id": 0, "billing": {"email": "Guest@Example.com", "phone": ""},
+     "date_created_gmt": "2026-02-01T10:00:00", "date_modified_gmt": "2026-02-03T10:00:00"},
+    {"id": 102, "customer_id": 0, "billing": {"email": "other@example.com", "phone": "0501234567"},
+     "date_created_gmt": "2026-01-05T10:00:00", "date_modified_gmt": "2026-01-05T10:00:00"},
+    {"id": 103, "customer_id": 7, "billing": {"email": "yossi@example.com", "phone": "03-5551234"},
+     "date_created_gmt": "2026-01-06T10:00:00", "date_modified_gmt": "2026-01-06T10:00:00"},
+]
+
+
+def _index():
+    index = CustomerIndex()
+    index.set_customers(CUSTOMERS)
+    index.set_orders(ORDERS)
+    return index
+
+
+@pytest.mark.anyio
+async def test_find_customers_tool(mcp_tool_client):
+    """בדיקה שהכלי find_customers רשום ועובד."""
+    result = await mcp_tool_client.call_tool("find_customers", {"emails": ["dana@example.com"]})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_normalization():
+    """בדיקה של נרמול אימייל (כולל צורה קנונית) וטלפון."""
+    assert email_key(" Dana@Example.COM ") == "dana@example.com"
+    assert email_key("Dana.Levi+tag@googlemail.com", canonical=True) == "danalevi@gmail.com"
+    assert email_key("d.l+x@example.com", canonical=True) == "d.l@example.com"
+    assert email_key("not-an-email") is None
+    assert phone_key("+972 50-123-4567") == phone_key("050 1234567") == "501234567"
+    assert phone_key("123") is None
+
+
+def test_find_matches_customers_and_guests():
+    """בדיקה שאורחים מקובצים לפי אימייל, וחיפוש מוצא לקוחות ואורחים לפי אימייל או טלפון."""
+    index = _index()
+
+    guest = index.records["guest:guest@example.com"]
+    assert guest["orders"] == 2
+    assert guest["last_order_date"] == "2026-02-01T10:00:00"
+    assert "guest:yossi@example.com" not in index.records
+
+    assert [r["key"] for r in index.find(email="GUEST@example.com")] == ["guest:guest@example.com"]
+    assert [r["key"] for r in index.find(email="dana.levi@gmail.com")] == ["customer:5", "customer:6"]
+    assert [r["key"] for r in index.find(phone="+972-50-123-4567")] == ["customer:5", "guest:other@example.com"]
+    assert index.find(email="nobody@example.com") == []
+
+
+def test_duplicates_group_connected_records():
+    """בדיקה שקבוצות כפילויות מאחדות רשומות שמחוברות דרך אימייל קנוני או טלפון."""
+    index = _index()
+
+    groups = index.duplicates()
+    assert len(groups) == 1
+    assert [r["key"] for r in groups[0]["records"]] == ["customer:5", "customer:6", "guest:other@example.com"]
+    assert {"email": "danalevi@gmail.com"} in groups[0]["matched_on"]
+    assert {"phone": "501234567"} in groups[0]["matched_on"]
+
+    groups = index.duplicates(include_guests=False)
+    assert [r["key"] for r in groups[0]["records"]] == ["customer:5", "customer:6"]
+
+
+def test_duplicates_ignore_invalid_emails():
+    """בדיקה שרשומות עם אימייל לא תקין (בלי "@") אינן מקובצות יחד כדלי None."""
+    index = CustomerIndex()
+    index.set_customers([{"id": 8, "email": "", "billing": {"email": "n/a", "phone": ""}}])
+    index.set_orders([
+        {"id": 200 + i, "customer_id": 0, "billing": {"email": "n/a", "phone": phone},
+         "date_created_gmt": "2026-01-01T10:00:00", "date_modified_gmt": "2026-01-01T10:00:00"}
+        for i, phone in enumerate(["050-1111111", "052-2222222"])
+    ])
+
+    assert len(index.records) == 3
+    assert index.duplicates() == []
+
+
+def test_order_becoming_registered_leaves_guests():
+    """בדיקה שהזמנת אורח ששויכה ללקוח רשום יוצאת מרשומת האורח."""
+    index = _index()
+    index.set_orders([{**ORDERS[2], "customer_id": 5}])
+
+    assert "guest:other@example.com" not in index.records
+    assert index.duplicates(include_guests=True)[0]["matched_on"] == [{"email": "danalevi@gmail.com"}]
+
+
+@pytest.mark.anyio
+async def test_tools_refresh_incrementally(mcp_server, fake_store, fake_client):
+    """בדיקה שהכלים בונים את האינדקס, ועדכון לקוח גורם לרענון הדרגתי של ההזמנות."""
+    fake_client.add_collection("/customers", [dict(customer) for customer in CUSTOMERS])
+    fake_client.add_collection("/orders", [dict(order) for order in ORDERS])
+    fake_client.on("PUT", "/customers/7", lambda params, body: {"id": 7})
+
+    result = await mcp_server.call_tool(
+        "find_customers", {"emails": ["guest@example.com", "x@example.com"], "phones": ["03-555-1234"], "profile": "test"}
+    )
+    data = json.loads(result[0].text)
+    assert data["emails"]["guest@example.com"][0]["orders"] == 2
+    assert [r["customer_id"] for r in data["phones"]["03-555-1234"]] == [7]
+    assert data["missing"] == ["x@example.com"]
+    assert "modified_after" not in fake_client.calls_to("GET", "/orders")[-1][2]
+
+    await mcp_server.call_tool("update_customer", {"customer_id": 7, "customer_data": {}, "profile": "test"})
+    result = await mcp_server.call_tool("find_duplicate_customers", {"profile": "test"})
+    data = json.loads(result[0].text)
+    assert data["groups_count"] == 1
+    assert fake_client.calls_to("GET", "/orders")[-1][2]["modified_after"] == "2026-02-03T10:00:00"
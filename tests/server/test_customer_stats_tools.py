@@ -0,0 +1,94 @@
+"""
+בדיקות לכלי סטטיסטיקות הלקוחות
+"""
+
+import json
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp.customer_stats import CustomerStatsView
+from woocommerce_mcp.utils import WordPressError
+
+ORDERS = [
+    {"id": 1, "customer_id": 5, "billing": {"email": "dana@example.com"}, "status": "completed", "total": "100.00",
+     "refunds": [{"id": 50, "total": "-20.00"}], "date_created_gmt": "2026-01-01T10:00:00",
+     "date_modified_gmt": "2026-01-02T10:00:00"},
+    {"id": 2, "customer_id": 5, "billing": {"email": "dana@example.com"}, "status": "processing", "total": "60.00",
+     "refunds": [], "date_created_gmt": "2026-02-01T10:00:00", "date_modified_gmt": "2026-02-01T10:00:00"},
+    {"id": 3, "customer_id": 5, "billing": {"email": "dana@example.com"}, "status": "cancelled", "total": "999.00",
+     "refunds": [], "date_created_gmt": "2026-03-01T10:00:00", "date_modified_gmt": "2026-03-01T10:00:00"},
+    {"id": 4, "customer_id": 0, "billing": {"email": "Guest@Example.com"}, "status": "completed", "total": "30.00",
+     "refunds": [], "date_created_gmt": "2026-01-15T10:00:00", "date_modified_gmt": "2026-01-15T10:00:00"},
+]
+
+
+@pytest.mark.anyio
+async def test_get_customer_stats_tool(mcp_tool_client):
+    """בדיקה שהכלי get_customer_stats רשום ועובד."""
+    result = await mcp_tool_client.call_tool("get_customer_stats", {"customer_ids": [5]})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_stats_aggregate_paid_orders_and_guests(tmp_path):
+    """בדיקה שערך החיים כולל רק הזמנות ששולמו בניכוי החזרים, והזמנות אורח מקובצות לפי אימייל."""
+    view = CustomerStatsView(str(tmp_path / "customers.sqlite3"))
+    view.upsert(ORDERS)
+
+    dana, guest = view.stats()
+    assert dana["customer_id"] == 5
+    assert dana["orders"] == 2
+    assert dana["all_orders"] == 3
+    assert dana["total_spent"] == 140.0
+    assert dana["refunded"] == 20.0
+    assert dana["average_order"] == 70.0
+    assert dana["first_order_date"] == "2026-01-01T10:00:00"
+    assert dana["last_order_date"] == "2026-02-01T10:00:00"
+    assert guest["customer_key"] == "guest:guest@example.com"
+
+    assert view.stats(emails=["GUEST@example.com"])[0]["total_spent"] == 30.0
+    assert view.stats(include_guests=False, min_orders=1) == [dana]
+    assert [row["customer_key"] for row in view.stats(sort="last_order")] == ["5", "guest:guest@example.com"]
+
+    with pytest.raises(WordPressError):
+        view.stats(sort="random")
+
+
+def test_upsert_recomputes_previous_customer(tmp_path):
+    """בדיקה שהעברת הזמנה ללקוח אחר (אורח שנרשם) מעדכנת את שני הסיכומים, ומחיקה מסירה לקוח ריק."""
+    view = CustomerStatsView(str(tmp_path / "customers.sqlite3"))
+    view.upsert(ORDERS)
+    view.upsert([{**ORDERS[3], "customer_id": 9}])
+
+    assert [row["customer_key"] for row in view.stats()] == ["5", "9"]
+
+    view.remove([4])
+    assert [row["customer_key"] for row in view.stats()] == ["5"]
+
+
+@pytest.mark.anyio
+async def test_refresh_incremental_through_tool(mcp_server, fake_store, fake_client, data_dir):
+    """בדיקה שהכלי בונה את התצוגה בקריאה הראשונה, ורענון נוסף מבקש רק הזמנות שהשתנו ומסיר הזמנות שבפח."""
+    orders = [dict(order) for order in ORDERS]
+    fake_client.on("GET", "/orders", lambda params, body: [
+        order for order in orders if (order["status"] == "trash") == (params["status"] == "trash")
+    ])
+
+    result = await mcp_server.call_tool("get_customer_stats", {"customer_ids": [5, 77], "profile": "test"})
+    data = json.loads(result[0].text)
+    assert data["customers"][0]["total_spent"] == 140.0
+    assert data["not_found"] == [77]
+
+    orders[1].update(status="trash", date_modified_gmt="2026-03-02T10:00:00")
+    result = await mcp_server.call_tool("refresh_customer_stats", {"profile": "test"})
+    params = fake_client.calls_to("GET", "/orders")[-2][2]
+    assert params["modified_after"] == "2026-03-01T10:00:00"
+    assert fake_client.calls_to("GET", "/orders")[-1][2]["status"] == "trash"
+    assert json.loads(result[0].text)["removed"] == 1
+    assert list((data_dir / "indexes").glob("customers-*.sqlite3"))
+
+    result = await mcp_server.call_tool("get_customer_stats", {"customer_ids": [5], "profile": "test"})
+    assert json.loads(result[0].text)["customers"][0]["total_spent"] == 80.0
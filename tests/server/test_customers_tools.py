@@ -2,6 +2,8 @@
 בדיקות לכלי ניהול לקוחות
 """
 
+import json
+
 import pytest
 from unittest.mock import patch, AsyncMock
 
@@ -153,4 +155,48 @@ async def test_create_customer_meta_tool(mcp_tool_client, mock_wc_client, mock_c
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent) 
+
+
+@pytest.mark.anyio
+async def test_customer_meta_fast_path(mcp_server, fake_store, fake_client):
+    """בדיקה שקריאת המטא מבקשת רק meta_data, ויצירת מטא שולחת PUT יחיד עם המפתח שמשתנה בלבד."""
+    meta = [{"id": 1, "key": "tier", "value": "silver"}, {"id": 2, "key": "source", "value": "ads"}]
+    fake_client.on("GET", "/customers/2", lambda params, body: {"meta_data": meta})
+    fake_client.on("PUT", "/customers/2", lambda params, body: {"meta_data": [meta[0], {"id": 3, **body["meta_data"][0]}]})
+
+    result = await mcp_server.call_tool("get_customer_meta", {"customer_id": 2, "meta_key": "tier", "profile": "test"})
+    assert json.loads(result[0].text) == {"id": 1, "key": "tier", "value": "silver"}
+    assert fake_client.calls_to("GET", "/customers/2")[0][2] == {"_fields": "meta_data"}
+
+    await mcp_server.call_tool(
+        "create_customer_meta", {"customer_id": 2, "meta_key": "tier", "meta_value": "gold", "profile": "test"}
+    )
+    assert len(fake_client.calls_to("GET", "/customers/2")) == 1
+    (_, _, params, body), = fake_client.calls_to("PUT", "/customers/2")
+    assert params == {"_fields": "meta_data"}
+    assert body == {"meta_data": [{"key": "tier", "value": "gold"}]}
+
+
+@pytest.mark.anyio
+async def test_set_customers_meta_batches_changes(mcp_server, fake_store, fake_client):
+    """בדיקה שעדכון מטא ללקוחות רבים נשלח ב-batch אחד, רק עם ערכים שהשתנו."""
+    fake_client.add_collection("/customers", [
+        {"id": 1, "meta_data": [{"id": 10, "key": "tier", "value": "gold"}]},
+        {"id": 2, "meta_data": [{"id": 11, "key": "tier", "value": "silver"}]},
+    ])
+    fake_client.on("POST", "/customers/batch", lambda params, body: {"update": [{"id": i["id"]} for i in body["update"]]})
+
+    result = await mcp_server.call_tool(
+        "set_customers_meta",
+        {"meta": {"1": {"tier": "gold"}, "2": {"tier": "gold"}, "3": {"tier": "gold"}}, "profile": "test"},
+    )
+    data = json.loads(result[0].text)
+
+    assert data["updated"] == 1
+    assert data["unchanged"] == 1
+    assert data["not_found"] == [3]
+    assert fake_client.calls_to("GET", "/customers")[0][2]["_fields"] == "id,meta_data"
+    (_, _, _, body), = fake_client.calls_to("POST", "/customers/batch")
+    assert body["update"] == [{"id": 2, "meta_data": [{"key": "tier", "value": "gold"}]}]
+
@@ -0,0 +1,66 @@
+"""
+בדיקות לכלי ייצוא נתונים
+"""
+
+import gzip
+import json
+
+import pytest
+from mcp.types import TextContent
+
+from tests.mocks.wc_api import FakeWCClient
+from woocommerce_mcp.exports import export_resource
+from woocommerce_mcp.utils import WordPressError
+
+
+@pytest.mark.anyio
+async def test_export_orders_tool(mcp_tool_client, mock_wc_client, mock_orders_list, mock_http_response):
+    """בדיקה שהכלי export_orders רשום ועובד."""
+    mock_wc_client.get.return_value = mock_http_response(json_data=mock_orders_list)
+
+    result = await mcp_tool_client.call_tool("export_orders", {"filters": {"status": "completed"}})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+@pytest.mark.anyio
+async def test_export_resource_streams_all_pages(tmp_path, mock_order_data):
+    """בדיקה שהייצוא עובר על כל העמודים וכותב NDJSON דחוס."""
+    client = FakeWCClient()
+    client.add_collection("/orders", [dict(mock_order_data, id=i) for i in range(1, 251)])
+    output = tmp_path / "orders.ndjson.gz"
+
+    result = await export_resource(client, "orders", str(output), filters={"status": "processing"})
+
+    assert result["rows"] == 250
+    assert result["pages"] == 3
+    with gzip.open(output, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["id"] for row in rows] == list(range(1, 251))
+    assert rows[0]["line_items"][0]["quantity"] == 2
+
+    # כל בקשה כוללת הטלת שדות ואת המסננים המקוריים
+    params = client.calls_to("GET", "/orders")[0][2]
+    assert params["status"] == "processing"
+    assert params["_fields"].startswith("id,")
+
+
+@pytest.mark.anyio
+async def test_export_resource_failure_leaves_no_file(tmp_path):
+    """בדיקה שכשל בבקשה לא משאיר קובץ חלקי."""
+    client = FakeWCClient()
+    output = tmp_path / "customers.ndjson"
+
+    with pytest.raises(WordPressError):
+        await export_resource(client, "customers", str(output), compression="none")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.anyio
+async def test_export_resource_rejects_unknown_format(tmp_path):
+    """בדיקה שפורמט לא נתמך נדחה."""
+    with pytest.raises(WordPressError):
+        await export_resource(FakeWCClient(), "orders", str(tmp_path / "x"), format="csv")
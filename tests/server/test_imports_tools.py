@@ -0,0 +1,167 @@
+"""
+בדיקות לכלי ייבוא נתונים
+"""
+
+import json
+
+import pytest
+from mcp.types import TextContent
+
+from tests.mocks.wc_api import FakeWCClient
+from woocommerce_mcp.imports import IMPORT_RESOURCES, import_file, map_csv_row, validate_payload
+
+
+def _batch_echo(params, body):
+    """מחזיר תשובת batch שבה כל פריט נוצר/עודכן, פרט לפריטים עם השם "dup"."""
+    result = {}
+    for action in ("create", "update"):
+        result[action] = [
+            {"id": 0, "error": {"code": "duplicate", "message": "Duplicate"}}
+            if item.get("name") == "dup" else {"id": item.get("id", 100)}
+            for item in body.get(action, [])
+        ]
+    return result
+
+
+@pytest.mark.anyio
+async def test_import_products_tool(mcp_tool_client, mock_wc_client, mock_http_response):
+    """בדיקה שהכלי import_products רשום ועובד."""
+    mock_wc_client.post.return_value = mock_http_response(json_data={"create": []})
+
+    result = await mcp_tool_client.call_tool("import_products", {"file_path": "products.csv"})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_map_csv_row_nested_and_lists():
+    """בדיקה שעמודות CSV ממופות למבנה הנתונים של WooCommerce."""
+    row = {
+        "name": "חולצה",
+        "regular_price": "49.90",
+        "manage_stock": "yes",
+        "stock_quantity": "12",
+        "categories": "9|10",
+        "images": "https://example.com/a.jpg",
+        "dimensions.length": "10",
+        "sku": "",
+    }
+
+    payload = map_csv_row(IMPORT_RESOURCES["products"], row)
+
+    assert payload["manage_stock"] is True
+    assert payload["stock_quantity"] == 12
+    assert payload["categories"] == [{"id": 9}, {"id": 10}]
+    assert payload["images"] == [{"src": "https://example.com/a.jpg"}]
+    assert payload["dimensions"] == {"length": "10"}
+    assert "sku" not in payload
+
+
+def test_validate_payload_rules():
+    """בדיקה שכללי האימות דוחים שורות לא תקינות."""
+    coupons = IMPORT_RESOURCES["coupons"]
+
+    assert validate_payload(coupons, {"code": "SALE", "amount": "10"}) is None
+    assert "code" in validate_payload(coupons, {"amount": "10"})
+    assert "amount" in validate_payload(coupons, {"code": "SALE", "amount": "ten"})
+    assert "discount_type" in validate_payload(coupons, {"code": "SALE", "discount_type": "bogus"})
+    assert "email" in validate_payload(IMPORT_RESOURCES["customers"], {"email": "not-an-email"})
+
+
+@pytest.mark.anyio
+async def test_import_file_batches_and_resumes(tmp_path, data_dir):
+    """בדיקה שהייבוא נשלח באצוות, מדווח שגיאות ולא שולח שוב אחרי השלמה."""
+    source = tmp_path / "products.ndjson"
+    rows = [{"name": f"מוצר {i}", "regular_price": "10"} for i in range(7)]
+    rows.append({"name": "dup"})
+    rows.append({"regular_price": "5"})
+    rows.append({"id": 55, "name": "עדכון"})
+    source.write_text("\n".join(json.dumps(row) for row in rows), encoding="utf-8")
+
+    client = FakeWCClient()
+    client.on("POST", "/products/batch", _batch_echo)
+
+    result = await import_file(client, "products", str(source), batch_size=3, concurrency=2)
+
+    assert result["rows"] == 10
+    assert result["invalid"] == 1
+    assert result["created"] == 7
+    assert result["updated"] == 1
+    assert result["failed"] == 1
+    assert result["completed"] is False
+    assert len(client.calls_to("POST", "/products/batch")) == 3
+
+    # בהרצה הבאה רק השורה שנכשלה נשלחת שוב, והפעם היא מצליחה
+    client.on("POST", "/products/batch", lambda params, body: {"create": [{"id": 7} for _ in body["create"]]})
+    again = await import_file(client, "products", str(source), batch_size=3)
+
+    assert again["completed"] is True
+    assert (again["created"], again["failed"]) == (8, 0)
+    assert len(client.calls_to("POST", "/products/batch")) == 4
+
+    done = await import_file(client, "products", str(source), batch_size=3)
+
+    assert done["already_completed"] is True
+    assert len(client.calls_to("POST", "/products/batch")) == 4
+
+
+@pytest.mark.anyio
+async def test_import_file_retries_only_failed_rows(tmp_path, data_dir):
+    """בדיקה שאצווה עם פריטים שנכשלו לא מסומנת כהושלמה, ורק השורות שנכשלו נשלחות שוב."""
+    source = tmp_path / "products.ndjson"
+    rows = [{"name": "א"}, {"name": "dup"}, {"name": "ב"}, {"name": "ג"}]
+    source.write_text("\n".join(json.dumps(row) for row in rows), encoding="utf-8")
+
+    client = FakeWCClient()
+    client.on("POST", "/products/batch", _batch_echo)
+
+    first = await import_file(client, "products", str(source), batch_size=2)
+
+    assert (first["created"], first["failed"], first["completed"]) == (3, 1, False)
+    assert first["errors"] == [{"row": 2, "code": "duplicate", "message": "Duplicate"}]
+
+    client.on("POST", "/products/batch", lambda params, body: {"create": [{"id": 7} for _ in body["create"]]})
+    second = await import_file(client, "products", str(source), batch_size=2)
+
+    assert client.calls_to("POST", "/products/batch")[-1][3]["create"] == [{"name": "dup"}]
+    assert (second["retried_rows"], second["skipped_chunks"]) == (1, 1)
+    assert (second["created"], second["failed"], second["completed"]) == (4, 0, True)
+
+
+@pytest.mark.anyio
+async def test_import_file_failed_chunk_is_retried(tmp_path, data_dir):
+    """בדיקה שאצווה שנכשלה נשלחת שוב בהרצה הבאה, בלי לשלוח שוב אצוות שהושלמו."""
+    source = tmp_path / "customers.csv"
+    source.write_text(
+        "email,first_name,billing.phone\n"
+        "a@example.com,א,050\n"
+        "b@example.com,ב,051\n"
+        "c@example.com,ג,052\n",
+        encoding="utf-8",
+    )
+
+    calls = []
+
+    def flaky(params, body):
+        calls.append(body)
+        if len(calls) == 2:
+            return 500, {"code": "internal", "message": "Server error"}
+        return {"create": [{"id": i} for i, _ in enumerate(body["create"], start=1)]}
+
+    client = FakeWCClient()
+    client.on("POST", "/customers/batch", flaky)
+
+    first = await import_file(client, "customers", str(source), batch_size=2, concurrency=1)
+
+    assert first["completed"] is False
+    assert first["pending_chunks"] == 1
+    assert first["created"] == 2
+    assert calls[0]["create"][0]["billing"] == {"phone": "050"}
+
+    second = await import_file(client, "customers", str(source), batch_size=2, concurrency=1)
+
+    assert second["completed"] is True
+    assert second["skipped_chunks"] == 1
+    assert second["created"] == 3
+    assert calls[-1]["create"][0]["email"] == "c@example.com"
@@ -0,0 +1,110 @@
+"""
+בדיקות לכלי עדכון המלאי המרוכז
+"""
+
+import json
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp.inventory import read_stock_file, update_stock
+from woocommerce_mcp.utils import WordPressError
+
+PRODUCTS = [
+    {"id": 1, "name": "חולצה", "sku": "TS-001", "type": "variable", "manage_stock": False, "stock_quantity": None},
+    {"id": 2, "name": "כובע", "sku": "CAP-2", "type": "simple", "manage_stock": True, "stock_quantity": 5},
+    {"id": 3, "name": "צעיף", "sku": "SC-3", "type": "simple", "manage_stock": False, "stock_quantity": None},
+]
+
+VARIATIONS = [
+    {"id": 11, "sku": "TS-001-S", "manage_stock": True, "stock_quantity": 2},
+    {"id": 12, "sku": "TS-001-M", "manage_stock": "parent", "stock_quantity": 0},
+]
+
+
+def _echo_batch(params, body):
+    return {"update": [{"id": item["id"]} for item in body.get("update", [])]}
+
+
+@pytest.fixture
+def catalog(fake_client):
+    fake_client.add_collection("/products", [dict(product) for product in PRODUCTS])
+    fake_client.add_collection("/products/1/variations", [dict(variation) for variation in VARIATIONS])
+    fake_client.on("POST", "/products/batch", _echo_batch)
+    fake_client.on("POST", "/products/1/variations/batch", _echo_batch)
+    return fake_client
+
+
+@pytest.mark.anyio
+async def test_update_stock_levels_tool(mcp_tool_client):
+    """בדיקה שהכלי update_stock_levels רשום ועובד."""
+    result = await mcp_tool_client.call_tool("update_stock_levels", {"levels": {"TS-001-S": 3}})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_read_stock_file_formats(tmp_path):
+    """בדיקה של קריאת CSV, NDJSON ומילון JSON, ודיווח על שורות לא תקינות."""
+    csv_path = tmp_path / "stock.csv"
+    csv_path.write_text("code,qty\nA-1,5\nB-2,abc\nA-1,7\n,3\n", encoding="utf-8")
+    ndjson_path = tmp_path / "stock.ndjson"
+    ndjson_path.write_text('{"sku": "A-1", "quantity": "4"}\nnot json\n', encoding="utf-8")
+    json_path = tmp_path / "stock.json"
+    json_path.write_text(json.dumps({"A-1": 1, "B-2": 2.5}), encoding="utf-8")
+
+    levels, errors = read_stock_file(str(csv_path), "code", "qty")
+    assert levels == {"A-1": 7}
+    assert [error["row"] for error in errors] == [3, 5]
+
+    levels, errors = read_stock_file(str(ndjson_path))
+    assert levels == {"A-1": 4}
+    assert errors == [{"row": 2, "message": "Invalid JSON"}]
+
+    levels, errors = read_stock_file(str(json_path))
+    assert levels == {"A-1": 1}
+    assert len(errors) == 1
+
+    with pytest.raises(WordPressError):
+        read_stock_file(str(tmp_path / "missing.csv"))
+
+
+@pytest.mark.anyio
+async def test_update_stock_groups_and_skips_unchanged(fake_store, catalog):
+    """בדיקה שמוצרים ווריאציות נשלחים ב-batch נפרדים, ורק ערכים שהשתנו נשלחים."""
+    levels = {"CAP-2": 5, "SC-3": 8, "TS-001-S": 2, "TS-001-M": 4, "NOPE": 1}
+
+    async with fake_store.client() as client:
+        result = await update_stock(fake_store, client, levels)
+
+    assert result["missing"] == ["NOPE"]
+    assert result["unchanged"] == 2
+    assert result["updated"] == 1
+    assert result["failed"] == 0
+
+    product_batches = catalog.calls_to("POST", "/products/batch")
+    assert [call[3]["update"] for call in product_batches] == [[{"id": 3, "stock_quantity": 8, "manage_stock": True}]]
+
+
+@pytest.mark.anyio
+async def test_update_stock_skips_parent_managed_variations(fake_store, catalog):
+    """בדיקה שוריאציה שהמלאי שלה מנוהל במוצר האב לא מנותקת ממנו, ומדווחת בנפרד."""
+    async with fake_store.client() as client:
+        result = await update_stock(fake_store, client, {"TS-001-M": 4})
+
+    assert result["parent_managed"] == [{"sku": "TS-001-M", "product_id": 1, "variation_id": 12, "quantity": 4}]
+    assert result["to_update"] == 0
+    assert not catalog.calls_to("POST", "/products/1/variations/batch")
+
+
+@pytest.mark.anyio
+async def test_update_stock_levels_dry_run(mcp_server, fake_store, catalog):
+    """בדיקה שהרצת ניסיון מחזירה את התוכנית בלי לשלוח בקשות batch."""
+    result = await mcp_server.call_tool(
+        "update_stock_levels", {"levels": {"CAP-2": 9}, "dry_run": True, "profile": "test"}
+    )
+    data = json.loads(result[0].text)
+
+    assert data["plan"] == {"/products": [{"id": 2, "stock_quantity": 9}]}
+    assert not catalog.calls_to("POST", "/products/batch")
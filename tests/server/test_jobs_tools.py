@@ -0,0 +1,94 @@
+"""
+בדיקות לכלי ניהול משימות רקע
+"""
+
+import asyncio
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp import jobs
+from woocommerce_mcp.jobs import JobManager
+from woocommerce_mcp.profiles import StoreProfile
+from woocommerce_mcp.utils import WordPressError
+
+
+async def _wait_for(manager, job_id, statuses=("completed", "failed", "cancelled")):
+    for _ in range(100):
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish: {job['status']}")
+
+
+@pytest.mark.anyio
+async def test_start_job_tool(mcp_tool_client):
+    """בדיקה שהכלי start_job רשום ועובד."""
+    result = await mcp_tool_client.call_tool("start_job", {"kind": "export_orders"})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+@pytest.mark.anyio
+async def test_job_runs_in_background_and_persists(tmp_path, data_dir, fake_store, fake_client, mock_customers_list):
+    """בדיקה שמשימת ייצוא רצה ברקע ושהתוצאה נשמרת במסד הנתונים."""
+    fake_client.add_collection("/customers", mock_customers_list)
+    db_path = str(tmp_path / "jobs.sqlite3")
+    manager = JobManager(db_path)
+
+    job = manager.start("export_customers", {"output_path": str(tmp_path / "c.ndjson")}, fake_store)
+    assert job["status"] == "pending"
+
+    job = await _wait_for(manager, job["id"])
+    assert job["status"] == "completed"
+    assert job["result"]["rows"] == 2
+
+    # מנהל חדש על אותו קובץ (הפעלה מחדש של השרת) רואה את המשימה
+    assert JobManager(db_path).get(job["id"])["result"]["rows"] == 2
+
+
+@pytest.mark.anyio
+async def test_invalid_job_parameters_are_rejected(tmp_path, fake_store):
+    """בדיקה שסוג משימה או פרמטרים לא מוכרים נדחים לפני ההפעלה."""
+    manager = JobManager(str(tmp_path / "jobs.sqlite3"))
+
+    with pytest.raises(WordPressError):
+        manager.start("bogus", {}, fake_store)
+    with pytest.raises(WordPressError):
+        manager.start("export_orders", {"unknown": 1}, fake_store)
+    assert manager.list() == []
+
+
+@pytest.mark.anyio
+async def test_cancel_and_interrupted_jobs(tmp_path, data_dir, fake_store):
+    """בדיקה שביטול משימה מסומן, ושמשימה שרצה בזמן עצירת התהליך מסומנת כנקטעת."""
+    gate = asyncio.Event()
+
+    async def slow(client, progress=None):
+        await gate.wait()
+        return {}
+
+    jobs.register_job_kind("test_slow", slow)
+    db_path = str(tmp_path / "jobs.sqlite3")
+    manager = JobManager(db_path)
+
+    running = manager.start("test_slow", {}, fake_store)
+    await asyncio.sleep(0.01)
+    manager.cancel(running["id"])
+    assert (await _wait_for(manager, running["id"]))["status"] == "cancelled"
+
+    orphan = manager.start("test_slow", {}, fake_store)
+    await asyncio.sleep(0.01)
+    restarted = JobManager(db_path)
+    assert restarted.get(orphan["id"])["status"] == "interrupted"
+
+    gate.set()
+    with pytest.raises(WordPressError):
+        restarted.resume(orphan["id"], StoreProfile("other", "https://other.example.com", "k", "s"))
+    resumed = restarted.resume(orphan["id"], fake_store)
+    assert resumed["status"] == "pending"
+    assert (await _wait_for(restarted, orphan["id"]))["status"] == "completed"
+    jobs.JOB_KINDS.pop("test_slow")
@@ -0,0 +1,138 @@
+"""
+בדיקות לכלי ניתוח שורות ההזמנה
+"""
+
+import json
+from datetime import date
+
+import pytest
+from mcp.types import TextContent
+
+import woocommerce_mcp.line_items as line_items
+from woocommerce_mcp.line_items import LineItemStore
+from woocommerce_mcp.utils import WordPressError
+
+ORDERS = [
+    {"id": 1, "status": "completed", "date_created_gmt": "2026-03-02T10:00:00", "date_modified_gmt": "2026-03-02T10:00:00",
+     "line_items": [
+         {"product_id": 10, "variation_id": 0, "name": "חולצה", "sku": "TS", "quantity": 2, "subtotal": "100", "total": "90"},
+         {"product_id": 20, "variation_id": 21, "name": "כובע", "sku": "CAP-R", "quantity": 1, "subtotal": "30", "total": "30"},
+     ]},
+    {"id": 2, "status": "processing", "date_created_gmt": "2026-03-04T10:00:00", "date_modified_gmt": "2026-03-04T10:00:00",
+     "line_items": [
+         {"product_id": 10, "variation_id": 0, "name": "חולצה", "sku": "TS", "quantity": 1, "subtotal": "50", "total": "50"},
+         {"product_id": 30, "variation_id": 0, "name": "צעיף", "sku": "SC", "quantity": 3, "subtotal": "60", "total": "60"},
+     ]},
+    {"id": 3, "status": "completed", "date_created_gmt": "2026-04-01T10:00:00", "date_modified_gmt": "2026-04-01T10:00:00",
+     "line_items": [
+         {"product_id": 20, "variation_id": 22, "name": "כובע", "sku": "CAP-B", "quantity": 4, "subtotal": "120", "total": "100"},
+     ]},
+    {"id": 4, "status": "cancelled", "date_created_gmt": "2026-03-05T10:00:00", "date_modified_gmt": "2026-03-05T10:00:00",
+     "line_items": [
+         {"product_id": 10, "variation_id": 0, "name": "חולצה", "sku": "TS", "quantity": 9, "subtotal": "450", "total": "450"},
+     ]},
+]
+
+
+@pytest.fixture(params=["python", "numpy"])
+def engine(request, monkeypatch):
+    """מריץ כל בדיקה גם בלולאת Python וגם ב-numpy (אם מותקן)."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(line_items, "_numpy", lambda: None)
+    return request.param
+
+
+def _store():
+    items = LineItemStore()
+    items.upsert([dict(order) for order in ORDERS])
+    return items
+
+
+@pytest.mark.anyio
+async def test_query_line_items_tool(mcp_tool_client):
+    """בדיקה שהכלי query_line_items רשום ועובד."""
+    result = await mcp_tool_client.call_tool("query_line_items", {"group_by": ["sku"]})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_group_by_product_and_variation(engine):
+    """בדיקה של קיבוץ לפי מוצר וּוריאציה, בלי הזמנות שבוטלו."""
+    items = _store()
+
+    rows = items.query(["product"])
+    assert [(row["product_id"], row["quantity"], row["orders"]) for row in rows] == [(20, 5.0, 2), (10, 3.0, 2), (30, 3.0, 1)]
+    assert rows[1]["name"] == "חולצה"
+    assert rows[1]["total"] == 140.0
+
+    rows = items.query(["variation"], product_ids=[20], sort="total")
+    assert [(row["product_id"], row["variation_id"], row["total"]) for row in rows] == [(20, 22, 100.0), (20, 21, 30.0)]
+
+    rows = items.query([], statuses=["completed", "processing", "cancelled"])
+    assert rows == [{"quantity": 20.0, "total": 780.0, "subtotal": 810.0, "orders": 4, "lines": 6}]
+
+
+def test_period_buckets_and_filters(engine):
+    """בדיקה של יחידות לכל SKU לכל תקופה (יום, שבוע, חודש) וסינון לפי תאריכים."""
+    items = _store()
+
+    rows = items.query(["sku", "period"], skus=["ts"], sort="lines")
+    assert sorted((row["sku"], row["period"], row["quantity"]) for row in rows) == [
+        ("TS", "2026-03-02", 2.0), ("TS", "2026-03-04", 1.0),
+    ]
+
+    rows = items.query(["period"], period="week")
+    assert sorted((row["period"], row["quantity"]) for row in rows) == [("2026-03-02", 7.0), ("2026-03-30", 4.0)]
+
+    rows = items.query(["period"], period="month", date_min=date(2026, 3, 3))
+    assert sorted((row["period"], row["quantity"], row["orders"]) for row in rows) == [
+        ("2026-03-01", 4.0, 1), ("2026-04-01", 4.0, 1),
+    ]
+
+    with pytest.raises(WordPressError):
+        items.query(["customer"])
+
+
+def test_bought_with_and_upsert(engine):
+    """בדיקה של "מה נמכר יחד עם", ושעדכון הזמנה מחליף את השורות הקודמות שלה."""
+    items = _store()
+
+    rows = items.query(["product"], with_product=10)
+    assert [(row["product_id"], row["orders"]) for row in rows] == [(30, 1), (20, 1)]
+
+    items.upsert([{**ORDERS[1], "status": "cancelled"}])
+    assert [row["product_id"] for row in items.query(["product"], with_product=10)] == [20]
+    assert len(items) == 6
+
+
+@pytest.mark.anyio
+async def test_tools_refresh_incrementally(mcp_server, fake_store, fake_client):
+    """בדיקה שהכלי בונה את הטבלה בקריאה הראשונה, ורענון נוסף מבקש רק הזמנות שהשתנו ומסיר הזמנות שבפח."""
+    orders = [dict(order) for order in ORDERS]
+    fake_client.on("GET", "/orders", lambda params, body: [
+        order for order in orders if (order["status"] == "trash") == (params["status"] == "trash")
+    ])
+
+    result = await mcp_server.call_tool(
+        "query_line_items", {"group_by": ["sku"], "date_max": "2026-03-31", "profile": "test"}
+    )
+    data = json.loads(result[0].text)
+    assert [(row["sku"], row["quantity"]) for row in data["rows"]] == [("TS", 3.0), ("SC", 3.0), ("CAP-R", 1.0)]
+    assert data["line_items"] == 6
+    assert fake_client.calls_to("GET", "/orders")[0][2]["_fields"] == "id,status,date_created_gmt,date_modified_gmt,line_items"
+
+    orders[1].update(status="trash", date_modified_gmt="2026-04-02T10:00:00")
+    result = await mcp_server.call_tool("refresh_line_items", {"profile": "test"})
+    data = json.loads(result[0].text)
+    assert (data["mode"], data["removed"], data["rows"]) == ("incremental", 1, 4)
+    assert fake_client.calls_to("GET", "/orders")[-2][2]["modified_after"] == "2026-04-01T10:00:00"
+    assert fake_client.calls_to("GET", "/orders")[-1][2]["status"] == "trash"
+
+    result = await mcp_server.call_tool(
+        "query_line_items", {"group_by": ["sku"], "date_max": "2026-03-31", "profile": "test"}
+    )
+    assert [(row["sku"], row["quantity"]) for row in json.loads(result[0].text)["rows"]] == [("TS", 2.0), ("CAP-R", 1.0)]
@@ -0,0 +1,82 @@
+"""
+בדיקות לכלי מטא-דאטה מרוכזים
+"""
+
+import pytest
+from mcp.types import TextContent
+
+from tests.mocks.wc_api import FakeWCClient
+from woocommerce_mcp.meta import build_meta_update, fetch_meta, write_meta
+from woocommerce_mcp.utils import WordPressError
+
+
+def _products(count):
+    return [
+        {"id": i, "meta_data": [{"id": i * 10, "key": "_flag", "value": "yes" if i % 2 else "no"}]}
+        for i in range(1, count + 1)
+    ]
+
+
+def _include_handler(items):
+    """מחזיר רק את הפריטים שמזהיהם בפרמטר include."""
+    def handler(params, body):
+        wanted = {int(i) for i in params["include"].split(",")}
+        return [item for item in items if item["id"] in wanted]
+    return handler
+
+
+@pytest.mark.anyio
+async def test_set_meta_bulk_tool(mcp_tool_client, mock_wc_client, mock_http_response):
+    """בדיקה שהכלי set_meta_bulk רשום ועובד."""
+    result = await mcp_tool_client.call_tool(
+        "set_meta_bulk", {"resource": "products", "ids": [1, 2], "values": {"_flag": "yes"}}
+    )
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_build_meta_update():
+    """בדיקה שנשלחים רק ערכים שהשתנו, ושמחיקה נשלחת עם מזהה המטא וערך ריק."""
+    current = [{"id": 5, "key": "a", "value": "1"}, {"id": 6, "key": "b", "value": "2"}]
+
+    update = build_meta_update(current, {"a": "1", "c": "3"}, ["b"])
+
+    assert update == [{"key": "c", "value": "3"}, {"id": 6, "key": "b", "value": None}]
+    assert build_meta_update(None, {"a": "1"}) == [{"key": "a", "value": "1"}]
+
+
+@pytest.mark.anyio
+async def test_fetch_meta_by_ids_uses_include_chunks():
+    """בדיקה שקריאה לפי מזהים נשלחת בחלקים של 100 עם _fields מצומצם."""
+    items = _products(250)
+    client = FakeWCClient()
+    client.on("GET", "/products", _include_handler(items))
+
+    meta = await fetch_meta(client, "products", ids=list(range(1, 251)))
+
+    calls = client.calls_to("GET", "/products")
+    assert len(calls) == 3
+    assert all(call[2]["_fields"] == "id,meta_data" for call in calls)
+    assert meta[3] == [{"id": 30, "key": "_flag", "value": "yes"}]
+    with pytest.raises(WordPressError):
+        await fetch_meta(client, "coupons", ids=[1])
+
+
+@pytest.mark.anyio
+async def test_write_meta_only_changed_via_batch():
+    """בדיקה שרק פריטים שערכם משתנה נשלחים, בבקשות batch."""
+    items = _products(300)
+    client = FakeWCClient()
+    client.add_collection("/products", items)
+    client.on("POST", "/products/batch", lambda params, body: {"update": [{"id": item["id"]} for item in body["update"]]})
+
+    result = await write_meta(client, "products", filters={"status": "publish"}, values={"_flag": "yes"})
+
+    assert result["matched"] == 300
+    assert result["updated"] == 150
+    assert result["unchanged"] == 150
+    batches = client.calls_to("POST", "/products/batch")
+    assert len(batches) == 2
+    assert batches[0][3]["update"][0] == {"id": 2, "meta_data": [{"key": "_flag", "value": "yes"}]}
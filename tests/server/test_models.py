@@ -0,0 +1,59 @@
+"""
+בדיקות למודול models.py
+"""
+
+import json
+
+from woocommerce_mcp.models import (
+    Customer,
+    LineItem,
+    Order,
+    Product,
+    decode_many,
+    decode_one,
+    projection,
+    to_dict,
+)
+
+
+def test_decode_orders_from_bytes(mock_order_data):
+    """בדיקה שהזמנות מפוענחות ישירות מ-bytes למודלים טיפוסיים."""
+    payload = json.dumps([mock_order_data]).encode()
+
+    orders = decode_many(Order, payload)
+
+    assert len(orders) == 1
+    order = orders[0]
+    assert isinstance(order, Order)
+    assert order.id == 1
+    assert order.status == "processing"
+    assert isinstance(order.line_items[0], LineItem)
+    assert order.line_items[0].quantity == 2
+
+
+def test_decode_ignores_unknown_fields(mock_product_data):
+    """בדיקה ששדות שאינם חלק מהמודל מושמטים ושהמודל אינו מחזיק __dict__."""
+    product = decode_one(Product, json.dumps(mock_product_data).encode())
+
+    assert product.categories[0].id == 9
+    assert not hasattr(product, "__dict__")
+    assert not hasattr(product, "meta_data")
+
+
+def test_decode_customer_with_null_fields(mock_customer_data):
+    """בדיקה שערכי null מה-API מתקבלים בשדות אופציונליים."""
+    data = dict(mock_customer_data, date_modified=None)
+
+    customer = decode_one(Customer, json.dumps(data))
+
+    assert customer.date_modified is None
+    assert customer.billing.phone == "050-1234567"
+
+
+def test_projection_and_to_dict():
+    """בדיקה שההטלה לפרמטר _fields ולמילון תואמת את שדות המודל."""
+    fields = projection(LineItem).split(",")
+    item = LineItem(id=5, product_id=1, quantity=3)
+
+    assert fields[0] == "id"
+    assert set(fields) == set(to_dict(item))
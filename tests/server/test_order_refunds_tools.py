@@ -2,12 +2,16 @@
 בדיקות לכלי ניהול החזרים להזמנות
 """
 
+import json
+
 import pytest
 from unittest.mock import patch, AsyncMock
 
 import mcp.types as types
 from mcp.types import TextContent
 
+from woocommerce_mcp.order_refunds import plan_refund, process_refunds, refundable_items
+
 
 @pytest.mark.anyio
 async def test_get_order_refunds_tool(mcp_tool_client, mock_wc_client, mock_http_response):
@@ -178,4 +182,108 @@ async def test_delete_order_refund_tool(mcp_tool_client, mock_wc_client, mock_ht
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent)
+
+
+REFUND_ORDER = {
+    "id": 20, "status": "completed", "currency": "ILS", "total": "351.00",
+    "line_items": [
+        {"id": 1, "product_id": 5, "variation_id": 0, "sku": "TS-1", "quantity": 3, "total": "100.00",
+         "taxes": [{"id": 7, "total": "17.00"}]},
+        {"id": 2, "product_id": 6, "variation_id": 61, "sku": "CAP", "quantity": 2, "total": "200.00",
+         "taxes": [{"id": 7, "total": "34.00"}]},
+    ],
+}
+
+EXISTING_REFUNDS = [
+    {"id": 90, "amount": "39.00", "line_items": [
+        {"id": 300, "quantity": -1, "total": "-33.33", "taxes": [{"id": 7, "total": "-5.67"}],
+         "meta_data": [{"key": "_refunded_item_id", "value": "1"}]},
+    ]},
+]
+
+
+def test_refundable_items_subtracts_existing_refunds():
+    """בדיקה שהכמות, הסכום והמס שנותרו מחושבים בניכוי החזרים קודמים."""
+    items = refundable_items(REFUND_ORDER, EXISTING_REFUNDS)
+
+    assert items[1]["quantity"] == 2
+    assert str(items[1]["total"]) == "66.67"
+    assert str(items[1]["taxes"][7]) == "11.33"
+    assert items[2]["quantity"] == 2
+
+
+def test_plan_refund_computes_and_rejects():
+    """בדיקה של חישוב סכומים יחסי, החזר יתרה מלאה ודחיית החזר יתר."""
+    partial, errors = plan_refund(REFUND_ORDER, EXISTING_REFUNDS, {"line_items": [{"sku": "CAP", "quantity": 1}]})
+    assert errors == []
+    assert partial == {"amount": "117.00", "line_items": [
+        {"id": 2, "quantity": 1, "refund_total": "100.00", "refund_tax": [{"id": 7, "refund_total": "17.00"}]},
+    ]}
+
+    rest, errors = plan_refund(REFUND_ORDER, EXISTING_REFUNDS, {"line_items": [{"id": 1}], "reason": "ריקול"})
+    assert rest["line_items"][0] == {
+        "id": 1, "quantity": 2, "refund_total": "66.67", "refund_tax": [{"id": 7, "refund_total": "11.33"}],
+    }
+    assert rest["reason"] == "ריקול"
+
+    _, errors = plan_refund(REFUND_ORDER, EXISTING_REFUNDS, {"line_items": [{"id": 1, "quantity": 3}]})
+    assert "cannot refund 3, 2 remaining" in errors[0]
+    _, errors = plan_refund(REFUND_ORDER, EXISTING_REFUNDS, {"line_items": [{"id": 1, "quantity": 0}]})
+    assert "cannot refund 0, 2 remaining" in errors[0]
+    _, errors = plan_refund(REFUND_ORDER, EXISTING_REFUNDS, {"amount": "400"})
+    assert errors
+    _, errors = plan_refund(REFUND_ORDER, EXISTING_REFUNDS, {"amount": "abc"})
+    assert errors == ["Invalid refund amount: abc"]
+    _, errors = plan_refund(REFUND_ORDER, EXISTING_REFUNDS, {"amount": "NaN"})
+    assert errors == ["Invalid refund amount: NaN"]
+    _, errors = plan_refund(REFUND_ORDER, EXISTING_REFUNDS, {"line_items": [{"id": 1, "quantity": "two"}]})
+    assert errors == ["Line item 1: invalid quantity two"]
+    _, errors = plan_refund({**REFUND_ORDER, "status": "refunded"}, [], {})
+    assert "cannot be refunded" in errors[0]
+
+
+@pytest.mark.anyio
+async def test_process_refunds_validates_before_writing():
+    """בדיקה שבקשה לא תקינה מונעת כל כתיבה, ו-skip_invalid שולח רק את התקינות."""
+    from tests.mocks.wc_api import FakeWCClient
+
+    client = FakeWCClient()
+    client.on("GET", "/orders/20", lambda params, body: REFUND_ORDER)
+    client.add_collection("/orders/20/refunds", EXISTING_REFUNDS)
+    client.on("GET", "/orders/21", lambda params, body: (404, {"code": "woocommerce_rest_shop_order_invalid_id", "message": "Invalid ID."}))
+    client.on("GET", "/orders/22", lambda params, body: {**REFUND_ORDER, "id": 22})
+    client.add_collection("/orders/22/refunds", [])
+    client.on("POST", "/orders/20/refunds", lambda params, body: {"id": 91, "amount": body["amount"]})
+    requests = [{"order_id": 20, "line_items": [{"sku": "CAP"}]}, {"order_id": 21}, {"order_id": 22, "amount": "abc"}]
+
+    blocked = await process_refunds(client, requests, reason="ריקול", rate=0)
+    assert blocked["submitted"] is False
+    rejected = {entry["order_id"]: entry["errors"] for entry in blocked["rejected"]}
+    assert set(rejected) == {21, 22}
+    assert rejected[22] == ["Invalid refund amount: abc"]
+    assert not client.calls_to("POST", "/orders/22/refunds")
+    assert not client.calls_to("POST", "/orders/20/refunds")
+
+    result = await process_refunds(client, requests, reason="ריקול", restock=True, skip_invalid=True, rate=0)
+    body = client.calls_to("POST", "/orders/20/refunds")[0][3]
+    assert result["refunded"] == 1
+    assert result["refunds"] == [{"order_id": 20, "refund_id": 91, "amount": "234.00"}]
+    assert body["reason"] == "ריקול"
+    assert body["api_restock"] is True
+
+
+@pytest.mark.anyio
+async def test_process_refunds_reads_all_refund_pages():
+    """בדיקה שהחזרים קודמים בעמוד השני נלקחים בחשבון באימות."""
+    from tests.mocks.wc_api import FakeWCClient
+
+    client = FakeWCClient()
+    client.on("GET", "/orders/20", lambda params, body: REFUND_ORDER)
+    fillers = [{"id": 100 + i, "amount": "0.00", "line_items": []} for i in range(100)]
+    client.add_collection("/orders/20/refunds", fillers + EXISTING_REFUNDS)
+
+    result = await process_refunds(client, [{"order_id": 20, "line_items": [{"id": 1, "quantity": 3}]}], rate=0)
+
+    assert "cannot refund 3, 2 remaining" in result["rejected"][0]["errors"][0]
+    assert len(client.calls_to("GET", "/orders/20/refunds")) == 2
@@ -0,0 +1,154 @@
+"""
+בדיקות לסורק ההזמנות התקועות
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp.order_sweeper import ORDER_SWEEPER_CACHE, OrderSweeper
+
+
+def _ago(hours):
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+@pytest.fixture
+def orders(fake_client):
+    """הזמנות בחנות המדומה, עם סינון לפי include, status ו-modified_before/after כמו ב-API."""
+    orders = [
+        {"id": 1, "status": "pending", "total": "50.00", "date_modified_gmt": _ago(48)},
+        {"id": 2, "status": "on-hold", "total": "80.00", "date_modified_gmt": _ago(30)},
+        {"id": 3, "status": "pending", "total": "20.00", "date_modified_gmt": _ago(2)},
+        {"id": 4, "status": "processing", "total": "99.00", "date_modified_gmt": _ago(50)},
+    ]
+
+    def list_orders(params, body):
+        items = orders
+        if "include" in params:
+            ids = {int(i) for i in params["include"].split(",")}
+            items = [o for o in items if o["id"] in ids]
+        if params.get("status", "any") != "any":
+            items = [o for o in items if o["status"] in params["status"].split(",")]
+        if "modified_before" in params:
+            items = [o for o in items if o["date_modified_gmt"] < params["modified_before"]]
+        if "modified_after" in params:
+            items = [o for o in items if o["date_modified_gmt"] > params["modified_after"]]
+        return items
+
+    def batch(params, body):
+        for update in body["update"]:
+            next(o for o in orders if o["id"] == update["id"]).update(status=update["status"])
+        return {"update": [{"id": update["id"]} for update in body["update"]]}
+
+    fake_client.on("GET", "/orders", list_orders)
+    fake_client.on("POST", "/orders/batch", batch)
+    return orders
+
+
+@pytest.mark.anyio
+async def test_get_stale_orders_tool(mcp_tool_client):
+    """בדיקה שהכלי get_stale_orders רשום ועובד."""
+    result = await mcp_tool_client.call_tool("get_stale_orders", {})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+@pytest.mark.anyio
+async def test_sweeper_maintains_stale_set(mcp_server, fake_store, fake_client, orders):
+    """בדיקה שהסריקה הראשונה מלאה, והבאות מסירות הזמנות שהשתנו ומוסיפות הזמנות שחצו את הסף."""
+    result = await mcp_server.call_tool("start_order_sweeper", {"older_than_hours": 24, "profile": "test"})
+    data = json.loads(result[0].text)
+    try:
+        assert data["sweep"] == {"mode": "full", "added": 2, "removed": 0, "stale": 2}
+        assert data["running"] is True
+        params = fake_client.calls_to("GET", "/orders")[0][2]
+        assert params["status"] == "pending,on-hold"
+        assert "modified_after" not in params
+
+        # הזמנה 2 שולמה, והזמנה 5 חצתה את הסף מאז הסריקה הקודמת
+        orders[1].update(status="processing", date_modified_gmt=_ago(-0.1))
+        orders.append({"id": 5, "status": "on-hold", "total": "10.00", "date_modified_gmt": _ago(25)})
+        fake_store.caches[ORDER_SWEEPER_CACHE].threshold = _ago(26)
+
+        result = await mcp_server.call_tool("get_stale_orders", {"sweep_now": True, "profile": "test"})
+        data = json.loads(result[0].text)
+        assert [order["id"] for order in data["orders"]] == [1, 5]
+        assert data["sweeps"] == 2
+    finally:
+        await mcp_server.call_tool("stop_order_sweeper", {"profile": "test"})
+
+
+@pytest.mark.anyio
+async def test_cancel_stale_orders(mcp_server, fake_store, fake_client, orders):
+    """בדיקה שביטול נשלח ב-batch רק להזמנות מהקבוצה, ומסיר אותן ממנה."""
+    await mcp_server.call_tool("start_order_sweeper", {"profile": "test"})
+    try:
+        result = await mcp_server.call_tool(
+            "cancel_stale_orders", {"order_ids": [1, 3], "dry_run": True, "profile": "test"}
+        )
+        data = json.loads(result[0].text)
+        assert [(o["id"], o["outcome"]) for o in data["orders"]] == [(1, "planned")]
+        assert data["not_stale"] == [3]
+        assert not fake_client.calls_to("POST", "/orders/batch")
+
+        result = await mcp_server.call_tool("cancel_stale_orders", {"profile": "test"})
+        data = json.loads(result[0].text)
+        assert data["counts"] == {"updated": 2}
+        (_, _, _, body), = fake_client.calls_to("POST", "/orders/batch")
+        assert body["update"] == [{"id": 1, "status": "cancelled"}, {"id": 2, "status": "cancelled"}]
+        assert fake_store.caches[ORDER_SWEEPER_CACHE].orders == {}
+    finally:
+        await mcp_server.call_tool("stop_order_sweeper", {"profile": "test"})
+
+
+@pytest.mark.anyio
+async def test_cancel_skips_orders_no_longer_stale(mcp_server, fake_store, fake_client, orders):
+    """בדיקה שהזמנה ששולמה או השתנתה אחרי הסריקה לא נשלחת לביטול ומדווחת ב-no_longer_stale."""
+    await mcp_server.call_tool("start_order_sweeper", {"profile": "test"})
+    try:
+        orders[1]["status"] = "processing"
+        # הזמנה 6 נכנסה לקבוצה כתקועה, ומאז עודכנה (עדיין pending)
+        fake_store.caches[ORDER_SWEEPER_CACHE].orders[6] = {"id": 6, "date_modified_gmt": _ago(40)}
+        orders.append({"id": 6, "status": "pending", "total": "5.00", "date_modified_gmt": _ago(1)})
+
+        result = await mcp_server.call_tool("cancel_stale_orders", {"profile": "test"})
+        data = json.loads(result[0].text)
+
+        assert sorted(data["no_longer_stale"]) == [2, 6]
+        assert [(o["id"], o["outcome"]) for o in data["orders"]] == [(1, "updated")]
+        (_, _, _, body), = fake_client.calls_to("POST", "/orders/batch")
+        assert body["update"] == [{"id": 1, "status": "cancelled"}]
+        assert orders[1]["status"] == "processing"
+        assert fake_store.caches[ORDER_SWEEPER_CACHE].orders == {}
+    finally:
+        await mcp_server.call_tool("stop_order_sweeper", {"profile": "test"})
+
+
+@pytest.mark.anyio
+async def test_scheduled_sweep_survives_unexpected_errors(fake_store, monkeypatch):
+    """בדיקה שחריגה לא צפויה בסריקה מתוזמנת נרשמת, והתזמון ממשיך לסריקה הבאה."""
+    sweeper = OrderSweeper(["pending"], 24, 1)
+    sweeper.interval = 0
+    calls = []
+
+    async def sweep(client, full=False):
+        calls.append(full)
+        if len(calls) == 1:
+            raise KeyError("id")
+        sweeper.stop()
+        return {}
+
+    monkeypatch.setattr(sweeper, "sweep", sweep)
+    sweeper.start(fake_store)
+    task = sweeper.task
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert len(calls) == 2
+    assert sweeper.last_error is None
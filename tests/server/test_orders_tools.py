@@ -2,12 +2,16 @@
 בדיקות לכלי ניהול הזמנות
 """
 
+import json
+
 import pytest
 from unittest.mock import patch, AsyncMock
 
 import mcp.types as types
 from mcp.types import TextContent
 
+from woocommerce_mcp.orders import build_order_timeline
+
 
 @pytest.mark.anyio
 async def test_get_orders_tool(mcp_tool_client, mock_wc_client, mock_orders_list, mock_http_response):
@@ -193,4 +197,113 @@ async def test_create_order_meta_tool(mcp_tool_client, mock_wc_client, mock_orde
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent)
+
+
+TIMELINE_ORDER = {
+    "id": 7, "number": "7", "status": "completed", "currency": "ILS", "total": "150.00", "customer_id": 3,
+    "billing": {"first_name": "דנה", "last_name": "לוי", "email": "dana@example.com"},
+    "payment_method_title": "כרטיס אשראי", "transaction_id": "",
+    "line_items": [{"name": "חולצה", "sku": "TS-1", "quantity": 2, "total": "150.00"}],
+    "date_created_gmt": "2026-03-01T10:00:00", "date_paid_gmt": "2026-03-01T10:01:00",
+    "date_completed_gmt": "2026-03-03T09:00:00", "date_modified_gmt": "2026-03-04T12:00:00",
+}
+
+TIMELINE_NOTES = [
+    {"id": 2, "note": "Order status changed from <b>Processing</b> to Completed.", "author": "system",
+     "customer_note": False, "date_created_gmt": "2026-03-03T09:00:00"},
+    {"id": 1, "note": "נשלח &amp; נארז", "author": "admin", "customer_note": True,
+     "date_created_gmt": "2026-03-02T08:00:00"},
+]
+
+TIMELINE_REFUNDS = [{"id": 9, "amount": "50.00", "reason": "פגום", "date_created_gmt": "2026-03-04T12:00:00"}]
+
+
+def test_build_order_timeline_sorts_events():
+    """בדיקה שהאירועים ממוינים לפי זמן והסיכום תמציתי."""
+    timeline = build_order_timeline(TIMELINE_ORDER, TIMELINE_NOTES, TIMELINE_REFUNDS)
+
+    assert [event["type"] for event in timeline["events"]] == [
+        "created", "paid", "note", "note", "completed", "refund", "modified",
+    ]
+    assert timeline["events"][2] == {
+        "date": "2026-03-02T08:00:00", "type": "note", "note": "נשלח & נארז", "author": "admin", "customer_note": True,
+    }
+    assert timeline["events"][3]["note"] == "Order status changed from Processing to Completed."
+    assert "transaction_id" not in timeline["events"][1]
+    assert timeline["refunded"] == "50.00"
+    assert timeline["customer"] == {"id": 3, "name": "דנה לוי", "email": "dana@example.com"}
+
+
+@pytest.mark.anyio
+async def test_get_order_timelines_reports_failures(mcp_server, fake_store, fake_client):
+    """בדיקה שהכלי מושך את שלושת המקורות ומדווח על הזמנה שלא נמצאה בלי לעצור."""
+    fake_client.on("GET", "/orders/7", lambda params, body: TIMELINE_ORDER)
+    fake_client.add_collection("/orders/7/notes", TIMELINE_NOTES)
+    fake_client.add_collection("/orders/7/refunds", TIMELINE_REFUNDS)
+
+    result = await mcp_server.call_tool("get_order_timelines", {"order_ids": [7, 8], "profile": "test"})
+    data = json.loads(result[0].text)
+
+    assert [timeline["id"] for timeline in data["timelines"]] == [7]
+    assert data["errors"][0]["order_id"] == 8
+    assert fake_client.calls_to("GET", "/orders/7")[0][2]["_fields"].startswith("id,number")
+
+
+@pytest.mark.anyio
+async def test_get_order_timelines_reads_all_refund_pages(mcp_server, fake_store, fake_client):
+    """בדיקה שהחזרים מעבר לעמוד הראשון נכללים בציר הזמן ובסכום שהוחזר."""
+    fillers = [{"id": 100 + i, "amount": "1.00", "reason": "", "date_created_gmt": "2026-03-04T11:00:00"} for i in range(100)]
+    fake_client.on("GET", "/orders/7", lambda params, body: TIMELINE_ORDER)
+    fake_client.add_collection("/orders/7/notes", TIMELINE_NOTES)
+    fake_client.add_collection("/orders/7/refunds", fillers + TIMELINE_REFUNDS)
+
+    result = await mcp_server.call_tool("get_order_timelines", {"order_ids": [7], "profile": "test"})
+    timeline = json.loads(result[0].text)["timelines"][0]
+
+    assert timeline["refunded"] == "150.00"
+    assert len([event for event in timeline["events"] if event["type"] == "refund"]) == 101
+
+
+def test_check_transition():
+    """בדיקה של מעברי סטטוס מותרים ואסורים."""
+    from woocommerce_mcp.orders import check_transition
+
+    assert check_transition("processing", "completed") is None
+    assert "not allowed" in check_transition("refunded", "completed")
+    assert "Unknown" in check_transition("wc-custom", "completed")
+
+
+@pytest.mark.anyio
+async def test_transition_orders_outcomes(mcp_server, fake_store, fake_client):
+    """בדיקה של תוצאה לכל הזמנה: עודכנה, ללא שינוי, מעבר אסור, נכשלה ולא נמצאה, והערות רק למי שעודכנה."""
+    fake_client.add_collection("/orders", [
+        {"id": 1, "status": "processing"},
+        {"id": 2, "status": "completed"},
+        {"id": 3, "status": "cancelled"},
+        {"id": 4, "status": "processing"},
+    ])
+
+    def batch(params, body):
+        return {"update": [
+            {"id": item["id"], "error": {"code": "woocommerce_rest_shop_order_invalid_id", "message": "Invalid ID."}}
+            if item["id"] == 4 else {"id": item["id"], "status": item["status"]}
+            for item in body["update"]
+        ]}
+
+    fake_client.on("POST", "/orders/batch", batch)
+    fake_client.on("POST", "/orders/1/notes", lambda params, body: {"id": 100, **body})
+
+    result = await mcp_server.call_tool("transition_orders", {
+        "status": "completed", "order_ids": [1, 2, 3, 4, 5], "note": "נשלח", "profile": "test",
+    })
+    data = json.loads(result[0].text)
+    outcomes = {order["id"]: order for order in data["orders"]}
+
+    assert data["counts"] == {"updated": 1, "unchanged": 1, "invalid": 1, "failed": 1, "not_found": 1}
+    assert outcomes[1]["note_added"] is True
+    assert outcomes[4]["message"] == "Invalid ID."
+    assert fake_client.calls_to("POST", "/orders/batch")[0][3]["update"] == [
+        {"id": 1, "status": "completed"}, {"id": 4, "status": "completed"},
+    ]
+    assert not fake_client.calls_to("POST", "/orders/4/notes")
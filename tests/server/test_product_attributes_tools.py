@@ -8,6 +8,9 @@ from unittest.mock import patch, AsyncMock
 import mcp.types as types
 from mcp.types import TextContent
 
+from woocommerce_mcp.product_attributes import diff_attribute_terms
+from woocommerce_mcp.utils import WordPressError
+
 
 @pytest.mark.anyio
 async def test_get_product_attributes_tool(mcp_tool_client, mock_wc_client, mock_http_response):
@@ -312,4 +315,90 @@ async def test_delete_attribute_term_tool(mcp_tool_client, mock_wc_client, mock_
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent)
+
+
+@pytest.mark.anyio
+async def test_sync_attribute_terms_tool(mcp_tool_client, mock_wc_client, mock_http_response):
+    """בדיקה שהכלי sync_attribute_terms רשום ועובד."""
+    result = await mcp_tool_client.call_tool("sync_attribute_terms", {"attribute": 1, "terms": ["אדום"]})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_diff_attribute_terms():
+    """בדיקה שההשוואה מזהה מונחים חדשים, שהשתנו ומיותרים."""
+    existing = [
+        {"id": 1, "name": "Red", "slug": "red", "menu_order": 0},
+        {"id": 2, "name": "Blue", "slug": "blue", "menu_order": 1},
+        {"id": 3, "name": "Old", "slug": "old", "menu_order": 2},
+    ]
+
+    plan = diff_attribute_terms(
+        ["Red", {"name": "כחול", "slug": "blue"}, {"name": "Green", "menu_order": 3}],
+        existing,
+        delete_missing=True,
+    )
+
+    assert plan["create"] == [{"name": "Green", "menu_order": 3}]
+    assert plan["update"] == [{"id": 2, "name": "כחול"}]
+    assert plan["delete"] == [3]
+    assert plan["unchanged"] == 1
+    assert diff_attribute_terms(["Red"], existing)["delete"] == []
+
+    # שינוי אותיות בלבד מותאם לאותו מונח ומתוכנן כעדכון שם
+    plan = diff_attribute_terms(["red"], existing)
+    assert plan["create"] == []
+    assert plan["update"] == [{"id": 1, "name": "red"}]
+    assert plan["unchanged"] == 0
+    with pytest.raises(WordPressError):
+        diff_attribute_terms([{"slug": "x"}], existing)
+
+
+def test_diff_attribute_terms_slug_fallback_and_duplicates():
+    """בדיקה ש-slug שלא נמצא מותאם לפי שם עם עדכון slug, ושם כפול במונחים חדשים נדחה."""
+    existing = [
+        {"id": 1, "name": "Red", "slug": "red", "menu_order": 0},
+        {"id": 2, "name": "Blue", "slug": "blue", "menu_order": 1},
+    ]
+
+    plan = diff_attribute_terms([{"name": "Red", "slug": "red-new"}], existing)
+    assert plan["create"] == []
+    assert plan["update"] == [{"id": 1, "slug": "red-new"}]
+
+    # ה-slug של Blue מבוקש במפורש למונח אחר, ולכן Blue אינו מותאם לפי שם
+    plan = diff_attribute_terms([{"name": "Blue", "slug": "navy"}, {"name": "Azure", "slug": "blue"}], existing)
+    assert plan["update"] == [{"id": 2, "name": "Azure"}]
+    assert plan["create"] == [{"name": "Blue", "slug": "navy"}]
+
+    with pytest.raises(WordPressError):
+        diff_attribute_terms(["Green", {"name": "green", "slug": "green-2"}], existing)
+
+
+@pytest.mark.anyio
+async def test_sync_attribute_terms_batches(mcp_server, fake_store, fake_client):
+    """בדיקה ש-500 מונחים נשלחים בכמה בקשות batch במקום בקשה לכל מונח."""
+    fake_client.add_collection("/products/attributes", [{"id": 4, "name": "Size", "slug": "pa_size"}])
+    fake_client.add_collection(
+        "/products/attributes/4/terms",
+        [{"id": i, "name": f"T{i}", "slug": f"t{i}", "menu_order": 0} for i in range(250)],
+    )
+    fake_client.on("POST", "/products/attributes/4/terms/batch", lambda params, body: {
+        action: [{"id": 1000} if action == "create" else {"id": 1} for _ in body.get(action, [])]
+        for action in ("create", "update", "delete")
+    })
+
+    await mcp_server.call_tool("sync_attribute_terms", {
+        "attribute": "size",
+        "terms": [f"T{i}" for i in range(500)],
+        "profile": "test",
+    })
+
+    pages = fake_client.calls_to("GET", "/products/attributes/4/terms")
+    batches = fake_client.calls_to("POST", "/products/attributes/4/terms/batch")
+    assert len(pages) == 3
+    assert len(batches) == 3
+    assert sum(len(call[3].get("create", [])) for call in batches) == 250
+
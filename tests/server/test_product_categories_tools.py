@@ -8,6 +8,8 @@ from unittest.mock import patch, AsyncMock
 import mcp.types as types
 from mcp.types import TextContent
 
+from woocommerce_mcp.product_categories import CATEGORY_TREE_CACHE, CategoryTree
+
 
 @pytest.mark.anyio
 async def test_get_product_categories_tool(mcp_tool_client, mock_wc_client, mock_categories_list, mock_http_response):
@@ -104,4 +106,69 @@ async def test_delete_product_category_tool(mcp_tool_client, mock_wc_client, moc
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent) 
+
+
+CATEGORIES = [
+    {"id": 1, "name": "ביגוד", "slug": "clothing", "parent": 0},
+    {"id": 2, "name": "חולצות", "slug": "shirts", "parent": 1},
+    {"id": 3, "name": "טי-שירט", "slug": "t-shirts", "parent": 2},
+    {"id": 4, "name": "מכנסיים", "slug": "pants", "parent": 1},
+    {"id": 5, "name": "אביזרים", "slug": "accessories", "parent": 0},
+]
+
+
+@pytest.mark.anyio
+async def test_get_category_tree_products_tool(mcp_tool_client, mock_wc_client, mock_http_response):
+    """בדיקה שהכלי get_category_tree_products רשום ועובד."""
+    result = await mcp_tool_client.call_tool("get_category_tree_products", {"category_id": 1})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_category_tree_lookups():
+    """בדיקה של שאילתות נתיב, אבות וצאצאים בעץ, ושל עדכון העץ."""
+    tree = CategoryTree(CATEGORIES)
+
+    assert [node["slug"] for node in tree.path(3)] == ["clothing", "shirts", "t-shirts"]
+    assert tree.ancestors(3) == [1, 2]
+    assert tree.descendants(1) == [2, 3, 4]
+    assert tree.descendants(1, include_self=True)[0] == 1
+    assert tree.is_descendant(3, 1)
+    assert not tree.is_descendant(1, 3)
+    assert tree.node(3)["depth"] == 2
+
+    tree.upsert({"id": 6, "name": "גרביים", "slug": "socks", "parent": 5})
+    tree.remove(2)
+
+    assert tree.ancestors(3) == [1]
+    assert tree.descendants(5) == [6]
+    with pytest.raises(Exception):
+        tree.path(2)
+
+
+@pytest.mark.anyio
+async def test_category_tree_cache_follows_mutations(mcp_server, fake_store, fake_client):
+    """בדיקה שהעץ נבנה פעם אחת ומתעדכן ביצירה ומחיקה של קטגוריות, ושמוצרי תת-העץ נאספים."""
+    fake_client.add_collection("/products/categories", CATEGORIES)
+    fake_client.on("POST", "/products/categories", lambda params, body: {"id": 7, "parent": 0, **body})
+    fake_client.on("DELETE", "/products/categories/4", lambda params, body: {"id": 4})
+    products = {1: [{"id": 10}], 2: [{"id": 10}, {"id": 11}], 3: [{"id": 12}], 4: [{"id": 13}]}
+    fake_client.on("GET", "/products", lambda params, body: products.get(int(params["category"]), []))
+
+    await mcp_server.call_tool("get_category_path", {"category_id": 3, "profile": "test"})
+    await mcp_server.call_tool("create_product_category", {"name": "בגדי ים", "parent": 1, "profile": "test"})
+    await mcp_server.call_tool("delete_product_category", {"category_id": 4, "profile": "test"})
+
+    tree = fake_store.caches[CATEGORY_TREE_CACHE]
+    assert len(fake_client.calls_to("GET", "/products/categories")) == 1
+    # האחים ממוינים לפי שם
+    assert tree.descendants(1) == [7, 2, 3]
+
+    result = await mcp_server.call_tool("get_category_tree_products", {"category_id": 1, "profile": "test"})
+
+    assert '"total": 3' in result[0].text
+    assert len(fake_client.calls_to("GET", "/products")) == 4
+
@@ -8,6 +8,9 @@ from unittest.mock import patch, AsyncMock
 import mcp.types as types
 from mcp.types import TextContent
 
+from woocommerce_mcp.product_reviews import compile_review_rules, match_review, moderate
+from woocommerce_mcp.utils import WordPressError
+
 
 @pytest.mark.anyio
 async def test_get_product_reviews_tool(mcp_tool_client, mock_wc_client, mock_http_response):
@@ -166,4 +169,65 @@ async def test_delete_product_review_tool(mcp_tool_client, mock_wc_client, mock_
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent)
+
+
+PENDING_REVIEWS = [
+    {"id": 1, "product_id": 10, "status": "hold", "reviewer": "Bot", "reviewer_email": "bot@spam.example",
+     "review": "<p>Cheap CASINO bonus</p>", "rating": 5, "verified": False},
+    {"id": 2, "product_id": 10, "status": "hold", "reviewer": "דנה", "reviewer_email": "dana@example.com",
+     "review": "מוצר מעולה", "rating": 5, "verified": True},
+    {"id": 3, "product_id": 11, "status": "hold", "reviewer": "Guest", "reviewer_email": "g@example.com",
+     "review": "visit http://x.example", "rating": 1, "verified": False},
+    {"id": 4, "product_id": 11, "status": "hold", "reviewer": "Guest2", "reviewer_email": "g2@example.com",
+     "review": "לא הגיע", "rating": 2, "verified": False},
+]
+
+MODERATION_RULES = [
+    {"action": "spam", "keywords": ["casino"]},
+    {"action": "spam", "pattern": r"https?://"},
+    {"action": "approve", "verified": True, "min_rating": 4},
+    {"action": "trash", "reviewers": ["G2@example.com"]},
+]
+
+
+def test_match_review_first_rule_wins():
+    """בדיקה שכל התנאים בכלל נדרשים והכלל הראשון שמתאים קובע."""
+    rules = compile_review_rules(MODERATION_RULES)
+
+    assert [match_review(rules, review) for review in PENDING_REVIEWS] == [
+        (0, "spam"), (2, "approve"), (1, "spam"), (3, "trash"),
+    ]
+    assert match_review(compile_review_rules([{"action": "approve", "verified": True, "max_rating": 3}]),
+                        PENDING_REVIEWS[1]) is None
+
+    with pytest.raises(WordPressError):
+        compile_review_rules([{"action": "spam"}])
+    with pytest.raises(WordPressError):
+        compile_review_rules([{"action": "delete", "keywords": ["x"]}])
+    with pytest.raises(WordPressError):
+        compile_review_rules([{"action": "spam", "pattern": "("}])
+
+
+@pytest.mark.anyio
+async def test_moderate_dry_run_and_batch():
+    """בדיקה שהרצת ניסיון לא שולחת עדכונים, והרצה רגילה שולחת batch אחד."""
+    from tests.mocks.wc_api import FakeWCClient
+
+    client = FakeWCClient()
+    client.add_collection("/products/reviews", [dict(review) for review in PENDING_REVIEWS])
+    client.on("POST", "/products/reviews/batch", lambda params, body: {"update": body["update"]})
+
+    report = await moderate(client, MODERATION_RULES, dry_run=True)
+    assert report["scanned"] == 4
+    assert report["actions"] == {"approve": 1, "hold": 0, "spam": 2, "trash": 1}
+    assert report["rules"] == [1, 1, 1, 1]
+    assert report["sample"][0]["excerpt"] == "Cheap CASINO bonus"
+    assert not client.calls_to("POST", "/products/reviews/batch")
+    assert client.calls_to("GET", "/products/reviews")[0][2]["status"] == "hold"
+
+    result = await moderate(client, MODERATION_RULES)
+    batches = client.calls_to("POST", "/products/reviews/batch")
+    assert result["updated"] == 4
+    assert len(batches) == 1
+    assert {"id": 2, "status": "approved"} in batches[0][3]["update"]
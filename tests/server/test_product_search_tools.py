@@ -0,0 +1,145 @@
+"""
+בדיקות לכלי חיפוש המוצרים באינדקס המקומי
+"""
+
+import json
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp.product_search import ProductSearchIndex, fts_query
+from woocommerce_mcp.utils import WordPressError
+
+PRODUCTS = [
+    {
+        "id": 1, "name": "חולצה כחולה", "sku": "TS-001", "type": "variable", "status": "publish",
+        "price": "49.90", "stock_status": "instock", "description": "<p>כותנה <b>רכה</b></p>",
+        "categories": [{"id": 10, "name": "חולצות"}],
+        "attributes": [{"name": "Color", "options": ["Blue", "Red"]}],
+        "date_modified_gmt": "2026-01-01T10:00:00",
+    },
+    {
+        "id": 2, "name": "מכנסי ג'ינס", "sku": "JN-002", "type": "simple", "status": "publish",
+        "price": "199", "stock_status": "outofstock", "description": "ג'ינס כחול קלאסי",
+        "categories": [{"id": 11, "name": "מכנסיים"}],
+        "attributes": [{"name": "Color", "options": ["Blue"]}],
+        "date_modified_gmt": "2026-01-02T10:00:00",
+    },
+    {
+        "id": 3, "name": "Blue Cap", "sku": "CP-003", "type": "simple", "status": "draft",
+        "price": "", "stock_status": "instock", "description": "",
+        "categories": [{"id": 10, "name": "חולצות"}],
+        "attributes": [],
+        "date_modified_gmt": "2026-01-03T10:00:00",
+    },
+]
+
+
+@pytest.mark.anyio
+async def test_search_products_tool(mcp_tool_client):
+    """בדיקה שהכלי search_products רשום ועובד."""
+    result = await mcp_tool_client.call_tool("search_products", {"query": "חולצה"})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_fts_query_quotes_tokens():
+    """בדיקה שמילים מצוטטות עם התאמת קידומת ותווים מיוחדים לא שוברים את השאילתה."""
+    assert fts_query('חולצ TS-001 "') == '"חולצ"* "TS-001"*'
+    assert fts_query("   ") == ""
+
+
+def test_search_ranking_filters_and_facets(tmp_path):
+    """בדיקה של דירוג, התאמת קידומת בעברית, סינון מחיר ומלאי ופאסטים."""
+    index = ProductSearchIndex(str(tmp_path / "index.sqlite3"))
+    index.upsert(PRODUCTS)
+
+    by_prefix = index.search("חולצ", status=None)
+    assert [item["id"] for item in by_prefix["results"]] == [1, 3]
+
+    blue = index.search("כחול", facets=["stock_status", "categories", "attributes"])
+    assert [item["id"] for item in blue["results"]] == [1, 2]
+    assert blue["facets"]["stock_status"] == {"instock": 1, "outofstock": 1}
+    assert blue["facets"]["attributes"] == {"Color": {"Blue": 2, "Red": 1}}
+    assert {row["value"] for row in blue["facets"]["categories"]} == {10, 11}
+
+    assert index.search("ts-001")["results"][0]["id"] == 1
+    assert index.search("כחול", in_stock=True)["total"] == 1
+    assert index.search(max_price=100)["total"] == 1
+    assert index.search(category_ids=[11], attributes={"color": "blue"})["total"] == 1
+    assert [item["id"] for item in index.search(sort="price_desc")["results"]] == [2, 1]
+
+    with pytest.raises(WordPressError):
+        index.search(sort="random")
+
+
+@pytest.mark.anyio
+async def test_refresh_is_incremental(tmp_path, fake_client):
+    """בדיקה שרענון הדרגתי מבקש רק מוצרים שהשתנו, ורענון מלא מסיר מוצרים שנמחקו."""
+    products = list(PRODUCTS)
+    fake_client.on("GET", "/products", lambda params, body: [] if params["status"] == "trash" else products)
+    index = ProductSearchIndex(str(tmp_path / "index.sqlite3"))
+
+    first = await index.refresh(fake_client)
+    assert first == {"mode": "full", "indexed": 3, "removed": 0, "total": 3}
+    assert index.last_modified == "2026-01-03T10:00:00"
+
+    await index.refresh(fake_client)
+    params = fake_client.calls_to("GET", "/products")[-2][2]
+    assert params["modified_after"] == "2026-01-03T10:00:00"
+    assert params["dates_are_gmt"] == "true"
+
+    products.pop()
+    full = await index.refresh(fake_client, full=True)
+    assert full["removed"] == 1
+    assert len(index) == 2
+
+
+@pytest.mark.anyio
+async def test_refresh_removes_trashed_and_deleted_products(mcp_server, fake_store, fake_client, data_dir, monkeypatch):
+    """בדיקה שמוצר שהועבר לפח מוסר ברענון הדרגתי, ומוצר שנמחק דרך הכלי מוסר מיד."""
+    from woocommerce_mcp import product_search
+
+    products = [dict(product) for product in PRODUCTS]
+
+    def list_products(params, body):
+        if params["status"] == "trash":
+            return [product for product in products if product["status"] == "trash"]
+        return [product for product in products if product["status"] != "trash"]
+
+    fake_client.on("GET", "/products", list_products)
+    fake_client.on("DELETE", "/products/2", lambda params, body: {"id": 2})
+
+    await mcp_server.call_tool("search_products", {"query": "כחול", "profile": "test"})
+    products[0].update(status="trash", date_modified_gmt="2026-01-04T10:00:00")
+    monkeypatch.setattr(product_search, "SEARCH_INDEX_MAX_AGE", -1)
+    result = await mcp_server.call_tool("search_products", {"query": "כחול", "status": None, "profile": "test"})
+    data = json.loads(result[0].text)
+
+    assert [product["id"] for product in data["results"]] == [2]
+    trash_params = fake_client.calls_to("GET", "/products")[-1][2]
+    assert (trash_params["status"], trash_params["modified_after"]) == ("trash", "2026-01-03T10:00:00")
+
+    await mcp_server.call_tool("delete_product", {"product_id": 2, "force": True, "profile": "test"})
+    assert len(product_search.get_search_index(fake_store)) == 1
+
+
+@pytest.mark.anyio
+async def test_search_products_by_category_tree(mcp_server, fake_store, fake_client, data_dir):
+    """בדיקה שהכלי בונה את האינדקס בקריאה הראשונה ומסנן לפי קטגוריה כולל תתי-קטגוריות."""
+    fake_client.add_collection("/products", list(PRODUCTS))
+    fake_client.add_collection("/products/categories", [
+        {"id": 9, "name": "ביגוד", "slug": "clothing", "parent": 0},
+        {"id": 10, "name": "חולצות", "slug": "shirts", "parent": 9},
+        {"id": 11, "name": "מכנסיים", "slug": "pants", "parent": 9},
+    ])
+
+    result = await mcp_server.call_tool("search_products", {"category": "clothing", "profile": "test"})
+    await mcp_server.call_tool("search_products", {"query": "cap", "profile": "test"})
+    data = json.loads(result[0].text)
+
+    assert data["total"] == 2
+    assert len(fake_client.calls_to("GET", "/products")) == 1
+    assert list((data_dir / "indexes").glob("products-*.sqlite3"))
@@ -8,6 +8,15 @@ from unittest.mock import patch, AsyncMock
 import mcp.types as types
 from mcp.types import TextContent
 
+from tests.mocks.wc_api import FakeWCClient
+from woocommerce_mcp.product_variations import (
+    build_variation_matrix,
+    diff_variations,
+    fetch_catalog_variations,
+    sync_variation_matrix,
+)
+from woocommerce_mcp.utils import WordPressError
+
 
 @pytest.mark.anyio
 async def test_get_product_variations_tool(mcp_tool_client, mock_wc_client, mock_http_response):
@@ -249,4 +258,136 @@ async def test_delete_product_variation_tool(mcp_tool_client, mock_wc_client, mo
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent) 
+
+
+@pytest.mark.anyio
+async def test_generate_variation_matrix_tool(mcp_tool_client, mock_wc_client, mock_http_response):
+    """בדיקה שהכלי generate_variation_matrix רשום ועובד."""
+    result = await mcp_tool_client.call_tool(
+        "generate_variation_matrix",
+        {"product_id": 123, "axes": [{"name": "Size", "options": ["S", "M"]}], "dry_run": True}
+    )
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_build_variation_matrix_rules_and_sku():
+    """בדיקה שהמטריצה היא מכפלה קרטזית ושהכללים ותבנית ה-SKU מוחלים."""
+    axes = [
+        {"name": "Size", "options": ["S", "XL"]},
+        {"id": 2, "name": "Color", "options": ["Red", "Blue", "Green"]},
+    ]
+
+    variations = build_variation_matrix(
+        axes,
+        defaults={"regular_price": "49.90", "sku": "TS-{Size}-{Color}"},
+        rules=[{"when": {"Size": "xl"}, "set": {"regular_price": "59.90"}}],
+    )
+
+    assert len(variations) == 6
+    xl_red = variations[3]
+    assert xl_red["attributes"] == [{"name": "Size", "option": "XL"}, {"id": 2, "option": "Red"}]
+    assert xl_red["regular_price"] == "59.90"
+    assert xl_red["sku"] == "TS-XL-Red"
+
+    with pytest.raises(WordPressError):
+        build_variation_matrix(axes, defaults={"bogus": 1})
+
+
+@pytest.mark.anyio
+async def test_sync_variation_matrix_applies_only_differences():
+    """בדיקה שרק וריאציות חסרות, שהשתנו או מיותרות נשלחות ב-batch אחד."""
+    client = FakeWCClient()
+    client.add_collection("/products/5/variations", [
+        {"id": 11, "attributes": [{"id": 0, "name": "Size", "option": "S"}], "regular_price": "10.00"},
+        {"id": 12, "attributes": [{"id": 0, "name": "Size", "option": "M"}], "regular_price": "10"},
+        {"id": 13, "attributes": [{"id": 0, "name": "Size", "option": "XXL"}], "regular_price": "10"},
+    ])
+    client.on("GET", "/products/5", lambda params, body: {
+        "id": 5, "type": "variable",
+        "attributes": [{"id": 0, "name": "Size", "options": ["S", "M"], "variation": True}],
+    })
+    client.on("PUT", "/products/5", lambda params, body: {"id": 5, **body})
+    client.on("POST", "/products/5/variations/batch", lambda params, body: {
+        "create": [{"id": 20}], "update": body.get("update", []), "delete": [{"id": i} for i in body.get("delete", [])],
+    })
+    axes = [{"name": "size", "options": ["S", "M", "L"]}]
+    rules = [{"when": {"size": "M"}, "set": {"regular_price": "12"}}]
+
+    plan = await sync_variation_matrix(client, 5, axes, {"regular_price": "10"}, rules, delete_missing=True, dry_run=True)
+
+    assert (plan["to_create"], plan["to_update"], plan["to_delete"], plan["unchanged"]) == (1, 1, 1, 1)
+    assert client.calls_to("POST", "/products/5/variations/batch") == []
+
+    result = await sync_variation_matrix(client, 5, axes, {"regular_price": "10"}, rules, delete_missing=True)
+
+    (batch,) = client.calls_to("POST", "/products/5/variations/batch")
+    payload = batch[3]
+    assert payload["create"][0]["attributes"] == [{"name": "size", "option": "L"}]
+    assert payload["update"] == [{"id": 12, "regular_price": "12"}]
+    assert payload["delete"] == [13]
+    assert client.calls_to("PUT", "/products/5")[0][3]["attributes"][0]["options"] == ["S", "M", "L"]
+    assert (result["created"], result["updated"], result["deleted"]) == (1, 1, 1)
+    assert result["created_ids"] == [20]
+
+
+def test_diff_variations_compares_text_fields_exactly():
+    """בדיקה שמחירים מושווים כמספר, אבל SKU כמו "007" מול "7" נחשב שינוי."""
+    axes = [{"name": "Size", "options": ["S"]}]
+    existing = [{"id": 11, "attributes": [{"name": "Size", "option": "S"}], "regular_price": "10.00", "sku": "7"}]
+    desired = [{"attributes": [{"name": "Size", "option": "S"}], "regular_price": "10", "sku": "007"}]
+
+    plan = diff_variations(axes, desired, existing)
+
+    assert plan["update"] == [{"id": 11, "sku": "007"}]
+
+
+@pytest.mark.anyio
+async def test_get_catalog_variations_tool(mcp_tool_client, mock_wc_client, mock_http_response):
+    """בדיקה שהכלי get_catalog_variations רשום ועובד."""
+    result = await mcp_tool_client.call_tool("get_catalog_variations", {"concurrency": 4})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+@pytest.mark.anyio
+async def test_fetch_catalog_variations_flat_table():
+    """בדיקה שהוריאציות של כל המוצרים נאספות לטבלה שטוחה לפי סדר המוצרים."""
+    client = FakeWCClient()
+    client.add_collection("/products", [{"id": i, "name": f"מוצר {i}"} for i in range(1, 151)])
+    for i in range(1, 151):
+        client.add_collection(f"/products/{i}/variations", [
+            {
+                "id": i * 1000 + j,
+                "sku": f"SKU-{i}-{j}",
+                "price": "10",
+                "manage_stock": "parent" if j else True,
+                "stock_quantity": j,
+                "stock_status": "instock",
+                "attributes": [{"id": 0, "name": "Size", "option": str(j)}],
+            }
+            for j in range(3 if i != 7 else 120)
+        ])
+    client.on("GET", "/products/9/variations", lambda params, body: (500, {"code": "error", "message": "Boom"}))
+    seen = []
+
+    result = await fetch_catalog_variations(client, concurrency=5, progress=seen.append)
+
+    assert result["products"] == 150
+    assert result["failed_products"] == 1
+    assert result["errors"][0]["product_id"] == 9
+    assert result["variations"] == 148 * 3 + 120
+    columns = result["columns"]
+    first = dict(zip(columns, result["rows"][0]))
+    assert first["product_id"] == 1 and first["sku"] == "SKU-1-0" and first["attributes"] == "Size: 0"
+    assert first["manage_stock"] is True
+    assert [row[0] for row in result["rows"]] == sorted(row[0] for row in result["rows"])
+    assert seen[-1]["done"] == 150
+    products_call = client.calls_to("GET", "/products")[0]
+    assert products_call[2]["type"] == "variable"
+
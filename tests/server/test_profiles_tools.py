@@ -0,0 +1,123 @@
+"""
+בדיקות לכלי פרופילי חנות
+"""
+
+import asyncio
+import json
+from collections import OrderedDict
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp import profiles
+from woocommerce_mcp.profiles import add_profile, load_profiles, resolve_store, set_active_profile
+from woocommerce_mcp.utils import WordPressError
+
+
+@pytest.fixture(autouse=True)
+def clean_profiles(monkeypatch):
+    """מבודד את מצב הפרופילים של המודול בין בדיקות."""
+    monkeypatch.setattr(profiles, "_PROFILES", {})
+    monkeypatch.setattr(profiles, "_ADHOC", OrderedDict())
+    monkeypatch.setattr(profiles, "_process_profile", None)
+    monkeypatch.delenv("WOOCOMMERCE_PROFILES", raising=False)
+    monkeypatch.delenv("WOOCOMMERCE_PROFILES_FILE", raising=False)
+
+
+@pytest.mark.anyio
+async def test_set_store_profile_tool(mcp_tool_client):
+    """בדיקה שהכלי set_store_profile רשום ועובד."""
+    result = await mcp_tool_client.call_tool("set_store_profile", {"profile": "main"})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_resolve_store_priority(monkeypatch):
+    """בדיקה של סדר העדיפויות: פרופיל, פרטים ישירים, פרופיל פעיל, ברירת מחדל."""
+    import woocommerce_mcp.server
+
+    monkeypatch.setattr(woocommerce_mcp.server, "DEFAULT_SITE_URL", "https://default.example.com/")
+    monkeypatch.setattr(woocommerce_mcp.server, "DEFAULT_CONSUMER_KEY", "default_key")
+    monkeypatch.setattr(woocommerce_mcp.server, "DEFAULT_CONSUMER_SECRET", "default_secret")
+    main = add_profile("main", "https://main.example.com", "main_key", "main_secret")
+    add_profile("other", "https://other.example.com", "other_key", "other_secret")
+
+    default = resolve_store()
+    assert default.site_url == "https://default.example.com"
+    assert resolve_store() is default
+
+    set_active_profile("main")
+    assert resolve_store() is main
+    assert resolve_store(profile="other").site_url == "https://other.example.com"
+
+    explicit = resolve_store(site_url="https://explicit.example.com")
+    assert explicit.credentials == ("https://explicit.example.com", "default_key", "default_secret")
+    assert resolve_store(site_url="https://explicit.example.com") is explicit
+
+
+def test_unknown_profile_raises():
+    """בדיקה שפרופיל לא מוכר מחזיר שגיאה ברורה."""
+    with pytest.raises(WordPressError):
+        resolve_store(profile="missing")
+    with pytest.raises(WordPressError):
+        set_active_profile("missing")
+
+
+def test_adhoc_profiles_are_bounded(monkeypatch):
+    """בדיקה שמספר הפרופילים הזמניים מוגבל."""
+    monkeypatch.setattr(profiles, "MAX_ADHOC_PROFILES", 2)
+
+    for i in range(5):
+        resolve_store(site_url=f"https://site{i}.example.com", consumer_key="k", consumer_secret="s")
+
+    assert len(profiles._ADHOC) == 2
+
+
+def test_load_profiles_from_env_and_file(tmp_path, monkeypatch):
+    """בדיקה שפרופילים נטענים מקובץ JSON וממשתנה סביבה."""
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({
+        "il": {"site_url": "https://il.example.com", "consumer_key": "k1", "consumer_secret": "s1"},
+    }))
+    monkeypatch.setenv("WOOCOMMERCE_PROFILES_FILE", str(path))
+    monkeypatch.setenv("WOOCOMMERCE_PROFILES", json.dumps({
+        "us": {"site_url": "https://us.example.com", "consumer_key": "k2", "consumer_secret": "s2"},
+    }))
+
+    assert load_profiles() == ["il", "us"]
+    assert resolve_store(profile="us").consumer_key == "k2"
+
+    monkeypatch.setenv("WOOCOMMERCE_PROFILES", json.dumps({"bad": {"site_url": "x"}}))
+    with pytest.raises(WordPressError):
+        load_profiles()
+
+
+@pytest.mark.anyio
+async def test_profile_client_is_reused(fake_store, fake_client):
+    """בדיקה שהלקוח של הפרופיל נוצר פעם אחת ולא נסגר בין קריאות."""
+    async with fake_store.client() as first:
+        pass
+    async with fake_store.client() as second:
+        pass
+
+    assert first is second is fake_client
+    assert not fake_client.is_closed
+
+
+@pytest.mark.anyio
+async def test_redefined_profile_closes_client_after_use(mcp_server, fake_client):
+    """בדיקה שהחלפת פרופיל לא סוגרת לקוח שקריאה אחרת עדיין משתמשת בו."""
+    old = add_profile("main", "https://main.example.com", "old_key", "old_secret")
+
+    async with old.client() as client:
+        await mcp_server.call_tool("set_store_profile", {
+            "profile": "main", "site_url": "https://main.example.com", "consumer_key": "new_key",
+            "consumer_secret": "new_secret",
+        })
+        await asyncio.sleep(0)
+        assert not client.is_closed
+        assert resolve_store(profile="main").consumer_key == "new_key"
+
+    assert client.is_closed
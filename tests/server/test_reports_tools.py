@@ -2,12 +2,16 @@
 בדיקות לכלי ניהול דוחות
 """
 
+import json
+
 import pytest
 from unittest.mock import patch, AsyncMock
 
 import mcp.types as types
 from mcp.types import TextContent
 
+from woocommerce_mcp.reports import aggregate_coupon_usage
+
 
 @pytest.mark.anyio
 async def test_get_sales_report_tool(mcp_tool_client, mock_wc_client, mock_sales_report, mock_http_response):
@@ -122,4 +126,69 @@ async def test_get_stock_report_tool(mcp_tool_client, mock_wc_client, mock_http_
     # בדיקת התוצאה - אנחנו בודקים רק שהכלי רשום ועובד
     assert result is not None
     assert len(result.content) == 1
-    assert isinstance(result.content[0], TextContent) 
\ No newline at end of file
+    assert isinstance(result.content[0], TextContent) 
+
+
+@pytest.mark.anyio
+async def test_coupon_usage_report_tool(mcp_tool_client):
+    """בדיקה שהכלי coupon_usage_report רשום ועובד."""
+    result = await mcp_tool_client.call_tool("coupon_usage_report", {"date_min": "2026-03-01"})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+COUPON_ORDERS = [
+    {"id": 1, "customer_id": 5, "date_created_gmt": "2026-03-01T10:00:00",
+     "coupon_lines": [{"code": "SPRING", "discount": "10.00", "discount_tax": "1.70"}]},
+    {"id": 2, "customer_id": 0, "billing": {"email": "guest@example.com"}, "date_created_gmt": "2026-03-01T23:30:00",
+     "coupon_lines": [{"code": "spring", "discount": "5.50", "discount_tax": "0"},
+                      {"code": "VIP", "discount": "20", "discount_tax": "0"}]},
+    {"id": 3, "customer_id": 5, "date_created_gmt": "2026-03-02T08:00:00",
+     "coupon_lines": [{"code": "spring", "discount": "4.50", "discount_tax": "0"}]},
+    {"id": 4, "customer_id": 6, "date_created_gmt": "2026-03-02T09:00:00", "coupon_lines": []},
+    {"id": 5, "customer_id": 7, "date_created_gmt": "2026-02-28T23:59:59",
+     "coupon_lines": [{"code": "spring", "discount": "99", "discount_tax": "0"}]},
+]
+
+
+def test_aggregate_coupon_usage_per_day():
+    """בדיקה שהסיכום היומי מקבץ קודים ללא תלות באותיות ומתעלם מהזמנות מחוץ לימים המבוקשים."""
+    days = {"2026-03-01": {}, "2026-03-02": {}}
+    assert aggregate_coupon_usage(COUPON_ORDERS, days) == 4
+
+    spring = days["2026-03-01"]["spring"]
+    assert spring["orders"] == {1, 2}
+    assert str(spring["discount"]) == "15.50"
+    assert spring["customers"] == {"5", "guest:guest@example.com"}
+    assert set(days["2026-03-02"]) == {"spring"}
+
+
+@pytest.mark.anyio
+async def test_coupon_usage_report_caches_days(mcp_server, fake_store, fake_client):
+    """בדיקה שהדוח מסכם את הטווח, ובקשה חופפת מושכת רק את הימים שחסרים במטמון."""
+    fake_client.add_collection("/orders", [dict(order) for order in COUPON_ORDERS])
+
+    result = await mcp_server.call_tool(
+        "coupon_usage_report", {"date_min": "2026-03-01", "date_max": "2026-03-01", "profile": "test"}
+    )
+    data = json.loads(result[0].text)
+    assert [row["code"] for row in data["coupons"]] == ["spring", "vip"]
+    assert data["coupons"][0] == {"code": "spring", "orders": 2, "discount": 15.5, "discount_tax": 1.7, "customers": 2}
+    params = fake_client.calls_to("GET", "/orders")[0][2]
+    assert params["_fields"] == "id,customer_id,billing,coupon_lines,date_created_gmt"
+    assert params["after"] == "2026-02-28T23:59:59"
+    assert params["before"] == "2026-03-02T00:00:00"
+
+    result = await mcp_server.call_tool(
+        "coupon_usage_report",
+        {"date_min": "2026-03-01", "date_max": "2026-03-02", "codes": ["SPRING", "NOPE"], "profile": "test"},
+    )
+    data = json.loads(result[0].text)
+    assert data["cached_days"] == 1
+    assert data["fetched_days"] == 1
+    assert data["coupons"] == [{"code": "spring", "orders": 3, "discount": 20.0, "discount_tax": 1.7, "customers": 2}]
+    assert data["unused"] == ["nope"]
+    assert fake_client.calls_to("GET", "/orders")[-1][2]["after"] == "2026-03-01T23:59:59"
+
@@ -0,0 +1,107 @@
+"""
+בדיקות לכלי תרגום שמות למזהים
+"""
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp import resolver
+from woocommerce_mcp.resolver import NameIndex, resolve_names, resolve_term_filters
+from woocommerce_mcp.utils import WordPressError
+
+TAGS = [
+    {"id": 1, "name": "Summer Sale", "slug": "summer-sale"},
+    {"id": 2, "name": "חדש", "slug": "new"},
+    {"id": 3, "name": "Sale", "slug": "sale"},
+    {"id": 4, "name": "Sale", "slug": "sale-2"},
+]
+
+
+@pytest.mark.anyio
+async def test_resolve_tags_tool(mcp_tool_client):
+    """בדיקה שהכלי resolve_tags רשום ועובד."""
+    result = await mcp_tool_client.call_tool("resolve_tags", {"names": ["summer-sale"]})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_name_index_lookup():
+    """בדיקה שחיפוש לפי slug, שם ומזהה עובד, ושם כפול מחזיר כמה מזהים."""
+    index = NameIndex(TAGS)
+
+    assert index.lookup("summer-sale") == [1]
+    assert index.lookup("SUMMER SALE ") == [1]
+    assert index.lookup("חדש") == [2]
+    assert index.lookup("sale") == [3]
+    assert index.lookup("Sale-2") == [4]
+    assert index.lookup(2) == [2]
+    assert index.lookup("99") == []
+
+
+def test_name_index_numeric_names():
+    """בדיקה שמחרוזת ספרות נחפשת קודם כשם, נופלת למזהה, ומדווחת כעמומה כשהיא מתאימה לשניהם."""
+    index = NameIndex(TAGS + [{"id": 57, "name": "2024", "slug": "2024"}, {"id": 60, "name": "3", "slug": "three"}])
+
+    assert index.lookup("2024") == [57]
+    assert index.lookup(2024) == []
+    assert index.lookup("2") == [2]
+    assert index.lookup("3") == [60, 3]
+    assert index.lookup(3) == [3]
+
+
+@pytest.mark.anyio
+async def test_resolve_names_uses_cache_and_refreshes_on_miss(fake_store, fake_client, monkeypatch):
+    """בדיקה שהאינדקס נשמר בין קריאות ונבנה מחדש כששם לא נמצא."""
+    fake_client.add_collection("/products/tags", list(TAGS))
+
+    async with fake_store.client() as client:
+        first = await resolve_names(fake_store, client, "tags", ["summer-sale", "חדש", "missing"])
+        await resolve_names(fake_store, client, "tags", ["new"])
+
+        assert first["resolved"] == {"summer-sale": 1, "חדש": 2}
+        assert first["missing"] == ["missing"]
+        assert len(fake_client.calls_to("GET", "/products/tags")) == 1
+
+        fake_client.collections["/products/tags"].append({"id": 5, "name": "Missing", "slug": "missing"})
+        monkeypatch.setattr(resolver, "MISS_REFRESH_INTERVAL", -1)
+        second = await resolve_names(fake_store, client, "tags", ["missing", "Sale Two"])
+
+        assert second["resolved"] == {"missing": 5}
+        assert len(fake_client.calls_to("GET", "/products/tags")) == 2
+
+
+@pytest.mark.anyio
+async def test_resolve_term_filters(fake_store, fake_client):
+    """בדיקה שמסנני category ו-tag מתורגמים, ושם לא מוכר מחזיר שגיאה."""
+    fake_client.add_collection("/products/tags", list(TAGS))
+    fake_client.add_collection("/products/categories", [{"id": 9, "name": "ביגוד", "slug": "clothing"}])
+
+    async with fake_store.client() as client:
+        filters = await resolve_term_filters(fake_store, client, {"category": "clothing", "tag": "summer-sale,2"})
+        unchanged = await resolve_term_filters(fake_store, client, {"category": "9", "status": "publish"})
+
+        assert filters == {"category": "9", "tag": "1,2"}
+        assert unchanged == {"category": "9", "status": "publish"}
+        with pytest.raises(WordPressError):
+            await resolve_term_filters(fake_store, client, {"tag": "nothing-like-this"})
+
+
+@pytest.mark.anyio
+async def test_tag_mutation_invalidates_index(mcp_server, fake_store, fake_client):
+    """בדיקה שיצירת תגית דרך הכלי מנקה את האינדקס, והכלי resolve_attribute_terms מתרגם את המאפיין."""
+    fake_client.add_collection("/products/tags", list(TAGS))
+    fake_client.add_collection("/products/attributes", [{"id": 7, "name": "Color", "slug": "pa_color"}])
+    fake_client.add_collection("/products/attributes/7/terms", [{"id": 70, "name": "Red", "slug": "red"}])
+    fake_client.on("POST", "/products/tags", lambda params, body: {"id": 6, "slug": "fresh", **body})
+
+    await mcp_server.call_tool("resolve_tags", {"names": ["new"], "profile": "test"})
+    await mcp_server.call_tool("create_product_tag", {"tag_data": {"name": "Fresh"}, "profile": "test"})
+    await mcp_server.call_tool("resolve_tags", {"names": ["fresh"], "profile": "test"})
+    result = await mcp_server.call_tool(
+        "resolve_attribute_terms", {"attribute": "Color", "names": ["red"], "profile": "test"}
+    )
+
+    assert len(fake_client.calls_to("GET", "/products/tags")) == 2
+    assert '"red": 70' in result[0].text
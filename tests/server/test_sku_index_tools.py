@@ -0,0 +1,151 @@
+"""
+בדיקות לכלי אינדקס ה-SKU
+"""
+
+import json
+
+import pytest
+from mcp.types import TextContent
+
+from woocommerce_mcp import sku_index
+from woocommerce_mcp.sku_index import SkuIndex, find_skus
+
+PRODUCTS = [
+    {"id": 1, "name": "חולצה", "sku": "TS-001", "type": "variable", "date_modified_gmt": "2026-01-01T10:00:00"},
+    {"id": 2, "name": "כובע", "sku": "CAP-2", "type": "simple", "date_modified_gmt": "2026-01-02T10:00:00"},
+    {"id": 3, "name": "ללא SKU", "sku": "", "type": "simple", "date_modified_gmt": "2026-01-03T10:00:00"},
+]
+
+VARIATIONS = [
+    {"id": 11, "sku": "TS-001-S"},
+    {"id": 12, "sku": "TS-001-M"},
+]
+
+
+@pytest.fixture
+def catalog(fake_client):
+    fake_client.add_collection("/products", [dict(product) for product in PRODUCTS])
+    fake_client.add_collection("/products/1/variations", [dict(variation) for variation in VARIATIONS])
+    return fake_client
+
+
+@pytest.mark.anyio
+async def test_lookup_skus_tool(mcp_tool_client):
+    """בדיקה שהכלי lookup_skus רשום ועובד."""
+    result = await mcp_tool_client.call_tool("lookup_skus", {"skus": ["TS-001"]})
+
+    assert result is not None
+    assert len(result.content) == 1
+    assert isinstance(result.content[0], TextContent)
+
+
+def test_sku_change_replaces_entry():
+    """בדיקה ששינוי SKU של פריט מסיר את ה-SKU הקודם, והשוואה לא תלויה באותיות."""
+    index = SkuIndex()
+    index.set_product({"id": 2, "sku": "CAP-2", "type": "simple"})
+    index.set_product({"id": 2, "sku": "CAP-NEW", "type": "simple"})
+
+    assert index.lookup("CAP-2") is None
+    assert index.lookup(" cap-new ")["product_id"] == 2
+    assert len(index) == 1
+
+
+def test_replace_variations_and_remove_products():
+    """בדיקה שהחלפת וריאציות ומחיקת מוצר מסירות רק את המפתחות של אותו מוצר."""
+    index = SkuIndex()
+    index.set_product({"id": 1, "sku": "TS", "type": "variable"})
+    index.set_variations(1, "חולצה", [{"id": 11, "sku": "TS-S"}, {"id": 12, "sku": "TS-M"}])
+    index.set_product({"id": 2, "sku": "CAP", "type": "simple"})
+
+    index.set_variations(1, "חולצה", [{"id": 12, "sku": "TS-M"}, {"id": 13, "sku": "TS-L"}])
+    assert index.lookup("TS-S") is None
+    assert index.lookup("TS-L")["variation_id"] == 13
+    assert index.lookup("TS")["product_id"] == 1
+
+    index.remove_products([1])
+    assert sorted(index.entries) == ["cap"]
+    assert index.product_ids == {2}
+
+
+def test_products_swapping_skus():
+    """בדיקה ששני מוצרים שהחליפו SKU ביניהם נשארים שניהם באינדקס."""
+    index = SkuIndex()
+    index.set_product({"id": 1, "sku": "X", "type": "simple"})
+    index.set_product({"id": 2, "sku": "Y", "type": "simple"})
+
+    index.set_product({"id": 1, "sku": "Y", "type": "simple"})
+    index.set_product({"id": 2, "sku": "X", "type": "simple"})
+
+    assert index.lookup("Y")["product_id"] == 1
+    assert index.lookup("X")["product_id"] == 2
+
+    index.remove_products([1])
+    assert index.lookup("X")["product_id"] == 2
+
+
+@pytest.mark.anyio
+async def test_find_skus_products_and_variations(fake_store, catalog):
+    """בדיקה שמוצרים ווריאציות נמצאים, וקריאה שנייה לא פונה ל-API."""
+    async with fake_store.client() as client:
+        result = await find_skus(fake_store, client, ["ts-001-m", "CAP-2", "TS-001", "nope"])
+        await find_skus(fake_store, client, ["CAP-2"])
+
+    assert result["found"]["ts-001-m"] == {
+        "sku": "TS-001-M", "product_id": 1, "variation_id": 12, "name": "חולצה", "type": "variation",
+    }
+    assert result["found"]["CAP-2"]["variation_id"] is None
+    assert result["found"]["TS-001"]["type"] == "variable"
+    assert result["missing"] == ["nope"]
+    assert len(catalog.calls_to("GET", "/products")) == 1
+    assert len(catalog.calls_to("GET", "/products/1/variations")) == 1
+
+
+@pytest.mark.anyio
+async def test_incremental_refresh_and_dirty_products(fake_store, catalog, monkeypatch):
+    """בדיקה שרענון הדרגתי משתמש ב-modified_after, ומוצר שסומן ונמחק מוסר מהאינדקס."""
+    async with fake_store.client() as client:
+        await find_skus(fake_store, client, ["CAP-2"])
+
+        catalog.collections["/products/1/variations"].append({"id": 13, "sku": "TS-001-L"})
+        sku_index.mark_sku_dirty(fake_store, 1)
+        catalog.collections["/products"] = [PRODUCTS[0]]
+        sku_index.mark_sku_dirty(fake_store, 2)
+        monkeypatch.setattr(sku_index, "SKU_MISS_REFRESH_INTERVAL", 3600)
+        result = await find_skus(fake_store, client, ["TS-001-L", "CAP-2"])
+
+    incremental = catalog.calls_to("GET", "/products")[1][2]
+    assert incremental["modified_after"] == "2026-01-03T10:00:00"
+    assert result["found"]["TS-001-L"]["variation_id"] == 13
+    assert result["missing"] == ["CAP-2"]
+
+
+@pytest.mark.anyio
+async def test_periodic_full_refresh(fake_store, catalog, monkeypatch):
+    """בדיקה שאחרי SKU_FULL_REFRESH_INTERVAL האינדקס נבנה מחדש, וקולט SKU של וריאציה ששונה מחוץ לשרת."""
+    async with fake_store.client() as client:
+        await find_skus(fake_store, client, ["TS-001-S"])
+        catalog.collections["/products/1/variations"][0]["sku"] = "TS-001-XS"
+
+        monkeypatch.setattr(sku_index, "SKU_FULL_REFRESH_INTERVAL", -1)
+        result = await find_skus(fake_store, client, ["TS-001-XS"])
+
+    assert "modified_after" not in catalog.calls_to("GET", "/products")[1][2]
+    assert result["found"]["TS-001-XS"]["variation_id"] == 11
+
+
+@pytest.mark.anyio
+async def test_variation_tool_marks_index_dirty(mcp_server, fake_store, catalog):
+    """בדיקה שעדכון וריאציה דרך הכלי גורם למשיכה מחדש של הוריאציות בחיפוש הבא."""
+    catalog.on("PUT", "/products/1/variations/11", lambda params, body: {"id": 11, **body})
+
+    await mcp_server.call_tool("lookup_skus", {"skus": ["TS-001-S"], "profile": "test"})
+    catalog.collections["/products/1/variations"][0]["sku"] = "TS-001-XS"
+    await mcp_server.call_tool(
+        "update_product_variation",
+        {"product_id": 1, "variation_id": 11, "variation_data": {"sku": "TS-001-XS"}, "profile": "test"},
+    )
+    result = await mcp_server.call_tool("lookup_skus", {"skus": ["TS-001-XS", "TS-001-S"], "profile": "test"})
+    data = json.loads(result[0].text)
+
+    assert data["found"]["TS-001-XS"]["variation_id"] == 11
+    assert data["missing"] == ["TS-001-S"]
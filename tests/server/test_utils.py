@@ -10,8 +10,11 @@ from woocommerce_mcp.utils import (
     WordPressError,
     create_wp_client,
     create_wc_client,
-    handle_response_error
+    handle_response_error,
+    apply_batch,
+    RateLimiter,
 )
+from tests.mocks.wc_api import FakeWCClient
 
 
 @pytest.mark.anyio
@@ -139,4 +142,47 @@ def test_handle_response_error_failure_no_json():
         handle_response_error(response, "Test error message")
     
     # בדיקת פרטי השגיאה
-    assert "Test error message: 500" in str(exc_info.value) 
\ No newline at end of file
+    assert "Test error message: 500" in str(exc_info.value) 
+
+
+@pytest.mark.anyio
+async def test_apply_batch_chunks_and_reports_errors():
+    """בדיקה שפעולות batch מחולקות לחלקים של עד 100 ושגיאות פריטים נספרות."""
+    def echo(params, body):
+        return {
+            "create": [{"id": i} for i, _ in enumerate(body.get("create", []), start=1)],
+            "delete": [
+                {"id": item_id, "error": {"code": "invalid", "message": "Invalid ID"}} if item_id < 0 else {"id": item_id}
+                for item_id in body.get("delete", [])
+            ],
+        }
+
+    client = FakeWCClient()
+    client.on("POST", "/products/batch", echo)
+
+    result = await apply_batch(client, "/products", create=[{"name": str(i)} for i in range(150)], delete=[1, -1])
+
+    assert len(client.calls_to("POST", "/products/batch")) == 2
+    assert result["created"] == 150
+    assert result["deleted"] == 1
+    assert result["failed"] == 1
+    assert result["errors"][0]["id"] == -1
+
+
+@pytest.mark.anyio
+async def test_rate_limiter_spaces_calls(monkeypatch):
+    """בדיקה שמגביל הקצב מרווח בין פעולות לפי הקצב, ושקצב 0 לא ממתין."""
+    import asyncio
+
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(round(delay, 1))
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    limiter = RateLimiter(2.0)
+    for _ in range(3):
+        await limiter.wait()
+    await RateLimiter(0).wait()
+
+    assert delays == [0.5, 1.0]